@@ -0,0 +1,370 @@
+"""Local fake of the Azure OpenAI chat completions API for benchmarks.
+
+Serves POST /openai/deployments/{deployment}/chat/completions like Azure does:
+    - requests with tools answer with a call to the requested tool, with arguments
+      generated from its JSON schema
+    - requests with a json_schema response format answer with JSON generated from the schema
+    - schema arrays whose items have a property tagged in the prompt as name="value"
+      (e.g. <NOTICE id_universo="123">) get one item per tagged value, like a model
+      answering about every item it was given
+    - other requests answer in the "Thought: ... Final Answer: ..." format crewai agents expect
+    - stream=true answers with server-sent events
+
+Latency, errors and rate limits are configurable, so the pipelines can be measured
+without calling Azure:
+
+    python -m benchmarks.fake_azure_openai --port 8089 --latency lognormal:1.5:0.5 --error-rate 0.01 --rpm 600
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+TAGGED_VALUE_PATTERN = re.compile(r'(\w+)="([^"]+)"')
+
+FILLER_WORDS = (
+    "prazo execução estação tratamento esgoto vazão contrato medição pagamento garantia "
+    "habilitação atestado capacidade técnica proposta edital licitação equipamento obra"
+).split()
+
+
+class LatencyDistribution:
+    """Response latency in seconds, parsed from "fixed:S", "uniform:MIN:MAX" or "lognormal:MEDIAN:SIGMA"."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(param) for param in params]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Invalid latency distribution '{spec}'")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        return median * rng.lognormvariate(0, sigma)
+
+
+def fake_from_schema(
+    schema: Dict[str, Any],
+    rng: random.Random,
+    max_items: int = 3,
+    keys: Optional[Dict[str, List[str]]] = None,
+) -> Any:
+    """Generate a value that validates against a (subset of) JSON schema.
+
+    Arrays whose items have a property listed in keys get one item per key value.
+    """
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "string")
+    if schema_type == "object":
+        return {
+            key: fake_from_schema(property_schema, rng, max_items, keys)
+            for key, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        item_schema = schema.get("items", {})
+        properties = item_schema.get("properties", {})
+        key = next((name for name in properties if name in (keys or {})), None)
+        if key:
+            items = []
+            integer_key = properties[key].get("type") == "integer"
+            for value in keys[key]:
+                if integer_key and not value.isdigit():
+                    # e.g. a placeholder in the instructions
+                    continue
+                item = fake_from_schema(item_schema, rng, max_items, keys)
+                item[key] = int(value) if integer_key else value
+                items.append(item)
+            return items
+        item_count = rng.randint(schema.get("minItems", 0), max(schema.get("minItems", 0), max_items))
+        return [fake_from_schema(item_schema, rng, max_items, keys) for _ in range(item_count)]
+    if schema_type == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if schema_type == "number":
+        return rng.uniform(schema.get("minimum", 0), schema.get("maximum", 100))
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    return " ".join(rng.choices(FILLER_WORDS, k=rng.randint(3, 12))).capitalize()
+
+
+def _count_tokens(text: str) -> int:
+    # Close enough for usage reports; the benchmark doesn't need tiktoken precision
+    return max(1, len(text) // 4)
+
+
+class FakeAzureOpenAI:
+    """aiohttp application emulating Azure OpenAI chat completions."""
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        requests_per_minute: int = 0,
+        tokens_per_second: float = 0.0,
+        max_items: int = 3,
+        omission_rate: float = 0.0,
+        seed: int = 42,
+    ):
+        """Initialize the fake backend.
+
+        Args:
+            latency: Time to first token distribution, e.g. "lognormal:1.5:0.5"
+            error_rate: Share of requests answered with HTTP 500
+            requests_per_minute: Answer with HTTP 429 and Retry-After beyond this rate (0 = unlimited)
+            tokens_per_second: Completion generation speed added to the latency (0 = instant)
+            max_items: Maximum number of items generated for schema arrays
+            omission_rate: Share of tagged items left out of keyed arrays
+            seed: Random seed
+        """
+        self.latency = LatencyDistribution(latency)
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_second = tokens_per_second
+        self.max_items = max_items
+        self.omission_rate = omission_rate
+        self.rng = random.Random(seed)
+        self._request_times: Deque[float] = deque()
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/openai/deployments/{deployment}/chat/completions", self.chat_completions)
+        return app
+
+    def _retry_after(self) -> Optional[float]:
+        """Seconds until the next request fits in the RPM quota, or None if it fits now."""
+        if not self.requests_per_minute:
+            return None
+        now = time.time()
+        while self._request_times and self._request_times[0] <= now - 60:
+            self._request_times.popleft()
+        if len(self._request_times) >= self.requests_per_minute:
+            return self._request_times[0] + 60 - now
+        self._request_times.append(now)
+        return None
+
+    def _keys(self, body: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Values tagged as name="value" in the prompt, by name, less the omitted ones."""
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        keys: Dict[str, List[str]] = {}
+        for name, value in TAGGED_VALUE_PATTERN.findall(prompt):
+            if value not in keys.setdefault(name, []) and self.rng.random() >= self.omission_rate:
+                keys[name].append(value)
+        return keys
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the assistant message for a request."""
+        tools = body.get("tools")
+        keys = self._keys(body)
+        response_format = body.get("response_format") or {}
+        if tools:
+            tool_choice = body.get("tool_choice")
+            tool_name = (
+                tool_choice["function"]["name"]
+                if isinstance(tool_choice, dict)
+                else tools[0]["function"]["name"]
+            )
+            tool = next(tool for tool in tools if tool["function"]["name"] == tool_name)
+            arguments = json.dumps(
+                fake_from_schema(tool["function"].get("parameters", {}), self.rng, self.max_items, keys),
+                ensure_ascii=False,
+            )
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{self.rng.getrandbits(48):x}",
+                        "type": "function",
+                        "function": {"name": tool_name, "arguments": arguments},
+                    }
+                ],
+            }
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            content = json.dumps(fake_from_schema(schema, self.rng, self.max_items, keys), ensure_ascii=False)
+        elif response_format.get("type") == "json_object":
+            content = "{}"
+        else:
+            paragraphs = [
+                " ".join(self.rng.choices(FILLER_WORDS, k=40)).capitalize() + "."
+                for _ in range(self.max_items * 2)
+            ]
+            content = (
+                "Thought: I now can give a great answer\nFinal Answer: # Relatório\n\n"
+                + "\n\n".join(paragraphs)
+            )
+        return {"role": "assistant", "content": content}
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["requests"] += 1
+
+        retry_after = self._retry_after()
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                status=429,
+                headers={"Retry-After": str(max(1, round(retry_after)))},
+            )
+
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response(
+                {"error": {"code": "500", "message": "The server had an error while processing your request."}},
+                status=500,
+            )
+
+        message = self._completion(body)
+        prompt_tokens = sum(_count_tokens(str(m.get("content") or "")) for m in body.get("messages", []))
+        completion_text = message["content"] or message["tool_calls"][0]["function"]["arguments"]
+        completion_tokens = _count_tokens(completion_text)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        if self.tokens_per_second:
+            await asyncio.sleep(completion_tokens / self.tokens_per_second)
+
+        model = request.match_info["deployment"]
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            return await self._stream(request, model, message["content"] or "", usage)
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{self.rng.getrandbits(48):x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+        )
+
+    async def _stream(self, request: web.Request, model: str, content: str, usage: Dict[str, int]) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words: List[str] = content.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-stream",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}
+                ],
+            }
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+        final_chunk = {
+            "id": "chatcmpl-stream",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+        await response.write(f"data: {json.dumps(final_chunk)}\n\ndata: [DONE]\n\n".encode())
+        await response.write_eof()
+        return response
+
+
+class FakeAzureOpenAIServer:
+    """Runs FakeAzureOpenAI on a background thread with its own event loop."""
+
+    def __init__(self, backend: FakeAzureOpenAI, host: str = "127.0.0.1", port: int = 0):
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeAzureOpenAIServer":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(self.backend.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the port when an ephemeral one (0) was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "FakeAzureOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def azure_environment(endpoint: str) -> Dict[str, str]:
+    """Environment variables pointing langchain and litellm at the fake backend."""
+    return {
+        "AZURE_OPENAI_ENDPOINT": endpoint,
+        "AZURE_OPENAI_API_KEY": "fake-key",
+        "OPENAI_API_VERSION": "2024-08-01-preview",
+        "AZURE_API_BASE": endpoint,
+        "AZURE_API_KEY": "fake-key",
+        "AZURE_API_VERSION": "2024-08-01-preview",
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0", help='e.g. "fixed:0.5", "uniform:0.5:3", "lognormal:1.5:0.5"')
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before answering 429")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    backend = FakeAzureOpenAI(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        tokens_per_second=args.tokens_per_second,
+    )
+    print("Point the app at the fake backend with:")
+    for key, value in azure_environment(f"http://{args.host}:{args.port}").items():
+        print(f"  export {key}={value}")
+    web.run_app(backend.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
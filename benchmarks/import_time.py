@@ -0,0 +1,125 @@
+"""Cold-start and per-rerun overhead of the Streamlit pages and core modules.
+
+Every measurement runs in a fresh Python process:
+    - modules: time to import each module cold
+    - pages: time of the first script run of each page (cold start, including its imports)
+      and the median time of the following reruns, using streamlit.testing.v1.AppTest
+
+Usage:
+    python -m benchmarks.import_time --repeat 5 -o import_time.json
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import statistics
+import subprocess
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "src.tender_analysis_crew.utils",
+    "src.tender_analysis_crew.crew",
+    "src.tender_notice_labeling.tender_notice_processor",
+    "src.background_jobs.job_handlers",
+]
+
+MODULE_SCRIPT = """
+import time, importlib
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+PAGE_SCRIPT = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({page!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+cold = time.perf_counter() - start
+reruns = []
+for _ in range({reruns}):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{"cold": cold, "reruns": reruns, "exception": bool(app.exception)}}))
+"""
+
+
+def _run(script: str) -> str:
+    environment = {**os.environ, "PYTHONPATH": ROOT, "OTEL_SDK_DISABLED": "true"}
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def measure_module(module: str, repeat: int) -> Dict[str, Any]:
+    """Median cold import time of a module over fresh processes."""
+    times = [float(_run(MODULE_SCRIPT.format(module=module))) for _ in range(repeat)]
+    return {"module": module, "cold_import_s": statistics.median(times), "samples": times}
+
+
+def measure_page(page: str, repeat: int, reruns: int) -> Dict[str, Any]:
+    """Median cold start and rerun time of a page over fresh processes."""
+    runs = [json.loads(_run(PAGE_SCRIPT.format(page=page, reruns=reruns))) for _ in range(repeat)]
+    return {
+        "page": os.path.relpath(page, ROOT),
+        "cold_start_s": statistics.median(run["cold"] for run in runs),
+        "rerun_s": statistics.median(rerun for run in runs for rerun in run["reruns"]),
+        "exception": any(run["exception"] for run in runs),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--reruns", type=int, default=5, help="Reruns per page after the cold start")
+    parser.add_argument("--modules", nargs="*", default=MODULES)
+    parser.add_argument(
+        "--pages",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")) + glob.glob(os.path.join(ROOT, "🏠_Início.py"))),
+    )
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, List[Dict[str, Any]]] = {"modules": [], "pages": []}
+    print(f"{'module':<55} | {'cold import s':>13}")
+    for module in args.modules:
+        try:
+            result = measure_module(module, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"{module:<55} | {'not found':>13}")
+            continue
+        results["modules"].append(result)
+        print(f"{module:<55} | {result['cold_import_s']:>13.3f}", flush=True)
+
+    print(f"\n{'page':<55} | {'cold start s':>12} | {'rerun s':>8}")
+    for page in args.pages:
+        if os.path.basename(page) == "__init__.py":
+            continue
+        result = measure_page(page, args.repeat, args.reruns)
+        results["pages"].append(result)
+        print(
+            f"{result['page']:<55} | {result['cold_start_s']:>12.3f} | {result['rerun_s']:>8.3f}"
+            + (" (page raised)" if result["exception"] else ""),
+            flush=True,
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
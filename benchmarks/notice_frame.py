@@ -0,0 +1,120 @@
+"""Memory and speed of the typed notice frame against the previous object-dtype frame.
+
+Builds frames of synthetic labeled notices (benchmarks.synthetic_tender) both ways: the
+previous pd.DataFrame of dicts with display labels, sorted by label priority and the
+opening date text, and notice_frame.to_notice_frame. Reports memory per notice and the time
+to build, sort, filter (state and label) and export (CSV) each frame.
+
+Usage:
+    python -m benchmarks.notice_frame --notices 1000 10000 100000 -o frame_results.json
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic_tender import generate_tender_notices
+
+
+def object_frame(notices: List[Dict[str, Any]]) -> pd.DataFrame:
+    """The frame TenderNoticeProcessor._to_dataframe built before typed frames."""
+    from src.tender_notice_labeling.label_store import DISPLAY_LABELS
+
+    df = pd.DataFrame(notices)
+    df["label"] = df["label"].map(lambda label: DISPLAY_LABELS.get(label, DISPLAY_LABELS["unsure"]))
+    return sort_object_frame(df)
+
+
+def sort_object_frame(df: pd.DataFrame) -> pd.DataFrame:
+    priority = {"✅ Participar": 0, "🤔 Avaliar": 1, "❌ Declinar": 2, "🤷‍♂️ Info insuficiente": 3}
+    df = df.assign(label_priority=df["label"].map(priority))
+    df = df.sort_values(["label_priority", "data_hora_licitacao"], na_position="last")
+    return df.drop("label_priority", axis=1)
+
+
+def typed_frame(notices: List[Dict[str, Any]]) -> pd.DataFrame:
+    from src.tender_notice_labeling.notice_frame import TenderNotice, to_notice_frame
+
+    return to_notice_frame(TenderNotice.from_dict(notice) for notice in notices)
+
+
+def timed(function: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run_case(notice_count: int, seed: int) -> List[Dict[str, Any]]:
+    """Build, sort, filter and export notice_count notices with both frames."""
+    from src.tender_notice_labeling.label_store import DISPLAY_LABELS
+    from src.tender_notice_labeling.notice_frame import sort_notices
+
+    rng = random.Random(seed)
+    notices = generate_tender_notices(notice_count, seed=seed)
+    for notice in notices:
+        notice["label"] = rng.choice(["yes", "no", "no", "no", "unsure", "insufficient_info"])
+        notice["label_source"] = rng.choice(["llm", "rule", "store"])
+        notice["source_file"] = f"boletim_{rng.randint(1, 20)}.pdf"
+
+    results = []
+    for name, build, sort in (
+        ("object", object_frame, sort_object_frame),
+        ("typed", typed_frame, sort_notices),
+    ):
+        build_time = timed(lambda: build(notices))
+        df = build(notices)
+        results.append(
+            {
+                "frame": name,
+                "notices": notice_count,
+                "bytes_per_notice": df.memory_usage(deep=True).sum() / notice_count,
+                "build_time": build_time,
+                "sort_time": timed(lambda: sort(df.sample(frac=1, random_state=seed))),
+                "filter_time": timed(
+                    lambda: df[(df["estado"] == "SP") & (df["label"] == DISPLAY_LABELS["yes"])]
+                ),
+                "csv_time": timed(lambda: df.to_csv(io.StringIO(), index=False, sep=";")),
+            }
+        )
+    return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render results as a text table."""
+    lines = [
+        f"{'notices':>7} | {'frame':<6} | {'bytes/notice':>12} | {'build ms':>8} | {'sort ms':>8} | "
+        f"{'filter ms':>9} | {'csv ms':>8}",
+        "-" * 79,
+    ]
+    for result in results:
+        lines.append(
+            f"{result['notices']:>7} | {result['frame']:<6} | {result['bytes_per_notice']:>12.0f} | "
+            f"{result['build_time'] * 1000:>8.1f} | {result['sort_time'] * 1000:>8.1f} | "
+            f"{result['filter_time'] * 1000:>9.2f} | {result['csv_time'] * 1000:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notices", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = [result for notice_count in args.notices for result in run_case(notice_count, args.seed)]
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
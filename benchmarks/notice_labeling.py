@@ -0,0 +1,118 @@
+"""Latency and token cost of bulletin notice labeling per labeling batch size.
+
+Labels synthetic notices with TenderNoticeProcessor against the local fake Azure OpenAI
+backend (benchmarks.fake_azure_openai), once per labeling batch size K (notices per LLM
+request, 1 = one request per notice). Notices missing from batched responses
+(--omission-rate) fall back to single requests, as in production.
+
+Usage:
+    python -m benchmarks.notice_labeling --notices 200 --batch-size 1 5 10 20 \\
+        --latency lognormal:1:0.4 -o labeling_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_azure_openai import FakeAzureOpenAI, FakeAzureOpenAIServer, azure_environment
+from benchmarks.synthetic_tender import generate_tender_notices
+
+
+def run_case(notice_count: int, labeling_batch_size: int, max_concurrent_chunks: int, backend: FakeAzureOpenAI) -> Dict[str, Any]:
+    """Label notice_count notices with the given labeling batch size."""
+    from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+    from src.tender_notice_labeling.tender_notice_templates import (
+        COMPANY_BUSINESS_DESCRIPTION,
+        TENDER_NOTICE_LABELING_TEMPLATE,
+    )
+
+    # A processor batch holds at least one labeling request
+    processor = TenderNoticeProcessor(
+        batch_size=max(labeling_batch_size, int(os.getenv("TENDER_NOTICE_PROCESSOR_BATCH_SIZE", 10))),
+        labeling_batch_size=labeling_batch_size,
+    )
+    notices = generate_tender_notices(notice_count)
+    stats_before = dict(backend.stats)
+
+    start = time.perf_counter()
+    asyncio.run(
+        processor._label_tenders(
+            notices,
+            TENDER_NOTICE_LABELING_TEMPLATE,
+            COMPANY_BUSINESS_DESCRIPTION,
+            max_concurrent_chunks=max_concurrent_chunks,
+        )
+    )
+    wall_time = time.perf_counter() - start
+
+    stats = {key: backend.stats[key] - stats_before[key] for key in backend.stats}
+    return {
+        "notices": notice_count,
+        "labeling_batch_size": labeling_batch_size,
+        "wall_time": wall_time,
+        "seconds_per_notice": wall_time / notice_count,
+        "requests": stats["requests"],
+        "prompt_tokens_per_notice": stats["prompt_tokens"] / notice_count,
+        "completion_tokens_per_notice": stats["completion_tokens"] / notice_count,
+        "unlabeled": sum(1 for notice in notices if not notice.get("label")),
+        "backend": stats,
+    }
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render results as a text table."""
+    lines = [
+        f"{'notices':>7} | {'K':>3} | {'wall s':>7} | {'requests':>8} | {'prompt tok/notice':>17} | "
+        f"{'compl. tok/notice':>17} | {'unlabeled':>9}",
+        "-" * 86,
+    ]
+    for result in results:
+        lines.append(
+            f"{result['notices']:>7} | {result['labeling_batch_size']:>3} | {result['wall_time']:>7.2f} | "
+            f"{result['requests']:>8} | {result['prompt_tokens_per_notice']:>17.1f} | "
+            f"{result['completion_tokens_per_notice']:>17.1f} | {result['unlabeled']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notices", type=int, nargs="+", default=[200])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 5, 10, 20], help="Notices per request (K)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Processor batches labeled at once")
+    parser.add_argument("--latency", default="lognormal:1:0.4", help="Fake backend latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake completion speed (0 = instant)")
+    parser.add_argument("--omission-rate", type=float, default=0.0, help="Share of notices missing from batched answers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    # Every case must label all of its notices
+    os.environ["TENDER_NOTICE_LABEL_STORE_ENABLED"] = "false"
+    backend = FakeAzureOpenAI(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        omission_rate=args.omission_rate,
+        seed=args.seed,
+    )
+    results = []
+    with FakeAzureOpenAIServer(backend) as server:
+        os.environ.update(azure_environment(server.endpoint))
+        for notice_count in args.notices:
+            for labeling_batch_size in args.batch_size:
+                results.append(run_case(notice_count, labeling_batch_size, args.concurrency, backend))
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
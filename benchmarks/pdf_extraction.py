@@ -0,0 +1,179 @@
+"""Speed and text fidelity of the PDF text extraction backends (src.pdf_text).
+
+Renders a synthetic bulletin and a synthetic tender document to PDF with reportlab, then
+extracts them with every available backend, in-process and on the process pool. Real
+samples can be added with --pdf.
+
+Fidelity is the word-level F1 against the text drawn into the synthetic PDFs, or against
+the --reference backend for real samples. "segments" is the number of notices
+segment_bulletin finds in the extracted text, which is what bulletin processing depends on.
+
+Usage:
+    python -m benchmarks.pdf_extraction --bulletin-notices 300 --tender-pages 200 \\
+        --workers 1 4 --pdf boletim.pdf edital.pdf -o extraction_results.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import textwrap
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic_tender import generate_tender_notices, generate_tender_text
+
+LINES_PER_PAGE = 60
+
+
+def _render_pdf(pages: List[List[str]], path: str) -> None:
+    """Draw each page's lines onto an A4 page."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for lines in pages:
+        text = pdf.beginText(40, A4[1] - 40)
+        text.setFont("Helvetica", 9)
+        for line in lines:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def _paginate(lines: List[str]) -> List[List[str]]:
+    return [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def bulletin_sample(notice_count: int, path: str) -> str:
+    """Render a bulletin of notice_count notices and return the text drawn."""
+    lines = ["Boletim de Licitações - Licita.AI", ""]
+    for notice in generate_tender_notices(notice_count):
+        lines.extend(
+            [
+                f"{notice['orgao']} - {notice['estado']} {notice['num_seq_boletim']}",
+                f"Licitação nº {notice['numero_licitacao']} - Abertura: {notice['data_hora_licitacao']}",
+                *textwrap.wrap(f"Objeto: {notice['objeto']}", 100),
+                f"ID Universo: {notice['id_universo']} - Alterado em {notice['data_hora_alteracao']}",
+                "",
+            ]
+        )
+    _render_pdf(_paginate(lines), path)
+    return "\n".join(lines)
+
+
+def tender_sample(page_count: int, path: str) -> str:
+    """Render a tender document of page_count synthetic pages and return the text drawn."""
+    pages = []
+    for page_text in re.split(r"\n(?=[^\n]+ - Pág\.\d+\n)", generate_tender_text(page_count)):
+        lines = [wrapped for line in page_text.splitlines() for wrapped in textwrap.wrap(line, 100) or [""]]
+        # Pages longer than a PDF page continue on the next one
+        pages.extend(_paginate(lines))
+    _render_pdf(pages, path)
+    return "\n".join(line for lines in pages for line in lines)
+
+
+def word_f1(text: str, reference: str) -> float:
+    """Word-level F1 of text against reference, ignoring case, punctuation and order."""
+    words, reference_words = (Counter(re.findall(r"\w+", value.lower())) for value in (text, reference))
+    common = sum((words & reference_words).values())
+    if not common:
+        return 0.0
+    precision = common / sum(words.values())
+    recall = common / sum(reference_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_case(path: str, backend: str, workers: int, repeat: int) -> Dict[str, Any]:
+    """Extract a PDF repeat times after a warm-up run, which also starts the process pool."""
+    from src.pdf_text import extract_text
+
+    text = extract_text(path, backend, workers)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_text(path, backend, workers)
+        timings.append(time.perf_counter() - start)
+    return {"text": text, "best_time": min(timings), "mean_time": sum(timings) / len(timings)}
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render results as a text table."""
+    lines = [
+        f"{'sample':<24} | {'pages':>5} | {'backend':<13} | {'workers':>7} | {'best s':>7} | {'pages/s':>8} | "
+        f"{'word F1':>7} | {'segments':>8}",
+        "-" * 104,
+    ]
+    for result in results:
+        lines.append(
+            f"{result['sample'][:24]:<24} | {result['pages']:>5} | {result['backend']:<13} | {result['workers']:>7} | "
+            f"{result['best_time']:>7.2f} | {result['pages'] / result['best_time']:>8.1f} | "
+            f"{result['word_f1']:>7.3f} | {result['segments']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.pdf_text import MAX_WORKERS, available_backends, page_count
+    from src.tender_notice_labeling.bulletin_segmenter import segment_bulletin
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulletin-notices", type=int, default=300, help="Notices of the synthetic bulletin (0 = none)")
+    parser.add_argument("--tender-pages", type=int, default=200, help="Pages of the synthetic tender (0 = none)")
+    parser.add_argument("--pdf", nargs="*", default=[], help="Real bulletins or tender documents")
+    parser.add_argument("--backends", nargs="+", default=None, help="Backends to compare (default: all available)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, MAX_WORKERS])
+    parser.add_argument("--reference", default="pdfminer", help="Backend whose text real samples are compared to")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    backends = args.backends or available_backends()
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # (name, path, expected text or None, expected notices or None)
+        samples = []
+        if args.bulletin_notices:
+            path = os.path.join(temp_dir, "boletim_sintetico.pdf")
+            samples.append(("boletim_sintetico", path, bulletin_sample(args.bulletin_notices, path), args.bulletin_notices))
+        if args.tender_pages:
+            path = os.path.join(temp_dir, "edital_sintetico.pdf")
+            samples.append(("edital_sintetico", path, tender_sample(args.tender_pages, path), None))
+        samples.extend((os.path.basename(path), path, None, None) for path in args.pdf)
+
+        for name, path, expected_text, expected_notices in samples:
+            reference = expected_text
+            if reference is None:
+                reference = run_case(path, args.reference, 1, 1)["text"]
+            pages = page_count(path)
+            for backend in backends:
+                for workers in sorted(set(args.workers)):
+                    case = run_case(path, backend, workers, args.repeat)
+                    results.append(
+                        {
+                            "sample": name,
+                            "pages": pages,
+                            "backend": backend,
+                            "workers": workers,
+                            "best_time": case["best_time"],
+                            "mean_time": case["mean_time"],
+                            "word_f1": word_f1(case["text"], reference),
+                            "segments": len(segment_bulletin(case["text"])),
+                            "expected_segments": expected_notices,
+                        }
+                    )
+                    print(format_results(results[-1:]).splitlines()[-1], flush=True)
+    print()
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
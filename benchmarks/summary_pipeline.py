@@ -0,0 +1,189 @@
+"""End-to-end throughput benchmark of TenderAnalysisCrew.generate_summary.
+
+Runs synthetic tenders through the full split, prefilter, map, combine and crew path
+against a local fake Azure OpenAI backend (benchmarks.fake_azure_openai), once per
+combination of page count, max_concurrent_chunks and chunk size. Each case runs in a
+fresh process, so peak RSS is measured per case.
+
+Usage:
+    python -m benchmarks.summary_pipeline --pages 50 200 500 1000 2000 --concurrency 5 10 20 \\
+        --latency lognormal:2:0.5 --rpm 1200 -o benchmark_results.json
+
+Results are printed as a table and written as JSON with, for every case, the wall time,
+throughput (pages, chunks and LLM requests per second), peak RSS, per-stage breakdown,
+chunk latency percentiles, retries and the requests, errors and 429s seen by the backend.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import resource
+import tempfile
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_azure_openai import FakeAzureOpenAI, FakeAzureOpenAIServer, azure_environment
+
+
+def _run_case(case: Dict[str, Any], environment: Dict[str, str], results: multiprocessing.Queue) -> None:
+    """Run one benchmark case. Runs in a spawned process."""
+    os.environ.update(environment)
+    if not case.get("verbose"):
+        # The crew is verbose; keep the benchmark output readable
+        sys.stdout = open(os.devnull, "w")
+
+    import asyncio
+    import logging
+    from benchmarks.synthetic_tender import generate_tender_text
+    from src.tender_analysis_crew.crew import TenderAnalysisCrew
+
+    if not case.get("verbose"):
+        logging.disable(logging.INFO)
+
+    tender_documents_text = generate_tender_text(case["pages"])
+    crew = TenderAnalysisCrew()
+
+    start = time.perf_counter()
+    try:
+        _, metrics = asyncio.run(
+            crew.generate_summary(
+                tender_documents_text,
+                max_concurrent_chunks=case["max_concurrent_chunks"],
+                return_metrics=True,
+            )
+        )
+    except Exception as e:
+        results.put({"error": str(e)})
+        return
+    wall_time = time.perf_counter() - start
+
+    metrics_dict = metrics.to_dict()
+    metrics_dict.pop("chunks")
+    chunk_count = metrics_dict["chunk_count"]
+    results.put(
+        {
+            "wall_time": wall_time,
+            "pages_per_second": case["pages"] / wall_time,
+            "chunks_per_second": chunk_count / wall_time,
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "metrics": metrics_dict,
+        }
+    )
+
+
+def run_benchmark(
+    pages: List[int],
+    concurrency: List[int],
+    chunk_sizes: List[int],
+    backend: FakeAzureOpenAI,
+    verbose: bool = False,
+) -> List[Dict[str, Any]]:
+    """Run every combination of pages, max_concurrent_chunks and chunk size.
+
+    Returns:
+        One result dict per case
+    """
+    context = multiprocessing.get_context("spawn")
+    case_results = []
+    with FakeAzureOpenAIServer(backend) as server, tempfile.TemporaryDirectory() as temp_dir:
+        for page_count, max_concurrent_chunks, chunk_size in itertools.product(pages, concurrency, chunk_sizes):
+            case = {
+                "pages": page_count,
+                "max_concurrent_chunks": max_concurrent_chunks,
+                "chunk_size": chunk_size,
+                "verbose": verbose,
+            }
+            environment = {
+                **azure_environment(server.endpoint),
+                "TENDER_ANALYSIS_CHUNK_SIZE": str(chunk_size),
+                "TENDER_ANALYSIS_CHUNK_OVERLAP": str(chunk_size // 10),
+                # Fresh checkpoints per case, otherwise repeated cases would resume
+                "TENDER_ANALYSIS_CHECKPOINT_DIR": os.path.join(temp_dir, f"checkpoints-{len(case_results)}"),
+                "TENDER_ANALYSIS_CHUNK_RETRY_BASE_DELAY": os.getenv("TENDER_ANALYSIS_CHUNK_RETRY_BASE_DELAY", "0.5"),
+                "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+                "OTEL_SDK_DISABLED": "true",
+                "LITELLM_LOG": "ERROR",
+                "ENVIRONMENT": "benchmark",
+            }
+            backend_stats = dict(backend.stats)
+            results_queue = context.Queue()
+            process = context.Process(target=_run_case, args=(case, environment, results_queue))
+            process.start()
+            result = results_queue.get()
+            process.join()
+
+            case.pop("verbose")
+            result = {**case, **result}
+            result["backend"] = {key: backend.stats[key] - backend_stats[key] for key in backend.stats}
+            if "wall_time" in result:
+                result["llm_requests_per_second"] = result["backend"]["requests"] / result["wall_time"]
+            case_results.append(result)
+            print(format_results([result], header=not case_results[:-1]), flush=True)
+    return case_results
+
+
+def format_results(results: List[Dict[str, Any]], header: bool = True) -> str:
+    """Render results as a text table."""
+    lines = []
+    if header:
+        lines.append(
+            f"{'pages':>6} | {'conc':>4} | {'chunk':>5} | {'chunks':>6} | {'wall s':>8} | {'pages/s':>7} | "
+            f"{'rss MB':>7} | {'map s':>7} | {'crew s':>7} | {'p95 chunk':>9} | {'retries':>7} | {'429s':>5}"
+        )
+        lines.append("-" * 112)
+    for result in results:
+        if "error" in result:
+            lines.append(
+                f"{result['pages']:>6} | {result['max_concurrent_chunks']:>4} | {result['chunk_size']:>5} | "
+                f"failed: {result['error']}"
+            )
+            continue
+        metrics = result["metrics"]
+        lines.append(
+            f"{result['pages']:>6} | {result['max_concurrent_chunks']:>4} | {result['chunk_size']:>5} | "
+            f"{metrics['chunk_count']:>6} | {result['wall_time']:>8.2f} | {result['pages_per_second']:>7.2f} | "
+            f"{result['peak_rss_mb']:>7.1f} | {metrics['stages']['batch_processing_time']:>7.2f} | "
+            f"{metrics['stages']['crew_time']:>7.2f} | {metrics['chunk_latency_p95']:>9.2f} | "
+            f"{metrics['retries']:>7} | {result['backend']['rate_limited']:>5}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 500, 1000, 2000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10], help="max_concurrent_chunks values")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[2500], help="Chunk sizes in tokens")
+    parser.add_argument("--latency", default="lognormal:1.5:0.5", help="Fake backend latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake completion speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with HTTP 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Fake backend requests per minute before 429s")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    parser.add_argument("--verbose", action="store_true", help="Show the crew output")
+    args = parser.parse_args(argv)
+
+    backend = FakeAzureOpenAI(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    results = run_benchmark(args.pages, args.concurrency, args.chunk_size, backend, verbose=args.verbose)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(
+                {"config": vars(args), "results": results},
+                output_file,
+                indent=2,
+                ensure_ascii=False,
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,110 @@
+"""Synthetic tender documents shaped like the output of TenderAnalysisUtils.concatenate_docs."""
+
+import random
+from typing import List
+
+RELEVANT_PARAGRAPHS = [
+    "O prazo de execução das obras é de {days} dias corridos, contados a partir da emissão da Ordem de Serviço.",
+    "A sessão pública de abertura das propostas ocorrerá em {day:02d}/{month:02d}/2025, às 9h, no portal de compras.",
+    "O valor global estimado da contratação é de R$ {value:,.2f}, incluído o BDI de {percent}%.",
+    "A estação de tratamento de esgoto deverá atender à vazão média de {flow} L/s, com tecnologia MBBR e desidratação do lodo por centrífuga.",
+    "As medições serão mensais e o pagamento ocorrerá em até {days} dias após a aprovação da medição e apresentação da nota fiscal.",
+    "Será exigida garantia contratual de {percent}% do valor do contrato, na modalidade caução, seguro-garantia ou fiança bancária.",
+    "Para a qualificação técnica, a licitante deverá apresentar atestado de capacidade técnico-operacional de estação de tratamento com vazão mínima de {flow} L/s.",
+    "O atraso injustificado na execução sujeitará a contratada à multa de {percent}% por dia sobre o valor da parcela em atraso.",
+    "Os equipamentos eletromecânicos deverão ser fabricados em aço inox AISI 316 e acompanhados de manual de operação e manutenção.",
+    "A licença ambiental de instalação é de responsabilidade da contratante e deverá ser obtida antes do início das obras.",
+]
+
+BOILERPLATE_PARAGRAPHS = [
+    "MINUTA DE CONTRATO. Cláusula {clause} – Das disposições gerais. E por estarem assim justas e contratadas, as partes assinam o presente instrumento.",
+    "MODELO DE DECLARAÇÃO. Declaramos, sob as penas da lei, para os devidos fins, que a empresa não emprega menor de dezoito anos. Local e data. ______________________ Representante legal.",
+    "Nos termos da Lei Federal nº 14.133/2021, aplicam-se subsidiariamente as disposições legais pertinentes, ficando eleito o foro da comarca da capital.",
+    "O tratamento de dados pessoais observará a Lei Geral de Proteção de Dados (LGPD), restringindo-se ao necessário à execução do contrato.",
+]
+
+DOCUMENTS = ["Edital", "Termo de Referência", "Memorial Descritivo", "Minuta de Contrato"]
+
+
+def generate_tender_text(pages: int, paragraphs_per_page: int = 12, relevant_share: float = 0.4, seed: int = 42) -> str:
+    """Generate a tender with the given number of pages.
+
+    Each page holds roughly 450 tokens, split between relevant paragraphs (deadlines,
+    values, technical requirements) and boilerplate (contract drafts, declarations).
+
+    Args:
+        pages: Number of pages
+        paragraphs_per_page: Paragraphs per page
+        relevant_share: Share of relevant paragraphs
+        seed: Random seed
+
+    Returns:
+        str: Text with "<document> - Pág.N" page markers
+    """
+    rng = random.Random(seed)
+    page_texts: List[str] = []
+    for page in range(1, pages + 1):
+        document = DOCUMENTS[min((page - 1) * len(DOCUMENTS) // pages, len(DOCUMENTS) - 1)]
+        paragraphs = []
+        for _ in range(paragraphs_per_page):
+            templates = RELEVANT_PARAGRAPHS if rng.random() < relevant_share else BOILERPLATE_PARAGRAPHS
+            paragraphs.append(
+                rng.choice(templates).format(
+                    days=rng.choice([30, 60, 90, 180, 360, 540]),
+                    day=rng.randint(1, 28),
+                    month=rng.randint(1, 12),
+                    value=rng.uniform(1e6, 2e8),
+                    percent=rng.choice([0.5, 1, 5, 10, 25]),
+                    flow=rng.choice([50, 120, 300, 800, 1500]),
+                    clause=rng.choice(["PRIMEIRA", "SEGUNDA", "DÉCIMA", "VIGÉSIMA"]),
+                )
+            )
+        page_texts.append(f"{document} - Pág.{page}\n" + "\n".join(paragraphs) + "\n")
+    return "".join(page_texts)
+
+
+NOTICE_ORGANIZATIONS = [
+    ("SANEPAR - Cia de Saneamento do Paraná", "PR"),
+    ("CASAN - Cia Catarinense de Águas e Saneamento", "SC"),
+    ("SABESP - Cia de Saneamento Básico do Estado de São Paulo", "SP"),
+    ("CORSAN - Cia Riograndense de Saneamento", "RS"),
+    ("Prefeitura Municipal de Campo Grande", "MS"),
+]
+
+NOTICE_OBJECTS = [
+    "EXECUCAO DE OBRAS DE AMPLIACAO DA ESTACAO DE TRATAMENTO DE ESGOTO COM TECNOLOGIA MBBR",
+    "FORNECIMENTO DE CENTRIFUGA DECANTER PARA DESIDRATACAO DE LODO",
+    "AQUISICAO DE PRODUTOS QUIMICOS PARA TRATAMENTO DE AGUA",
+    "PAVIMENTACAO ASFALTICA DE VIAS URBANAS",
+    "OPERACAO E MANUTENCAO DE ESTACOES DE TRATAMENTO DE AGUA",
+    "CONTRATACAO DE EMPRESA PARA LIMPEZA DE PREDIOS PUBLICOS",
+]
+
+
+def generate_tender_notices(count: int, seed: int = 42) -> List[dict]:
+    """Generate notices shaped like the output of TenderNoticeProcessor._extract_tender_notices.
+
+    Args:
+        count: Number of notices
+        seed: Random seed
+
+    Returns:
+        List[dict]: Notices with the TENDER_NOTICE_EXTRACTION_SCHEMA fields
+    """
+    rng = random.Random(seed)
+    notices = []
+    for number in range(1, count + 1):
+        organization, state = rng.choice(NOTICE_ORGANIZATIONS)
+        notices.append(
+            {
+                "num_seq_boletim": f"({number}/{count})",
+                "orgao": organization,
+                "estado": state,
+                "numero_licitacao": f"{rng.randint(1, 999)}/2024",
+                "objeto": rng.choice(NOTICE_OBJECTS),
+                "data_hora_licitacao": f"{rng.randint(1, 28):02d}/12/2024 10:00",
+                "id_universo": 10_000_000 + number,
+                "data_hora_alteracao": "02/12/2024 08:00",
+            }
+        )
+    return notices
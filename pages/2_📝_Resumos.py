@@ -1,18 +1,15 @@
 from typing import Optional
 import streamlit as st
 import rootpath
-import asyncio
 import os
 import logging
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 
 rootpath.append()
 
-from src.tender_analysis_crew.crew import TenderAnalysisCrew, TenderAnalysisUtils
+from src.services import get_services
+from src.background_jobs.job_store import SUCCEEDED, FAILED, CANCELLED
+from src.background_jobs.job_handlers import TENDER_SUMMARY
+from src.tender_analysis_crew.report_export import MIME_TYPES
 
 # TO-DO
 ## TODO: Adicionar botão para download do resumo em PDF
@@ -21,69 +18,25 @@ from src.tender_analysis_crew.crew import TenderAnalysisCrew, TenderAnalysisUtil
 # SOMEDAY MAYBE
 ## TODO: Utilizar API da Adobe pra ler pdfs complexos, contendo imagens e tabelas: https://opensource.adobe.com/developers.adobe.com/apis/documentcloud/dcsdk/pdf-extract.html
 
-crew = TenderAnalysisCrew()
-utils = TenderAnalysisUtils()
+# Built once per server process and shared by all sessions
+services = get_services()
+services.warm_up()
+utils = services.analysis_utils
+job_store = services.job_store
+report_exporter = services.report_exporter
 logger = logging.getLogger(__name__)
 
-def markdown_to_pdf(markdown_text: str | object) -> BytesIO:
-    """Convert markdown text to PDF.
-    
-    Args:
-        markdown_text: The markdown text to convert (can be string or CrewOutput object)
-        
-    Returns:
-        BytesIO: PDF file as bytes
-    """
-    # Convert to string if needed
-    text_content = str(markdown_text)
-    
-    # Create a BytesIO buffer to receive PDF data
-    buffer = BytesIO()
-    
-    # Create the PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    normal_style = styles['Normal']
-    
-    # Create custom style for better readability
-    custom_style = ParagraphStyle(
-        'CustomStyle',
-        parent=normal_style,
-        spaceBefore=10,
-        spaceAfter=10,
-        leading=14,
-    )
-    
-    # Convert markdown to PDF elements
-    elements = []
-    
-    # Split text into paragraphs and process each
-    paragraphs = text_content.split('\n')
-    for paragraph in paragraphs:
-        if paragraph.strip():  # Skip empty lines
-            # Clean up any XML-unsafe characters
-            cleaned_text = (
-                paragraph.replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-            )
-            p = Paragraph(cleaned_text, custom_style)
-            elements.append(p)
-            elements.append(Spacer(1, 0.1 * inch))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+# Seconds between job status checks while a summary is being generated
+JOB_POLL_INTERVAL = float(os.getenv("LICITA_AI_JOB_UI_POLL_INTERVAL", 1.0))
+
+# Seconds between checks while the report files are rendered in the background
+REPORT_POLL_INTERVAL = float(os.getenv("LICITA_AI_REPORT_UI_POLL_INTERVAL", 0.5))
+
+# Download buttons of the rendered summary, by export format
+REPORT_DOWNLOADS = {
+    "pdf": ("⬇️ Baixar PDF", "resumo_licitacao.pdf"),
+    "docx": ("⬇️ Baixar DOCX", "resumo_licitacao.docx"),
+}
 
 # Configure page
 st.set_page_config(
@@ -149,6 +102,9 @@ if "processing_status" not in st.session_state:
     st.session_state.processing_status = None
 if "error_details" not in st.session_state:
     st.session_state.error_details = None
+if "summary_job_id" not in st.session_state:
+    # Resume a job started before a reload or in a closed tab
+    st.session_state.summary_job_id = st.query_params.get("job")
 
 st.title("Resumo de Licitação 📋")
 st.divider()
@@ -219,74 +175,122 @@ if st.button(
     "📝 Gerar Resumo",
     type="primary",
     use_container_width=True,
-    disabled=not st.session_state.get("tender_documents_text"),
+    disabled=not st.session_state.get("tender_documents_text")
+    or st.session_state.get("summary_job_id") is not None,
 ):
     # Reset error state
     st.session_state.error_details = None
-    
-    # Create a placeholder for the progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    with st.spinner("Gerando resumo..."):
-        try:
-            # Get total number of chunks for progress calculation
-            chunks = utils.split_text(st.session_state.tender_documents_text)
-            total_chunks = len(chunks)
-
-            # Update initial status
-            st.session_state.processing_status = f"Processando parte 0/{total_chunks}"
-            status_text.text(st.session_state.processing_status)
-
-            def update_progress(current_chunk: int):
-                """Update progress bar and status text"""
-                try:
-                    progress = float(current_chunk) / total_chunks
-                    progress_bar.progress(progress)
-                    st.session_state.processing_status = (
-                        f"Processando parte {current_chunk}/{total_chunks}"
-                    )
-                    status_text.text(st.session_state.processing_status)
-                except Exception as e:
-                    logger.error(f"Error updating progress: {str(e)}", exc_info=True)
+    st.session_state.summary = None
+
+    try:
+        # Run the summary as a background job; the page only polls its status
+        services.job_runner()
+        st.session_state.summary_job_id = job_store.enqueue(
+            TENDER_SUMMARY,
+            {"tender_documents_text": st.session_state.tender_documents_text},
+        )
+        # Keep the job id in the URL so the result survives reruns and reloads
+        st.query_params["job"] = st.session_state.summary_job_id
+    except Exception as e:
+        error_msg = f"Erro ao gerar resumo: {str(e)}"
+        st.error(error_msg)
+        logger.error(error_msg, exc_info=True)
+        st.session_state.error_details = str(e)
+
+# Titles for the intermediate outputs of each crew task
+TASK_TITLES = {
+    "montagem_de_cronograma": "🗓️ Cronograma",
+    "montagem_de_cronograma_paralela": "🗓️ Cronograma",
+    "esboco_do_relatorio": "✏️ Esboço do Relatório",
+    "esboco_do_relatorio_paralelo": "✏️ Esboço do Relatório",
+}
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL if st.session_state.summary_job_id else None)
+def show_summary_job_status():
+    """Poll the summary job and render its progress and partial results"""
+    job_id = st.session_state.get("summary_job_id")
+    if job_id is None:
+        return
+
+    job = job_store.get(job_id)
+    if job is None:
+        st.session_state.summary_job_id = None
+        st.query_params.pop("job", None)
+        return
 
-            # Generate summary with progress updates
-            st.session_state.summary = asyncio.run(
-                crew.generate_summary(
-                    st.session_state.tender_documents_text,
-                    progress_callback=update_progress,
+    if job.status == SUCCEEDED:
+        st.session_state.summary = job.result
+        st.session_state.summary_job_id = None
+        st.session_state.show_preview = False
+        st.toast("Resumo gerado com sucesso!", icon="✅")
+        st.rerun()
+    elif job.status in (FAILED, CANCELLED):
+        st.session_state.summary_job_id = None
+        st.query_params.pop("job", None)
+        error_msg = f"Erro ao gerar resumo: {job.error or 'processamento cancelado'}"
+        st.error(error_msg)
+        logger.error(error_msg)
+        st.session_state.error_details = job.error
+        return
+
+    # Make sure workers are running, e.g. after a server restart
+    services.job_runner()
+    st.progress(job.progress)
+    st.text(job.progress_message or "Aguardando processamento...")
+    for task, output in job.partial_result.get("task_outputs", {}).items():
+        if task in TASK_TITLES:
+            with st.expander(TASK_TITLES[task]):
+                st.markdown(output)
+    if job.partial_result.get("report"):
+        st.markdown(job.partial_result["report"])
+
+
+show_summary_job_status()
+
+def start_report_renders() -> dict:
+    """Start rendering the summary in every export format. Cached formats are done immediately."""
+    return {
+        export_format: report_exporter.submit(st.session_state.summary, export_format)
+        for export_format in REPORT_DOWNLOADS
+    }
+
+
+reports_pending = bool(st.session_state.summary) and not all(
+    render.done() for render in start_report_renders().values()
+)
+
+
+@st.fragment(run_every=REPORT_POLL_INTERVAL if reports_pending else None)
+def show_report_downloads():
+    """Render the download buttons, polling until the background renders finish"""
+    renders = start_report_renders()
+    for column, (export_format, (label, file_name)) in zip(st.columns(len(REPORT_DOWNLOADS)), REPORT_DOWNLOADS.items()):
+        with column:
+            render = renders[export_format]
+            if not render.done():
+                st.button(label, disabled=True, help="Gerando arquivo...", use_container_width=True)
+            elif render.exception():
+                st.error(f"Erro ao gerar {export_format.upper()}: {render.exception()}")
+                logger.error(f"Error rendering {export_format} report", exc_info=render.exception())
+            else:
+                st.download_button(
+                    label=label,
+                    data=render.result(),
+                    file_name=file_name,
+                    mime=MIME_TYPES[export_format],
+                    type="primary",
+                    on_click="ignore",
+                    use_container_width=True,
                 )
-            )
-
-            # Update final status
-            progress_bar.progress(1.0)
-            status_text.text("Resumo gerado com sucesso!")
-            st.session_state.show_preview = False
-            st.toast("Resumo gerado com sucesso!", icon="✅")
-
-        except Exception as e:
-            error_msg = f"Erro ao gerar resumo: {str(e)}"
-            st.error(error_msg)
-            logger.error(error_msg, exc_info=True)
-            st.session_state.error_details = str(e)
-        finally:
-            # Clean up progress display
-            progress_bar.empty()
-            status_text.empty()
+    if reports_pending and all(render.done() for render in renders.values()):
+        # Full rerun to stop polling
+        st.rerun()
+
 
 if st.session_state.summary:
     st.markdown(st.session_state.summary)
-    
-    # Add download button
-    pdf_buffer = markdown_to_pdf(st.session_state.summary)
-    st.download_button(
-        label="⬇️ Baixar PDF",
-        data=pdf_buffer,
-        file_name="resumo_licitacao.pdf",
-        mime="application/pdf",
-        type="primary",
-        use_container_width=True,
-    )
+    show_report_downloads()
 
 # Display detailed error information if available
 if st.session_state.error_details and os.getenv("ENVIRONMENT") == "dev":
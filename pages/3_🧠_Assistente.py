@@ -4,7 +4,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 from dotenv import load_dotenv
 
-from src.dify_client import DifyClient
+from src.services import get_services
 
 load_dotenv()
 
@@ -74,8 +74,10 @@ st.divider()
 # TODO: Permitir a criação de outras bases de conhecimento, não diretamente relacionadas a licitações
 st.subheader("Criar Nova Base de Conhecimento")
 
-# Initialize Dify client
-dify_client = DifyClient()
+# Dify client shared by all sessions
+services = get_services()
+services.warm_up()
+dify_client = services.dify_client
 
 # Initialize session state for form data
 if "cliente" not in st.session_state:
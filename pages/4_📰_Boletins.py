@@ -2,20 +2,33 @@
 
 import streamlit as st
 from datetime import datetime, timedelta
-import pandas as pd
-import tempfile
 import os
-from langchain_openai import AzureChatOpenAI
-import io
-import asyncio
-from tempfile import NamedTemporaryFile
+import hashlib
+from functools import partial
 
-from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+from src.services import get_services
+from src.background_jobs.job_store import SUCCEEDED, store_upload
+from src.background_jobs.job_handlers import TENDER_NOTICE_PDFS
+from src.tender_notice_labeling.label_store import DISPLAY_LABELS, SOURCE_USER, labeling_context_hash
+from src.tender_notice_labeling.notice_export import MIME_TYPES
+from src.tender_notice_labeling.notice_store import NoticeFilters, normalize_datetime
 from src.tender_notice_labeling.tender_notice_templates import (
-    TENDER_NOTICE_LABELING_TEMPLATE,
     COMPANY_BUSINESS_DESCRIPTION,
+    TENDER_NOTICE_LABELING_TEMPLATE,
 )
 
+# Built once per server process and shared by all sessions
+services = get_services()
+services.warm_up()
+job_store = services.job_store
+notice_store = services.notice_store
+context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+
+# Seconds between job status checks while bulletins are being processed
+JOB_POLL_INTERVAL = float(os.getenv("LICITA_AI_JOB_UI_POLL_INTERVAL", 1.0))
+# Notices per page of the results table
+NOTICES_PAGE_SIZE = int(os.getenv("LICITA_AI_NOTICES_PAGE_SIZE", 50))
+
 # Configure page
 st.set_page_config(
     page_title="Boletins - Licita.AI",
@@ -80,24 +93,91 @@ st.title("📰 Boletins de Licitações")
 st.divider()
 
 # Initialize session state
-if "processed_tenders" not in st.session_state:
-    st.session_state.processed_tenders = None
+if "selected_bulletins" not in st.session_state:
+    st.session_state.selected_bulletins = []
 if "processing_status" not in st.session_state:
     st.session_state.processing_status = None
 if "error_details" not in st.session_state:
     st.session_state.error_details = None
+if "bulletin_jobs" not in st.session_state:
+    st.session_state.bulletin_jobs = {}
+# Bulletins to show once processed; the selection widget can only be updated before it is created
+if "pending_selection" in st.session_state:
+    st.session_state.selected_bulletins = st.session_state.pop("pending_selection")
+
+# Filters in sidebar
+with st.sidebar:
+    st.markdown(
+        """
+        <link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">
+        <h1 style="display: flex; align-items: center;">
+            Filtros&nbsp<span class="material-icons">filter_alt</span>
+        </h1>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # File upload section
+    st.markdown("### 📤 Upload de Arquivos")
+    uploaded_files = st.file_uploader(
+        "Selecione os boletins para processar (PDF)",
+        type=['pdf'],
+        accept_multiple_files=True
+    )
+
+    if uploaded_files:
+        st.success(f"{len(uploaded_files)} arquivo(s) recebido(s)")
+
+    # Process button
+    st.markdown("---")
+    process_button = st.button(
+        "⚡ Processar",
+        type="primary",
+        use_container_width=True,
+        disabled=not uploaded_files,
+    )
+
+    # Bulletins processed before are reopened from the notice store, without LLM calls
+    st.markdown("---")
+    stored_bulletins = {
+        bulletin["file_hash"]: bulletin for bulletin in notice_store.list_bulletins(context_hash)
+    }
+    st.session_state.selected_bulletins = [
+        file_hash for file_hash in st.session_state.selected_bulletins if file_hash in stored_bulletins
+    ]
+    selected_bulletins = st.multiselect(
+        "📚 Boletins processados",
+        options=list(stored_bulletins),
+        format_func=lambda file_hash: (
+            f"{stored_bulletins[file_hash]['source_file']} "
+            f"({datetime.fromtimestamp(stored_bulletins[file_hash]['processed_at']):%d/%m/%Y %H:%M})"
+        ),
+        key="selected_bulletins",
+    )
+    estados = st.multiselect("UF", options=notice_store.estados(context_hash, selected_bulletins))
+    labels = st.multiselect("Recomendação", options=list(DISPLAY_LABELS), format_func=DISPLAY_LABELS.get)
+    search = st.text_input("Buscar no objeto", placeholder="ex.: estação de tratamento")
+    st.markdown('<div class="date-label">Abertura a partir de</div>', unsafe_allow_html=True)
+    date_from = st.date_input("Abertura a partir de", value=None, format="DD/MM/YYYY")
+    st.markdown('<div class="date-label">Abertura até</div>', unsafe_allow_html=True)
+    date_to = st.date_input("Abertura até", value=None, format="DD/MM/YYYY")
+
+filters = NoticeFilters(
+    file_hashes=selected_bulletins,
+    estados=estados or None,
+    labels=labels or None,
+    search=search,
+    date_from=date_from,
+    date_to=date_to,
+)
 
 # Display results (metrics, dataframe, and buttons)
-if st.session_state.processed_tenders is not None and not st.session_state.processed_tenders.empty:
+label_counts = notice_store.label_counts(context_hash, filters) if selected_bulletins else {}
+total = sum(label_counts.values())
+if total:
     # Display statistics
-    total = len(st.session_state.processed_tenders)
-    
-    # Safe label counting
-    def count_labels(df: pd.DataFrame, pattern: str) -> int:
-        return df['label'].str.contains(pattern, na=False).sum()
-    
-    relevant = count_labels(st.session_state.processed_tenders, 'Participar')
-    need_analysis = count_labels(st.session_state.processed_tenders, 'Avaliar')
+    relevant = label_counts.get('yes', 0)
+    need_analysis = label_counts.get('unsure', 0)
     irrelevant = total - relevant - need_analysis
     
     st.markdown(
@@ -131,16 +211,27 @@ if st.session_state.processed_tenders is not None and not st.session_state.proce
         st.markdown('<div class="metric-label">DECLINAR</div>', unsafe_allow_html=True)
         st.markdown(f'<div class="metric-value">{irrelevant}</div>', unsafe_allow_html=True)
     
+    # Only the current page of notices is read from the store
+    page_count = (total + NOTICES_PAGE_SIZE - 1) // NOTICES_PAGE_SIZE
+    page_number = st.number_input(
+        f"Página (de {page_count})", min_value=1, max_value=page_count, value=1, step=1
+    )
+    page_df = notice_store.query_notices(
+        context_hash, filters, limit=NOTICES_PAGE_SIZE, offset=(page_number - 1) * NOTICES_PAGE_SIZE
+    )
+    
     # Show DataFrame with specific columns and formatting
-    display_df = st.session_state.processed_tenders.copy()
+    display_df = page_df.copy()
     
     # Ensure all columns have proper values
     display_df['orgao'] = display_df['orgao'].fillna('Organização não identificada')
     display_df['estado'] = display_df['estado'].fillna('N/A')
     display_df['numero_licitacao'] = display_df['numero_licitacao'].fillna('N/A')
     display_df['objeto'] = display_df['objeto'].fillna('Descrição não disponível')
+    display_df['label'] = display_df['label'].map(lambda label: DISPLAY_LABELS.get(label, DISPLAY_LABELS['unsure']))
     
-    st.dataframe(
+    # Recommendations can be corrected in the table; saved corrections train the local classifier
+    edited_df = st.data_editor(
         data=display_df,
         height=400,
         use_container_width=True,
@@ -172,10 +263,12 @@ if st.session_state.processed_tenders is not None and not st.session_state.proce
                 format="DD/MM/YYYY HH:mm",
                 width="medium",
             ),
-            "label": st.column_config.TextColumn(
+            "label": st.column_config.SelectboxColumn(
                 "Recomendação",
-                help="Ação recomendada para a licitação",
+                help="Ação recomendada para a licitação. Altere para corrigir a recomendação.",
                 width="small",
+                options=list(DISPLAY_LABELS.values()),
+                required=True,
             ),
         },
         column_order=[
@@ -186,36 +279,45 @@ if st.session_state.processed_tenders is not None and not st.session_state.proce
             "data_hora_licitacao",
             "label",
         ],
+        disabled=[column for column in display_df.columns if column != "label"],
+        key="tenders-editor",
     )
+    corrected = edited_df.index[edited_df["label"] != display_df["label"]]
     
-    # Download buttons
+    # Downloads hold every notice matching the filters, not only the current page. Files are
+    # generated when a button is clicked and cached until the notices change, so reruns don't pay for them.
+    exporter = services.notice_exporter
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    with col1:
-        # CSV download button
-        if st.download_button(
-            "📥 Baixar Resultados (CSV)",
-            display_df.to_csv(index=False, sep=';', encoding='utf-8-sig').encode('utf-8-sig'),
-            "resultados_licitacoes.csv",
-            "text/csv",
-            key='download-csv'
-        ):
-            st.toast("Download iniciado!")
-    
-    with col2:
-        # Excel download button
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-            display_df.to_excel(writer, index=False, sheet_name='Licitações')
-        
-        if st.download_button(
-            "📥 Baixar Resultados (Excel)",
-            excel_buffer.getvalue(),
-            "resultados_licitacoes.xlsx",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key='download-excel'
+    export_labels = {
+        "csv": "📥 Baixar Resultados (CSV)",
+        "xlsx": "📥 Baixar Resultados (Excel)",
+        "parquet": "📥 Baixar Resultados (Parquet)",
+    }
+    for column, (export_format, label) in zip((col1, col2, col3), export_labels.items()):
+        with column:
+            st.download_button(
+                label,
+                data=partial(exporter.export_bytes, context_hash, filters, export_format),
+                file_name=f"resultados_licitacoes.{export_format}",
+                mime=MIME_TYPES[export_format],
+                on_click="ignore",
+                key=f"download-{export_format}",
+            )
+
+    with col4:
+        if st.button(
+            f"💾 Salvar correções ({len(corrected)})",
+            disabled=corrected.empty,
+            use_container_width=True,
         ):
-            st.toast("Download iniciado!")
+            labels = {display: label for label, display in DISPLAY_LABELS.items()}
+            corrections = {index: labels[edited_df.at[index, "label"]] for index in corrected}
+            notices = [{**page_df.loc[index].to_dict(), "label": label} for index, label in corrections.items()]
+            services.label_store.put_labels(notices, context_hash, source=SOURCE_USER)
+            notice_store.set_labels(corrections, label_source=SOURCE_USER)
+            st.toast(f"{len(notices)} correção(ões) salva(s)!", icon="✅")
+            st.rerun()
 else:
     st.info("Nenhum dado processado ainda. Faça o upload de arquivos para começar.")
     st.markdown(
@@ -244,113 +346,114 @@ else:
         st.markdown('<div class="metric-label">DECLINAR</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-value">0</div>', unsafe_allow_html=True)
 
-# Filters in sidebar
-with st.sidebar:
-    st.markdown(
-        """
-        <link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">
-        <h1 style="display: flex; align-items: center;">
-            Filtros&nbsp<span class="material-icons">filter_alt</span>
-        </h1>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    # File upload section
-    st.markdown("### 📤 Upload de Arquivos")
-    uploaded_files = st.file_uploader(
-        "Selecione os boletins para processar (PDF)",
-        type=['pdf'],
-        accept_multiple_files=True
-    )
-
-    if uploaded_files:
-        st.success(f"{len(uploaded_files)} arquivo(s) recebido(s)")
-
-    # Process button
-    st.markdown("---")
-    process_button = st.button(
-        "⚡ Processar",
-        type="primary",
-        use_container_width=True,
-        disabled=not uploaded_files,
-    )
-
-# TODO: Refactor. Move to src/tender_notice_labeling/tender_notice_processor.py
-async def process_pdfs(files):
-    """Process multiple PDFs asynchronously."""
+# Main content area
+if process_button and uploaded_files:
     try:
-        # Initialize processor with correct model settings
-        processor = TenderNoticeProcessor()
-        
-        # Process each PDF
-        all_tenders = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, file in enumerate(files):
-            try:
-                # Save uploaded file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                    tmp_file.write(file.getvalue())
-                    tmp_path = tmp_file.name
-                
-                try:
-                    # Update status
-                    status_text.text(f"Processando {file.name}...")
-                    
-                    # Process PDF
-                    df = await processor.process_pdf(
-                        pdf_path=tmp_path,
-                        template=TENDER_NOTICE_LABELING_TEMPLATE,
-                        company_description=COMPANY_BUSINESS_DESCRIPTION,
-                        max_concurrent_chunks=5
-                    )
-                    
-                    if not df.empty:
-                        # Add source information
-                        df['source_file'] = file.name
-                        df['processed_at'] = datetime.now()
-                        all_tenders.append(df)
-                    
-                finally:
-                    # Clean up temp file
-                    os.unlink(tmp_path)
-                
-            except Exception as e:
-                st.error(f"Erro ao processar {file.name}: {str(e)}")
-                if os.getenv("ENVIRONMENT") == "dev":
-                    st.exception(e)
-                continue
-            
-            # Update progress
-            progress = (i + 1) / len(files)
-            progress_bar.progress(progress)
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Combine all results
-        if all_tenders:
-            df = pd.concat(all_tenders, ignore_index=True)
-            return df
-            
-        return pd.DataFrame()
-        
+        # The bulletins are processed together in a background job, so notices shared by
+        # them are labeled once; the page only polls its status
+        uploads = {hashlib.sha256(file.getvalue()).hexdigest(): file for file in uploaded_files}
+        stored = notice_store.get_bulletins(list(uploads), context_hash)
+        new_uploads = {file_hash: file for file_hash, file in uploads.items() if file_hash not in stored}
+        if new_uploads:
+            services.job_runner()
+            files = [
+                {"pdf_path": store_upload(file.name, file.getvalue()), "source_file": file.name, "file_hash": file_hash}
+                for file_hash, file in new_uploads.items()
+            ]
+            job_id = job_store.enqueue(TENDER_NOTICE_PDFS, {"files": files})
+            st.session_state.bulletin_jobs = {job_id: ", ".join(file.name for file in new_uploads.values())}
+            st.session_state.reopened_bulletins = list(stored)
+        else:
+            # Every bulletin was processed before: reopen them from the store
+            st.session_state.pending_selection = list(stored)
+            st.rerun()
     except Exception as e:
         st.error(f"Erro ao processar os boletins: {str(e)}")
         if os.getenv("ENVIRONMENT") == "dev":
             st.exception(e)
-        return pd.DataFrame()
 
-# Main content area
-if process_button and uploaded_files:
-    with st.spinner("Processando boletins..."):
-        # Run async processing
-        st.session_state.processed_tenders = asyncio.run(process_pdfs(uploaded_files))
-        
-        if not st.session_state.processed_tenders.empty:
-            st.toast("Processamento concluído com sucesso!", icon="✅")
-        else:
-            st.error("Nenhum boletim foi processado com sucesso!")
+
+@st.fragment(run_every=JOB_POLL_INTERVAL if st.session_state.bulletin_jobs else None)
+def show_bulletin_jobs_status():
+    """Poll the bulletin jobs, then combine their results once all of them finish"""
+    if not st.session_state.bulletin_jobs:
+        return
+
+    jobs = [job_store.get(job_id) for job_id in st.session_state.bulletin_jobs]
+    jobs = [job for job in jobs if job is not None]
+    finished = [job for job in jobs if job.is_finished]
+
+    if len(finished) < len(jobs):
+        # Make sure workers are running, e.g. after a server restart
+        services.job_runner()
+        with st.spinner("Processando boletins..."):
+            st.progress(len(finished) / len(jobs))
+            for job in jobs:
+                status = job.progress_message or "Aguardando processamento..."
+                st.text(f"{st.session_state.bulletin_jobs[job.id]}: {status}")
+
+        # Notices are shown as soon as they are labeled, so the first relevant tenders can be reviewed right away
+        streamed = [notice for job in jobs for notice in job.partial_result.get("notices", [])]
+        if streamed:
+            label_counts = {}
+            for job in jobs:
+                for label, count in job.partial_result.get("label_counts", {}).items():
+                    label_counts[label] = label_counts.get(label, 0) + count
+            col1, col2, col3, col4 = st.columns(4)
+            for column, title, value in (
+                (col1, "ROTULADOS", len(streamed)),
+                (col2, "PARTICIPAR", label_counts.get("yes", 0)),
+                (col3, "AVALIAR", label_counts.get("unsure", 0)),
+                (col4, "DECLINAR", label_counts.get("no", 0)),
+            ):
+                with column:
+                    st.markdown(f'<div class="metric-label">{title}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="metric-value">{value}</div>', unsafe_allow_html=True)
+
+            label_priority = {"yes": 0, "unsure": 1, "no": 2, "insufficient_info": 3}
+            streamed.sort(
+                key=lambda notice: (
+                    label_priority.get(notice["label"], 1),
+                    normalize_datetime(notice["data_hora_licitacao"]) or "9999",
+                )
+            )
+            st.dataframe(
+                [
+                    {**notice, "label": DISPLAY_LABELS.get(notice["label"], DISPLAY_LABELS["unsure"])}
+                    for notice in streamed
+                ],
+                height=400,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "orgao": st.column_config.TextColumn("Cliente", width="medium"),
+                    "estado": st.column_config.TextColumn("UF", width="small"),
+                    "numero_licitacao": st.column_config.TextColumn("Nº", width="small"),
+                    "objeto": st.column_config.TextColumn("Descrição do objeto", width="large"),
+                    "data_hora_licitacao": st.column_config.TextColumn("Data", width="medium"),
+                    "label": st.column_config.TextColumn("Recomendação", width="small"),
+                },
+                column_order=["orgao", "estado", "numero_licitacao", "objeto", "data_hora_licitacao", "label"],
+            )
+        return
+
+    bulletins = list(st.session_state.get("reopened_bulletins", []))
+    for job in finished:
+        for source_file, error in job.partial_result.get("failed_files", {}).items():
+            st.error(f"Erro ao processar {source_file}: {error}")
+        if job.status == SUCCEEDED and job.result:
+            bulletins.extend(bulletin["file_hash"] for bulletin in job.result)
+        elif job.status != SUCCEEDED:
+            st.error(f"Erro ao processar {st.session_state.bulletin_jobs[job.id]}: {job.error}")
+
+    st.session_state.bulletin_jobs = {}
+    st.session_state.reopened_bulletins = []
+    if bulletins:
+        st.session_state.pending_selection = bulletins
+        st.toast("Processamento concluído com sucesso!", icon="✅")
+        st.rerun()
+    else:
+        st.error("Nenhum boletim foi processado com sucesso!")
+
+
+show_bulletin_jobs_status()
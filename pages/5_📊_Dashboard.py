@@ -5,7 +5,35 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime, timedelta
-import numpy as np
+
+from src.services import get_services
+from src.background_jobs.job_handlers import TENDER_SUMMARY
+from src.tender_notice_labeling.label_store import DISPLAY_LABELS, labeling_context_hash
+from src.tender_notice_labeling.tender_notice_templates import (
+    COMPANY_BUSINESS_DESCRIPTION,
+    TENDER_NOTICE_LABELING_TEMPLATE,
+)
+
+# Built once per server process and shared by all sessions
+services = get_services()
+services.warm_up()
+notice_store = services.notice_store
+context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+
+UF_REGIONS = {
+    **dict.fromkeys(["PR", "RS", "SC"], "Sul"),
+    **dict.fromkeys(["ES", "MG", "RJ", "SP"], "Sudeste"),
+    **dict.fromkeys(["DF", "GO", "MS", "MT"], "Centro-Oeste"),
+    **dict.fromkeys(["AC", "AM", "AP", "PA", "RO", "RR", "TO"], "Norte"),
+    **dict.fromkeys(["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"], "Nordeste"),
+}
+
+PERIODS = {
+    "Últimos 30 dias": 30,
+    "Último trimestre": 91,
+    "Último semestre": 182,
+    "Último ano": 365,
+}
 
 # Configure page
 st.set_page_config(
@@ -38,8 +66,6 @@ st.markdown(
 st.title("Dashboard 📊")
 st.divider()
 
-st.warning("⚠️ Em construção. Este é um dashboard de exemplo e os dados são fictícios.")
-
 # Sidebar filters
 with st.sidebar:
     st.markdown(
@@ -54,33 +80,27 @@ with st.sidebar:
 
     # Time range
     st.subheader("Período")
-    time_range = st.selectbox(
-        "Selecione o período",
-        [
-            "Últimos 30 dias",
-            "Último trimestre",
-            "Último semestre",
-            "Último ano",
-            "Personalizado",
-        ],
-    )
+    time_range = st.selectbox("Selecione o período", [*PERIODS, "Personalizado"])
 
+    end_date = datetime.now().date()
     if time_range == "Personalizado":
         start_date = st.date_input(
             "De",
-            value=datetime.now().date() - timedelta(days=30),
-            max_value=datetime.now().date(),
+            value=end_date - timedelta(days=30),
+            max_value=end_date,
         )
         end_date = st.date_input(
             "Até",
-            value=datetime.now().date(),
-            max_value=datetime.now().date(),
+            value=end_date,
+            max_value=end_date,
         )
+    else:
+        start_date = end_date - timedelta(days=PERIODS[time_range] - 1)
 
     # View type
     st.subheader("Visualização")
     view_type = st.radio(
-        "Tipo de visualização", ["Geral", "Por Cliente", "Por Tipo", "Por Região"]
+        "Tipo de visualização", ["Geral", "Por Cliente", "Por Recomendação", "Por Região"]
     )
 
     # Metrics selection
@@ -88,124 +108,161 @@ with st.sidebar:
     metrics = st.multiselect(
         "Selecione as métricas",
         [
-            "Valor Total",
-            "Quantidade de Editais",
+            "Quantidade de Avisos",
+            "Recomendados (Participar)",
             "Taxa de Participação",
-            "Taxa de Sucesso",
-            "Tempo Médio de Análise",
+            "Resumos Gerados",
         ],
-        default=["Valor Total", "Quantidade de Editais"],
+        default=["Quantidade de Avisos", "Recomendados (Participar)", "Taxa de Participação", "Resumos Gerados"],
     )
 
     # Comparison
     st.subheader("Comparação")
-    compare_with = st.multiselect(
-        "Comparar com", ["Período Anterior", "Meta", "Média do Mercado"], default=[]
-    )
+    compare_with = st.multiselect("Comparar com", ["Período Anterior"], default=[])
 
     # Apply filters button
     if st.button("Atualizar Dashboard", type="primary", use_container_width=True):
         st.rerun()
 
-# Generate mock data
-dates = pd.date_range(start="2023-01-01", end="2023-12-31", freq="D")
-values = np.random.normal(1000000, 200000, len(dates))
-tenders = np.random.randint(1, 10, len(dates))
-df = pd.DataFrame({"Data": dates, "Valor": values, "Quantidade": tenders})
-
-# Monthly aggregation
-df_monthly = (
-    df.set_index("Data")
-    .resample("ME")
-    .agg({"Valor": "sum", "Quantidade": "sum"})
-    .reset_index()
+# The rollups are small and maintained as bulletins are stored, so every rerun reads them fresh
+period_days = (end_date - start_date).days + 1
+previous_start = start_date - timedelta(days=period_days)
+rollups = notice_store.daily_rollups(context_hash, previous_start, end_date)
+current = rollups[rollups["day"] >= pd.Timestamp(start_date)]
+previous = rollups[rollups["day"] < pd.Timestamp(start_date)]
+summaries = pd.DataFrame(
+    services.job_store.daily_job_stats(TENDER_SUMMARY, since=datetime.combine(previous_start, datetime.min.time()).timestamp()),
+    columns=["day", "jobs", "avg_seconds", "cost_usd"],
 )
+summaries["day"] = pd.to_datetime(summaries["day"])
+current_summaries = summaries[summaries["day"] >= pd.Timestamp(start_date)]
 
-# Create mock data for other visualizations
-regions = ["Sul", "Sudeste", "Centro-Oeste", "Norte", "Nordeste"]
-region_values = np.random.randint(5000000, 50000000, len(regions))
-region_quantities = np.random.randint(20, 200, len(regions))
 
-tender_types = ["Obras", "Serviços", "Materiais", "Equipamentos", "Outros"]
-type_values = np.random.randint(1000000, 10000000, len(tender_types))
+def kpis(notices: pd.DataFrame, summary_jobs: pd.DataFrame) -> dict:
+    total = int(notices["notices"].sum())
+    participate = int(notices.loc[notices["label"] == "yes", "notices"].sum())
+    return {
+        "Quantidade de Avisos": total,
+        "Recomendados (Participar)": participate,
+        "Taxa de Participação": participate / total if total else 0.0,
+        "Resumos Gerados": int(summary_jobs["jobs"].sum()),
+    }
 
-# KPI metrics row
-col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.metric(
-        "Valor Total de Licitações",
-        f"R$ {df['Valor'].sum()/1e6:.1f}M",
-        "12.5%",
-        help="Valor total de todas as licitações no período selecionado",
-    )
+current_kpis = kpis(current, current_summaries)
+previous_kpis = kpis(previous, summaries[summaries["day"] < pd.Timestamp(start_date)])
+KPI_HELP = {
+    "Quantidade de Avisos": "Avisos de licitação processados no período",
+    "Recomendados (Participar)": "Avisos com recomendação de participação",
+    "Taxa de Participação": "Percentual de avisos com recomendação de participação",
+    "Resumos Gerados": "Resumos de editais gerados no período",
+}
 
-with col2:
-    st.metric(
-        "Quantidade de Editais",
-        f"{df['Quantidade'].sum()}",
-        "-4.2%",
-        help="Número total de editais analisados no período",
-    )
+if not current_kpis["Quantidade de Avisos"] and not current_kpis["Resumos Gerados"]:
+    st.info("Nenhum boletim ou resumo processado no período selecionado.")
 
-with col3:
-    st.metric(
-        "Taxa de Participação",
-        "68.5%",
-        "8.1%",
-        help="Percentual de editais em que houve participação",
-    )
+# KPI metrics row
+if metrics:
+    for column, metric in zip(st.columns(len(metrics)), metrics):
+        value, previous_value = current_kpis[metric], previous_kpis[metric]
+        delta = None
+        if "Período Anterior" in compare_with:
+            if metric == "Taxa de Participação":
+                delta = f"{(value - previous_value) * 100:+.1f} p.p."
+            elif previous_value:
+                delta = f"{(value - previous_value) / previous_value:+.1%}"
+        with column:
+            st.metric(
+                metric,
+                f"{value:.1%}" if metric == "Taxa de Participação" else f"{value}",
+                delta,
+                help=KPI_HELP[metric],
+            )
 
-with col4:
-    st.metric(
-        "Taxa de Sucesso",
-        "42.3%",
-        "15.4%",
-        help="Percentual de licitações vencidas entre as participadas",
-    )
+# Daily rollups for short periods, monthly otherwise
+frequency, period_label = ("D", "Dia") if period_days <= 31 else ("MS", "Mês")
+current_display = current.assign(
+    Recomendação=current["label"].map(lambda label: DISPLAY_LABELS.get(label, DISPLAY_LABELS["unsure"])),
+    Região=current["estado"].str.upper().map(UF_REGIONS).fillna("Não identificada"),
+)
 
 # Charts row 1
 col1, col2 = st.columns(2)
 
 with col1:
-    st.subheader("Valor Total de Licitações por Mês")
+    st.subheader(f"Avisos Processados por {period_label}")
+    by_period = (
+        current_display.groupby([pd.Grouper(key="day", freq=frequency), "Recomendação"])["notices"]
+        .sum()
+        .reset_index()
+    )
     fig = px.bar(
-        df_monthly,
-        x="Data",
-        y="Valor",
-        labels={"Data": "Mês", "Valor": "Valor Total (R$)"},
+        by_period,
+        x="day",
+        y="notices",
+        color="Recomendação",
+        labels={"day": period_label, "notices": "Avisos"},
         template="plotly_white",
     )
     fig.update_layout(
         height=400,
         hovermode="x unified",
-        showlegend=False,
     )
     st.plotly_chart(fig, use_container_width=True)
 
 with col2:
-    st.subheader("Distribuição por Região")
-    fig = px.pie(
-        values=region_values,
-        names=regions,
-        hole=0.4,
-        template="plotly_white",
-    )
-    fig.update_layout(height=400)
+    if view_type == "Por Cliente":
+        st.subheader("Principais Clientes")
+        orgaos = notice_store.orgao_rollups(context_hash, start_date, end_date)
+        orgaos["Recomendação"] = orgaos["label"].map(lambda label: DISPLAY_LABELS.get(label, DISPLAY_LABELS["unsure"]))
+        top_orgaos = orgaos.groupby("orgao")["notices"].sum().nlargest(10).index
+        fig = px.bar(
+            orgaos[orgaos["orgao"].isin(top_orgaos)],
+            x="notices",
+            y="orgao",
+            color="Recomendação",
+            orientation="h",
+            labels={"notices": "Avisos", "orgao": "Cliente"},
+            template="plotly_white",
+        )
+        fig.update_layout(height=400, yaxis={"categoryorder": "total ascending"})
+    elif view_type == "Por Região":
+        st.subheader("Distribuição por Região")
+        by_region = current_display.groupby("Região")["notices"].sum()
+        fig = px.pie(
+            values=by_region.values,
+            names=by_region.index,
+            hole=0.4,
+            template="plotly_white",
+        )
+        fig.update_layout(height=400)
+    else:
+        st.subheader("Distribuição por Recomendação")
+        by_label = current_display.groupby("Recomendação")["notices"].sum()
+        fig = px.pie(
+            values=by_label.values,
+            names=by_label.index,
+            hole=0.4,
+            template="plotly_white",
+        )
+        fig.update_layout(height=400)
     st.plotly_chart(fig, use_container_width=True)
 
 # Charts row 2
 col1, col2 = st.columns(2)
 
 with col1:
-    st.subheader("Quantidade de Editais por Mês")
+    st.subheader(f"Resumos Gerados por {period_label}")
+    summaries_by_period = (
+        current_summaries.groupby(pd.Grouper(key="day", freq=frequency))["jobs"].sum().reset_index()
+    )
     fig = go.Figure()
     fig.add_trace(
         go.Scatter(
-            x=df_monthly["Data"],
-            y=df_monthly["Quantidade"],
+            x=summaries_by_period["day"],
+            y=summaries_by_period["jobs"],
             mode="lines+markers",
-            name="Quantidade",
+            name="Resumos",
             line=dict(width=3),
         )
     )
@@ -214,56 +271,37 @@ with col1:
         template="plotly_white",
         hovermode="x unified",
         showlegend=False,
-        yaxis_title="Quantidade de Editais",
-        xaxis_title="Mês",
+        yaxis_title="Resumos",
+        xaxis_title=period_label,
     )
     st.plotly_chart(fig, use_container_width=True)
 
 with col2:
-    st.subheader("Valor por Tipo de Licitação")
-    df_types = pd.DataFrame({"Tipo": tender_types, "Valor": type_values})
+    st.subheader("Recomendados por Estado")
+    by_state = (
+        current_display[current_display["label"] == "yes"]
+        .groupby("estado")["notices"]
+        .sum()
+        .sort_values(ascending=False)
+        .reset_index()
+    )
     fig = px.bar(
-        df_types,
-        x="Tipo",
-        y="Valor",
-        labels={"Valor": "Valor Total (R$)"},
+        by_state,
+        x="estado",
+        y="notices",
+        labels={"estado": "UF", "notices": "Avisos recomendados"},
         template="plotly_white",
     )
     fig.update_layout(height=400, showlegend=False)
     st.plotly_chart(fig, use_container_width=True)
 
 # Data table
-st.subheader("Últimas Licitações")
-df_table = pd.DataFrame(
-    {
-        "Data": pd.date_range(end=datetime.now(), periods=5, freq="D"),
-        "Órgão": [
-            "Prefeitura de São Paulo",
-            "Governo do Estado RS",
-            "Ministério da Saúde",
-            "Prefeitura de Curitiba",
-            "DNIT",
-        ],
-        "Objeto": [
-            "Construção de Hospital",
-            "Fornecimento de Medicamentos",
-            "Serviços de Limpeza",
-            "Manutenção de Escolas",
-            "Pavimentação de Rodovia",
-        ],
-        "Valor Estimado": np.random.randint(100000, 5000000, 5),
-        "Status": [
-            "Em Análise",
-            "Participando",
-            "Vencida",
-            "Em Análise",
-            "Não Participar",
-        ],
-    }
+st.subheader("Resumo por Estado")
+state_table = current_display.pivot_table(
+    index="estado", columns="Recomendação", values="notices", aggfunc="sum", fill_value=0
 )
-
+state_table["Total"] = state_table.sum(axis=1)
 st.dataframe(
-    df_table.style.format({"Valor Estimado": "R$ {:,.2f}"}),
-    hide_index=True,
+    state_table.sort_values("Total", ascending=False).rename_axis("UF"),
     use_container_width=True,
 )
@@ -0,0 +1 @@
+"""Background job subsystem: persistent queue, worker pool and job handlers."""
@@ -0,0 +1,219 @@
+"""Job handlers executed by the worker processes.
+
+Each handler receives the job payload and a report_progress callback and returns a
+JSON-serializable result. Heavy dependencies are imported inside the handlers so they
+are only loaded by the worker processes.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Signature: report_progress(progress, message, partial_result)
+ProgressReporter = Callable[[Optional[float], Optional[str], Optional[Dict[str, Any]]], None]
+
+# Job kinds
+TENDER_SUMMARY = "tender_summary"
+TENDER_NOTICE_PDF = "tender_notice_pdf"
+TENDER_NOTICE_PDFS = "tender_notice_pdfs"
+
+# Minimum interval between partial report updates written to the job store
+PARTIAL_REPORT_UPDATE_INTERVAL = float(os.getenv("LICITA_AI_JOB_PARTIAL_UPDATE_INTERVAL", 0.5))
+
+# Notice fields published while a bulletin batch is labeled, enough for the Boletins table
+STREAMED_NOTICE_FIELDS = ("source_file", "orgao", "estado", "numero_licitacao", "objeto", "data_hora_licitacao", "label")
+
+
+def run_tender_summary(payload: Dict[str, Any], report_progress: ProgressReporter) -> str:
+    """Run TenderAnalysisCrew.generate_summary for the payload's tender documents text.
+
+    Intermediate task outputs and the report being written are published as partial
+    results, so the UI can show them while the job runs. The run metrics are published
+    as a partial result once the summary is done.
+    """
+    from src.services import get_services
+
+    tender_documents_text = payload["tender_documents_text"]
+
+    async def generate(crew: Any) -> str:
+        total_chunks = len(crew.utils.split_text(tender_documents_text))
+        streamed_report = ""
+        last_report_update = 0.0
+        async for event in crew.stream_summary(tender_documents_text):
+            if event["type"] == "progress":
+                processed = event["processed_chunks"]
+                report_progress(
+                    processed / max(total_chunks, 1),
+                    f"Processando parte {processed}/{total_chunks}",
+                    None,
+                )
+            elif event["type"] == "task_output":
+                report_progress(
+                    None,
+                    "Redigindo relatório...",
+                    {"task_outputs": {event["task"]: event["output"]}},
+                )
+            elif event["type"] == "token":
+                streamed_report += event["token"]
+                if time.time() - last_report_update >= PARTIAL_REPORT_UPDATE_INTERVAL:
+                    report_progress(None, None, {"report": streamed_report})
+                    last_report_update = time.time()
+            elif event["type"] == "summary":
+                report_progress(None, None, {"metrics": event["metrics"]})
+                return str(event["summary"])
+
+    # The crew is built once per worker process and reused by its jobs
+    with get_services().crew_pool.acquire() as crew:
+        return asyncio.run(generate(crew))
+
+
+def _remove_uploads(pdf_paths: List[str]) -> None:
+    """Delete uploaded files of a finished job, ignoring files that are already gone."""
+    for pdf_path in pdf_paths:
+        try:
+            os.unlink(pdf_path)
+        except FileNotFoundError:
+            pass
+
+
+def run_tender_notice_pdf(payload: Dict[str, Any], report_progress: ProgressReporter) -> List[Dict[str, Any]]:
+    """Run TenderNoticeProcessor.process_pdf for an uploaded bulletin PDF.
+
+    The uploaded file is deleted once the job is done, whether it succeeded or not.
+    """
+    from src.services import get_services
+    from src.tender_notice_labeling.tender_notice_templates import (
+        TENDER_NOTICE_LABELING_TEMPLATE,
+        COMPANY_BUSINESS_DESCRIPTION,
+    )
+
+    try:
+        with get_services().notice_processor_pool.acquire() as processor:
+            df = asyncio.run(
+                processor.process_pdf(
+                    pdf_path=payload["pdf_path"],
+                    template=TENDER_NOTICE_LABELING_TEMPLATE,
+                    company_description=COMPANY_BUSINESS_DESCRIPTION,
+                    progress_callback=lambda message: report_progress(None, message, None),
+                    max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
+                )
+            )
+    finally:
+        _remove_uploads([payload["pdf_path"]])
+    if not df.empty:
+        df["source_file"] = payload.get("source_file", os.path.basename(payload["pdf_path"]))
+        df["processed_at"] = datetime.now()
+    return json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+
+
+def _unique_name(file_name: str, taken: Set[str]) -> str:
+    """Return file_name, or file_name with a " (n)" suffix if it is already taken."""
+    stem, extension = os.path.splitext(file_name)
+    unique_name, number = file_name, 2
+    while unique_name in taken:
+        unique_name, number = f"{stem} ({number}){extension}", number + 1
+    return unique_name
+
+
+def run_tender_notice_pdfs(payload: Dict[str, Any], report_progress: ProgressReporter) -> List[Dict[str, Any]]:
+    """Run TenderNoticeProcessor.process_pdfs for a batch of uploaded bulletin PDFs.
+
+    The labeled notices of every bulletin are saved in the notice store, and bulletins
+    already in the store for the current template and company description are not
+    processed again. Notices are published as the "notices" partial result as soon as they
+    are labeled, with their count per label in "label_counts", so the UI can show them while
+    the job runs. Files that failed are published as the "failed_files" partial result.
+    The uploaded files are deleted once the job is done, whether it succeeded or not.
+
+    Returns:
+        One {"file_hash", "source_file", "notice_count"} dict per bulletin available in the store
+    """
+    from src.tender_notice_labeling.label_store import labeling_context_hash
+    from src.tender_notice_labeling.notice_frame import notice_records
+    from src.tender_notice_labeling.notice_store import file_hash, get_notice_store
+    from src.services import get_services
+    from src.tender_notice_labeling.tender_notice_templates import (
+        TENDER_NOTICE_LABELING_TEMPLATE,
+        COMPANY_BUSINESS_DESCRIPTION,
+    )
+
+    notice_store = get_notice_store()
+    context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+    try:
+        hashes = {file["pdf_path"]: file.get("file_hash") or file_hash(file["pdf_path"]) for file in payload["files"]}
+        stored = notice_store.get_bulletins(list(hashes.values()), context_hash)
+        # Each new bulletin is processed once, under a file name no other bulletin of the batch uses,
+        # since the processor tells the notices of each file apart by name
+        to_process: List[Dict[str, Any]] = []
+        queued_hashes: Set[str] = set()
+        source_files: Set[str] = set()
+        for file in payload["files"]:
+            if hashes[file["pdf_path"]] in stored or hashes[file["pdf_path"]] in queued_hashes:
+                continue
+            source_file = _unique_name(file["source_file"], source_files)
+            queued_hashes.add(hashes[file["pdf_path"]])
+            source_files.add(source_file)
+            to_process.append({**file, "source_file": source_file})
+        if len(to_process) < len(payload["files"]):
+            report_progress(None, f"{len(payload['files']) - len(to_process)} boletim(ns) já processado(s)", None)
+
+        async def process(processor: Any) -> Any:
+            streamed_notices: List[Dict[str, Any]] = []
+            label_counts: Dict[str, int] = {}
+            last_notices_update = 0.0
+            async for event in processor.stream_pdfs(
+                [(file["source_file"], file["pdf_path"]) for file in to_process],
+                template=TENDER_NOTICE_LABELING_TEMPLATE,
+                company_description=COMPANY_BUSINESS_DESCRIPTION,
+                max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
+            ):
+                if event["type"] == "progress":
+                    report_progress(None, event["message"], None)
+                elif event["type"] == "notices":
+                    for notice in event["notices"]:
+                        streamed_notices.append({field: notice.get(field) for field in STREAMED_NOTICE_FIELDS})
+                        label_counts[notice.get("label")] = label_counts.get(notice.get("label"), 0) + 1
+                    if time.time() - last_notices_update >= PARTIAL_REPORT_UPDATE_INTERVAL:
+                        report_progress(None, None, {"notices": streamed_notices, "label_counts": label_counts})
+                        last_notices_update = time.time()
+                elif event["type"] == "result":
+                    report_progress(None, None, {"notices": streamed_notices, "label_counts": label_counts})
+                    return event["df"]
+
+        if to_process:
+            with get_services().notice_processor_pool.acquire() as processor:
+                df = asyncio.run(process(processor))
+            if df.attrs.get("failed_files"):
+                report_progress(None, None, {"failed_files": df.attrs["failed_files"]})
+            # Bulletins without notices are stored too, so they aren't processed again
+            records = notice_records(df) if not df.empty else []
+            for file in to_process:
+                if file["source_file"] in df.attrs.get("failed_files", {}):
+                    continue
+                notice_store.add_bulletin(
+                    hashes[file["pdf_path"]],
+                    context_hash,
+                    file["source_file"],
+                    [record for record in records if record["source_file"] == file["source_file"]],
+                )
+    finally:
+        _remove_uploads([file["pdf_path"] for file in payload["files"]])
+
+    bulletins = notice_store.get_bulletins(list(hashes.values()), context_hash)
+    return [
+        {"file_hash": bulletin["file_hash"], "source_file": bulletin["source_file"], "notice_count": bulletin["notice_count"]}
+        for bulletin in bulletins.values()
+    ]
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], ProgressReporter], Any]] = {
+    TENDER_SUMMARY: run_tender_summary,
+    TENDER_NOTICE_PDF: run_tender_notice_pdf,
+    TENDER_NOTICE_PDFS: run_tender_notice_pdfs,
+}
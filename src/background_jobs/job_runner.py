@@ -0,0 +1,154 @@
+"""Pool of worker processes that execute jobs from the persistent queue."""
+
+import os
+import time
+import logging
+import threading
+import traceback
+import multiprocessing
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from src.background_jobs.job_store import JobStore, current_worker_id
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_loop(db_path: str, poll_interval: float, stop_event) -> None:
+    """Claim and run jobs until stop_event is set. Runs in a worker process."""
+    from src.background_jobs.job_handlers import JOB_HANDLERS
+    from src.services import get_services
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = JobStore(db_path)
+    worker_id = current_worker_id()
+    get_services().warm_up_worker()
+    logger.info(f"Job worker {worker_id} started")
+
+    while not stop_event.is_set():
+        job = store.claim_next(worker_id)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            store.fail(job.id, f"Unknown job kind: {job.kind}")
+            continue
+
+        logger.info(f"Worker {worker_id} running {job.kind} job {job.id}")
+        try:
+            result = handler(
+                job.payload,
+                lambda progress, message, partial_result: store.update_progress(
+                    job.id, progress, message, partial_result
+                ),
+            )
+            store.complete(job.id, result)
+        except Exception as e:
+            logger.error(f"Error running job {job.id}: {traceback.format_exc()}")
+            store.fail(job.id, str(e))
+
+    logger.info(f"Job worker {worker_id} stopped")
+
+
+class JobRunner:
+    """Runs a pool of worker processes that poll the job store for queued jobs.
+
+    Throughput scales with the number of workers: each worker runs one job at a time,
+    independently from the Streamlit script threads.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        num_workers: int = int(os.getenv("LICITA_AI_JOB_WORKERS", 2)),
+        poll_interval: float = float(os.getenv("LICITA_AI_JOB_POLL_INTERVAL", 1.0)),
+    ):
+        """Initialize the job runner.
+
+        Args:
+            db_path: Path to the job store database. Defaults to the JobStore default.
+            num_workers: Number of worker processes (default: 2)
+            poll_interval: Seconds an idle worker waits before polling the queue again
+        """
+        self.store = JobStore(db_path)
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        # Spawn instead of fork: the Streamlit server is multi-threaded
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._workers: List[multiprocessing.Process] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def _spawn_worker(self, index: int) -> multiprocessing.Process:
+        worker = self._context.Process(
+            target=_worker_loop,
+            args=(self.store.db_path, self.poll_interval, self._stop_event),
+            name=f"licita-ai-job-worker-{index}",
+            daemon=True,
+        )
+        worker.start()
+        return worker
+
+    def start(self) -> None:
+        """Recover orphaned jobs and start the worker processes."""
+        if self.is_running:
+            return
+        self.store.requeue_orphaned_jobs()
+        self._stop_event.clear()
+        self._workers = [self._spawn_worker(i) for i in range(self.num_workers)]
+        logger.info(f"Started {self.num_workers} job worker(s)")
+
+    def replace_dead_workers(self) -> int:
+        """Requeue the jobs of workers that died (OOM, crash in a PDF backend) and respawn them.
+
+        Returns:
+            int: Number of workers respawned
+        """
+        if self._stop_event.is_set():
+            return 0
+        dead = [index for index, worker in enumerate(self._workers) if not worker.is_alive()]
+        if not dead:
+            return 0
+        for index in dead:
+            logger.warning(f"Job worker {self._workers[index].name} exited with code {self._workers[index].exitcode}")
+        # is_alive() reaped the dead workers, so their pids no longer look alive
+        self.store.requeue_orphaned_jobs()
+        for index in dead:
+            self._workers[index] = self._spawn_worker(index)
+        logger.info(f"Respawned {len(dead)} job worker(s)")
+        return len(dead)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask the workers to stop after their current job and wait for them."""
+        self._stop_event.set()
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.time(), 0))
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
+
+
+_job_runner: Optional[JobRunner] = None
+_job_runner_lock = threading.Lock()
+
+
+def ensure_job_runner() -> JobRunner:
+    """Start the process-wide job runner on first use, replace its dead workers and return it."""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner()
+        if not _job_runner.is_running:
+            _job_runner.start()
+        else:
+            _job_runner.replace_dead_workers()
+    return _job_runner
@@ -0,0 +1,338 @@
+"""SQLite-backed persistent queue for background jobs."""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    partial_result TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at);
+"""
+
+
+@dataclass
+class Job:
+    """A unit of work stored in the job queue."""
+    id: str
+    kind: str
+    status: str
+    payload: Dict[str, Any]
+    progress: float
+    progress_message: Optional[str]
+    partial_result: Dict[str, Any]
+    result: Any
+    error: Optional[str]
+    attempts: int
+    worker_id: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            payload=json.loads(row["payload"]),
+            progress=row["progress"],
+            progress_message=row["progress_message"],
+            partial_result=json.loads(row["partial_result"]) if row["partial_result"] else {},
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            worker_id=row["worker_id"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+        )
+
+
+def current_worker_id() -> str:
+    """Identify the current process as a worker (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Persistent job queue shared by the Streamlit server and the worker processes."""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: int = int(os.getenv("LICITA_AI_JOB_MAX_ATTEMPTS", 3))):
+        """Initialize the job store.
+
+        Args:
+            db_path: Path to the SQLite database. Defaults to LICITA_AI_JOBS_DB_PATH or data/jobs.sqlite3.
+            max_attempts: Maximum number of times a job is started before it is marked as failed
+        """
+        self.db_path = db_path or os.getenv("LICITA_AI_JOBS_DB_PATH", "data/jobs.sqlite3")
+        self.max_attempts = max_attempts
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Add a job to the queue.
+
+        Args:
+            kind: Name of the job handler that will run the job
+            payload: JSON-serializable job arguments
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload), time.time()),
+            )
+        logger.info(f"Enqueued {kind} job {job_id}")
+        return job_id
+
+    def claim_next(self, worker_id: str) -> Optional[Job]:
+        """Atomically move the oldest queued job to running and return it."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = ?, worker_id = ?, started_at = ?, attempts = attempts + 1
+                    WHERE id = ?
+                    """,
+                    (RUNNING, worker_id, time.time(), row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def update_progress(
+        self,
+        job_id: str,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+        partial_result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record the progress of a running job.
+
+        Args:
+            job_id: The job id
+            progress: Optional completion fraction between 0 and 1
+            message: Optional human-readable status message
+            partial_result: Optional intermediate results, merged into the stored ones
+        """
+        with self._connect() as conn:
+            if progress is not None:
+                conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+            if message is not None:
+                conn.execute("UPDATE jobs SET progress_message = ? WHERE id = ?", (message, job_id))
+            if partial_result:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT partial_result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                merged = json.loads(row["partial_result"]) if row and row["partial_result"] else {}
+                merged.update(partial_result)
+                conn.execute(
+                    "UPDATE jobs SET partial_result = ? WHERE id = ?",
+                    (json.dumps(merged), job_id),
+                )
+                conn.execute("COMMIT")
+
+    def complete(self, job_id: str, result: Any) -> None:
+        """Mark a job as succeeded and store its JSON-serializable result."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, progress = 1, finished_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id),
+            )
+        logger.info(f"Job {job_id} succeeded")
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Mark a job as failed."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+        logger.error(f"Job {job_id} failed: {error}")
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet.
+
+        Returns:
+            bool: True if the job was cancelled
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """List the most recent jobs, optionally filtered by status."""
+        query = "SELECT * FROM jobs"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def daily_job_stats(self, kind: str, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Succeeded jobs of a kind per finishing day, for history charts.
+
+        Args:
+            kind: Job kind
+            since: Only jobs finished at or after this timestamp
+
+        Returns:
+            List of {"day", "jobs", "avg_seconds", "cost_usd"} dicts, oldest day first. The
+            cost sums the cost_usd of the "metrics" partial results, when published.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT date(finished_at, 'unixepoch', 'localtime') AS day, COUNT(*) AS jobs,
+                    AVG(finished_at - started_at) AS avg_seconds,
+                    COALESCE(SUM(json_extract(partial_result, '$.metrics.cost_usd')), 0) AS cost_usd
+                FROM jobs
+                WHERE kind = ? AND status = ? AND finished_at >= ?
+                GROUP BY day ORDER BY day
+                """,
+                (kind, SUCCEEDED, since or 0),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def requeue_orphaned_jobs(self) -> int:
+        """Requeue running jobs whose worker process on this host is gone.
+
+        Jobs that already used up max_attempts are marked as failed instead.
+
+        Returns:
+            int: Number of jobs recovered
+        """
+        hostname = socket.gethostname()
+        recovered = 0
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_id, attempts FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            for row in rows:
+                host, _, pid = (row["worker_id"] or "").rpartition(":")
+                if host != hostname or not pid.isdigit() or _pid_is_alive(int(pid)):
+                    continue
+                if row["attempts"] >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (FAILED, "Worker process exited before finishing the job", time.time(), row["id"]),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker_id = NULL WHERE id = ?",
+                        (QUEUED, row["id"]),
+                    )
+                recovered += 1
+        if recovered:
+            logger.warning(f"Recovered {recovered} orphaned job(s)")
+        return recovered
+
+
+@lru_cache(maxsize=None)
+def get_job_store(db_path: Optional[str] = None) -> JobStore:
+    """Return the process-wide job store, so page reruns don't recreate the schema."""
+    return JobStore(db_path)
+
+
+def store_upload(file_name: str, data: bytes, upload_dir: Optional[str] = None) -> str:
+    """Persist an uploaded file so a worker process can read it.
+
+    Args:
+        file_name: Original file name, kept as a suffix for readability
+        data: File contents
+        upload_dir: Target directory. Defaults to LICITA_AI_JOBS_UPLOAD_DIR or data/jobs/uploads.
+
+    Returns:
+        str: Path of the stored file
+    """
+    upload_dir = upload_dir or os.getenv("LICITA_AI_JOBS_UPLOAD_DIR", "data/jobs/uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{os.path.basename(file_name)}")
+    with open(path, "wb") as upload_file:
+        upload_file.write(data)
+    return path
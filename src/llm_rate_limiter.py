@@ -0,0 +1,321 @@
+"""Token-aware rate limiting of the Azure OpenAI calls shared by all pipelines.
+
+Every LLM request reserves one request and its estimated token count in a sliding
+one-minute window before it is sent, and is reconciled with the actual usage reported
+in the response once it completes. Requests wait while either the requests-per-minute
+(RPM) or tokens-per-minute (TPM) budget of the deployment is exhausted, so concurrent
+summaries and bulletin batches queue up instead of cascading into 429 errors.
+
+The window is kept in memory and shared by the whole process. Setting
+LICITA_AI_LLM_RATE_LIMIT_BACKEND=sqlite shares it across processes (Streamlit server and
+job workers) through a SQLite database at LICITA_AI_LLM_RATE_LIMIT_DB_PATH.
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple, Union
+
+import tiktoken
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+
+# Backends
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+RATE_LIMIT_BACKENDS = (BACKEND_MEMORY, BACKEND_SQLITE)
+
+# Tokens reserved for the completion when the caller gives no estimate
+DEFAULT_COMPLETION_TOKENS = int(os.getenv("LICITA_AI_LLM_DEFAULT_COMPLETION_TOKENS", 1000))
+
+
+def count_tokens(messages: Union[str, List[Any]], encoding: str = "o200k_base") -> int:
+    """Count the prompt tokens of a string, LangChain messages or OpenAI-style message dicts."""
+    enc = tiktoken.get_encoding(encoding)
+    if isinstance(messages, str):
+        return len(enc.encode(messages))
+    total = 0
+    for message in messages:
+        content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+        # Role and message framing add a few tokens per message
+        total += len(enc.encode(content if isinstance(content, str) else str(content))) + 4
+    return total
+
+
+def usage_tokens(message: Any) -> Optional[int]:
+    """Total tokens reported by a LangChain AIMessage, or None if the response carries no usage."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage and usage.get("total_tokens") is not None:
+        return usage["total_tokens"]
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens")
+
+
+class _MemoryWindow:
+    """Sliding window of reservations kept in process memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # reservation id -> (timestamp, tokens), in timestamp order
+        self._entries: "OrderedDict[int, Tuple[float, int]]" = OrderedDict()
+
+    def try_reserve(self, tokens: int, rpm: int, tpm: int, now: float) -> Tuple[Optional[int], float]:
+        with self._lock:
+            while self._entries:
+                reservation_id, (timestamp, _) = next(iter(self._entries.items()))
+                if timestamp > now - WINDOW_SECONDS:
+                    break
+                del self._entries[reservation_id]
+
+            wait = _wait_time(list(self._entries.values()), tokens, rpm, tpm, now)
+            if wait > 0:
+                return None, wait
+            self._next_id += 1
+            self._entries[self._next_id] = (now, tokens)
+            return self._next_id, 0.0
+
+    def reconcile(self, reservation_id: int, tokens: int) -> None:
+        with self._lock:
+            if reservation_id in self._entries:
+                timestamp, _ = self._entries[reservation_id]
+                self._entries[reservation_id] = (timestamp, tokens)
+
+
+class _SQLiteWindow:
+    """Sliding window of reservations shared by every process using the same database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp REAL NOT NULL,
+                    tokens INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_requests_timestamp ON llm_requests (timestamp)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def try_reserve(self, tokens: int, rpm: int, tpm: int, now: float) -> Tuple[Optional[int], float]:
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE serializes reservations across processes
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM llm_requests WHERE timestamp <= ?", (now - WINDOW_SECONDS,))
+            entries = conn.execute("SELECT timestamp, tokens FROM llm_requests ORDER BY timestamp").fetchall()
+            wait = _wait_time(entries, tokens, rpm, tpm, now)
+            if wait > 0:
+                conn.execute("COMMIT")
+                return None, wait
+            cursor = conn.execute(
+                "INSERT INTO llm_requests (timestamp, tokens) VALUES (?, ?)", (now, tokens)
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid, 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reconcile(self, reservation_id: int, tokens: int) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE llm_requests SET tokens = ? WHERE id = ?", (tokens, reservation_id))
+
+
+def _wait_time(entries: List[Tuple[float, int]], tokens: int, rpm: int, tpm: int, now: float) -> float:
+    """Seconds until a request of the given size fits in the window (0 if it fits now).
+
+    Args:
+        entries: (timestamp, tokens) of the reservations in the window, oldest first
+        tokens: Tokens of the new request
+        rpm: Requests per minute (0 for unlimited)
+        tpm: Tokens per minute (0 for unlimited)
+        now: Current time
+    """
+    wait = 0.0
+    if rpm and len(entries) >= rpm:
+        # The oldest requests must leave the window until there is room for one more
+        wait = max(wait, entries[len(entries) - rpm][0] + WINDOW_SECONDS - now)
+    if tpm:
+        excess = sum(entry_tokens for _, entry_tokens in entries) + tokens - tpm
+        for timestamp, entry_tokens in entries:
+            if excess <= 0:
+                break
+            excess -= entry_tokens
+            wait = max(wait, timestamp + WINDOW_SECONDS - now)
+    return wait
+
+
+class RateLimitReservation:
+    """A request admitted by the rate limiter, to be reconciled with its actual usage."""
+
+    def __init__(self, limiter: "LLMRateLimiter", reservation_id: Optional[int], estimated_tokens: int):
+        self.limiter = limiter
+        self.reservation_id = reservation_id
+        self.estimated_tokens = estimated_tokens
+
+    def reconcile(self, actual_tokens: Optional[int]) -> None:
+        """Replace the estimated tokens of the request with the tokens it actually used."""
+        if actual_tokens is None or self.reservation_id is None:
+            return
+        self.limiter._window.reconcile(self.reservation_id, actual_tokens)
+
+    def reconcile_response(self, message: Any) -> None:
+        """Reconcile with the usage reported by a LangChain AIMessage."""
+        self.reconcile(usage_tokens(message))
+
+
+class LLMRateLimiter:
+    """Sliding-window limiter of LLM requests and tokens per minute."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        backend: Optional[str] = None,
+        db_path: Optional[str] = None,
+    ):
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_minute: RPM quota, 0 for unlimited. Defaults to LICITA_AI_LLM_RPM (0).
+            tokens_per_minute: TPM quota, 0 for unlimited. Defaults to LICITA_AI_LLM_TPM (0).
+            backend: "memory" or "sqlite". Defaults to LICITA_AI_LLM_RATE_LIMIT_BACKEND ("memory").
+            db_path: Database of the sqlite backend. Defaults to LICITA_AI_LLM_RATE_LIMIT_DB_PATH
+                or data/llm_rate_limit.sqlite3.
+        """
+        self.requests_per_minute = (
+            requests_per_minute
+            if requests_per_minute is not None
+            else int(os.getenv("LICITA_AI_LLM_RPM", 0))
+        )
+        self.tokens_per_minute = (
+            tokens_per_minute
+            if tokens_per_minute is not None
+            else int(os.getenv("LICITA_AI_LLM_TPM", 0))
+        )
+        self.backend = backend or os.getenv("LICITA_AI_LLM_RATE_LIMIT_BACKEND", BACKEND_MEMORY)
+        if self.backend not in RATE_LIMIT_BACKENDS:
+            raise ValueError(
+                f"Invalid rate limit backend '{self.backend}'. Expected one of: {', '.join(RATE_LIMIT_BACKENDS)}"
+            )
+        self._window = (
+            _SQLiteWindow(
+                db_path or os.getenv("LICITA_AI_LLM_RATE_LIMIT_DB_PATH", "data/llm_rate_limit.sqlite3")
+            )
+            if self.backend == BACKEND_SQLITE
+            else _MemoryWindow()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _try_acquire(self, estimated_tokens: int) -> Tuple[Optional[RateLimitReservation], float]:
+        if not self.enabled:
+            return RateLimitReservation(self, None, estimated_tokens), 0.0
+        # A request larger than the whole TPM budget would never fit; let it use the full window
+        tokens = min(estimated_tokens, self.tokens_per_minute) if self.tokens_per_minute else estimated_tokens
+        reservation_id, wait = self._window.try_reserve(
+            tokens, self.requests_per_minute, self.tokens_per_minute, time.time()
+        )
+        if reservation_id is None:
+            return None, wait
+        return RateLimitReservation(self, reservation_id, estimated_tokens), 0.0
+
+    def acquire(self, estimated_tokens: int) -> RateLimitReservation:
+        """Block the calling thread until the request fits in the RPM and TPM budgets."""
+        while True:
+            reservation, wait = self._try_acquire(estimated_tokens)
+            if reservation is not None:
+                return reservation
+            logger.debug(f"Rate limit reached, waiting {wait:.2f} seconds")
+            time.sleep(wait)
+
+    async def acquire_async(self, estimated_tokens: int) -> RateLimitReservation:
+        """Wait without blocking the event loop until the request fits in the RPM and TPM budgets."""
+        while True:
+            reservation, wait = self._try_acquire(estimated_tokens)
+            if reservation is not None:
+                return reservation
+            logger.debug(f"Rate limit reached, waiting {wait:.2f} seconds")
+            await asyncio.sleep(wait)
+
+    @contextmanager
+    def limit(
+        self, prompt: Union[str, List[Any]], completion_tokens: int = DEFAULT_COMPLETION_TOKENS
+    ) -> Iterator[RateLimitReservation]:
+        """Acquire a reservation for a prompt and its expected completion.
+
+        Usage:
+            with limiter.limit(messages) as reservation:
+                response = llm.invoke(messages)
+                reservation.reconcile_response(response)
+
+        If the block raises (a 429, a timeout), the request keeps its place in the RPM budget
+        but its estimated tokens are released.
+        """
+        if not self.enabled:
+            # Skip tokenizing the prompt when there is nothing to limit
+            yield RateLimitReservation(self, None, completion_tokens)
+            return
+        reservation = self.acquire(count_tokens(prompt) + completion_tokens)
+        try:
+            yield reservation
+        except BaseException:
+            reservation.reconcile(0)
+            raise
+
+    @asynccontextmanager
+    async def limit_async(
+        self, prompt: Union[str, List[Any]], completion_tokens: int = DEFAULT_COMPLETION_TOKENS
+    ) -> AsyncIterator[RateLimitReservation]:
+        """Async version of limit()."""
+        if not self.enabled:
+            yield RateLimitReservation(self, None, completion_tokens)
+            return
+        reservation = await self.acquire_async(count_tokens(prompt) + completion_tokens)
+        try:
+            yield reservation
+        except BaseException:
+            reservation.reconcile(0)
+            raise
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the process-wide rate limiter, built from the environment on first use."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = LLMRateLimiter()
+            if _rate_limiter.enabled:
+                logger.info(
+                    f"LLM rate limit: {_rate_limiter.requests_per_minute or 'unlimited'} RPM, "
+                    f"{_rate_limiter.tokens_per_minute or 'unlimited'} TPM ({_rate_limiter.backend} backend)"
+                )
+    return _rate_limiter
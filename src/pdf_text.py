@@ -0,0 +1,162 @@
+"""Page-by-page PDF text extraction with selectable backends, shared by both pipelines.
+
+Backends:
+    - pypdf: pypdf's extract_text, the text PyPDFLoader produced for tender documents
+    - pdfminer: pdfminer.six with its default layout analysis, the text bulletins were read with
+    - pdfminer-fast: pdfminer.six without the hierarchical box ordering (LAParams boxes_flow=None),
+      much faster on dense pages; text flows top to bottom per column instead
+    - pypdfium2: PDFium's text extraction, when pypdfium2 is installed
+
+Pages are split into ranges extracted on a shared process pool, so large documents use
+every core. Small documents, and callers already running in a daemon process (the job
+workers, which can't start child processes), extract in-process.
+
+benchmarks/pdf_extraction.py compares the speed and text fidelity of the backends.
+"""
+
+import io
+import os
+import logging
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Processes extracting pages of large documents (1 = always in-process)
+MAX_WORKERS = int(os.getenv("LICITA_AI_PDF_WORKERS", 0)) or min(os.cpu_count() or 1, 8)
+# Pages per extraction task; documents with at most this many pages are extracted in-process
+PAGES_PER_TASK = int(os.getenv("LICITA_AI_PDF_PAGES_PER_TASK", 8))
+
+
+def _extract_pypdf(path: str, page_indexes: Sequence[int]) -> List[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[index].extract_text() for index in page_indexes]
+
+
+def _pdfminer_extractor(boxes_flow: Optional[float]) -> Callable[[str, Sequence[int]], List[str]]:
+    def extract(path: str, page_indexes: Sequence[int]) -> List[str]:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        texts = []
+        output = io.StringIO()
+        manager = PDFResourceManager(caching=True)
+        converter = TextConverter(manager, output, codec="utf-8", laparams=LAParams(boxes_flow=boxes_flow))
+        interpreter = PDFPageInterpreter(manager, converter)
+        with open(path, "rb") as pdf_file:
+            for page in PDFPage.get_pages(pdf_file, pagenos=set(page_indexes)):
+                interpreter.process_page(page)
+                # Same text as pdfminer.high_level.extract_text, which ends every page with a form feed
+                texts.append(output.getvalue().removesuffix("\f"))
+                output.seek(0)
+                output.truncate()
+        converter.close()
+        return texts
+
+    return extract
+
+
+def _extract_pypdfium2(path: str, page_indexes: Sequence[int]) -> List[str]:
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(path)
+    try:
+        return [
+            document[index].get_textpage().get_text_range().replace("\r\n", "\n")
+            for index in page_indexes
+        ]
+    finally:
+        document.close()
+
+
+BACKENDS: Dict[str, Callable[[str, Sequence[int]], List[str]]] = {
+    "pypdf": _extract_pypdf,
+    "pdfminer": _pdfminer_extractor(boxes_flow=0.5),
+    "pdfminer-fast": _pdfminer_extractor(boxes_flow=None),
+    "pypdfium2": _extract_pypdfium2,
+}
+
+_BACKEND_MODULES = {"pypdf": "pypdf", "pdfminer": "pdfminer", "pdfminer-fast": "pdfminer", "pypdfium2": "pypdfium2"}
+
+
+def available_backends() -> List[str]:
+    """Return the backends whose library is installed."""
+    return [backend for backend in BACKENDS if importlib.util.find_spec(_BACKEND_MODULES[backend])]
+
+
+def page_count(path: str) -> int:
+    """Return the number of pages of a PDF."""
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def _extract_range(backend: str, path: str, start: int, stop: int) -> List[str]:
+    return BACKENDS[backend](path, range(start, stop))
+
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the process-wide pool with max_workers processes, started on first use."""
+    with _pools_lock:
+        if max_workers not in _pools:
+            # Spawn instead of fork: the Streamlit server is multi-threaded
+            _pools[max_workers] = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[max_workers]
+
+
+def extract_pages(path: str, backend: str = "pypdf", max_workers: Optional[int] = None) -> List[str]:
+    """Extract the text of every page of a PDF.
+
+    Args:
+        path: Path to the PDF
+        backend: One of BACKENDS
+        max_workers: Extraction processes. Defaults to LICITA_AI_PDF_WORKERS or the number of CPUs (up to 8).
+
+    Returns:
+        List[str]: The text of each page, in page order
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    pages = page_count(path)
+    max_workers = max_workers or MAX_WORKERS
+    if max_workers <= 1 or pages <= PAGES_PER_TASK or multiprocessing.current_process().daemon:
+        return BACKENDS[backend](path, range(pages))
+
+    starts = range(0, pages, PAGES_PER_TASK)
+    ranges = [(backend, path, start, min(start + PAGES_PER_TASK, pages)) for start in starts]
+    try:
+        results = list(_get_pool(max_workers).map(_extract_range, *zip(*ranges)))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a new pool next time and finish in-process
+        logger.warning(f"PDF extraction pool broke while extracting {path}, extracting in-process")
+        with _pools_lock:
+            _pools.pop(max_workers, None)
+        return BACKENDS[backend](path, range(pages))
+    texts = [text for page_texts in results for text in page_texts]
+    logger.debug(f"Extracted {pages} pages of {path} with {backend} in {len(ranges)} tasks")
+    return texts
+
+
+def extract_text(path: str, backend: str = "pypdf", max_workers: Optional[int] = None) -> str:
+    """Extract the text of a PDF, each page followed by a form feed as in pdfminer's extract_text.
+
+    See extract_pages for the arguments.
+    """
+    return "".join(f"{text}\f" for text in extract_pages(path, backend, max_workers))
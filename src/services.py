@@ -0,0 +1,244 @@
+"""Services shared by every Streamlit session and job of a process, built once and reused.
+
+Streamlit re-executes page modules on every rerun, so clients and stores created at page
+level were rebuilt on each interaction. get_services() returns the process-wide
+ServiceContainer instead: its services are built on first use under a lock and reused by
+all sessions. The summary crew and the bulletin processor are costly to build and hold the
+state of the run using them, so they are lent to one caller at a time from a ResourcePool;
+each pooled crew has its own agents, tasks and LLMs. Job workers run one job at a time, so
+the pools keep a single object per process by default.
+
+warm_up() runs once per process. In the Streamlit server, the first script run builds the
+page services and starts the job workers, so the first summary or bulletin batch doesn't
+wait for them. In a job worker, it builds a crew and a bulletin processor before the first
+job is claimed. Shutdown hooks, such as stopping the job workers, run when the process exits.
+"""
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+from functools import lru_cache
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Summary crews and bulletin processors kept per process, one per concurrent caller
+CREW_POOL_SIZE = int(os.getenv("LICITA_AI_CREW_POOL_SIZE", 1))
+NOTICE_PROCESSOR_POOL_SIZE = int(os.getenv("LICITA_AI_NOTICE_PROCESSOR_POOL_SIZE", 1))
+# Build services and start the job workers when the server starts instead of on first use
+WARM_UP = os.getenv("LICITA_AI_WARM_UP", "true").lower() == "true"
+
+
+class ResourcePool(Generic[T]):
+    """Bounded pool of reusable objects, each used by one caller at a time.
+
+    Objects are built on demand, up to max_size; further callers wait for one to be released.
+    """
+
+    def __init__(self, factory: Callable[[], T], max_size: int):
+        """Initialize the pool.
+
+        Args:
+            factory: Builds a new object
+            max_size: Objects built at most
+        """
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self._idle: "queue.LifoQueue[T]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._built = 0
+
+    @property
+    def size(self) -> int:
+        """Number of objects built so far."""
+        return self._built
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[T]:
+        """Lend an object for the duration of the block, building one if none is idle.
+
+        Raises:
+            TimeoutError: If no object is released within timeout seconds
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No pooled object released within {timeout}s")
+        try:
+            item = self._take()
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            yield item
+        finally:
+            self._idle.put(item)
+            self._slots.release()
+
+    def _take(self) -> T:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            item = self.factory()
+            with self._lock:
+                self._built += 1
+            return item
+
+    def warm_up(self, count: int = 1) -> None:
+        """Build objects ahead of use until at least count (at most max_size) exist."""
+        with ExitStack() as stack:
+            for _ in range(min(count, self.max_size)):
+                stack.enter_context(self.acquire())
+
+
+def _build_crew() -> Any:
+    from src.tender_analysis_crew.crew import TenderAnalysisCrew
+
+    return TenderAnalysisCrew()
+
+
+def _build_notice_processor() -> Any:
+    from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+
+    return TenderNoticeProcessor()
+
+
+class ServiceContainer:
+    """Lazily built services of a process, safe to use from concurrent sessions."""
+
+    def __init__(self):
+        self._services: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._shutdown_hooks: List[Callable[[], None]] = []
+        self._warmed_up = False
+        self.crew_pool: ResourcePool = ResourcePool(_build_crew, CREW_POOL_SIZE)
+        self.notice_processor_pool: ResourcePool = ResourcePool(_build_notice_processor, NOTICE_PROCESSOR_POOL_SIZE)
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """Return the service registered under name, building it with factory on first use."""
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = factory()
+                    self._services[name] = service
+                    logger.debug(f"Built service {name}")
+        return service
+
+    @property
+    def dify_client(self) -> Any:
+        from src.dify_client import DifyClient
+
+        return self.get("dify_client", DifyClient)
+
+    @property
+    def analysis_utils(self) -> Any:
+        from src.tender_analysis_crew.utils import TenderAnalysisUtils
+
+        return self.get("analysis_utils", TenderAnalysisUtils)
+
+    @property
+    def job_store(self) -> Any:
+        from src.background_jobs.job_store import get_job_store
+
+        return self.get("job_store", get_job_store)
+
+    @property
+    def report_exporter(self) -> Any:
+        from src.tender_analysis_crew.report_export import get_report_exporter
+
+        return self.get("report_exporter", get_report_exporter)
+
+    @property
+    def notice_store(self) -> Any:
+        from src.tender_notice_labeling.notice_store import get_notice_store
+
+        return self.get("notice_store", get_notice_store)
+
+    @property
+    def label_store(self) -> Any:
+        from src.tender_notice_labeling.label_store import get_label_store
+
+        return self.get("label_store", get_label_store)
+
+    @property
+    def notice_exporter(self) -> Any:
+        from src.tender_notice_labeling.notice_export import get_notice_exporter
+
+        return self.get("notice_exporter", get_notice_exporter)
+
+    def job_runner(self) -> Any:
+        """Return the job runner, starting (or restarting) its workers if they aren't running."""
+        from src.background_jobs.job_runner import ensure_job_runner
+
+        with self._lock:
+            first_start = "job_runner" not in self._services
+            runner = self._services["job_runner"] = ensure_job_runner()
+            if first_start:
+                self.on_shutdown(runner.stop)
+        return runner
+
+    def on_shutdown(self, hook: Callable[[], None]) -> None:
+        """Register a callable run by shutdown(), in reverse registration order."""
+        with self._lock:
+            self._shutdown_hooks.append(hook)
+
+    def shutdown(self) -> None:
+        """Run the shutdown hooks. Runs when the process exits."""
+        with self._lock:
+            hooks, self._shutdown_hooks = self._shutdown_hooks[::-1], []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning(f"Shutdown hook {hook!r} failed: {e}")
+
+    def warm_up(self) -> None:
+        """Build the page services and start the job workers, once per process.
+
+        Does nothing when LICITA_AI_WARM_UP is false; services are then built on first use.
+        """
+        # Spawned children (job workers, PDF extraction) import the running page as their main
+        # module, since Streamlit runs pages as __main__; only the server process warms up
+        if self._warmed_up or not WARM_UP or multiprocessing.current_process().name != "MainProcess":
+            return
+        with self._lock:
+            if self._warmed_up:
+                return
+            self._warmed_up = True
+            for name in ("job_store", "report_exporter", "notice_store", "label_store", "notice_exporter", "analysis_utils"):
+                getattr(self, name)
+            try:
+                self.dify_client
+            except EnvironmentError as e:
+                logger.warning(f"Dify client not available: {e}")
+            self.job_runner()
+        logger.info("Services warmed up")
+
+    def warm_up_worker(self) -> None:
+        """Build a crew and a bulletin processor ahead of the first job of a worker process (see warm_up)."""
+        if not WARM_UP:
+            return
+        for pool in (self.crew_pool, self.notice_processor_pool):
+            try:
+                pool.warm_up()
+            except Exception as e:
+                logger.warning(f"Could not warm up {pool.factory.__name__}: {e}")
+
+
+@lru_cache(maxsize=None)
+def get_services() -> ServiceContainer:
+    """Return the process-wide service container."""
+    services = ServiceContainer()
+    atexit.register(services.shutdown)
+    return services
@@ -1,59 +1,84 @@
 import os
 from typing import Any, Dict, List
 from dotenv import load_dotenv
-from crewai import Agent
-from crewai.llm import LLM
-import litellm
 
 # Load environment variables
 load_dotenv()
 
+AGENT_NAMES = ("analista_de_licitacoes", "compilador_de_relatorio", "revisor_de_relatório")
 
-analista_de_licitacoes = Agent(
-    role="Analista de Licitações de Obras Públicas de Saneamento",
-    goal=(
-        "Analisar atentamente os documentos de uma licitação obras públicas de saneamento para identificar, extrair e categorizar as seções e trechos relevantes que possam ser utilizados para a tomada de decisões táticas e estratégicas durante a fase de preparo para participar de uma licitação."
-    ),
-    backstory=(
-        "Analista de Licitações em uma empresa que fabrica equipamentos eletromecânicos E executa obras complexas de saneamento básico no Brasil, para clientes como Sabesp, Sanepar, Casan e Corsan. Especialista em licitações públicas no setor de saneamento. Detalhista e metódico, identifica e extrai com precisão os trechos mais relevantes contidos nos documentos de cada licitação, munindo sua empresa de informações e dados fundamentados e confiáveis."
-    ),
-    llm=LLM(
-        model=os.getenv(key="TENDER_ANALYSIS_MODEL", default="azure/gpt-4o"),
-        temperature=float(os.getenv(key="TENDER_ANALYSIS_TEMPERATURE", default=0.2)),
+
+# Role, goal, backstory and LLM settings of each agent. Agents and LLMs are mutable (crewai
+# keeps per-run state on them), so only this configuration is shared and build_agents()
+# makes fresh objects for every crew.
+AGENT_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "analista_de_licitacoes": {
+        "role": "Analista de Licitações de Obras Públicas de Saneamento",
+        "goal": (
+            "Analisar atentamente os documentos de uma licitação obras públicas de saneamento para identificar, extrair e categorizar as seções e trechos relevantes que possam ser utilizados para a tomada de decisões táticas e estratégicas durante a fase de preparo para participar de uma licitação."
+        ),
+        "backstory": (
+            "Analista de Licitações em uma empresa que fabrica equipamentos eletromecânicos E executa obras complexas de saneamento básico no Brasil, para clientes como Sabesp, Sanepar, Casan e Corsan. Especialista em licitações públicas no setor de saneamento. Detalhista e metódico, identifica e extrai com precisão os trechos mais relevantes contidos nos documentos de cada licitação, munindo sua empresa de informações e dados fundamentados e confiáveis."
+        ),
+        "streaming": False,
+        "model": os.getenv(key="TENDER_ANALYSIS_MODEL", default="azure/gpt-4o"),
+        "temperature": float(os.getenv(key="TENDER_ANALYSIS_TEMPERATURE", default=0.2)),
+    },
+    "compilador_de_relatorio": {
+        "role": "Compilador de Relatórios de Licitações",
+        "goal": (
+            "Compilar e comunicar as informações recebidas em um relatório abrangente, claro e objetivo, que possa ser utilizado com confiança para a tomada de decisões estratégicas e táticas durante a fase de preparo para participar de uma licitação."
         ),
-    verbose=True,
-    allow_delegation=False,
-)
-
-compilador_de_relatorio = Agent(
-    role="Compilador de Relatórios de Licitações",
-    goal=(
-        "Compilar e comunicar as informações recebidas em um relatório abrangente, claro e objetivo, que possa ser utilizado com confiança para a tomada de decisões estratégicas e táticas durante a fase de preparo para participar de uma licitação."
-    ),
-    backstory=(
-        "Experiente compilador de resumos e relatórios que transmitem com precisão e clareza as informações mais pertinentes referentes a cada processo licitatório para permitir à gerência e à direção de sua empresa eficiência e eficácia na tomada de decisões estratégicas e táticas referentes às licitações que analisa."
-    ),
-    llm=LLM(
-        model=os.getenv(key="TENDER_ANALYSIS_REPORT_DRAFT_MODEL", default="azure/gpt-4o"),
-        temperature=float(os.getenv("TENDER_ANALYSIS_REPORT_DRAFT_TEMPERATURE", default=0.4)),
+        "backstory": (
+            "Experiente compilador de resumos e relatórios que transmitem com precisão e clareza as informações mais pertinentes referentes a cada processo licitatório para permitir à gerência e à direção de sua empresa eficiência e eficácia na tomada de decisões estratégicas e táticas referentes às licitações que analisa."
         ),
-    verbose=True,
-    allow_delegation=False,
-)
-
-# TODO: Equip this agent with the capacity to perform semantic search on the tender documents to validate and enhance the final report
-revisor_de_relatório = Agent(
-    role="Revisor de Relatórios de Licitações",
-    goal=(
-        "Revisar e aprimorar os relatórios de licitações compilados por seus pares, garantindo que as informações estejam corretas, claras e objetivas"
-    ),
-    backstory=(
-        "Revisor experiente de relatórios e documentos de licitações, com habilidades excepcionais de revisão e edição para garantir a precisão, clareza e objetividade das informações contidas em cada relatório, assegurando que os relatórios atendam aos padrões de qualidade e excelência exigidos pela empresa."
-    ),
-    llm=LLM(
-        model=os.getenv(key="TENDER_ANALYSIS_FINAL_REPORT_MODEL", default="azure/gpt-4o"),
-        temperature=float(os.getenv(key="TENDER_ANALYSIS_FINAL_REPORT_TEMPERATURE", default=0)),
+        "streaming": False,
+        "model": os.getenv(key="TENDER_ANALYSIS_REPORT_DRAFT_MODEL", default="azure/gpt-4o"),
+        "temperature": float(os.getenv("TENDER_ANALYSIS_REPORT_DRAFT_TEMPERATURE", default=0.4)),
+    },
+    # TODO: Equip this agent with the capacity to perform semantic search on the tender documents to validate and enhance the final report
+    "revisor_de_relatório": {
+        "role": "Revisor de Relatórios de Licitações",
+        "goal": (
+            "Revisar e aprimorar os relatórios de licitações compilados por seus pares, garantindo que as informações estejam corretas, claras e objetivas"
         ),
-    verbose=True,
-    allow_delegation=False,
-)
+        "backstory": (
+            "Revisor experiente de relatórios e documentos de licitações, com habilidades excepcionais de revisão e edição para garantir a precisão, clareza e objetividade das informações contidas em cada relatório, assegurando que os relatórios atendam aos padrões de qualidade e excelência exigidos pela empresa."
+        ),
+        "streaming": True,
+        "model": os.getenv(key="TENDER_ANALYSIS_FINAL_REPORT_MODEL", default="azure/gpt-4o"),
+        "temperature": float(os.getenv(key="TENDER_ANALYSIS_FINAL_REPORT_TEMPERATURE", default=0)),
+    },
+}
+
+
+def build_agents() -> Dict[str, Any]:
+    """Build a new set of crew agents, each with its own LLM.
+
+    crewai is imported here rather than at module level, so importing this module is cheap.
+
+    Returns:
+        Dict mapping each agent's variable name to its Agent
+    """
+    from crewai import Agent
+    from src.tender_analysis_crew.streaming_llm import RateLimitedLLM, StreamingLLM
+
+    agents = {}
+    for name, config in AGENT_CONFIGS.items():
+        llm_class = StreamingLLM if config["streaming"] else RateLimitedLLM
+        agents[name] = Agent(
+            role=config["role"],
+            goal=config["goal"],
+            backstory=config["backstory"],
+            llm=llm_class(model=config["model"], temperature=config["temperature"]),
+            verbose=True,
+            allow_delegation=False,
+        )
+    return agents
+
+
+def __getattr__(name: str) -> Any:
+    # Backward compatibility for the former module-level agents
+    if name in AGENT_NAMES:
+        return build_agents()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,84 @@
+"""On-disk checkpoints of per-chunk extraction results, so interrupted runs can resume."""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_run_id(tender_documents_text: str, *settings: Any) -> str:
+    """Derive a stable run id from the documents text and the extraction settings.
+
+    Rerunning the same documents with the same settings resumes the same run.
+    """
+    fingerprint = hash_text(tender_documents_text + json.dumps(settings, default=str))
+    return fingerprint[:16]
+
+
+class ChunkCheckpointStore:
+    """Stores each completed chunk result as a JSON file under <checkpoint_dir>/<run_id>/."""
+
+    def __init__(self, run_id: str, checkpoint_dir: Optional[str] = None):
+        """Initialize the checkpoint store.
+
+        Args:
+            run_id: Identifier of the summary run
+            checkpoint_dir: Base directory. Defaults to TENDER_ANALYSIS_CHECKPOINT_DIR or data/checkpoints.
+        """
+        self.run_id = run_id
+        self.run_dir = os.path.join(
+            checkpoint_dir or os.getenv("TENDER_ANALYSIS_CHECKPOINT_DIR", "data/checkpoints"),
+            run_id,
+        )
+
+    def _path(self, chunk_index: int) -> str:
+        return os.path.join(self.run_dir, f"chunk_{chunk_index:05d}.json")
+
+    def load(self, chunk_index: int, chunk_text: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpointed result of a chunk, if it exists and matches the chunk text."""
+        try:
+            with open(self._path(chunk_index), encoding="utf-8") as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if checkpoint.get("chunk_hash") != hash_text(chunk_text):
+            return None
+        return checkpoint["result"]
+
+    def save(self, chunk_index: int, chunk_text: str, result: Dict[str, Any]) -> None:
+        """Atomically write the result of a chunk.
+
+        Each write goes through its own temporary file, so concurrent runs of the same
+        documents don't overwrite each other's partial writes.
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = self._path(chunk_index)
+        fd, temp_path = tempfile.mkstemp(dir=self.run_dir, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as checkpoint_file:
+                json.dump(
+                    {"chunk_hash": hash_text(chunk_text), "result": result},
+                    checkpoint_file,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def clear(self) -> None:
+        """Delete all checkpoints of the run."""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        logger.debug(f"Cleared checkpoints of run {self.run_id}")
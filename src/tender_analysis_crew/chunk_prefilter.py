@@ -0,0 +1,245 @@
+"""Cheap local relevance scoring of tender document chunks.
+
+Scores each chunk with keywords, regexes and TF-IDF similarity to the categories of
+extract_and_label_sections_template, so that boilerplate (minuta de contrato, modelos de
+declaração, signature pages, standard legal clauses) can skip the LLM map stage or be
+routed to a cheaper model.
+"""
+
+import os
+import re
+import math
+import logging
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Routes
+ROUTE_FULL = "full"
+ROUTE_CHEAP = "cheap"
+ROUTE_SKIP = "skip"
+
+# Prefilter modes
+MODE_OFF = "off"
+MODE_SKIP = "skip"
+MODE_CHEAP_MODEL = "cheap_model"
+PREFILTER_MODES = (MODE_OFF, MODE_SKIP, MODE_CHEAP_MODEL)
+
+# Keywords per category of extract_and_label_sections_template (accent-insensitive)
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "prazos_e_cronograma": [
+        "prazo", "prazos", "cronograma", "dias corridos", "dias uteis", "vigencia",
+        "abertura das propostas", "sessao publica", "data limite", "esclarecimentos",
+        "ordem de servico", "assinatura do contrato", "marco", "conclusao",
+    ],
+    "caracteristicas_tecnicas": [
+        "vazao", "tratamento", "estacao de tratamento", "ete", "eta", "mbbr", "lodo",
+        "efluente", "esgoto", "agua bruta", "agua tratada", "dbo", "dqo", "turbidez",
+        "membrana", "decantador", "centrifuga", "aco inox", "inoxidavel", "especificacao tecnica",
+        "memorial descritivo", "termo de referencia", "projeto basico", "projeto executivo",
+        "equipamento", "equipamentos", "eletromecanico", "automacao", "reator", "filtro",
+    ],
+    "economicos_financeiros": [
+        "valor estimado", "valor global", "orcamento", "preco", "bdi", "reajuste",
+        "patrimonio liquido", "indice de liquidez", "capital social", "dotacao orcamentaria",
+        "fonte de recursos", "planilha", "custo",
+    ],
+    "medicao_e_pagamento": [
+        "medicao", "medicoes", "pagamento", "fatura", "nota fiscal", "cronograma fisico-financeiro",
+        "evento de medicao", "retencao", "faturamento",
+    ],
+    "riscos": [
+        "multa", "penalidade", "penalidades", "sancao", "sancoes", "garantia contratual",
+        "seguro-garantia", "caucao", "fianca bancaria", "licenca", "licenca ambiental",
+        "alvara", "licenciamento", "rescisao", "matriz de riscos", "impedimento de licitar",
+    ],
+    "oportunidades": [
+        "bonus", "antecipacao", "remuneracao variavel", "inovacao", "alternativa tecnologica",
+        "estrutura existente", "aproveitamento",
+    ],
+    "checklist_participacao": [
+        "habilitacao", "atestado", "capacidade tecnica", "capacidade tecnico-operacional",
+        "acervo tecnico", "certidao", "proposta comercial", "proposta tecnica", "visita tecnica",
+        "consorcio", "qualificacao tecnica", "qualificacao economico-financeira", "documentos",
+    ],
+    "outras_informacoes_relevantes": [
+        "objeto", "licitacao", "edital", "contratante", "modalidade", "criterio de julgamento",
+        "menor preco", "tecnica e preco", "regime de execucao", "empreitada",
+    ],
+}
+
+# Regexes for content that is usually actionable: dates, money, flows, percentages, deadlines
+SIGNAL_PATTERNS = [
+    re.compile(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b"),
+    re.compile(r"r\$\s*\d"),
+    re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:l/s|m3/h|m³/h|m3/dia|mg/l)\b"),
+    re.compile(r"\b\d+(?:[.,]\d+)?\s*%"),
+    re.compile(r"\b\d+\s*(?:\([a-z\s]+\)\s*)?dias\b"),
+]
+
+# Boilerplate that rarely contains tender-specific information
+BOILERPLATE_PATTERNS = [
+    re.compile(r"minuta (?:do|de) contrato"),
+    re.compile(r"\bdeclar(?:o|amos|a)\b.{0,40}(?:penas da lei|para os devidos fins|sob as penas)"),
+    re.compile(r"modelo de (?:declaracao|procuracao|carta|proposta)"),
+    re.compile(r"representante legal"),
+    re.compile(r"local e data"),
+    re.compile(r"assinatura"),
+    re.compile(r"_{5,}"),
+    re.compile(r"lei (?:federal )?n[oº°.]*\s*14\.133"),
+    re.compile(r"lei (?:federal )?n[oº°.]*\s*8\.666"),
+    re.compile(r"protecao de dados|lgpd"),
+    re.compile(r"(?:fica )?eleito o foro"),
+    re.compile(r"e por estarem (?:assim )?justas e contratadas"),
+    re.compile(r"clausula \w+ [-–] d[aoe]s? "),
+]
+
+STOPWORDS = set(
+    "a o as os de da do das dos e em no na nos nas para por com sem que se ao aos um uma "
+    "uns umas ou pelo pela pelos pelas este esta estes estas esse essa isso sua seu suas seus "
+    "ser sera sao foi como mais quando qual quais ja nao sob sobre entre ate apos".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into content tokens."""
+    return [
+        token
+        for token in re.findall(r"[a-z0-9]+", normalize_text(text))
+        if len(token) > 2 and token not in STOPWORDS
+    ]
+
+
+class ChunkPreFilter:
+    """Scores chunks between 0 (boilerplate) and 1 (clearly relevant) and routes them.
+
+    The score combines three features:
+        - keyword hits for the categories of extract_and_label_sections_template
+        - regex hits for dates, money, flows, percentages and deadlines
+        - TF-IDF cosine similarity to a prototype document per category
+    minus a penalty for boilerplate patterns.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        mode: Optional[str] = None,
+        keep_first_chunk: bool = True,
+    ):
+        """Initialize the prefilter.
+
+        Args:
+            threshold: Chunks scoring below it skip the map stage or go to the cheap model.
+                Defaults to TENDER_ANALYSIS_PREFILTER_THRESHOLD (0.15).
+            mode: "off", "skip" or "cheap_model". Defaults to TENDER_ANALYSIS_PREFILTER_MODE ("off").
+            keep_first_chunk: Always send the first chunk to the full model, since it usually
+                carries the overview (client, tender id and object)
+        """
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(os.getenv("TENDER_ANALYSIS_PREFILTER_THRESHOLD", 0.15))
+        )
+        self.mode = mode or os.getenv("TENDER_ANALYSIS_PREFILTER_MODE", MODE_OFF)
+        if self.mode not in PREFILTER_MODES:
+            raise ValueError(
+                f"Invalid prefilter mode '{self.mode}'. Expected one of: {', '.join(PREFILTER_MODES)}"
+            )
+        self.keep_first_chunk = keep_first_chunk
+        self._keyword_patterns = [
+            re.compile(rf"\b{re.escape(normalize_text(keyword))}\b")
+            for keywords in CATEGORY_KEYWORDS.values()
+            for keyword in keywords
+        ]
+        self._prototypes = {
+            category: Counter(tokenize(" ".join(keywords)))
+            for category, keywords in CATEGORY_KEYWORDS.items()
+        }
+
+    def _keyword_score(self, normalized_chunk: str) -> float:
+        hits = sum(1 for pattern in self._keyword_patterns if pattern.search(normalized_chunk))
+        return min(hits / 8, 1.0)
+
+    @staticmethod
+    def _signal_score(normalized_chunk: str) -> float:
+        hits = sum(len(pattern.findall(normalized_chunk)) for pattern in SIGNAL_PATTERNS)
+        return min(hits / 4, 1.0)
+
+    @staticmethod
+    def _boilerplate_score(normalized_chunk: str) -> float:
+        hits = sum(1 for pattern in BOILERPLATE_PATTERNS if pattern.search(normalized_chunk))
+        return min(hits / 3, 1.0)
+
+    def _tfidf_scores(self, chunk_tokens: List[Counter]) -> List[float]:
+        """Max cosine similarity of each chunk to the category prototypes.
+
+        IDF is fitted on the chunks of the current document plus the prototypes, so terms
+        repeated on every page (headers, footers) carry little weight.
+        """
+        documents = chunk_tokens + list(self._prototypes.values())
+        document_frequency = Counter(token for document in documents for token in document)
+        idf = {
+            token: math.log((1 + len(documents)) / (1 + frequency)) + 1
+            for token, frequency in document_frequency.items()
+        }
+
+        def vectorize(counts: Counter) -> Dict[str, float]:
+            vector = {token: (1 + math.log(count)) * idf[token] for token, count in counts.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+            return {token: value / norm for token, value in vector.items()}
+
+        prototype_vectors = [vectorize(prototype) for prototype in self._prototypes.values()]
+        scores = []
+        for counts in chunk_tokens:
+            vector = vectorize(counts)
+            scores.append(
+                max(
+                    sum(weight * prototype.get(token, 0.0) for token, weight in vector.items())
+                    for prototype in prototype_vectors
+                )
+                if vector
+                else 0.0
+            )
+        return scores
+
+    def score_chunks(self, chunks: List[str]) -> List[float]:
+        """Score the relevance of each chunk between 0 and 1."""
+        normalized_chunks = [normalize_text(chunk) for chunk in chunks]
+        tfidf_scores = self._tfidf_scores([Counter(tokenize(chunk)) for chunk in chunks])
+        scores = []
+        for normalized_chunk, tfidf_score in zip(normalized_chunks, tfidf_scores):
+            # TF-IDF similarities to short prototypes are small; scale them to [0, 1]
+            score = (
+                0.45 * self._keyword_score(normalized_chunk)
+                + 0.20 * self._signal_score(normalized_chunk)
+                + 0.35 * min(tfidf_score * 4, 1.0)
+                - 0.50 * self._boilerplate_score(normalized_chunk)
+            )
+            scores.append(max(0.0, min(score, 1.0)))
+        return scores
+
+    def route_chunks(self, chunks: List[str], scores: Optional[List[float]] = None) -> List[str]:
+        """Decide whether each chunk goes to the full model, the cheap model or is skipped."""
+        if self.mode == MODE_OFF:
+            return [ROUTE_FULL] * len(chunks)
+
+        scores = scores if scores is not None else self.score_chunks(chunks)
+        low_score_route = ROUTE_SKIP if self.mode == MODE_SKIP else ROUTE_CHEAP
+        routes = [
+            ROUTE_FULL if score >= self.threshold else low_score_route for score in scores
+        ]
+        if self.keep_first_chunk and routes:
+            routes[0] = ROUTE_FULL
+        logger.info(
+            f"Prefilter routed {routes.count(ROUTE_FULL)} chunk(s) to the full model, "
+            f"{routes.count(ROUTE_CHEAP)} to the cheap model and skipped {routes.count(ROUTE_SKIP)}"
+        )
+        return routes
@@ -1,37 +1,40 @@
 from datetime import datetime
 import os
-from tempfile import TemporaryDirectory, NamedTemporaryFile
 import logging
-from typing import Any, Dict, List, Optional, Callable
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Callable
 from dotenv import load_dotenv
 from crewai import Crew, Process
-from crewai.llm import LLM
-import tiktoken
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import AzureChatOpenAI
-from langchain.schema import BaseOutputParser
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import re
 import time
+import random
 import asyncio
 import aiohttp
 from concurrent.futures import ThreadPoolExecutor
 
+from src.llm_rate_limiter import get_rate_limiter
 from src.tender_analysis_crew.templates.extract_and_label_sections_template import (
     extract_and_label_sections_template,
     extract_and_label_sections_json_schema,
 )
-from src.tender_analysis_crew.agents import (
-    analista_de_licitacoes,
-    compilador_de_relatorio,
-    revisor_de_relatório,
+from src.tender_analysis_crew.chunk_prefilter import (
+    ChunkPreFilter,
+    ROUTE_CHEAP,
+    ROUTE_SKIP,
 )
-from src.tender_analysis_crew.tasks import (
-    montagem_de_cronograma,
-    esboco_do_relatorio,
-    revisao_final_do_relatorio,
+from src.tender_analysis_crew.chunk_checkpoint import ChunkCheckpointStore, make_run_id
+from src.tender_analysis_crew.run_metrics import (
+    ChunkMetrics,
+    RunMetrics,
+    current_run_metrics,
+    export_run_metrics,
 )
+from src.tender_analysis_crew.streaming_llm import RateLimitedLLM, StreamingLLM, FinalAnswerTokenFilter
+from src.tender_analysis_crew.agents import build_agents
+from src.tender_analysis_crew.tasks import build_tasks
+from src.tender_analysis_crew.utils import TenderAnalysisUtils
 
 # Load environment variables
 load_dotenv()
@@ -42,104 +45,166 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-llm = LLM(
-    model=os.getenv("TENDER_ANALYSIS_CREW_MANAGER_MODEL", "azure/gpt-4o"),
-    temperature=float(os.getenv("TENDER_ANALYSIS_CREW_MANAGER_TEMPERATURE", 0.2)),
-)
 
-class TenderAnalysisUtils:
-    @staticmethod
-    def load_pdfs_to_docs(uploaded_pdfs):
-        logger.debug("Loading PDFs to documents")
-        all_documents = []
-        with TemporaryDirectory() as temp_dir:
-            for uploaded_file in uploaded_pdfs:
-                try:
-                    temp_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(temp_path, "wb") as temp_file:
-                        temp_file.write(uploaded_file.getvalue())
-                    logger.debug(f"File written to temporary path: {temp_path}")
-
-                    loader = PyPDFLoader(file_path=temp_path)
-                    documents = loader.load()
-                    logger.debug(
-                        f"Loaded {len(documents)} documents from {uploaded_file.name}"
-                    )
-                    all_documents.extend(documents)
-                except Exception as e:
-                    logger.error(f"Error processing document: {e}")
-                    continue
+@lru_cache(maxsize=None)
+def get_manager_llm() -> RateLimitedLLM:
+    """Build the crew's manager and function calling LLM once per process."""
+    return RateLimitedLLM(
+        model=os.getenv("TENDER_ANALYSIS_CREW_MANAGER_MODEL", "azure/gpt-4o"),
+        temperature=float(os.getenv("TENDER_ANALYSIS_CREW_MANAGER_TEMPERATURE", 0.2)),
+    )
 
-        logger.debug(f"Total documents loaded: {len(all_documents)}")
-        return all_documents
 
-    @staticmethod
-    def concatenate_docs(documents):
-        logger.debug("Concatenating documents")
-        tender_documents = ""
-        for i, doc in enumerate(documents):
-            source = doc.metadata.get("source", "")
-            filename = source.split("/")[-1]
-            filename = filename.split(".")[0]
-            tender_documents += f"{filename} - Pág.{i + 1}\n{doc.page_content}\n"
-        logger.debug("All documents concatenated")
-        return tender_documents
+def __getattr__(name: str) -> Any:
+    # Backward compatibility for the former module-level `llm`
+    if name == "llm":
+        return get_manager_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    @staticmethod
-    def _length_function(text: str, encoding: str = "o200k_base") -> int:
-        enc = tiktoken.get_encoding(f"{encoding}")
-        return len(enc.encode(text))
+# Completion tokens reserved in the rate limiter for each chunk extraction
+EXTRACTION_COMPLETION_TOKENS = int(os.getenv("TENDER_ANALYSIS_EXTRACTION_COMPLETION_TOKENS", 2000))
+
+
+class ChunkValidationError(ValueError):
+    """Raised when a chunk extraction result does not match the schema and cannot be repaired."""
 
-    @staticmethod
-    def split_text(text: str) -> List[str]:
-        splitter = RecursiveCharacterTextSplitter(
-            separators=["\n\n", "\n", " ", ""],
-            chunk_size=2500,
-            chunk_overlap=250,
-            length_function=TenderAnalysisUtils._length_function,
-        )
-        chunks = splitter.split_text(text=text)
-        return chunks
+
+# Task names for each crew execution mode (see tasks.build_tasks). In "graph" mode the schedule
+# tables and the parts of the draft that do not depend on them run concurrently and are merged in review.
+CREW_EXECUTION_MODES = {
+    "sequential": [
+        "montagem_de_cronograma",
+        "esboco_do_relatorio",
+        "revisao_final_do_relatorio",
+    ],
+    "graph": [
+        "montagem_de_cronograma_paralela",
+        "esboco_do_relatorio_paralelo",
+        "revisao_final_do_relatorio_consolidada",
+    ],
+}
 
 
 class TenderAnalysisCrew:
-    def __init__(self):
+    def __init__(self, execution_mode: Optional[str] = None):
+        """Initialize the crew.
+
+        Args:
+            execution_mode: "sequential" (default) or "graph". Defaults to the
+                TENDER_ANALYSIS_CREW_EXECUTION_MODE environment variable.
+        """
         logger.debug("Initializing TendersAnalysisCrew")
         self.env = os.getenv("ENVIRONMENT", "prod")
-        self.crew = Crew(
-            agents=[
-                analista_de_licitacoes,
-                compilador_de_relatorio,
-                revisor_de_relatório,
-            ],
-            tasks=[
-                montagem_de_cronograma,
-                esboco_do_relatorio,
-                revisao_final_do_relatorio,
-            ],
-            process=Process.sequential,
-            verbose=True,
-            planning=False,
-            memory=False,
-            tools=[],
-            manager_llm=llm,
-            function_calling_llm=llm,
-            output_log_file=(
-                f"src/tender_analysis_crew/outputs/tender_analysis_crew_logs_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.log"
-                if self.env == "dev"
-                else None
-            ),
-            task_execution_output_json_files=(
-                [
-                    f"src/tender_analysis_crew/outputs/task_execution_output_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.json"
-                ]
-                if self.env == "dev"
-                else None
-            ),
+        self.execution_mode = execution_mode or os.getenv(
+            "TENDER_ANALYSIS_CREW_EXECUTION_MODE", "sequential"
         )
+        if self.execution_mode not in CREW_EXECUTION_MODES:
+            raise ValueError(
+                f"Invalid crew execution mode '{self.execution_mode}'. "
+                f"Expected one of: {', '.join(CREW_EXECUTION_MODES)}"
+            )
+        self._crew: Optional[Crew] = None
         self.utils = TenderAnalysisUtils()
+        self.prefilter = ChunkPreFilter()
         logger.debug("Crew initialized with agents and tasks")
 
+    @property
+    def crew(self) -> Crew:
+        """The crew, built on first use so that constructing TenderAnalysisCrew stays cheap.
+
+        Each crew gets its own agents, tasks and LLMs, so crews don't share mutable crewai state.
+        """
+        if self._crew is None:
+            agents = build_agents()
+            tasks = build_tasks(agents)
+            self._crew = Crew(
+                agents=[
+                    agents["analista_de_licitacoes"],
+                    agents["compilador_de_relatorio"],
+                    agents["revisor_de_relatório"],
+                ],
+                tasks=[tasks[name] for name in CREW_EXECUTION_MODES[self.execution_mode]],
+                process=Process.sequential,
+                verbose=True,
+                planning=False,
+                memory=False,
+                tools=[],
+                manager_llm=get_manager_llm(),
+                function_calling_llm=get_manager_llm(),
+                output_log_file=(
+                    f"src/tender_analysis_crew/outputs/tender_analysis_crew_logs_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.log"
+                    if self.env == "dev"
+                    else None
+                ),
+                task_execution_output_json_files=(
+                    [
+                        f"src/tender_analysis_crew/outputs/task_execution_output_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.json"
+                    ]
+                    if self.env == "dev"
+                    else None
+                ),
+            )
+        return self._crew
+
+    async def _kickoff_crew(
+        self,
+        crew_input: Dict[str, str],
+        task_output_callback: Optional[Callable[[str, str], None]] = None,
+        token_callback: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        """Run the crew without blocking the event loop.
+
+        The crew itself is synchronous, so it runs in the default executor while the
+        event loop stays free to serve progress updates and other coroutines.
+
+        Args:
+            crew_input: Inputs interpolated into the crew tasks
+            task_output_callback: Optional callback receiving (task name, raw output) as each task completes
+            token_callback: Optional callback receiving the final task's tokens as they are generated
+
+        Returns:
+            CrewOutput: The output of the final crew task
+        """
+        # Each run uses a copy of the crew, so concurrent runs share neither the
+        # callbacks nor the agents' token counters
+        run_crew = self.crew.copy()
+        if task_output_callback:
+            run_crew.task_callback = lambda output: task_output_callback(
+                output.name, output.raw
+            )
+        final_task_llm = run_crew.tasks[-1].agent.llm
+        if token_callback and isinstance(final_task_llm, StreamingLLM):
+            final_task_llm.token_callback = token_callback
+        output = await run_crew.kickoff_async(inputs=crew_input)
+
+        run_metrics = current_run_metrics.get()
+        if run_metrics:
+            self._record_crew_usage(run_metrics, run_crew)
+        return output
+
+    @staticmethod
+    def _record_crew_usage(run_metrics: RunMetrics, run_crew: Crew) -> None:
+        """Add the token usage of each crew agent under the model of its LLM.
+
+        The agents use their own models (see AGENT_CONFIGS), so the crew's aggregate
+        usage can't be priced as a single model.
+        """
+        agents = list(run_crew.agents)
+        if run_crew.manager_agent:
+            agents.append(run_crew.manager_agent)
+        for agent in agents:
+            usage = agent._token_process.get_summary()
+            if not usage.successful_requests:
+                continue
+            model = getattr(agent.llm, "model", None) or "unknown"
+            run_metrics.record_usage(
+                "crew/" + model.split("/")[-1],
+                usage.prompt_tokens,
+                usage.completion_tokens,
+                usage.cached_prompt_tokens,
+                requests=usage.successful_requests,
+            )
+
     def _format_section(self, section: Dict[str, Any]) -> str:
         """Format a section dictionary into a readable string.
 
@@ -191,6 +256,7 @@ class TenderAnalysisCrew:
         tender_documents_chunk_text: str,
         prompt_template: Optional[str] = extract_and_label_sections_template,
         json_schema: Optional[Dict[str, Any]] = extract_and_label_sections_json_schema,
+        model_name: str = os.getenv("TENDER_ANALYSIS_EXTRACTION_MODEL", "gpt-4o-mini"),
     ) -> Dict[str, Any]:
         """Extract and label sections from tender documents asynchronously.
 
@@ -198,6 +264,7 @@ class TenderAnalysisCrew:
             tender_documents_chunk_text: The text to analyze
             prompt_template: Template for the extraction prompt
             json_schema: Schema for structured output
+            model_name: Azure model and deployment name (default: gpt-4o-mini)
 
         Returns:
             Dict containing 'sections' and 'overview' data
@@ -207,22 +274,137 @@ class TenderAnalysisCrew:
 
         # Instantiate the language model
         model = AzureChatOpenAI(
-            model="gpt-4o-mini", azure_deployment="gpt-4o-mini", temperature=0
+            model=model_name, azure_deployment=model_name, temperature=0
         )
 
-        # Enforce structured output with json schema
-        structured_model = model.with_structured_output(json_schema)
+        # Enforce structured output with json schema, keeping the raw message for its token usage
+        structured_model = model.with_structured_output(json_schema, include_raw=True)
 
-        # Chain the prompt and the model
-        chain = prompt | structured_model
-
-        # Invoke the chain asynchronously
-        response = await chain.ainvoke(
-            {
-                "tender_documents_chunk_text": tender_documents_chunk_text,
-            }
+        # Wait for the shared rate limiter, then invoke the model asynchronously
+        messages = prompt.format_messages(
+            tender_documents_chunk_text=tender_documents_chunk_text,
         )
-        return response
+        async with get_rate_limiter().limit_async(
+            messages, completion_tokens=EXTRACTION_COMPLETION_TOKENS
+        ) as reservation:
+            response = await structured_model.ainvoke(messages)
+            reservation.reconcile_response(response["raw"])
+
+        run_metrics = current_run_metrics.get()
+        if run_metrics:
+            run_metrics.record_llm_response(model_name, response["raw"])
+
+        if response["parsing_error"]:
+            raise response["parsing_error"]
+        return response["parsed"]
+
+    def _validate_chunk_result(self, result: Any, chunk: str = "") -> Dict[str, Any]:
+        """Validate a chunk result against the extraction schema, repairing what is repairable.
+
+        Sections with an unknown category are kept under 'outras_informacoes_relevantes',
+        checklist values are coerced to 0 or 1, invalid page numbers fall back to the first
+        page marker of the chunk, sections without a transcription are dropped and missing
+        overview fields are left empty.
+
+        Args:
+            result: Raw structured output of _extract_and_label_sections
+            chunk: The chunk text, used to recover page numbers
+
+        Returns:
+            Dict containing valid 'sections' and 'overview' data
+
+        Raises:
+            ChunkValidationError: If the result cannot be repaired
+        """
+        if not isinstance(result, dict):
+            raise ChunkValidationError(f"Expected an object, got {type(result).__name__}")
+        sections = result.get("sections") or []
+        overview = result.get("overview") or {}
+        if not isinstance(sections, list) or not isinstance(overview, dict):
+            raise ChunkValidationError("'sections' must be an array and 'overview' an object")
+
+        section_schema = extract_and_label_sections_json_schema["properties"]["sections"]["items"]
+        categories = section_schema["properties"]["categoria"]["enum"]
+        chunk_pages = re.findall(r"Pág\.(\d+)", chunk)
+        fallback_page = int(chunk_pages[0]) if chunk_pages else 0
+        repaired_sections = []
+        for section in sections:
+            if not isinstance(section, dict) or not section.get("transcricao"):
+                continue
+            section = dict(section)
+            if section.get("categoria") not in categories:
+                section["categoria"] = "outras_informacoes_relevantes"
+            try:
+                section["checklist"] = 1 if int(section.get("checklist", 0)) else 0
+            except (TypeError, ValueError):
+                section["checklist"] = 0
+            try:
+                section["pagina"] = int(section.get("pagina"))
+            except (TypeError, ValueError):
+                section["pagina"] = fallback_page
+            section["fonte"] = str(section.get("fonte") or "")
+            if section.get("comentario") is None:
+                section.pop("comentario", None)
+            repaired_sections.append(section)
+
+        repaired_overview = {
+            key: str(overview[key]) for key in ("client_name", "tender_id", "tender_date", "tender_object")
+            if overview.get(key)
+        }
+        return {"sections": repaired_sections, "overview": repaired_overview}
+
+    async def _extract_chunk_with_retries(
+        self,
+        chunk: str,
+        model_name: Optional[str] = None,
+        max_retries: int = int(os.getenv("TENDER_ANALYSIS_CHUNK_MAX_RETRIES", 3)),
+        base_delay: float = float(os.getenv("TENDER_ANALYSIS_CHUNK_RETRY_BASE_DELAY", 2.0)),
+        chunk_metrics: Optional[ChunkMetrics] = None,
+    ) -> Dict[str, Any]:
+        """Extract and validate the sections of a chunk, retrying with exponential backoff.
+
+        Args:
+            chunk: The chunk text
+            model_name: Optional model override for _extract_and_label_sections
+            max_retries: Number of retries after the first attempt (default: 3)
+            base_delay: Delay before the first retry in seconds, doubled on every retry (default: 2)
+            chunk_metrics: Optional metrics of the chunk, where retries are counted
+
+        Returns:
+            Dict containing the validated 'sections' and 'overview' data
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                if model_name:
+                    result = await self._extract_and_label_sections(chunk, model_name=model_name)
+                else:
+                    result = await self._extract_and_label_sections(chunk)
+                return self._validate_chunk_result(result, chunk)
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                if chunk_metrics:
+                    chunk_metrics.retries += 1
+                delay = base_delay * 2**attempt + random.uniform(0, base_delay)
+                # Honour the server's Retry-After header on rate limit errors
+                response = getattr(e, "response", None)
+                retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+                if retry_after and retry_after.replace(".", "", 1).isdigit():
+                    delay = max(delay, float(retry_after))
+                logger.warning(
+                    f"Chunk extraction failed (attempt {attempt + 1}/{max_retries + 1}): {str(e)}. "
+                    f"Retrying in {delay:.1f} seconds"
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _chunk_pages(chunk: str) -> List[str]:
+        """List the page markers written by concatenate_docs that appear in a chunk."""
+        return list(dict.fromkeys(re.findall(r"^(.+ - Pág\.\d+)$", chunk, flags=re.MULTILINE)))
+
+    async def _skipped_chunk_result(self) -> Dict[str, Any]:
+        """Result for a chunk the prefilter kept out of the map stage."""
+        return {"sections": [], "overview": {}}
 
     def _filter_sections_by_category(
         self, labeled_sections: Dict[str, Any]
@@ -263,126 +445,193 @@ class TenderAnalysisCrew:
         tender_documents_text: str,
         progress_callback: Optional[Callable[[int], None]] = None,
         max_concurrent_chunks: int = int(os.getenv("TENDER_ANALYSIS_MAX_CONCURRENT_CHUNKS", 10)),
-    ) -> str:
+        task_output_callback: Optional[Callable[[str, str], None]] = None,
+        token_callback: Optional[Callable[[str], None]] = None,
+        run_id: Optional[str] = None,
+        allow_partial: bool = os.getenv("TENDER_ANALYSIS_ALLOW_PARTIAL", "false").lower() == "true",
+        return_metrics: bool = False,
+    ) -> Any:
         """Generate a summary of tender documents.
 
+        Each completed chunk is checkpointed to disk under the run id, so rerunning the same
+        documents after a failure only processes the chunks that are still missing.
+
         Args:
             tender_documents_text: The text content of tender documents
             progress_callback: Optional callback function to report progress (receives current chunk number)
             max_concurrent_chunks: Maximum number of chunks to process concurrently (default: 10)
+            task_output_callback: Optional callback receiving (task name, raw output) as each crew task completes.
+                Called from the crew's worker threads.
+            token_callback: Optional callback receiving the final report's raw tokens as they are generated.
+                Called from the crew's worker threads.
+            run_id: Optional checkpoint run id. Defaults to a hash of the documents text and extraction settings.
+            allow_partial: Continue when chunks fail after all retries and flag the missing pages in the report
+                (default: TENDER_ANALYSIS_ALLOW_PARTIAL or False)
+            return_metrics: Return a (summary, RunMetrics) tuple instead of the summary alone
 
         Returns:
-            str: The generated summary
+            CrewOutput: The generated summary, or (summary, RunMetrics) if return_metrics is set
         """
         start_time = time.time()
         logger.info("Starting summary generation")
 
-        # Initialize timing metrics
-        timing_metrics = {
-            "split_time": 0,
-            "batch_processing_time": 0,
-            "combine_time": 0,
-            "filter_time": 0,
-            "format_time": 0,
-            "crew_time": 0
-        }
+        # Initialize run metrics; LLM calls made during the run record their token usage in them
+        metrics = RunMetrics()
+        metrics_token = current_run_metrics.set(metrics)
+        timing_metrics = metrics.stages
+        timing_metrics.update(
+            {
+                "split_time": 0,
+                "prefilter_time": 0,
+                "batch_processing_time": 0,
+                "combine_time": 0,
+                "filter_time": 0,
+                "format_time": 0,
+                "crew_time": 0,
+            }
+        )
 
         try:
             # Split text into chunks
-            split_start = time.time()
-            chunks = self.utils.split_text(tender_documents_text)
-            timing_metrics["split_time"] = time.time() - split_start
+            with metrics.stage("split_time"):
+                chunks = self.utils.split_text(tender_documents_text)
             logger.info(f"Split text into {len(chunks)} chunks in {timing_metrics['split_time']:.2f} seconds")
 
-            # Process chunks in batches
-            chunk_results = []
-            processed_chunks = 0
+            # Score chunks locally to skip boilerplate or send it to a cheaper model
+            with metrics.stage("prefilter_time"):
+                routes = self.prefilter.route_chunks(chunks)
+            logger.info(f"Prefiltered chunks in {timing_metrics['prefilter_time']:.2f} seconds")
+
+            # Process chunks concurrently, checkpointing each completed chunk
             total_chunks = len(chunks)
-            batch_start = time.time()
-
-            # Process chunks in batches of max_concurrent_chunks
-            for i in range(0, total_chunks, max_concurrent_chunks):
-                batch = chunks[i : i + max_concurrent_chunks]
-                batch_tasks = []
-
-                # Create tasks for the current batch
-                # TODO: Adicionar chunk_id para identificar e facilitar o refenciamento dos trechos
-                for chunk in batch:
-                    task = asyncio.create_task(self._extract_and_label_sections(chunk))
-                    batch_tasks.append(task)
-
-                try:
-                    # Wait for the current batch to complete
-                    batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                    
-                    # Handle any exceptions from batch processing
-                    for result in batch_results:
-                        if isinstance(result, Exception):
-                            logger.error(f"Error processing batch: {str(result)}")
-                            raise result
-                        
-                    chunk_results.extend(batch_results)
-
-                    # Update progress for completed chunks
-                    processed_chunks += len(batch)
-                    if progress_callback:
-                        progress_callback(min(processed_chunks, total_chunks))
-
-                    logger.debug(f"Processed batch {i//max_concurrent_chunks + 1}/{(total_chunks + max_concurrent_chunks - 1)//max_concurrent_chunks}")
-                except Exception as e:
-                    logger.error(f"Error processing batch {i//max_concurrent_chunks + 1}: {str(e)}")
-                    raise
+            processed_chunks = 0
+            cheap_model_name = os.getenv(
+                "TENDER_ANALYSIS_PREFILTER_CHEAP_MODEL",
+                os.getenv("TENDER_ANALYSIS_EXTRACTION_MODEL", "gpt-4o-mini"),
+            )
+            # The routing settings are part of the run id, so a run with another prefilter
+            # setup doesn't reuse skipped or cheap-model chunk results
+            run_id = run_id or make_run_id(
+                tender_documents_text,
+                os.getenv("TENDER_ANALYSIS_EXTRACTION_MODEL", "gpt-4o-mini"),
+                extract_and_label_sections_template,
+                self.prefilter.mode,
+                self.prefilter.threshold,
+                cheap_model_name,
+            )
+            metrics.run_id = run_id
+            metrics.chunks = [ChunkMetrics(chunk_index=i, route=route) for i, route in enumerate(routes)]
+            checkpoints = ChunkCheckpointStore(run_id)
+            semaphore = asyncio.Semaphore(max_concurrent_chunks)
+
+            # TODO: Adicionar chunk_id para identificar e facilitar o refenciamento dos trechos
+            async def process_chunk(chunk_index: int, chunk: str, route: str) -> Dict[str, Any]:
+                nonlocal processed_chunks
+                chunk_metrics = metrics.chunks[chunk_index]
+                queued_at = time.time()
+                result = checkpoints.load(chunk_index, chunk)
+                if result is None:
+                    async with semaphore:
+                        chunk_metrics.queue_wait = time.time() - queued_at
+                        chunk_start = time.time()
+                        try:
+                            if route == ROUTE_SKIP:
+                                result = await self._skipped_chunk_result()
+                            else:
+                                result = await self._extract_chunk_with_retries(
+                                    chunk,
+                                    model_name=cheap_model_name if route == ROUTE_CHEAP else None,
+                                    chunk_metrics=chunk_metrics,
+                                )
+                        except Exception:
+                            chunk_metrics.failed = True
+                            raise
+                        finally:
+                            chunk_metrics.latency = time.time() - chunk_start
+                    # Skipped chunks cost nothing to route again; only real extractions are checkpointed
+                    if route != ROUTE_SKIP:
+                        checkpoints.save(chunk_index, chunk, result)
+                else:
+                    chunk_metrics.from_checkpoint = True
+                processed_chunks += 1
+                if progress_callback:
+                    progress_callback(processed_chunks)
+                return result
+
+            with metrics.stage("batch_processing_time"):
+                results = await asyncio.gather(
+                    *(process_chunk(i, chunk, route) for i, (chunk, route) in enumerate(zip(chunks, routes))),
+                    return_exceptions=True,
+                )
+
+            chunk_results = []
+            missing_pages = []
+            for chunk, result in zip(chunks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing chunk: {str(result)}")
+                    missing_pages.extend(self._chunk_pages(chunk) or [chunk[:60]])
+                else:
+                    chunk_results.append(result)
+
+            if missing_pages and not allow_partial:
+                failed_chunks = sum(1 for result in results if isinstance(result, Exception))
+                raise RuntimeError(
+                    f"{failed_chunks} of {total_chunks} chunks failed. Completed chunks were checkpointed "
+                    f"under run {run_id}; rerun to resume or enable partial coverage."
+                ) from next(result for result in results if isinstance(result, Exception))
+            if missing_pages:
+                logger.warning(f"Continuing with partial coverage. Missing pages: {', '.join(missing_pages)}")
 
-            timing_metrics["batch_processing_time"] = time.time() - batch_start
             logger.info(f"Processed all chunks in {timing_metrics['batch_processing_time']:.2f} seconds")
 
             # Combine results from all chunks
-            combine_start = time.time()
-            labeled_sections = self._combine_labeled_sections(chunk_results)
-            timing_metrics["combine_time"] = time.time() - combine_start
+            with metrics.stage("combine_time"):
+                labeled_sections = self._combine_labeled_sections(chunk_results)
             logger.info(f"Combined results in {timing_metrics['combine_time']:.2f} seconds")
 
             # Filter sections by category
-            filter_start = time.time()
-            filtered_sections = self._filter_sections_by_category(labeled_sections)
-            timing_metrics["filter_time"] = time.time() - filter_start
+            with metrics.stage("filter_time"):
+                filtered_sections = self._filter_sections_by_category(labeled_sections)
             logger.info(f"Filtered sections in {timing_metrics['filter_time']:.2f} seconds")
 
             # Format sections
-            format_start = time.time()
-            overview_str = f"""
-            Cliente: {labeled_sections['overview']['client_name']}
-            ID da Licitação: {labeled_sections['overview']['tender_id']}
-            Data: {labeled_sections['overview'].get('tender_date', 'Não especificada')}
-            Objeto: {labeled_sections['overview']['tender_object']}
-            """
-
-            technical_sections_str = "Seções Técnicas:\n"
-            for category, sections in {
-                k: v
-                for k, v in filtered_sections.items()
-                if k in ["requisitos_tecnicos", "economicos_financeiros", "oportunidades", "outros_requisitos"]
-            }.items():
-                if sections:
-                    technical_sections_str += f"\n{category.upper()}:\n"
-                    technical_sections_str += "\n".join(self._format_section(s) for s in sections)
-
-            cronograma_sections_str = "Seções de Cronograma:\n"
-            cronograma_sections_str += "\n".join(
-                self._format_section(s) for s in filtered_sections["prazos_e_cronograma"]
-            )
+            with metrics.stage("format_time"):
+                overview_str = f"""
+                Cliente: {labeled_sections['overview'].get('client_name', 'Não identificado')}
+                ID da Licitação: {labeled_sections['overview'].get('tender_id', 'Não identificado')}
+                Data: {labeled_sections['overview'].get('tender_date', 'Não especificada')}
+                Objeto: {labeled_sections['overview'].get('tender_object', 'Não identificado')}
+                """
+                if missing_pages:
+                    overview_str += (
+                        "ATENÇÃO: As seguintes páginas não puderam ser analisadas e não estão "
+                        f"representadas nos trechos relevantes: {', '.join(missing_pages)}\n"
+                    )
 
-            all_sections_str = "Todas as Seções:\n"
-            for category, sections in filtered_sections.items():
-                if sections:
-                    all_sections_str += f"\n{category.upper()}:\n"
-                    all_sections_str += "\n".join(self._format_section(s) for s in sections)
+                technical_sections_str = "Seções Técnicas:\n"
+                for category, sections in {
+                    k: v
+                    for k, v in filtered_sections.items()
+                    if k in ["requisitos_tecnicos", "economicos_financeiros", "oportunidades", "outros_requisitos"]
+                }.items():
+                    if sections:
+                        technical_sections_str += f"\n{category.upper()}:\n"
+                        technical_sections_str += "\n".join(self._format_section(s) for s in sections)
+
+                cronograma_sections_str = "Seções de Cronograma:\n"
+                cronograma_sections_str += "\n".join(
+                    self._format_section(s) for s in filtered_sections["prazos_e_cronograma"]
+                )
+
+                all_sections_str = "Todas as Seções:\n"
+                for category, sections in filtered_sections.items():
+                    if sections:
+                        all_sections_str += f"\n{category.upper()}:\n"
+                        all_sections_str += "\n".join(self._format_section(s) for s in sections)
 
-            timing_metrics["format_time"] = time.time() - format_start
             logger.info(f"Formatted sections in {timing_metrics['format_time']:.2f} seconds")
 
             # Prepare and execute crew tasks
-            crew_start = time.time()
             crew_input = {
                 "cronograma_sections": cronograma_sections_str,
                 "technical_sections": technical_sections_str,
@@ -390,14 +639,30 @@ class TenderAnalysisCrew:
                 "overview": overview_str,
             }
 
-            logger.info("Starting crew execution")
-            summary = self.crew.kickoff(inputs=crew_input)
-            timing_metrics["crew_time"] = time.time() - crew_start
+            logger.info(f"Starting crew execution ({self.execution_mode} mode)")
+            with metrics.stage("crew_time"):
+                summary = await self._kickoff_crew(
+                    crew_input,
+                    task_output_callback=task_output_callback,
+                    token_callback=token_callback,
+                )
             logger.info(f"Crew execution completed in {timing_metrics['crew_time']:.2f} seconds")
 
+            if missing_pages:
+                summary.raw += (
+                    "\n\n---\n\n> ⚠️ **Cobertura parcial:** as seguintes páginas não puderam ser "
+                    f"analisadas e não foram consideradas neste relatório: {', '.join(missing_pages)}\n"
+                )
+            elif os.getenv("TENDER_ANALYSIS_KEEP_CHECKPOINTS", "false").lower() != "true":
+                checkpoints.clear()
+
             # Log total execution time and return summary
             total_time = time.time() - start_time
-            logger.info(f"Total summary generation time: {total_time:.2f} seconds")
+            metrics.status = "partial" if missing_pages else "succeeded"
+            logger.info(
+                f"Total summary generation time: {total_time:.2f} seconds "
+                f"({metrics.retries} retries, estimated cost US$ {metrics.cost_usd:.4f})"
+            )
 
             # If in dev environment, write detailed timing metrics to file
             if self.env == "dev":
@@ -408,6 +673,7 @@ class TenderAnalysisCrew:
                 with open(log_path, "w") as log_file:
                     log_file.write(f"Execution started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                     log_file.write(f"Text splitting time: {timing_metrics['split_time']:.2f} seconds\n")
+                    log_file.write(f"Prefiltering time: {timing_metrics['prefilter_time']:.2f} seconds\n")
                     log_file.write(f"Batch processing time: {timing_metrics['batch_processing_time']:.2f} seconds\n")
                     log_file.write(f"Combining results time: {timing_metrics['combine_time']:.2f} seconds\n")
                     log_file.write(f"Filtering sections time: {timing_metrics['filter_time']:.2f} seconds\n")
@@ -415,8 +681,73 @@ class TenderAnalysisCrew:
                     log_file.write(f"Crew execution time: {timing_metrics['crew_time']:.2f} seconds\n")
                     log_file.write(f"\nTotal execution time: {total_time:.2f} seconds\n")
 
-            return summary
+            return (summary, metrics) if return_metrics else summary
 
         except Exception as e:
+            metrics.status = "failed"
             logger.error(f"Error in generate_summary: {str(e)}", exc_info=True)
             raise
+
+        finally:
+            current_run_metrics.reset(metrics_token)
+            metrics.total_time = time.time() - start_time
+            export_run_metrics(metrics)
+
+    async def stream_summary(
+        self,
+        tender_documents_text: str,
+        max_concurrent_chunks: int = int(os.getenv("TENDER_ANALYSIS_MAX_CONCURRENT_CHUNKS", 10)),
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Generate a summary of tender documents, yielding events as they happen.
+
+        Events are dicts with a "type" key:
+            - "progress": {"processed_chunks": int}
+            - "task_output": {"task": str, "output": str} when a crew task completes
+            - "token": {"token": str} for each piece of the final report
+            - "summary": {"summary": CrewOutput, "metrics": dict} once, at the end
+
+        Args:
+            tender_documents_text: The text content of tender documents
+            max_concurrent_chunks: Maximum number of chunks to process concurrently (default: 10)
+
+        Yields:
+            Dict[str, Any]: The next pipeline event
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        token_filter = FinalAnswerTokenFilter()
+
+        def emit(event: Optional[Dict[str, Any]]) -> None:
+            # Crew callbacks run on worker threads; hand the events over to the loop
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def on_token(token: str) -> None:
+            answer_token = token_filter.feed(token)
+            if answer_token:
+                emit({"type": "token", "token": answer_token})
+
+        run = asyncio.create_task(
+            self.generate_summary(
+                tender_documents_text,
+                progress_callback=lambda processed: emit(
+                    {"type": "progress", "processed_chunks": processed}
+                ),
+                max_concurrent_chunks=max_concurrent_chunks,
+                task_output_callback=lambda task, output: emit(
+                    {"type": "task_output", "task": task, "output": output}
+                ),
+                token_callback=on_token,
+                return_metrics=True,
+            )
+        )
+        run.add_done_callback(lambda _: emit(None))
+
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            if not run.done():
+                run.cancel()
+
+        summary, metrics = run.result()
+        yield {"type": "summary", "summary": summary, "metrics": metrics.to_dict()}
@@ -0,0 +1,179 @@
+"""Evaluation harness for the chunk prefilter: recall versus LLM calls saved.
+
+Usage:
+    # 1) Label the chunks of sample tenders with the LLM map stage (costs one call per chunk)
+    python -m src.tender_analysis_crew.prefilter_evaluation label edital.pdf termo.pdf -o chunks.jsonl
+
+    # 2) Sweep prefilter thresholds over the labeled chunks (local, free)
+    python -m src.tender_analysis_crew.prefilter_evaluation evaluate chunks.jsonl -o results.json
+
+A chunk is relevant when the LLM extracted at least one section from it. Besides chunk
+recall, the sweep reports section recall (share of all extracted sections whose chunk is
+kept) and checklist recall (same, for sections with checklist == 1).
+"""
+
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List, Optional
+
+from src.tender_analysis_crew.chunk_prefilter import ChunkPreFilter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLDS = [round(0.025 * i, 3) for i in range(0, 21)]
+
+
+async def label_chunks(pdf_paths: List[str], max_concurrent_chunks: int = 10) -> List[Dict[str, Any]]:
+    """Run the LLM map stage on every chunk of the given PDFs.
+
+    Returns:
+        List of {"source", "chunk_index", "text", "sections"} records
+    """
+    from langchain_core.documents import Document
+    from src.pdf_text import extract_pages
+    from src.tender_analysis_crew.crew import TenderAnalysisCrew, TenderAnalysisUtils
+    from src.tender_analysis_crew.utils import PDF_BACKEND
+
+    crew = TenderAnalysisCrew()
+    semaphore = asyncio.Semaphore(max_concurrent_chunks)
+    records = []
+
+    for pdf_path in pdf_paths:
+        documents = [
+            Document(page_content=text, metadata={"source": pdf_path, "page": page})
+            for page, text in enumerate(extract_pages(pdf_path, PDF_BACKEND))
+        ]
+        chunks = TenderAnalysisUtils.split_text(TenderAnalysisUtils.concatenate_docs(documents))
+
+        async def label(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await crew._extract_and_label_sections(chunk)
+
+        results = await asyncio.gather(*(label(chunk) for chunk in chunks))
+        for chunk_index, (chunk, result) in enumerate(zip(chunks, results)):
+            records.append(
+                {
+                    "source": pdf_path,
+                    "chunk_index": chunk_index,
+                    "text": chunk,
+                    "sections": result.get("sections", []),
+                }
+            )
+        logger.info(f"Labeled {len(chunks)} chunks from {pdf_path}")
+    return records
+
+
+def evaluate_prefilter(
+    records: List[Dict[str, Any]],
+    thresholds: Optional[List[float]] = None,
+    prefilter: Optional[ChunkPreFilter] = None,
+) -> List[Dict[str, float]]:
+    """Sweep thresholds and compute recall versus calls saved.
+
+    Args:
+        records: Labeled chunks, as produced by label_chunks
+        thresholds: Thresholds to evaluate (default: 0 to 0.5 in steps of 0.025)
+        prefilter: Prefilter used for scoring (default: ChunkPreFilter())
+
+    Returns:
+        One dict per threshold with calls_saved, chunk_recall, section_recall and checklist_recall
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    prefilter = prefilter or ChunkPreFilter()
+
+    # Score chunks per source document, since TF-IDF is fitted per document
+    sources: Dict[str, List[int]] = {}
+    for index, record in enumerate(records):
+        sources.setdefault(record.get("source", ""), []).append(index)
+    scores: List[float] = [0.0] * len(records)
+    for indexes in sources.values():
+        for index, score in zip(indexes, prefilter.score_chunks([records[i]["text"] for i in indexes])):
+            scores[index] = score
+
+    section_counts = [len(record["sections"]) for record in records]
+    checklist_counts = [
+        sum(1 for section in record["sections"] if section.get("checklist") == 1)
+        for record in records
+    ]
+    relevant_chunks = sum(1 for count in section_counts if count)
+    total_sections = sum(section_counts)
+    total_checklist = sum(checklist_counts)
+
+    results = []
+    for threshold in thresholds:
+        kept = [score >= threshold for score in scores]
+        results.append(
+            {
+                "threshold": threshold,
+                "calls_saved": 1 - sum(kept) / len(records) if records else 0.0,
+                "chunk_recall": (
+                    sum(1 for keep, count in zip(kept, section_counts) if keep and count) / relevant_chunks
+                    if relevant_chunks
+                    else 1.0
+                ),
+                "section_recall": (
+                    sum(count for keep, count in zip(kept, section_counts) if keep) / total_sections
+                    if total_sections
+                    else 1.0
+                ),
+                "checklist_recall": (
+                    sum(count for keep, count in zip(kept, checklist_counts) if keep) / total_checklist
+                    if total_checklist
+                    else 1.0
+                ),
+            }
+        )
+    return results
+
+
+def format_results(results: List[Dict[str, float]]) -> str:
+    """Render the threshold sweep as a text table."""
+    lines = [
+        f"{'threshold':>9} | {'calls saved':>11} | {'chunk recall':>12} | {'section recall':>14} | {'checklist recall':>16}",
+        "-" * 75,
+    ]
+    for result in results:
+        lines.append(
+            f"{result['threshold']:>9.3f} | {result['calls_saved']:>11.1%} | {result['chunk_recall']:>12.1%} | "
+            f"{result['section_recall']:>14.1%} | {result['checklist_recall']:>16.1%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    label_parser = subparsers.add_parser("label", help="Label tender chunks with the LLM map stage")
+    label_parser.add_argument("pdfs", nargs="+", help="Tender PDF files")
+    label_parser.add_argument("-o", "--output", required=True, help="Output JSONL file")
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="Sweep prefilter thresholds")
+    evaluate_parser.add_argument("dataset", help="JSONL file produced by the label command")
+    evaluate_parser.add_argument("-o", "--output", help="Optional JSON file for the results")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.command == "label":
+        records = asyncio.run(label_chunks(args.pdfs))
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            for record in records:
+                output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"Labeled {len(records)} chunks into {args.output}")
+        return
+
+    with open(args.dataset, encoding="utf-8") as dataset_file:
+        records = [json.loads(line) for line in dataset_file if line.strip()]
+    results = evaluate_prefilter(records)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
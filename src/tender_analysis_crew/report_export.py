@@ -0,0 +1,425 @@
+"""Rendering of markdown reports to PDF and DOCX, cached by report hash and format.
+
+The markdown is parsed once into a flat list of blocks (headings, paragraphs, list
+items, tables, code and rules), which the PDF (reportlab) and DOCX (python-docx)
+renderers walk. Rendered files are kept in memory and on disk, keyed by the SHA-256 of
+the report and the format, so exporting the same report again takes milliseconds.
+Renders run on a small thread pool, so Streamlit pages can draw while a file is built.
+"""
+
+import os
+import logging
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.tender_analysis_crew.chunk_checkpoint import hash_text
+
+logger = logging.getLogger(__name__)
+
+# (text, bold, italic, code)
+Span = Tuple[str, bool, bool, bool]
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+@dataclass
+class Block:
+    """A block of the report.
+
+    kind is one of "heading", "paragraph", "quote", "list_item", "table", "code" or "rule".
+    """
+
+    kind: str
+    spans: List[Span] = field(default_factory=list)
+    level: int = 0  # Heading level or list depth
+    marker: Optional[str] = None  # "•" or "1." for the first paragraph of a list item
+    rows: List[List[List[Span]]] = field(default_factory=list)  # Table cells, header row first
+    text: str = ""  # Code block content
+
+
+def _inline_spans(token) -> List[Span]:
+    """Flatten the children of an inline markdown-it token into styled spans."""
+    spans: List[Span] = []
+    bold = italic = False
+    for child in token.children or []:
+        if child.type == "strong_open":
+            bold = True
+        elif child.type == "strong_close":
+            bold = False
+        elif child.type == "em_open":
+            italic = True
+        elif child.type == "em_close":
+            italic = False
+        elif child.type == "code_inline":
+            spans.append((child.content, bold, italic, True))
+        elif child.type == "softbreak":
+            spans.append((" ", bold, italic, False))
+        elif child.type == "hardbreak":
+            spans.append(("\n", bold, italic, False))
+        elif child.type in ("text", "html_inline"):
+            spans.append((child.content, bold, italic, False))
+        elif child.type == "image":
+            spans.append((child.content, bold, italic, False))
+    return spans
+
+
+def parse_markdown(markdown_text: str) -> List[Block]:
+    """Parse markdown (CommonMark plus tables and strikethrough) into report blocks.
+
+    Args:
+        markdown_text: The markdown text
+
+    Returns:
+        List[Block]: Blocks in document order
+    """
+    from markdown_it import MarkdownIt
+
+    tokens = MarkdownIt("commonmark").enable(["table", "strikethrough"]).parse(markdown_text)
+    blocks: List[Block] = []
+    # One entry per open list: [ordered, next item number]
+    lists: List[List] = []
+    # Marker of the current list item, consumed by its first paragraph
+    pending_marker: Optional[str] = None
+    table: Optional[Block] = None
+    heading_level = 0
+    quote_depth = 0
+
+    for token in tokens:
+        if token.type == "heading_open":
+            heading_level = int(token.tag[1])
+        elif token.type in ("bullet_list_open", "ordered_list_open"):
+            lists.append([token.type == "ordered_list_open", int(token.attrGet("start") or 1)])
+        elif token.type in ("bullet_list_close", "ordered_list_close"):
+            lists.pop()
+        elif token.type == "list_item_open":
+            ordered, number = lists[-1]
+            pending_marker = f"{number}." if ordered else "•"
+            lists[-1][1] = number + 1
+        elif token.type == "blockquote_open":
+            quote_depth += 1
+        elif token.type == "blockquote_close":
+            quote_depth -= 1
+        elif token.type == "table_open":
+            table = Block("table")
+        elif token.type == "table_close":
+            blocks.append(table)
+            table = None
+        elif token.type == "tr_open":
+            table.rows.append([])
+        elif token.type in ("fence", "code_block"):
+            blocks.append(Block("code", text=token.content.rstrip("\n")))
+        elif token.type == "hr":
+            blocks.append(Block("rule"))
+        elif token.type == "html_block":
+            blocks.append(Block("paragraph", spans=[(token.content.strip(), False, False, False)]))
+        elif token.type == "inline":
+            spans = _inline_spans(token)
+            if table is not None:
+                table.rows[-1].append(spans)
+            elif heading_level:
+                blocks.append(Block("heading", spans=spans, level=heading_level))
+                heading_level = 0
+            elif lists:
+                blocks.append(Block("list_item", spans=spans, level=len(lists) - 1, marker=pending_marker))
+                pending_marker = None
+            else:
+                blocks.append(Block("quote" if quote_depth else "paragraph", spans=spans))
+    return blocks
+
+
+def _pdf_text(text: str) -> str:
+    """Escape text for reportlab paragraph markup.
+
+    The standard PDF fonts only cover WinAnsi (cp1252), so characters outside it,
+    such as emojis, are dropped instead of being drawn as black boxes.
+    """
+    text = "".join(char for char in text if char == "\n" or _is_cp1252(char))
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br/>")
+
+
+def _is_cp1252(char: str) -> bool:
+    try:
+        char.encode("cp1252")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def _pdf_markup(spans: List[Span]) -> str:
+    parts = []
+    for text, bold, italic, code in spans:
+        markup = _pdf_text(text)
+        if code:
+            markup = f'<font face="Courier">{markup}</font>'
+        if italic:
+            markup = f"<i>{markup}</i>"
+        if bold:
+            markup = f"<b>{markup}</b>"
+        parts.append(markup)
+    return "".join(parts).strip()
+
+
+def markdown_to_pdf(markdown_text: str) -> bytes:
+    """Render markdown to PDF.
+
+    Args:
+        markdown_text: The markdown text to convert
+
+    Returns:
+        bytes: The PDF file
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import HRFlowable, Paragraph, Preformatted, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+
+    styles = getSampleStyleSheet()
+    body_style = ParagraphStyle("Body", parent=styles["Normal"], spaceBefore=4, spaceAfter=6, leading=14)
+    quote_style = ParagraphStyle("Quote", parent=body_style, leftIndent=18, textColor=colors.dimgrey)
+    cell_style = ParagraphStyle("Cell", parent=styles["Normal"], fontSize=9, leading=11)
+    header_cell_style = ParagraphStyle("HeaderCell", parent=cell_style, fontName="Helvetica-Bold")
+
+    elements = []
+    for block in parse_markdown(markdown_text):
+        if block.kind == "heading":
+            elements.append(Paragraph(_pdf_markup(block.spans), styles[f"Heading{min(block.level, 6)}"]))
+        elif block.kind in ("paragraph", "quote"):
+            markup = _pdf_markup(block.spans)
+            if markup:
+                elements.append(Paragraph(markup, quote_style if block.kind == "quote" else body_style))
+        elif block.kind == "list_item":
+            indent = 18 * (block.level + 1)
+            item_style = ParagraphStyle(
+                f"ListItem{block.level}",
+                parent=body_style,
+                leftIndent=indent,
+                bulletIndent=indent - 12,
+                spaceBefore=0,
+                spaceAfter=2,
+            )
+            elements.append(Paragraph(_pdf_markup(block.spans), item_style, bulletText=block.marker))
+        elif block.kind == "table":
+            column_count = max(len(row) for row in block.rows)
+            data = [
+                [Paragraph(_pdf_markup(cell), header_cell_style if row_index == 0 else cell_style) for cell in row]
+                + [""] * (column_count - len(row))
+                for row_index, row in enumerate(block.rows)
+            ]
+            table = Table(data, colWidths=[doc.width / column_count] * column_count, repeatRows=1)
+            table.setStyle(
+                TableStyle(
+                    [
+                        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#E8EEF4")),
+                        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                    ]
+                )
+            )
+            elements.extend([table, Spacer(1, 0.1 * inch)])
+        elif block.kind == "code":
+            elements.append(Preformatted(_pdf_text(block.text).replace("<br/>", "\n"), styles["Code"]))
+        elif block.kind == "rule":
+            elements.append(HRFlowable(width="100%", color=colors.lightgrey, spaceBefore=6, spaceAfter=6))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def _add_docx_runs(paragraph, spans: List[Span]) -> None:
+    for text, bold, italic, code in spans:
+        run = paragraph.add_run(text)
+        run.bold = bold or None
+        run.italic = italic or None
+        if code:
+            run.font.name = "Courier New"
+
+
+def markdown_to_docx(markdown_text: str) -> bytes:
+    """Render markdown to DOCX.
+
+    Args:
+        markdown_text: The markdown text to convert
+
+    Returns:
+        bytes: The DOCX file
+    """
+    from docx import Document
+    from docx.shared import Pt
+
+    document = Document()
+    for block in parse_markdown(markdown_text):
+        if block.kind == "heading":
+            _add_docx_runs(document.add_heading(level=min(block.level, 9)), block.spans)
+        elif block.kind in ("paragraph", "quote"):
+            _add_docx_runs(document.add_paragraph(style="Quote" if block.kind == "quote" else None), block.spans)
+        elif block.kind == "list_item":
+            if block.marker == "•":
+                style = "List Bullet" if block.level == 0 else f"List Bullet {min(block.level + 1, 3)}"
+                paragraph = document.add_paragraph(style=style)
+            else:
+                # Numbers are written out, Word's automatic numbering would continue across lists
+                paragraph = document.add_paragraph(style="List Paragraph")
+                paragraph.paragraph_format.left_indent = Pt(18 * (block.level + 1))
+                if block.marker:
+                    paragraph.add_run(f"{block.marker} ")
+            _add_docx_runs(paragraph, block.spans)
+        elif block.kind == "table":
+            column_count = max(len(row) for row in block.rows)
+            table = document.add_table(rows=len(block.rows), cols=column_count)
+            table.style = "Table Grid"
+            for row_index, row in enumerate(block.rows):
+                for column_index, cell in enumerate(row):
+                    paragraph = table.cell(row_index, column_index).paragraphs[0]
+                    _add_docx_runs(paragraph, cell)
+                    if row_index == 0:
+                        for run in paragraph.runs:
+                            run.bold = True
+        elif block.kind == "code":
+            run = document.add_paragraph().add_run(block.text)
+            run.font.name = "Courier New"
+            run.font.size = Pt(9)
+        elif block.kind == "rule":
+            document.add_paragraph()
+
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+RENDERERS: Dict[str, Callable[[str], bytes]] = {
+    "pdf": markdown_to_pdf,
+    "docx": markdown_to_docx,
+}
+
+
+class ReportExporter:
+    """Renders reports in the background and caches them by report hash and format."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        memory_items: Optional[int] = None,
+    ):
+        """Initialize the exporter.
+
+        Args:
+            cache_dir: Directory of rendered files. Defaults to TENDER_ANALYSIS_REPORT_CACHE_DIR
+                or data/report_cache. An empty string disables the disk cache.
+            max_workers: Render threads. Defaults to TENDER_ANALYSIS_REPORT_WORKERS or 2.
+            memory_items: Rendered files kept in memory. Defaults to TENDER_ANALYSIS_REPORT_CACHE_ITEMS or 32.
+        """
+        self.cache_dir = (
+            cache_dir if cache_dir is not None else os.getenv("TENDER_ANALYSIS_REPORT_CACHE_DIR", "data/report_cache")
+        )
+        self.memory_items = memory_items or int(os.getenv("TENDER_ANALYSIS_REPORT_CACHE_ITEMS", 32))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("TENDER_ANALYSIS_REPORT_WORKERS", 2)),
+            thread_name_prefix="report-export",
+        )
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        report_hash, export_format = key
+        return os.path.join(self.cache_dir, f"{report_hash}.{export_format}")
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as cache_file:
+                data = cache_file.read()
+        except FileNotFoundError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key: Tuple[str, str], data: bytes) -> None:
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _render(self, key: Tuple[str, str], report: str) -> bytes:
+        data = RENDERERS[key[1]](report)
+        self._remember(key, data)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(temp_path, path)
+        logger.debug(f"Rendered report {key[0][:12]} as {key[1]} ({len(data)} bytes)")
+        return data
+
+    def submit(self, report: str, export_format: str = "pdf") -> Future:
+        """Start rendering a report, unless it is cached or already being rendered.
+
+        Args:
+            report: The report markdown (CrewOutput objects are converted with str)
+            export_format: "pdf" or "docx"
+
+        Returns:
+            Future: Resolves to the rendered file bytes. Already done on cache hits.
+        """
+        if export_format not in RENDERERS:
+            raise ValueError(f"Unsupported report format: {export_format}")
+        report = str(report)
+        key = (hash_text(report), export_format)
+        data = self._cached(key)
+        if data is not None:
+            future: Future = Future()
+            future.set_result(data)
+            return future
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                return in_flight
+            future = self._executor.submit(self._render, key, report)
+            self._in_flight[key] = future
+        # Outside the lock: the callback runs right away if the render already finished
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Tuple[str, str], future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def render(self, report: str, export_format: str = "pdf") -> bytes:
+        """Render a report, blocking until it is ready.
+
+        Args:
+            report: The report markdown
+            export_format: "pdf" or "docx"
+
+        Returns:
+            bytes: The rendered file
+        """
+        return self.submit(report, export_format).result()
+
+
+@lru_cache(maxsize=None)
+def get_report_exporter() -> ReportExporter:
+    """Return the process-wide report exporter."""
+    return ReportExporter()
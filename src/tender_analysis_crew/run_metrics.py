@@ -0,0 +1,280 @@
+"""Stage, chunk, token and cost metrics of summary runs.
+
+Each generate_summary call records a RunMetrics, which is returned with the summary
+when requested and added to the process-wide MetricsRegistry. The registry renders
+the aggregates in the Prometheus text format. Every run is also appended to runs.jsonl
+in TENDER_ANALYSIS_METRICS_DIR (data/metrics by default) and the Prometheus textfile of
+the process is rewritten, in every environment.
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (prompt, cached prompt, completion)
+DEFAULT_MODEL_PRICES: Dict[str, tuple] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+# Metrics of the run being executed by the current task or thread
+current_run_metrics: ContextVar[Optional["RunMetrics"]] = ContextVar("current_run_metrics", default=None)
+
+
+def get_model_prices() -> Dict[str, tuple]:
+    """Price table, extended or overridden by TENDER_ANALYSIS_MODEL_PRICES.
+
+    The variable holds JSON like {"gpt-4o": [2.5, 1.25, 10.0]} in USD per million tokens.
+    """
+    prices = dict(DEFAULT_MODEL_PRICES)
+    overrides = os.getenv("TENDER_ANALYSIS_MODEL_PRICES")
+    if overrides:
+        prices.update({model: tuple(price) for model, price in json.loads(overrides).items()})
+    return prices
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimated cost in USD of a model's token usage, 0 for models without a price."""
+    # Strip litellm provider prefixes such as "azure/"
+    price = get_model_prices().get(model.split("/")[-1])
+    if price is None:
+        return 0.0
+    prompt_price, cached_price, completion_price = price
+    return (
+        (prompt_tokens - cached_tokens) * prompt_price
+        + cached_tokens * cached_price
+        + completion_tokens * completion_price
+    ) / 1_000_000
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    requests: int = 0
+    cost_usd: float = 0.0
+
+
+@dataclass
+class ChunkMetrics:
+    chunk_index: int
+    route: str
+    queue_wait: float = 0.0
+    latency: float = 0.0
+    retries: int = 0
+    from_checkpoint: bool = False
+    failed: bool = False
+
+
+@dataclass
+class RunMetrics:
+    """Metrics of a single generate_summary run. All durations are in seconds."""
+
+    run_id: str = ""
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    status: str = "running"
+    total_time: float = 0.0
+    stages: Dict[str, float] = field(default_factory=dict)
+    chunks: List[ChunkMetrics] = field(default_factory=list)
+    tokens: Dict[str, TokenUsage] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage, adding to any previous time of the same stage."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.time() - start
+
+    def record_usage(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        requests: int = 1,
+    ) -> None:
+        """Add token usage of a model. Safe to call from worker threads."""
+        with self._lock:
+            usage = self.tokens.setdefault(model, TokenUsage())
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.cached_tokens += cached_tokens
+            usage.requests += requests
+            usage.cost_usd += estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+
+    def record_llm_response(self, model: str, message: Any) -> None:
+        """Add the token usage reported in a LangChain AIMessage's metadata."""
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        usage_metadata = getattr(message, "usage_metadata", None) or {}
+        prompt_tokens = usage_metadata.get("input_tokens", token_usage.get("prompt_tokens", 0))
+        completion_tokens = usage_metadata.get("output_tokens", token_usage.get("completion_tokens", 0))
+        cached_tokens = (
+            (usage_metadata.get("input_token_details") or {}).get("cache_read")
+            or (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or 0
+        )
+        self.record_usage(model, prompt_tokens or 0, completion_tokens or 0, cached_tokens)
+
+    @property
+    def retries(self) -> int:
+        return sum(chunk.retries for chunk in self.chunks)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(usage.cost_usd for usage in self.tokens.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        chunk_latencies = sorted(chunk.latency for chunk in self.chunks if not chunk.from_checkpoint)
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "status": self.status,
+            "total_time": self.total_time,
+            "stages": dict(self.stages),
+            "chunk_count": len(self.chunks),
+            "chunk_latency_p50": _percentile(chunk_latencies, 0.5),
+            "chunk_latency_p95": _percentile(chunk_latencies, 0.95),
+            "queue_wait_max": max((chunk.queue_wait for chunk in self.chunks), default=0.0),
+            "retries": self.retries,
+            "cost_usd": self.cost_usd,
+            "tokens": {model: asdict(usage) for model, usage in self.tokens.items()},
+            "chunks": [asdict(chunk) for chunk in self.chunks],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def _percentile(sorted_values: List[float], quantile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(quantile * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class MetricsRegistry:
+    """Aggregates the metrics of every run in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs: Dict[str, int] = {}
+        self.run_seconds_sum = 0.0
+        self.stage_seconds: Dict[str, float] = {}
+        self.chunk_latency_sum = 0.0
+        self.chunk_queue_wait_sum = 0.0
+        self.chunks_total: Dict[str, int] = {}
+        self.retries_total = 0
+        self.tokens_total: Dict[tuple, int] = {}
+        self.cost_usd_total: Dict[str, float] = {}
+
+    def record(self, metrics: RunMetrics) -> None:
+        with self._lock:
+            self.runs[metrics.status] = self.runs.get(metrics.status, 0) + 1
+            self.run_seconds_sum += metrics.total_time
+            for stage, seconds in metrics.stages.items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            for chunk in metrics.chunks:
+                source = "checkpoint" if chunk.from_checkpoint else chunk.route
+                self.chunks_total[source] = self.chunks_total.get(source, 0) + 1
+                self.chunk_latency_sum += chunk.latency
+                self.chunk_queue_wait_sum += chunk.queue_wait
+            self.retries_total += metrics.retries
+            for model, usage in metrics.tokens.items():
+                for kind in ("prompt", "completion", "cached"):
+                    key = (model, kind)
+                    self.tokens_total[key] = self.tokens_total.get(key, 0) + getattr(usage, f"{kind}_tokens")
+                self.cost_usd_total[model] = self.cost_usd_total.get(model, 0.0) + usage.cost_usd
+
+    def to_prometheus(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """Render the aggregates in the Prometheus text exposition format."""
+
+        def series(name: str, value: float, **series_labels: str) -> str:
+            all_labels = {**(labels or {}), **series_labels}
+            label_str = ",".join(f'{key}="{value}"' for key, value in all_labels.items())
+            return f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}"
+
+        with self._lock:
+            lines = [
+                "# HELP tender_analysis_runs_total Summary runs by final status.",
+                "# TYPE tender_analysis_runs_total counter",
+                *(series("tender_analysis_runs_total", count, status=status) for status, count in self.runs.items()),
+                "# HELP tender_analysis_run_seconds_total Wall time of summary runs.",
+                "# TYPE tender_analysis_run_seconds_total counter",
+                series("tender_analysis_run_seconds_total", self.run_seconds_sum),
+                "# HELP tender_analysis_stage_seconds_total Time spent in each pipeline stage.",
+                "# TYPE tender_analysis_stage_seconds_total counter",
+                *(
+                    series("tender_analysis_stage_seconds_total", seconds, stage=stage)
+                    for stage, seconds in self.stage_seconds.items()
+                ),
+                "# HELP tender_analysis_chunks_total Chunks processed by route or resumed from checkpoints.",
+                "# TYPE tender_analysis_chunks_total counter",
+                *(series("tender_analysis_chunks_total", count, source=source) for source, count in self.chunks_total.items()),
+                "# HELP tender_analysis_chunk_seconds_total Map stage latency of the chunks.",
+                "# TYPE tender_analysis_chunk_seconds_total counter",
+                series("tender_analysis_chunk_seconds_total", self.chunk_latency_sum),
+                "# HELP tender_analysis_chunk_queue_wait_seconds_total Time chunks waited for a free slot.",
+                "# TYPE tender_analysis_chunk_queue_wait_seconds_total counter",
+                series("tender_analysis_chunk_queue_wait_seconds_total", self.chunk_queue_wait_sum),
+                "# HELP tender_analysis_chunk_retries_total Retried chunk extractions.",
+                "# TYPE tender_analysis_chunk_retries_total counter",
+                series("tender_analysis_chunk_retries_total", self.retries_total),
+                "# HELP tender_analysis_tokens_total LLM tokens by model and kind.",
+                "# TYPE tender_analysis_tokens_total counter",
+                *(
+                    series("tender_analysis_tokens_total", count, model=model, kind=kind)
+                    for (model, kind), count in self.tokens_total.items()
+                ),
+                "# HELP tender_analysis_cost_usd_total Estimated LLM cost by model.",
+                "# TYPE tender_analysis_cost_usd_total counter",
+                *(series("tender_analysis_cost_usd_total", cost, model=model) for model, cost in self.cost_usd_total.items()),
+            ]
+        return "\n".join(lines) + "\n"
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _metrics_registry
+
+
+def export_run_metrics(metrics: RunMetrics, metrics_dir: Optional[str] = None) -> None:
+    """Aggregate a finished run and export it to the metrics directory.
+
+    Each process writes its own Prometheus textfile, labeled with the worker id, so the
+    Streamlit server and the job workers don't overwrite each other's aggregates.
+
+    Args:
+        metrics: The finished run
+        metrics_dir: Target directory. Defaults to TENDER_ANALYSIS_METRICS_DIR or data/metrics.
+    """
+    _metrics_registry.record(metrics)
+    metrics_dir = metrics_dir or os.getenv("TENDER_ANALYSIS_METRICS_DIR") or "data/metrics"
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        with open(os.path.join(metrics_dir, "runs.jsonl"), "a", encoding="utf-8") as runs_file:
+            runs_file.write(metrics.to_json() + "\n")
+
+        worker = f"{socket.gethostname()}-{os.getpid()}"
+        prom_path = os.path.join(metrics_dir, f"tender_analysis_{worker}.prom")
+        with open(f"{prom_path}.tmp", "w", encoding="utf-8") as prom_file:
+            prom_file.write(_metrics_registry.to_prometheus({"worker": worker}))
+        os.replace(f"{prom_path}.tmp", prom_path)
+    except OSError as e:
+        logger.error(f"Error exporting run metrics: {str(e)}")
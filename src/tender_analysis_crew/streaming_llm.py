@@ -0,0 +1,155 @@
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from crewai.llm import LLM
+import litellm
+
+from src.llm_rate_limiter import DEFAULT_COMPLETION_TOKENS, count_tokens, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+class RateLimitedLLM(LLM):
+    """crewai LLM whose calls wait for the process-wide LLM rate limiter.
+
+    crewai's call() returns only the text, so the reservation is reconciled with the
+    prompt tokens plus the tokens of the returned text, or with no tokens if the call fails.
+    """
+
+    def call(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        prompt_tokens = count_tokens(messages)
+        reservation = get_rate_limiter().acquire(
+            prompt_tokens + (self.max_tokens or self.max_completion_tokens or DEFAULT_COMPLETION_TOKENS)
+        )
+        try:
+            response = self._complete(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+            )
+        except BaseException:
+            # A failed call (429, timeout) must not keep its estimate in the TPM window
+            reservation.reconcile(0)
+            raise
+        reservation.reconcile(prompt_tokens + count_tokens(str(response)))
+        return response
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        return super().call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+        )
+
+
+class StreamingLLM(RateLimitedLLM):
+    """crewai LLM that forwards completion tokens to a callback as they arrive.
+
+    Without a token_callback (or when tools are requested) it behaves exactly like
+    RateLimitedLLM. The callback is meant to be set on the per-run copy of the LLM made
+    by Crew.copy(). Streamed completions request the token usage in the last chunk and
+    report it to crewai's callbacks, as non-streamed calls do.
+    """
+
+    def __init__(self, *args, token_callback: Optional[Callable[[str], None]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token_callback = token_callback
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        if self.token_callback is None or tools:
+            return super()._complete(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+            )
+
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "timeout": self.timeout,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "n": self.n,
+            "stop": self.stop,
+            "max_tokens": self.max_tokens or self.max_completion_tokens,
+            "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty,
+            "logit_bias": self.logit_bias,
+            "seed": self.seed,
+            "api_base": self.base_url,
+            "api_version": self.api_version,
+            "api_key": self.api_key,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+        if callbacks:
+            self.set_callbacks(callbacks)
+
+        text_chunks = []
+        usage = None
+        for chunk in litellm.completion(**params):
+            usage = getattr(chunk, "usage", None) or usage
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if not token:
+                continue
+            text_chunks.append(token)
+            try:
+                self.token_callback(token)
+            except Exception as e:
+                logger.error(f"Error in token callback: {str(e)}")
+
+        # Same usage report as LLM.call, e.g. for crewai's TokenCalcHandler
+        if usage:
+            for callback in callbacks or []:
+                if hasattr(callback, "log_success_event"):
+                    callback.log_success_event(kwargs=params, response_obj={"usage": usage}, start_time=0, end_time=0)
+        return "".join(text_chunks)
+
+
+class FinalAnswerTokenFilter:
+    """Drops the agent's reasoning preamble and passes through only the final answer.
+
+    crewai agents answer in the "Thought: ... Final Answer: ..." format, so tokens are
+    buffered until the marker shows up and forwarded unchanged afterwards.
+    """
+
+    def __init__(self, marker: str = FINAL_ANSWER_MARKER):
+        self.marker = marker
+        self._buffer = ""
+        self._passthrough = False
+
+    def feed(self, token: str) -> str:
+        """Return the part of the token that belongs to the final answer."""
+        if self._passthrough:
+            return token
+        self._buffer += token
+        marker_index = self._buffer.find(self.marker)
+        if marker_index == -1:
+            return ""
+        self._passthrough = True
+        answer_start = self._buffer[marker_index + len(self.marker):].lstrip()
+        self._buffer = ""
+        return answer_start
@@ -0,0 +1,83 @@
+"""Document loading and chunking helpers for the tender analysis pipeline.
+
+Kept apart from crew.py, and with the PDF backends, tokenizer and text splitter imported on
+first use, so the Streamlit pages can use them without importing crewai and langchain.
+"""
+
+import os
+import logging
+from tempfile import TemporaryDirectory
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Text extraction backend of tender documents (see src.pdf_text)
+PDF_BACKEND = os.getenv("TENDER_ANALYSIS_PDF_BACKEND", "pypdf")
+
+
+class TenderAnalysisUtils:
+    @staticmethod
+    def load_pdfs_to_docs(uploaded_pdfs):
+        from langchain_core.documents import Document
+        from src.pdf_text import extract_pages
+
+        logger.debug("Loading PDFs to documents")
+        all_documents = []
+        with TemporaryDirectory() as temp_dir:
+            for uploaded_file in uploaded_pdfs:
+                try:
+                    temp_path = os.path.join(temp_dir, uploaded_file.name)
+                    with open(temp_path, "wb") as temp_file:
+                        temp_file.write(uploaded_file.getvalue())
+                    logger.debug(f"File written to temporary path: {temp_path}")
+
+                    documents = [
+                        Document(page_content=text, metadata={"source": temp_path, "page": page})
+                        for page, text in enumerate(extract_pages(temp_path, PDF_BACKEND))
+                    ]
+                    logger.debug(
+                        f"Loaded {len(documents)} documents from {uploaded_file.name}"
+                    )
+                    all_documents.extend(documents)
+                except Exception as e:
+                    logger.error(f"Error processing document: {e}")
+                    continue
+
+        logger.debug(f"Total documents loaded: {len(all_documents)}")
+        return all_documents
+
+    @staticmethod
+    def concatenate_docs(documents):
+        logger.debug("Concatenating documents")
+        tender_documents = ""
+        for i, doc in enumerate(documents):
+            source = doc.metadata.get("source", "")
+            filename = source.split("/")[-1]
+            filename = filename.split(".")[0]
+            tender_documents += f"{filename} - Pág.{i + 1}\n{doc.page_content}\n"
+        logger.debug("All documents concatenated")
+        return tender_documents
+
+    @staticmethod
+    def _length_function(text: str, encoding: str = "o200k_base") -> int:
+        import tiktoken
+
+        enc = tiktoken.get_encoding(f"{encoding}")
+        return len(enc.encode(text))
+
+    @staticmethod
+    def split_text(
+        text: str,
+        chunk_size: int = int(os.getenv("TENDER_ANALYSIS_CHUNK_SIZE", 2500)),
+        chunk_overlap: int = int(os.getenv("TENDER_ANALYSIS_CHUNK_OVERLAP", 250)),
+    ) -> List[str]:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        splitter = RecursiveCharacterTextSplitter(
+            separators=["\n\n", "\n", " ", ""],
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=TenderAnalysisUtils._length_function,
+        )
+        chunks = splitter.split_text(text=text)
+        return chunks
@@ -0,0 +1,228 @@
+"""Headless bulletin processing: label folders of bulletin PDFs and write the notices to a file.
+
+Inputs are PDF files, directories (searched recursively for *.pdf) and glob patterns.
+Bulletins run one per task on a pool of worker processes; the workers share the LLM rate
+limit through the sqlite rate limiter backend and split the concurrent request slots
+between them. Every labeled bulletin is saved in the notice store as soon as it finishes,
+with the template and company description of the app, so the Boletins page shows it too.
+
+Bulletins already in the store are skipped, which also resumes an interrupted run: running
+the same command again only processes the bulletins that didn't finish. The output file
+holds the notices of every input bulletin, processed now or before, in the format of the
+Boletins page exports (CSV, Parquet, JSONL or Excel, from the output extension or --format).
+
+Usage:
+    licita-boletins boletins/ "arquivo/2025-*/*.pdf" -o licitacoes.parquet --workers 4
+    python -m src.tender_notice_labeling.batch_cli boletim.pdf -o licitacoes.csv --force --report timings.json
+
+The exit status is 1 when any bulletin failed.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_PROCESSED = "processed"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+_processor = None
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """Return the PDF paths of files, directories and glob patterns, without repeating any.
+
+    Raises:
+        FileNotFoundError: If an input is neither an existing path nor a pattern matching PDFs
+    """
+    paths: List[str] = []
+    for value in inputs:
+        if os.path.isdir(value):
+            matches = sorted(glob.glob(os.path.join(glob.escape(value), "**", "*.[pP][dD][fF]"), recursive=True))
+        elif os.path.isfile(value):
+            matches = [value]
+        else:
+            matches = sorted(path for path in glob.glob(value, recursive=True) if path.lower().endswith(".pdf"))
+            if not matches:
+                raise FileNotFoundError(f"No PDF matches {value}")
+        paths.extend(matches)
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def _init_worker(environ: Dict[str, str]) -> None:
+    os.environ.update(environ)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+
+
+def process_bulletin(source_file: str, pdf_path: str, max_concurrent_requests: int) -> Dict[str, Any]:
+    """Label the notices of one bulletin with the app's template and company description.
+
+    Runs in the worker processes; the processor is created once per process.
+
+    Returns:
+        Dict[str, Any]: "records" (the notices, as stored by NoticeStore) and "seconds"
+    """
+    global _processor
+    from .notice_frame import notice_records
+    from .tender_notice_processor import TenderNoticeProcessor
+    from .tender_notice_templates import COMPANY_BUSINESS_DESCRIPTION, TENDER_NOTICE_LABELING_TEMPLATE
+
+    if _processor is None:
+        _processor = TenderNoticeProcessor()
+    start = time.perf_counter()
+    df = asyncio.run(
+        _processor.process_pdfs(
+            [(source_file, pdf_path)],
+            TENDER_NOTICE_LABELING_TEMPLATE,
+            COMPANY_BUSINESS_DESCRIPTION,
+            max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
+            max_concurrent_requests=max_concurrent_requests,
+        )
+    )
+    return {"records": notice_records(df), "seconds": time.perf_counter() - start}
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render per-file results as a text table."""
+    lines = [f"{'file':<40} | {'status':<9} | {'notices':>7} | {'seconds':>8}", "-" * 73]
+    for result in results:
+        notices = "" if result["notices"] is None else result["notices"]
+        seconds = "" if result["seconds"] is None else f"{result['seconds']:.1f}"
+        lines.append(f"{result['source_file'][-40:]:<40} | {result['status']:<9} | {notices:>7} | {seconds:>8}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .label_store import labeling_context_hash
+    from .notice_export import EXPORT_FORMATS, write_notices
+    from .notice_store import NoticeFilters, file_hash, get_notice_store
+    from .tender_notice_processor import MAX_CONCURRENT_REQUESTS
+    from .tender_notice_templates import COMPANY_BUSINESS_DESCRIPTION, TENDER_NOTICE_LABELING_TEMPLATE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Bulletin PDFs, directories or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.parquet, .csv, .jsonl or .xlsx)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Output format (default: from the output extension)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("TENDER_NOTICE_CLI_WORKERS", 4)),
+        help="Bulletins processed at once, each in its own process (1 = in-process)",
+    )
+    parser.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help="LLM requests in flight across all workers",
+    )
+    parser.add_argument("--force", action="store_true", help="Process bulletins already in the notice store again")
+    parser.add_argument("--store", help="Notice store database (default: TENDER_NOTICE_STORE_PATH)")
+    parser.add_argument("--report", help="Optional JSON file for the per-file results")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    export_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if export_format not in EXPORT_FORMATS:
+        parser.error(f"Can't tell the output format of {args.output}, use --format")
+    try:
+        paths = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    notice_store = get_notice_store(args.store)
+    context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+    # Copies of a bulletin under other names are processed once
+    hashes = {path: file_hash(path) for path in paths}
+    stored = {} if args.force else notice_store.get_bulletins(list(set(hashes.values())), context_hash)
+    results: Dict[str, Dict[str, Any]] = {}
+    to_process: Dict[str, str] = {}
+    for path, pdf_hash in hashes.items():
+        result = {"source_file": os.path.basename(path), "path": path, "file_hash": pdf_hash, "status": STATUS_SKIPPED}
+        result.update(notices=stored[pdf_hash]["notice_count"] if pdf_hash in stored else None, seconds=None)
+        results[path] = result
+        if pdf_hash not in stored:
+            to_process.setdefault(pdf_hash, path)
+    logger.info(f"{len(paths)} bulletins, {len(paths) - len(to_process)} already processed or repeated")
+
+    def finish(path: str, outcome: Optional[Dict[str, Any]], error: Optional[BaseException]) -> None:
+        result = results[path]
+        if error is not None:
+            logger.error(f"Failed to process {path}: {error}")
+            result.update(status=STATUS_FAILED, error=str(error))
+        else:
+            notice_store.add_bulletin(result["file_hash"], context_hash, result["source_file"], outcome["records"])
+            result.update(status=STATUS_PROCESSED, notices=len(outcome["records"]), seconds=outcome["seconds"])
+        print(format_results([result]).splitlines()[-1], flush=True)
+
+    workers = max(1, min(args.workers, len(to_process)))
+    # Each worker gets its share of the request slots, so the run keeps to the total
+    requests_per_worker = max(1, args.max_concurrent_requests // workers)
+    if workers == 1:
+        for path in to_process.values():
+            try:
+                outcome = process_bulletin(results[path]["source_file"], path, requests_per_worker)
+            except Exception as e:
+                finish(path, None, e)
+            else:
+                finish(path, outcome, None)
+    elif to_process:
+        # The workers share the RPM/TPM limit through the sqlite backend, and extract pages
+        # in-process since bulletins already run in parallel
+        environ = {"LICITA_AI_LLM_RATE_LIMIT_BACKEND": "sqlite", "LICITA_AI_PDF_WORKERS": "1"}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(environ,),
+        ) as executor:
+            futures = {
+                executor.submit(process_bulletin, results[path]["source_file"], path, requests_per_worker): path
+                for path in to_process.values()
+            }
+            for future in as_completed(futures):
+                error = future.exception()
+                finish(futures[future], None if error else future.result(), error)
+
+    for path, result in results.items():
+        processed = results[to_process.get(result["file_hash"], path)]
+        if processed is not result:
+            # A copy of a bulletin processed in this run
+            result.update(status=STATUS_FAILED if processed["status"] == STATUS_FAILED else STATUS_SKIPPED)
+            result.update(notices=processed["notices"])
+
+    done = [result["file_hash"] for result in results.values() if result["status"] != STATUS_FAILED]
+    write_notices(
+        notice_store,
+        args.output,
+        context_hash,
+        NoticeFilters(file_hashes=sorted(set(done))),
+        export_format,
+        int(os.getenv("TENDER_NOTICE_EXPORT_CHUNK_SIZE", 5000)),
+    )
+
+    print()
+    print(format_results(list(results.values())))
+    counts = {
+        status: sum(result["status"] == status for result in results.values())
+        for status in (STATUS_PROCESSED, STATUS_SKIPPED, STATUS_FAILED)
+    }
+    print(f"\n{counts[STATUS_PROCESSED]} processed, {counts[STATUS_SKIPPED]} skipped, {counts[STATUS_FAILED]} failed; "
+          f"notices written to {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump({"config": vars(args), "results": list(results.values())}, report_file, indent=2, ensure_ascii=False)
+    return 1 if counts[STATUS_FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""Local segmentation of bulletin text at the (n/N) counters that open every notice."""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# "(12/31)": notice 12 of a bulletin with 31 notices
+NOTICE_MARKER_PATTERN = re.compile(r"\(\s*(\d{1,4})\s*/\s*(\d{1,4})\s*\)")
+
+
+@dataclass
+class BulletinSegment:
+    """The text of one notice, from the line holding its (n/N) counter up to the next notice."""
+
+    number: int
+    total: int
+    text: str
+
+
+def parse_sequence_number(num_seq_boletim: Any) -> Optional[int]:
+    """Return n from a "(n/N)" or "n/N" sequence number, or None if it can't be read."""
+    match = re.search(r"(\d+)\s*/\s*\d+", str(num_seq_boletim or ""))
+    return int(match.group(1)) if match else None
+
+
+def segment_bulletin(text: str) -> List[BulletinSegment]:
+    """Split bulletin text into one segment per notice.
+
+    The total N with the most distinct counters is taken as the bulletin size, and only
+    counters with that total and an increasing n are used as boundaries, so fractions
+    inside notice texts don't split them. Text before the first counter (the email header) is dropped.
+
+    Args:
+        text: Bulletin text extracted from the PDF
+
+    Returns:
+        List[BulletinSegment]: Segments in bulletin order. Empty if the text has no counters.
+    """
+    matches = list(NOTICE_MARKER_PATTERN.finditer(text))
+    if not matches:
+        return []
+    # Counters of the bulletin share a total and count up to it, repeated fractions don't
+    numbers_by_total: Dict[int, Set[int]] = defaultdict(set)
+    for match in matches:
+        number, total = int(match.group(1)), int(match.group(2))
+        if 1 <= number <= total:
+            numbers_by_total[total].add(number)
+    if not numbers_by_total:
+        return []
+    total = max(
+        numbers_by_total,
+        key=lambda total: (len(numbers_by_total[total]), len(numbers_by_total[total]) / total),
+    )
+
+    boundaries = []
+    last_number = 0
+    for match in matches:
+        number = int(match.group(1))
+        if int(match.group(2)) != total or not last_number < number <= total:
+            continue
+        # Segments start at the line holding the counter, which also holds the organization name
+        boundaries.append((number, text.rfind("\n", 0, match.start()) + 1))
+        last_number = number
+
+    return [
+        BulletinSegment(
+            number=number,
+            total=total,
+            text=text[start : boundaries[index + 1][1] if index + 1 < len(boundaries) else len(text)].strip(),
+        )
+        for index, (number, start) in enumerate(boundaries)
+    ]
+
+
+def group_segments(segments: List[BulletinSegment], group_size: int) -> List[List[BulletinSegment]]:
+    """Group consecutive segments, so each extraction request holds up to group_size notices."""
+    group_size = max(group_size, 1)
+    return [segments[index : index + group_size] for index in range(0, len(segments), group_size)]
+
+
+def segments_to_reextract(
+    segments: List[BulletinSegment], extracted_numbers: Iterable[int]
+) -> List[BulletinSegment]:
+    """Return the segments that must be extracted again to complete the sequence 1..N.
+
+    A missing notice whose counter was found is re-extracted from its own segment. A missing
+    notice whose counter was lost (e.g. a PDF text glitch) ended up in the segment before it,
+    so that segment is re-extracted instead.
+
+    Args:
+        segments: All segments of the bulletin
+        extracted_numbers: Sequence numbers of the notices extracted so far
+
+    Returns:
+        List[BulletinSegment]: Segments to re-extract, in bulletin order
+    """
+    if not segments:
+        return []
+    extracted = set(extracted_numbers)
+    to_reextract = {}
+    for number in range(1, segments[0].total + 1):
+        if number in extracted:
+            continue
+        candidates = [segment for segment in segments if segment.number <= number]
+        # Notices before the first counter can only be in the first segment
+        segment = candidates[-1] if candidates else segments[0]
+        to_reextract[segment.number] = segment
+    return [to_reextract[number] for number in sorted(to_reextract)]
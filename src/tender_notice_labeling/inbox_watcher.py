@@ -0,0 +1,293 @@
+"""Daemon that labels bulletins dropped into an inbox folder, so they are ready when the app opens.
+
+The inbox is scanned every poll interval; when watchdog is installed, file events (inotify
+on Linux) wake the scan up early. PDFs and .eml files (whose PDF attachments are the
+bulletins) are picked up once they haven't changed for a few seconds, so files still being
+written are left for the next scan. Bulletins are deduplicated by content hash against the
+notice store, then labeled together with TenderNoticeProcessor.process_pdfs and saved in
+the notice store with the template and company description of the app, so the Boletins
+page lists them. Handled files are moved to the "processados" (or "falhas") subfolder.
+
+Usage:
+    licita-inbox --inbox /srv/boletins/entrada
+    python -m src.tender_notice_labeling.inbox_watcher --once   # Process what is there and exit
+"""
+
+import os
+import sys
+import time
+import email
+import shutil
+import signal
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from email import policy
+from typing import Any, Dict, List, Optional, Tuple
+
+from .label_store import labeling_context_hash
+from .notice_frame import notice_records
+from .notice_store import NoticeStore, file_hash, get_notice_store
+from .tender_notice_templates import COMPANY_BUSINESS_DESCRIPTION, TENDER_NOTICE_LABELING_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = "processados"
+FAILED_DIR = "falhas"
+
+INBOX_EXTENSIONS = (".pdf", ".eml")
+
+
+def eml_attachments(path: str) -> List[Tuple[str, bytes]]:
+    """Return the (file name, content) of the PDF attachments of an email, forwarded emails included."""
+    with open(path, "rb") as eml_file:
+        message = email.message_from_binary_file(eml_file, policy=policy.default)
+    attachments = []
+    for part in message.walk():
+        filename = part.get_filename() or ""
+        if part.get_content_type() == "application/pdf" or filename.lower().endswith(".pdf"):
+            content = part.get_payload(decode=True)
+            if content:
+                attachments.append((os.path.basename(filename) or f"anexo_{len(attachments) + 1}.pdf", content))
+    return attachments
+
+
+class InboxWatcher:
+    """Scans an inbox folder and labels the new bulletins in it."""
+
+    def __init__(
+        self,
+        inbox_dir: Optional[str] = None,
+        notice_store: Optional[NoticeStore] = None,
+        processor: Any = None,
+        settle_seconds: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        archive: Optional[bool] = None,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            inbox_dir: Folder to watch. Defaults to TENDER_NOTICE_INBOX_DIR or data/inbox.
+            notice_store: Store the labeled notices are saved to. Defaults to the process-wide store.
+            processor: TenderNoticeProcessor, created on the first bulletin if not given
+            settle_seconds: Seconds a file must be left unchanged before it is read.
+                Defaults to TENDER_NOTICE_INBOX_SETTLE_SECONDS or 5.
+            batch_size: Bulletins labeled together at most. Defaults to TENDER_NOTICE_INBOX_BATCH_SIZE or 10.
+            archive: Move handled files to the processados/falhas subfolders. Defaults to
+                TENDER_NOTICE_INBOX_ARCHIVE (true); otherwise they are only remembered in memory.
+        """
+        self.inbox_dir = inbox_dir or os.getenv("TENDER_NOTICE_INBOX_DIR", "data/inbox")
+        self.notice_store = notice_store or get_notice_store()
+        self._processor = processor
+        self.settle_seconds = float(
+            settle_seconds if settle_seconds is not None else os.getenv("TENDER_NOTICE_INBOX_SETTLE_SECONDS", 5)
+        )
+        self.batch_size = batch_size or int(os.getenv("TENDER_NOTICE_INBOX_BATCH_SIZE", 10))
+        if archive is None:
+            archive = os.getenv("TENDER_NOTICE_INBOX_ARCHIVE", "true").lower() == "true"
+        self.archive = archive
+        self.context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+        # (path, size, mtime) of the files handled without archiving
+        self._handled = set()
+        os.makedirs(self.inbox_dir, exist_ok=True)
+
+    @property
+    def processor(self) -> Any:
+        if self._processor is None:
+            from .tender_notice_processor import TenderNoticeProcessor
+
+            self._processor = TenderNoticeProcessor()
+        return self._processor
+
+    def ready_files(self) -> List[str]:
+        """Return the PDFs and emails of the inbox left unchanged for settle_seconds, oldest first."""
+        now = time.time()
+        ready = []
+        for entry in os.scandir(self.inbox_dir):
+            if not entry.is_file() or not entry.name.lower().endswith(INBOX_EXTENSIONS):
+                continue
+            stat = entry.stat()
+            if (entry.path, stat.st_size, stat.st_mtime) in self._handled or now - stat.st_mtime < self.settle_seconds:
+                continue
+            ready.append((stat.st_mtime, entry.path))
+        return [path for _, path in sorted(ready)]
+
+    def process_ready(self) -> Dict[str, int]:
+        """Label the bulletins of the ready files, batch_size at a time.
+
+        Returns:
+            Dict[str, int]: Counts of "processed", "duplicate" and "failed" bulletins
+        """
+        counts = {"processed": 0, "duplicate": 0, "failed": 0}
+        paths = self.ready_files()
+        for start in range(0, len(paths), self.batch_size):
+            with tempfile.TemporaryDirectory(prefix="licita-inbox-") as temp_dir:
+                for status, count in self._process_batch(paths[start:start + self.batch_size], temp_dir).items():
+                    counts[status] += count
+        return counts
+
+    def _process_batch(self, paths: List[str], temp_dir: str) -> Dict[str, int]:
+        # Bulletins of the batch: source_file -> (file hash, PDF path, inbox file it came from)
+        bulletins: Dict[str, Tuple[str, str, str]] = {}
+        # Status of each inbox file; an email fails if any of its bulletins fails
+        file_status: Dict[str, str] = {}
+        counts = {"processed": 0, "duplicate": 0, "failed": 0}
+        for file_index, path in enumerate(paths):
+            file_status[path] = "duplicate"
+            if path.lower().endswith(".eml"):
+                try:
+                    attachments = eml_attachments(path)
+                except Exception as e:
+                    logger.error(f"Could not read {path}: {e}")
+                    file_status[path] = "failed"
+                    continue
+                if not attachments:
+                    logger.warning(f"No PDF attached to {path}")
+                pdfs = []
+                for index, (filename, content) in enumerate(attachments):
+                    pdf_path = os.path.join(temp_dir, f"{file_index}_{index}.pdf")
+                    with open(pdf_path, "wb") as pdf_file:
+                        pdf_file.write(content)
+                    pdfs.append((filename, pdf_path))
+            else:
+                pdfs = [(os.path.basename(path), path)]
+            for source_file, pdf_path in pdfs:
+                if source_file in bulletins:
+                    # Another bulletin of the batch has this name; tell them apart in the Boletins page
+                    source_file = f"{os.path.splitext(os.path.basename(path))[0]} - {source_file}"
+                bulletins[source_file] = (file_hash(pdf_path), pdf_path, path)
+
+        hashes = list({pdf_hash for pdf_hash, _, _ in bulletins.values()})
+        stored = self.notice_store.get_bulletins(hashes, self.context_hash)
+        to_process: Dict[str, str] = {}
+        for source_file, (pdf_hash, _, _) in bulletins.items():
+            if pdf_hash in stored or pdf_hash in to_process.values():
+                counts["duplicate"] += 1
+            else:
+                to_process[source_file] = pdf_hash
+        logger.info(f"{len(bulletins)} bulletin(s) in {len(paths)} file(s), {len(to_process)} new")
+
+        if to_process:
+            start = time.perf_counter()
+            try:
+                df = asyncio.run(
+                    self.processor.process_pdfs(
+                        [(source_file, bulletins[source_file][1]) for source_file in to_process],
+                        TENDER_NOTICE_LABELING_TEMPLATE,
+                        COMPANY_BUSINESS_DESCRIPTION,
+                        max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
+                    )
+                )
+                failed_files = df.attrs.get("failed_files", {})
+                records = notice_records(df)
+            except Exception as e:
+                logger.error(f"Could not process the batch: {e}")
+                failed_files, records = {source_file: str(e) for source_file in to_process}, []
+            for source_file, pdf_hash in to_process.items():
+                if source_file in failed_files:
+                    logger.error(f"Failed to process {source_file}: {failed_files[source_file]}")
+                    file_status[bulletins[source_file][2]] = "failed"
+                    counts["failed"] += 1
+                    continue
+                notices = [record for record in records if record["source_file"] == source_file]
+                self.notice_store.add_bulletin(pdf_hash, self.context_hash, source_file, notices)
+                counts["processed"] += 1
+                if file_status[bulletins[source_file][2]] != "failed":
+                    file_status[bulletins[source_file][2]] = "processed"
+            logger.info(
+                f"Labeled {counts['processed']} bulletin(s) in {time.perf_counter() - start:.1f}s, {counts['failed']} failed"
+            )
+
+        for path, status in file_status.items():
+            self._handle(path, status)
+        return counts
+
+    def _handle(self, path: str, status: str) -> None:
+        """Archive a file, or remember it, so it isn't picked up again."""
+        if not self.archive:
+            stat = os.stat(path)
+            self._handled.add((path, stat.st_size, stat.st_mtime))
+            return
+        archive_dir = os.path.join(self.inbox_dir, FAILED_DIR if status == "failed" else PROCESSED_DIR)
+        os.makedirs(archive_dir, exist_ok=True)
+        target = os.path.join(archive_dir, os.path.basename(path))
+        if os.path.exists(target):
+            name, extension = os.path.splitext(os.path.basename(path))
+            target = os.path.join(archive_dir, f"{name}_{time.strftime('%Y%m%d%H%M%S')}{extension}")
+        shutil.move(path, target)
+
+    def run(self, stop_event: threading.Event, poll_interval: Optional[float] = None) -> None:
+        """Process the inbox until stop_event is set.
+
+        Args:
+            stop_event: Stops the loop once the current batch is done
+            poll_interval: Seconds between scans. Defaults to TENDER_NOTICE_INBOX_POLL_INTERVAL or 30.
+        """
+        poll_interval = poll_interval or float(os.getenv("TENDER_NOTICE_INBOX_POLL_INTERVAL", 30))
+        wake_event = threading.Event()
+        observer = self._start_observer(wake_event)
+        logger.info(f"Watching {os.path.abspath(self.inbox_dir)} ({'file events' if observer else 'polling'})")
+        try:
+            while not stop_event.is_set():
+                wake_event.clear()
+                try:
+                    self.process_ready()
+                except Exception as e:
+                    logger.exception(f"Error processing the inbox: {e}")
+                # Files picked up by an event are read once they have settled
+                if wake_event.wait(poll_interval):
+                    stop_event.wait(self.settle_seconds)
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+
+    def _start_observer(self, wake_event: threading.Event) -> Any:
+        """Start a watchdog observer setting wake_event on inbox changes, if watchdog is installed."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        class WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    wake_event.set()
+
+        observer = Observer()
+        observer.schedule(WakeHandler(), self.inbox_dir, recursive=False)
+        observer.start()
+        return observer
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inbox", help="Folder to watch (default: TENDER_NOTICE_INBOX_DIR)")
+    parser.add_argument(
+        "--poll-interval", type=float, help="Seconds between scans (default: TENDER_NOTICE_INBOX_POLL_INTERVAL)"
+    )
+    parser.add_argument("--once", action="store_true", help="Process the files in the inbox and exit")
+    parser.add_argument("--no-archive", action="store_true", help="Leave handled files in the inbox")
+    parser.add_argument("--store", help="Notice store database (default: TENDER_NOTICE_STORE_PATH)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    watcher = InboxWatcher(args.inbox, get_notice_store(args.store), archive=False if args.no_archive else None)
+    if args.once:
+        print(watcher.process_ready())
+        return
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    watcher.run(stop_event, args.poll_interval)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
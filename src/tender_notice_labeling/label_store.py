@@ -0,0 +1,207 @@
+"""SQLite-backed store of notice labels, so notices repeated across bulletins are labeled once."""
+
+import os
+import re
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stored labels are reused only for the same notice object and the same labeling context
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notice_labels (
+    id_universo TEXT NOT NULL,
+    objeto_hash TEXT NOT NULL,
+    context_hash TEXT NOT NULL,
+    label TEXT NOT NULL,
+    labeled_at REAL NOT NULL,
+    last_seen_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'llm',
+    objeto TEXT,
+    orgao TEXT,
+    estado TEXT,
+    PRIMARY KEY (id_universo, objeto_hash, context_hash)
+);
+"""
+
+# Columns added after the first release of the store, with their definitions
+_ADDED_COLUMNS = {
+    "source": "TEXT NOT NULL DEFAULT 'llm'",
+    "objeto": "TEXT",
+    "orgao": "TEXT",
+    "estado": "TEXT",
+}
+
+# Label sources. User corrections are never overwritten by LLM labels.
+SOURCE_LLM = "llm"
+SOURCE_USER = "user"
+
+# Labels as displayed in the app
+DISPLAY_LABELS = {
+    "yes": "✅ Participar",
+    "no": "❌ Declinar",
+    "unsure": "🤔 Avaliar",
+    "insufficient_info": "🤷‍♂️ Info insuficiente",
+}
+
+# Keeps IN (...) lists below SQLite's host parameter limit
+_QUERY_BATCH_SIZE = 500
+
+NoticeKey = Tuple[str, str]
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def labeling_context_hash(template: str, company_description: str) -> str:
+    """Hash of everything besides the notice that determines its label."""
+    return _hash(f"{template}\x00{company_description}")
+
+
+def notice_key(notice: Dict[str, Any]) -> Optional[NoticeKey]:
+    """Return (id_universo, objeto hash) of a notice, or None if it has no id_universo.
+
+    Whitespace differences in objeto, common between PDF extractions, don't change the key.
+    Float ids, as read back from DataFrames with missing ids, map to the same key as ints.
+    """
+    id_universo = notice.get("id_universo")
+    if isinstance(id_universo, float):
+        if math.isnan(id_universo):
+            return None
+        if id_universo.is_integer():
+            id_universo = int(id_universo)
+    if id_universo in (None, ""):
+        return None
+    objeto = re.sub(r"\s+", " ", str(notice.get("objeto") or "")).strip()
+    return str(id_universo), _hash(objeto)
+
+
+class LabelStore:
+    """Persistent labels of tender notices, keyed by id_universo, objeto and labeling context."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the label store.
+
+        Args:
+            db_path: Path to the SQLite database. Defaults to TENDER_NOTICE_LABEL_STORE_PATH
+                or data/notice_labels.sqlite3.
+        """
+        self.db_path = db_path or os.getenv("TENDER_NOTICE_LABEL_STORE_PATH", "data/notice_labels.sqlite3")
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(notice_labels)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE notice_labels ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_labels(self, notices: List[Dict[str, Any]], context_hash: str) -> Dict[NoticeKey, str]:
+        """Look up the stored labels of notices.
+
+        Args:
+            notices: Extracted tender notices
+            context_hash: labeling_context_hash of the template and company description
+
+        Returns:
+            Dict[NoticeKey, str]: Labels by notice_key, for the notices found in the store
+        """
+        keys = {key for key in map(notice_key, notices) if key is not None}
+        ids = sorted({id_universo for id_universo, _ in keys})
+        labels: Dict[NoticeKey, str] = {}
+        now = time.time()
+        with self._connect() as conn:
+            for start in range(0, len(ids), _QUERY_BATCH_SIZE):
+                batch = ids[start:start + _QUERY_BATCH_SIZE]
+                rows = conn.execute(
+                    f"""
+                    SELECT id_universo, objeto_hash, label FROM notice_labels
+                    WHERE context_hash = ? AND id_universo IN ({", ".join("?" * len(batch))})
+                    """,
+                    (context_hash, *batch),
+                ).fetchall()
+                for row in rows:
+                    key = (row["id_universo"], row["objeto_hash"])
+                    if key in keys:
+                        labels[key] = row["label"]
+            conn.executemany(
+                """
+                UPDATE notice_labels SET hits = hits + 1, last_seen_at = ?
+                WHERE id_universo = ? AND objeto_hash = ? AND context_hash = ?
+                """,
+                [(now, id_universo, objeto_hash, context_hash) for id_universo, objeto_hash in labels],
+            )
+        return labels
+
+    def put_labels(self, notices: List[Dict[str, Any]], context_hash: str, source: str = SOURCE_LLM) -> None:
+        """Store the labels of labeled notices. Notices without id_universo or label are skipped.
+
+        Args:
+            notices: Labeled tender notices
+            context_hash: labeling_context_hash of the template and company description
+            source: SOURCE_LLM, or SOURCE_USER for corrections, which LLM labels never overwrite
+        """
+        now = time.time()
+        rows = [
+            (*key, context_hash, notice["label"], now, now, source, notice.get("objeto"), notice.get("orgao"), notice.get("estado"))
+            for notice, key in ((notice, notice_key(notice)) for notice in notices)
+            if key is not None and notice.get("label")
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO notice_labels (
+                    id_universo, objeto_hash, context_hash, label, labeled_at, last_seen_at, source, objeto, orgao, estado
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id_universo, objeto_hash, context_hash)
+                DO UPDATE SET label = excluded.label, labeled_at = excluded.labeled_at,
+                    last_seen_at = excluded.last_seen_at, source = excluded.source
+                WHERE notice_labels.source != 'user' OR excluded.source = 'user'
+                """,
+                rows,
+            )
+        logger.debug(f"Stored {len(rows)} {source} notice labels")
+
+    def training_examples(self, context_hash: str) -> List[Dict[str, Any]]:
+        """Return the stored notices with their labels, for training local classifiers.
+
+        Returns:
+            List of {"id_universo", "objeto", "orgao", "estado", "label", "source"} dicts,
+            oldest first, for the notices whose text was stored
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT id_universo, objeto, orgao, estado, label, source FROM notice_labels
+                WHERE context_hash = ? AND objeto IS NOT NULL
+                ORDER BY labeled_at
+                """,
+                (context_hash,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def get_label_store(db_path: Optional[str] = None) -> LabelStore:
+    """Return the process-wide label store."""
+    return LabelStore(db_path)
@@ -0,0 +1,339 @@
+"""Local relevance classifier of bulletin notices, trained from stored labels.
+
+A logistic regression over TF-IDF features of objeto (words and word pairs), orgao and
+estado estimates the probability that the LLM would label a notice "no". Notices above a
+high threshold are declined locally, so only the uncertain band is sent to the LLM.
+
+Usage:
+    # Sweep thresholds on held-out LLM labels of the label store (precision and recall of "no")
+    python -m src.tender_notice_labeling.notice_classifier evaluate -o results.json
+
+    # Train on all stored LLM labels and user corrections and save the model
+    python -m src.tender_notice_labeling.notice_classifier train
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import logging
+import argparse
+from functools import lru_cache
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.tender_analysis_crew.chunk_prefilter import normalize_text, tokenize
+from .label_store import SOURCE_LLM, SOURCE_USER, get_label_store, labeling_context_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = "data/notice_classifier.json"
+
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 0.99]
+
+# User corrections weigh more than LLM labels, since they fix the LLM's mistakes
+USER_CORRECTION_WEIGHT = 3.0
+
+
+def notice_features(notice: Dict[str, Any]) -> Counter:
+    """Count the features of a notice: objeto words and word pairs, orgao words and estado."""
+    words = tokenize(str(notice.get("objeto") or ""))
+    features = Counter(words)
+    features.update(f"{first}_{second}" for first, second in zip(words, words[1:]))
+    features.update(f"orgao:{word}" for word in tokenize(str(notice.get("orgao") or "")))
+    estado = normalize_text(str(notice.get("estado") or "")).strip()
+    if estado:
+        features[f"uf:{estado}"] += 1
+    return features
+
+
+class NoticeRelevanceClassifier:
+    """Estimates the probability that a notice would be labeled "no" by the LLM."""
+
+    def __init__(
+        self,
+        context_hash: str = "",
+        idf: Optional[Dict[str, float]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        bias: float = 0.0,
+        trained_on: int = 0,
+    ):
+        """Initialize the classifier.
+
+        Args:
+            context_hash: labeling_context_hash of the labels it was trained on. The model is
+                only used for the same template and company description.
+            idf: Inverse document frequency per feature
+            weights: Logistic regression weight per feature
+            bias: Logistic regression intercept
+            trained_on: Number of training examples
+        """
+        self.context_hash = context_hash
+        self.idf = idf or {}
+        self.weights = weights or {}
+        self.bias = bias
+        self.trained_on = trained_on
+
+    def _vectorize(self, notice: Dict[str, Any]) -> Dict[str, float]:
+        """Sublinear TF-IDF vector of a notice, L2-normalized. Unknown features are dropped."""
+        vector = {
+            feature: (1 + math.log(count)) * self.idf[feature]
+            for feature, count in notice_features(notice).items()
+            if feature in self.idf
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {feature: value / norm for feature, value in vector.items()} if norm else {}
+
+    def fit(
+        self,
+        examples: List[Dict[str, Any]],
+        epochs: int = 30,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        min_df: int = 1,
+        seed: int = 42,
+    ) -> "NoticeRelevanceClassifier":
+        """Train on labeled notices with stochastic gradient descent.
+
+        Args:
+            examples: Notices with objeto, orgao, estado, label and optionally source
+                (SOURCE_USER examples weigh USER_CORRECTION_WEIGHT)
+            epochs: Passes over the examples
+            learning_rate: Initial step size, decayed per epoch
+            l2: L2 regularization strength
+            min_df: Features seen in fewer examples are dropped
+            seed: Seed of the example shuffling
+
+        Returns:
+            NoticeRelevanceClassifier: self
+        """
+        document_frequency = Counter()
+        for example in examples:
+            document_frequency.update(notice_features(example).keys())
+        total = len(examples)
+        self.idf = {
+            feature: math.log((1 + total) / (1 + count)) + 1
+            for feature, count in document_frequency.items()
+            if count >= min_df
+        }
+        self.weights = {}
+        self.bias = 0.0
+        self.trained_on = total
+        if not examples:
+            return self
+
+        vectors = [self._vectorize(example) for example in examples]
+        targets = [1.0 if example.get("label") == "no" else 0.0 for example in examples]
+        # Balanced class weights, so a majority of "no" notices doesn't swamp the rest
+        positives = sum(targets)
+        class_weights = {
+            1.0: total / (2 * positives) if positives else 1.0,
+            0.0: total / (2 * (total - positives)) if positives < total else 1.0,
+        }
+        sample_weights = [
+            class_weights[target] * (USER_CORRECTION_WEIGHT if example.get("source") == SOURCE_USER else 1.0)
+            for example, target in zip(examples, targets)
+        ]
+
+        rng = random.Random(seed)
+        order = list(range(total))
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            step = learning_rate / (1 + epoch)
+            for index in order:
+                vector = vectors[index]
+                error = (self._sigmoid(self._score(vector)) - targets[index]) * sample_weights[index]
+                for feature, value in vector.items():
+                    weight = self.weights.get(feature, 0.0)
+                    self.weights[feature] = weight - step * (error * value + l2 * weight)
+                self.bias -= step * error
+        return self
+
+    def _score(self, vector: Dict[str, float]) -> float:
+        return self.bias + sum(self.weights.get(feature, 0.0) * value for feature, value in vector.items())
+
+    @staticmethod
+    def _sigmoid(score: float) -> float:
+        if score >= 0:
+            return 1 / (1 + math.exp(-score))
+        exp_score = math.exp(score)
+        return exp_score / (1 + exp_score)
+
+    def predict_no_probability(self, notices: List[Dict[str, Any]]) -> List[float]:
+        """Return the probability of a "no" label for each notice."""
+        return [self._sigmoid(self._score(self._vectorize(notice))) for notice in notices]
+
+    def save(self, path: str) -> None:
+        """Write the model as JSON, replacing any previous model atomically."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as model_file:
+            json.dump(
+                {
+                    "context_hash": self.context_hash,
+                    "bias": self.bias,
+                    "trained_on": self.trained_on,
+                    # Features the training pushed to zero are kept for their idf, which affects the norm
+                    "features": {
+                        feature: [idf, self.weights.get(feature, 0.0)] for feature, idf in self.idf.items()
+                    },
+                },
+                model_file,
+                ensure_ascii=False,
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NoticeRelevanceClassifier":
+        """Read a model written by save."""
+        with open(path, encoding="utf-8") as model_file:
+            data = json.load(model_file)
+        return cls(
+            context_hash=data["context_hash"],
+            idf={feature: values[0] for feature, values in data["features"].items()},
+            weights={feature: values[1] for feature, values in data["features"].items() if values[1]},
+            bias=data["bias"],
+            trained_on=data["trained_on"],
+        )
+
+
+@lru_cache(maxsize=4)
+def _load_classifier(path: str, modified_at: float) -> NoticeRelevanceClassifier:
+    return NoticeRelevanceClassifier.load(path)
+
+
+def get_notice_classifier(path: Optional[str] = None) -> Optional[NoticeRelevanceClassifier]:
+    """Return the trained classifier, or None if none was trained yet.
+
+    The model is reloaded when its file changes, so a retrained model is picked up by
+    running workers.
+
+    Args:
+        path: Model file. Defaults to TENDER_NOTICE_CLASSIFIER_PATH or data/notice_classifier.json.
+    """
+    path = path or os.getenv("TENDER_NOTICE_CLASSIFIER_PATH", DEFAULT_MODEL_PATH)
+    try:
+        modified_at = os.path.getmtime(path)
+    except OSError:
+        return None
+    try:
+        return _load_classifier(path, modified_at)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load the notice classifier from {path}: {e}")
+        return None
+
+
+def split_examples(
+    examples: List[Dict[str, Any]], holdout: float = 0.2, seed: int = 42
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split examples into training examples and held-out LLM labels.
+
+    Only LLM labels are held out, since they are what the classifier replaces; user
+    corrections always go to training.
+
+    Returns:
+        (training examples, held-out examples)
+    """
+    llm_examples = [example for example in examples if example.get("source", SOURCE_LLM) == SOURCE_LLM]
+    random.Random(seed).shuffle(llm_examples)
+    held_out = llm_examples[: int(len(llm_examples) * holdout)]
+    held_out_ids = {id(example) for example in held_out}
+    return [example for example in examples if id(example) not in held_out_ids], held_out
+
+
+def evaluate_classifier(
+    classifier: NoticeRelevanceClassifier,
+    held_out: List[Dict[str, Any]],
+    thresholds: Optional[List[float]] = None,
+) -> List[Dict[str, float]]:
+    """Sweep thresholds over held-out LLM labels.
+
+    Args:
+        classifier: Classifier trained without the held-out examples
+        held_out: Notices labeled by the LLM
+        thresholds: Thresholds to evaluate (default: DEFAULT_THRESHOLDS)
+
+    Returns:
+        One dict per threshold with auto_labeled (share of notices declined locally),
+        precision and recall of the local "no" against the LLM "no", and missed_yes
+        (notices the LLM labeled "yes" that would be declined)
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    probabilities = classifier.predict_no_probability(held_out)
+    labels = [example.get("label") for example in held_out]
+    llm_no = labels.count("no")
+
+    results = []
+    for threshold in thresholds:
+        declined = [label for label, probability in zip(labels, probabilities) if probability >= threshold]
+        correct = declined.count("no")
+        results.append(
+            {
+                "threshold": threshold,
+                "auto_labeled": len(declined) / len(held_out) if held_out else 0.0,
+                "precision": correct / len(declined) if declined else 1.0,
+                "recall": correct / llm_no if llm_no else 1.0,
+                "missed_yes": declined.count("yes"),
+            }
+        )
+    return results
+
+
+def format_results(results: List[Dict[str, float]]) -> str:
+    """Render the threshold sweep as a text table."""
+    lines = [
+        f"{'threshold':>9} | {'auto-labeled':>12} | {'precision':>9} | {'recall':>7} | {'missed yes':>10}",
+        "-" * 60,
+    ]
+    for result in results:
+        lines.append(
+            f"{result['threshold']:>9.3f} | {result['auto_labeled']:>12.1%} | {result['precision']:>9.1%} | "
+            f"{result['recall']:>7.1%} | {result['missed_yes']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .tender_notice_templates import COMPANY_BUSINESS_DESCRIPTION, TENDER_NOTICE_LABELING_TEMPLATE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train on all stored labels and save the model")
+    train_parser.add_argument("-o", "--output", help="Model file (default: TENDER_NOTICE_CLASSIFIER_PATH)")
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="Sweep thresholds on held-out LLM labels")
+    evaluate_parser.add_argument("--holdout", type=float, default=0.2, help="Share of LLM labels held out")
+    evaluate_parser.add_argument("-o", "--output", help="Optional JSON file for the results")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    context_hash = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+    examples = get_label_store().training_examples(context_hash)
+    if not examples:
+        print("No stored labels for the current template and company description")
+        return
+
+    if args.command == "train":
+        classifier = NoticeRelevanceClassifier(context_hash=context_hash).fit(examples)
+        output = args.output or os.getenv("TENDER_NOTICE_CLASSIFIER_PATH", DEFAULT_MODEL_PATH)
+        classifier.save(output)
+        print(f"Trained on {len(examples)} labeled notices into {output}")
+        return
+
+    training, held_out = split_examples(examples, holdout=args.holdout)
+    classifier = NoticeRelevanceClassifier(context_hash=context_hash).fit(training)
+    results = evaluate_classifier(classifier, held_out)
+    print(f"Trained on {len(training)} notices, evaluated on {len(held_out)} held-out LLM labels")
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
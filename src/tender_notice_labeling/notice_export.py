@@ -0,0 +1,239 @@
+"""CSV, Excel, Parquet and JSONL exports of stored notices, generated on request and cached on disk.
+
+Exports are written chunk by chunk from NoticeStore.iter_notices, so large result sets are
+never held in memory as a whole: CSV and JSONL rows are appended per chunk, Excel rows are
+flushed as they are written (xlsxwriter constant_memory mode) and Parquet chunks become row groups.
+Files are keyed by the store version, the labeling context, the filters and the format, so
+an export is generated once per dataset version and reused until notices change.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from src.tender_notice_labeling.label_store import DISPLAY_LABELS
+from src.tender_notice_labeling.notice_store import NOTICE_FIELDS, NoticeFilters, NoticeStore, get_notice_store
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "xlsx", "parquet", "jsonl")
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "jsonl": "application/jsonl",
+}
+
+EXPORT_COLUMNS = ("source_file", "processed_at", *NOTICE_FIELDS)
+
+_DATETIME_COLUMNS = ("processed_at", "data_hora_licitacao")
+
+
+def _display_labels(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk.reset_index(drop=True)
+    chunk["label"] = chunk["label"].map(lambda label: DISPLAY_LABELS.get(label, DISPLAY_LABELS["unsure"]))
+    return chunk[list(EXPORT_COLUMNS)]
+
+
+def write_csv(chunks: Iterator[pd.DataFrame], path: str) -> None:
+    """Write notices as a ";"-separated CSV with a BOM, so Excel opens it with the right encoding."""
+    with open(path, "w", encoding="utf-8-sig", newline="") as csv_file:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(csv_file, index=False, sep=";", header=header)
+            header = False
+        if header:
+            csv_file.write(";".join(EXPORT_COLUMNS) + "\n")
+
+
+def write_xlsx(chunks: Iterator[pd.DataFrame], path: str) -> None:
+    """Write notices to a single-sheet workbook, flushing each row as it is written."""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(
+        path, {"constant_memory": True, "default_date_format": "dd/mm/yyyy hh:mm", "remove_timezone": True}
+    )
+    try:
+        worksheet = workbook.add_worksheet("Licitações")
+        worksheet.write_row(0, 0, EXPORT_COLUMNS)
+        row_number = 1
+        for chunk in chunks:
+            # Missing values become blank cells; xlsxwriter rejects NaN and NaT
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                worksheet.write_row(row_number, 0, row)
+                row_number += 1
+    finally:
+        workbook.close()
+
+
+def write_parquet(chunks: Iterator[pd.DataFrame], path: str) -> None:
+    """Write notices to a Parquet file, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            (column, pa.timestamp("ns") if column in _DATETIME_COLUMNS else pa.string())
+            for column in EXPORT_COLUMNS
+        ]
+    )
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            # Ids and sequence numbers read back as numbers when a chunk has no missing values
+            chunk = chunk.assign(
+                **{
+                    column: chunk[column].map(lambda value: None if pd.isna(value) else str(value))
+                    for column in EXPORT_COLUMNS
+                    if column not in _DATETIME_COLUMNS
+                }
+            )
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_jsonl(chunks: Iterator[pd.DataFrame], path: str) -> None:
+    """Write notices as JSON lines, one object per notice with ISO dates."""
+    with open(path, "w", encoding="utf-8") as jsonl_file:
+        for chunk in chunks:
+            if not chunk.empty:
+                lines = chunk.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+                # Older pandas versions leave out the final newline
+                jsonl_file.write(lines if lines.endswith("\n") else f"{lines}\n")
+
+
+WRITERS: Dict[str, Callable[[Iterator[pd.DataFrame], str], None]] = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+    "jsonl": write_jsonl,
+}
+
+
+def write_notices(
+    store: NoticeStore,
+    path: str,
+    context_hash: str,
+    filters: Optional[NoticeFilters] = None,
+    export_format: str = "csv",
+    chunk_size: int = 5000,
+) -> None:
+    """Write the matching notices of a store to path, replacing it only once complete.
+
+    Args:
+        store: Notice store to export from
+        path: Output file
+        context_hash: labeling_context_hash of the template and company description
+        filters: Query filters, as used for the results table
+        export_format: One of EXPORT_FORMATS
+        chunk_size: Notices read from the store at a time
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if export_format not in WRITERS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    temp_path = f"{path}.tmp"
+    chunks = map(_display_labels, store.iter_notices(context_hash, filters, chunk_size))
+    try:
+        WRITERS[export_format](chunks, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class NoticeExporter:
+    """Generates notice exports on request and caches them by dataset version."""
+
+    def __init__(
+        self,
+        store: Optional[NoticeStore] = None,
+        cache_dir: Optional[str] = None,
+        cache_items: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        """Initialize the exporter.
+
+        Args:
+            store: Notice store to export from. Defaults to the process-wide store.
+            cache_dir: Directory of generated files. Defaults to TENDER_NOTICE_EXPORT_DIR
+                or data/notice_exports.
+            cache_items: Generated files kept on disk. Defaults to TENDER_NOTICE_EXPORT_CACHE_ITEMS or 32.
+            chunk_size: Notices read from the store at a time. Defaults to TENDER_NOTICE_EXPORT_CHUNK_SIZE or 5000.
+        """
+        self.store = store or get_notice_store()
+        self.cache_dir = cache_dir or os.getenv("TENDER_NOTICE_EXPORT_DIR", "data/notice_exports")
+        self.cache_items = cache_items or int(os.getenv("TENDER_NOTICE_EXPORT_CACHE_ITEMS", 32))
+        self.chunk_size = chunk_size or int(os.getenv("TENDER_NOTICE_EXPORT_CHUNK_SIZE", 5000))
+        self._lock = threading.Lock()
+
+    def export_key(self, context_hash: str, filters: Optional[NoticeFilters], export_format: str) -> str:
+        """Return the cache key of an export at the current store version."""
+        key = json.dumps(
+            [self.store.version(), context_hash, asdict(filters or NoticeFilters()), export_format],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def export(self, context_hash: str, filters: Optional[NoticeFilters] = None, export_format: str = "csv") -> str:
+        """Return the path of an export of the matching notices, generating it if not cached.
+
+        Args:
+            context_hash: labeling_context_hash of the template and company description
+            filters: Query filters, as used for the results table
+            export_format: One of EXPORT_FORMATS
+
+        Returns:
+            str: Path of the generated file
+
+        Raises:
+            ValueError: If the format is not supported
+        """
+        if export_format not in WRITERS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        path = os.path.join(self.cache_dir, f"{self.export_key(context_hash, filters, export_format)}.{export_format}")
+        # One export is generated at a time, so concurrent requests for the same file wait for it
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                return path
+            os.makedirs(self.cache_dir, exist_ok=True)
+            write_notices(self.store, path, context_hash, filters, export_format, self.chunk_size)
+            logger.info(f"Exported notices as {export_format} ({os.path.getsize(path)} bytes)")
+            self._prune()
+        return path
+
+    def export_bytes(
+        self, context_hash: str, filters: Optional[NoticeFilters] = None, export_format: str = "csv"
+    ) -> bytes:
+        """Return the contents of an export, see export()."""
+        with open(self.export(context_hash, filters, export_format), "rb") as export_file:
+            return export_file.read()
+
+    def _prune(self) -> None:
+        """Delete the least recently used exports beyond cache_items."""
+        paths = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.rpartition(".")[2] in WRITERS
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.cache_items:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+@lru_cache(maxsize=None)
+def get_notice_exporter() -> NoticeExporter:
+    """Return the process-wide notice exporter."""
+    return NoticeExporter()
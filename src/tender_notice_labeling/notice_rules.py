@@ -0,0 +1,240 @@
+"""Firm triage rules of the bid team, applied to bulletin notices before any model.
+
+A rule labels a notice when all of its conditions hold:
+    - terms: at least one term occurs as a whole word in one of its fields (accent and case
+      insensitive; a trailing "*" matches any word starting with the term)
+    - patterns: or at least one regex matches (terms and patterns are alternatives)
+    - estados: the notice is from one of these states
+    - min_value / max_value: the largest R$ amount in the objeto is within the bounds
+
+Rules are checked in order and the first matching rule wins. The terms of all rules are
+compiled into one Aho-Corasick automaton per field, so a notice is scanned once regardless
+of the number of terms.
+
+Rules are read from the JSON file in TENDER_NOTICE_RULES_PATH when set, a list of
+objects with name, label and conditions, e.g.:
+    [{"name": "ete", "label": "yes", "terms": ["ETE", "estação de tratamento*"]},
+     {"name": "merenda", "label": "no", "terms": ["merenda"], "estados": ["SP"]}]
+"""
+
+import os
+import re
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.tender_analysis_crew.chunk_prefilter import normalize_text
+
+logger = logging.getLogger(__name__)
+
+RULE_LABELS = ("yes", "no", "unsure", "insufficient_info")
+
+# The bid team's rules, previously only implied by COMPANY_BUSINESS_DESCRIPTION
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "tratamento_de_agua_e_esgoto",
+        "label": "yes",
+        "terms": ["ETE", "ETEs", "ETA", "ETAs", "centrífuga*", "centrifugação", "MBBR", "decanter*"],
+    },
+    {
+        "name": "fora_do_escopo",
+        "label": "no",
+        "terms": ["merenda", "combustível", "combustíveis", "pavimentação", "pavimento*"],
+    },
+]
+
+# "R$ 1.234.567,89"
+VALUE_PATTERN = re.compile(r"r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+
+
+def normalize_for_matching(text: str) -> str:
+    """Lowercase, strip accents and collapse non-alphanumerics to single spaces, padded with spaces."""
+    return f" {' '.join(re.findall(r'[a-z0-9]+', normalize_text(text)))} "
+
+
+def extract_value(text: str) -> Optional[float]:
+    """Return the largest R$ amount in a text, or None if it has none."""
+    values = [
+        float(match.group(1).replace(".", "").replace(",", "."))
+        for match in VALUE_PATTERN.finditer(normalize_text(text))
+    ]
+    return max(values) if values else None
+
+
+class AhoCorasickAutomaton:
+    """Multi-pattern substring matcher: finds all keywords of a text in a single pass."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Set[Any]] = [set()]
+        self._built = False
+
+    def add(self, keyword: str, value: Any) -> None:
+        """Add a keyword, reported as value when found."""
+        if self._built:
+            raise RuntimeError("Keywords can't be added after build()")
+        node = 0
+        for char in keyword:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(set())
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._outputs[node].add(value)
+
+    def build(self) -> "AhoCorasickAutomaton":
+        """Compute the failure links. Must be called once all keywords are added."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] |= self._outputs[self._fail[child]]
+        self._built = True
+        return self
+
+    def find(self, text: str) -> Set[Any]:
+        """Return the values of all keywords occurring in text."""
+        found: Set[Any] = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found |= self._outputs[node]
+        return found
+
+
+@dataclass
+class NoticeRule:
+    """A triage rule. See the module docstring for the meaning of its conditions."""
+
+    name: str
+    label: str
+    terms: List[str] = field(default_factory=list)
+    patterns: List[str] = field(default_factory=list)
+    fields: List[str] = field(default_factory=lambda: ["objeto"])
+    estados: List[str] = field(default_factory=list)
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+    def __post_init__(self):
+        if self.label not in RULE_LABELS:
+            raise ValueError(f"Rule {self.name!r} has an invalid label {self.label!r}")
+        if not (self.terms or self.patterns or self.estados or self.min_value is not None or self.max_value is not None):
+            raise ValueError(f"Rule {self.name!r} has no conditions")
+        self.estados = [estado.strip().upper() for estado in self.estados]
+        self._compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.patterns]
+
+
+class NoticeRuleEngine:
+    """Labels notices with the first matching rule."""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        """Compile the rules.
+
+        Args:
+            rules: Rule definitions in priority order (see the module docstring)
+
+        Raises:
+            ValueError: If a rule has an invalid label, no conditions or an unknown key
+        """
+        self.rules: List[NoticeRule] = []
+        for definition in rules:
+            try:
+                self.rules.append(NoticeRule(**definition))
+            except TypeError as e:
+                raise ValueError(f"Invalid rule {definition.get('name')!r}: {e}") from e
+        self._automata: Dict[str, AhoCorasickAutomaton] = {}
+        for index, rule in enumerate(self.rules):
+            for term in rule.terms:
+                prefix = term.endswith("*")
+                keyword = normalize_for_matching(term.rstrip("*"))
+                if keyword.strip():
+                    # Padding spaces anchor the term to word boundaries; prefixes stay open on the right
+                    for field_name in rule.fields:
+                        self._automata.setdefault(field_name, AhoCorasickAutomaton()).add(
+                            keyword.rstrip() if prefix else keyword, index
+                        )
+        for automaton in self._automata.values():
+            automaton.build()
+
+    def match(self, notice: Dict[str, Any]) -> Optional[NoticeRule]:
+        """Return the first rule matching a notice, or None."""
+        term_hits: Set[int] = set()
+        for field_name, automaton in self._automata.items():
+            term_hits |= automaton.find(normalize_for_matching(str(notice.get(field_name) or "")))
+        estado = str(notice.get("estado") or "").strip().upper()
+        value = None
+        value_parsed = False
+
+        for index, rule in enumerate(self.rules):
+            if rule.terms or rule.patterns:
+                if index not in term_hits and not any(
+                    pattern.search(str(notice.get(field_name) or ""))
+                    for pattern in rule._compiled_patterns
+                    for field_name in rule.fields
+                ):
+                    continue
+            if rule.estados and estado not in rule.estados:
+                continue
+            if rule.min_value is not None or rule.max_value is not None:
+                if not value_parsed:
+                    value = extract_value(str(notice.get("objeto") or ""))
+                    value_parsed = True
+                if value is None:
+                    continue
+                if rule.min_value is not None and value < rule.min_value:
+                    continue
+                if rule.max_value is not None and value > rule.max_value:
+                    continue
+            return rule
+        return None
+
+    def apply(self, notices: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Label the notices a rule matches, with label_source "rule" and the rule in label_rule.
+
+        Returns:
+            (labeled notices, notices no rule matches)
+        """
+        labeled, unmatched = [], []
+        for notice in notices:
+            rule = self.match(notice)
+            if rule is None:
+                unmatched.append(notice)
+                continue
+            notice["label"] = rule.label
+            notice["label_source"] = "rule"
+            notice["label_rule"] = rule.name
+            labeled.append(notice)
+        return labeled, unmatched
+
+
+@lru_cache(maxsize=4)
+def _load_rule_engine(path: Optional[str], modified_at: Optional[float]) -> NoticeRuleEngine:
+    if path is None:
+        return NoticeRuleEngine(DEFAULT_RULES)
+    with open(path, encoding="utf-8") as rules_file:
+        return NoticeRuleEngine(json.load(rules_file))
+
+
+def get_rule_engine(path: Optional[str] = None) -> NoticeRuleEngine:
+    """Return the rule engine of the configured rules, recompiled when the rules file changes.
+
+    Args:
+        path: JSON rules file. Defaults to TENDER_NOTICE_RULES_PATH, or DEFAULT_RULES when unset.
+
+    Raises:
+        OSError, ValueError: If the rules file can't be read or holds invalid rules
+    """
+    path = path or os.getenv("TENDER_NOTICE_RULES_PATH") or None
+    return _load_rule_engine(path, os.path.getmtime(path) if path else None)
@@ -0,0 +1,497 @@
+"""SQLite-backed store of processed bulletin notices, queried by the Boletins page.
+
+Bulletins are keyed by the hash of their PDF and the labeling context, so a bulletin
+processed once is reopened from the store without any LLM call. Notices are indexed by
+id_universo, estado, label and opening date, and their objeto by an FTS5 full-text index.
+Rollups for the Dashboard page are maintained incrementally by triggers, and a version
+counter, bumped on every write, keys caches of query results such as exports.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bulletins (
+    file_hash TEXT NOT NULL,
+    context_hash TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    notice_count INTEGER NOT NULL,
+    processed_at REAL NOT NULL,
+    PRIMARY KEY (file_hash, context_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_bulletins_processed_at ON bulletins (processed_at);
+
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL,
+    context_hash TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    processed_at REAL NOT NULL,
+    num_seq_boletim TEXT,
+    orgao TEXT,
+    estado TEXT,
+    numero_licitacao TEXT,
+    objeto TEXT,
+    data_hora_licitacao TEXT,
+    id_universo TEXT,
+    data_hora_alteracao TEXT,
+    label TEXT,
+    label_source TEXT,
+    label_rule TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notices_bulletin ON notices (file_hash, context_hash);
+CREATE INDEX IF NOT EXISTS idx_notices_id_universo ON notices (id_universo);
+CREATE INDEX IF NOT EXISTS idx_notices_estado ON notices (estado);
+CREATE INDEX IF NOT EXISTS idx_notices_label ON notices (label);
+CREATE INDEX IF NOT EXISTS idx_notices_data_hora_licitacao ON notices (data_hora_licitacao);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS notices_fts USING fts5(
+    objeto, content='notices', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS notices_fts_insert AFTER INSERT ON notices BEGIN
+    INSERT INTO notices_fts (rowid, objeto) VALUES (new.id, new.objeto);
+END;
+CREATE TRIGGER IF NOT EXISTS notices_fts_delete AFTER DELETE ON notices BEGIN
+    INSERT INTO notices_fts (notices_fts, rowid, objeto) VALUES ('delete', old.id, old.objeto);
+END;
+
+CREATE TABLE IF NOT EXISTS store_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_version VALUES (1, 0);
+"""
+
+# Notice counts per processing day, state and label, and per month, organization and
+# label, kept up to date by triggers as bulletins are added, replaced and corrected
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notice_rollups_daily (
+    context_hash TEXT NOT NULL,
+    day TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    label TEXT NOT NULL,
+    notices INTEGER NOT NULL,
+    PRIMARY KEY (context_hash, day, estado, label)
+);
+CREATE TABLE IF NOT EXISTS notice_rollups_orgao (
+    context_hash TEXT NOT NULL,
+    month TEXT NOT NULL,
+    orgao TEXT NOT NULL,
+    label TEXT NOT NULL,
+    notices INTEGER NOT NULL,
+    PRIMARY KEY (context_hash, month, orgao, label)
+);
+
+CREATE TRIGGER IF NOT EXISTS notice_rollups_insert AFTER INSERT ON notices BEGIN
+    INSERT INTO notice_rollups_daily VALUES (
+        new.context_hash, date(new.processed_at, 'unixepoch', 'localtime'),
+        COALESCE(new.estado, ''), COALESCE(new.label, ''), 1
+    ) ON CONFLICT DO UPDATE SET notices = notices + 1;
+    INSERT INTO notice_rollups_orgao VALUES (
+        new.context_hash, strftime('%Y-%m', new.processed_at, 'unixepoch', 'localtime'),
+        COALESCE(new.orgao, ''), COALESCE(new.label, ''), 1
+    ) ON CONFLICT DO UPDATE SET notices = notices + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS notice_rollups_delete AFTER DELETE ON notices BEGIN
+    UPDATE notice_rollups_daily SET notices = notices - 1
+    WHERE context_hash = old.context_hash AND day = date(old.processed_at, 'unixepoch', 'localtime')
+        AND estado = COALESCE(old.estado, '') AND label = COALESCE(old.label, '');
+    UPDATE notice_rollups_orgao SET notices = notices - 1
+    WHERE context_hash = old.context_hash AND month = strftime('%Y-%m', old.processed_at, 'unixepoch', 'localtime')
+        AND orgao = COALESCE(old.orgao, '') AND label = COALESCE(old.label, '');
+END;
+CREATE TRIGGER IF NOT EXISTS notice_rollups_update AFTER UPDATE OF label ON notices BEGIN
+    UPDATE notice_rollups_daily SET notices = notices - 1
+    WHERE context_hash = old.context_hash AND day = date(old.processed_at, 'unixepoch', 'localtime')
+        AND estado = COALESCE(old.estado, '') AND label = COALESCE(old.label, '');
+    UPDATE notice_rollups_orgao SET notices = notices - 1
+    WHERE context_hash = old.context_hash AND month = strftime('%Y-%m', old.processed_at, 'unixepoch', 'localtime')
+        AND orgao = COALESCE(old.orgao, '') AND label = COALESCE(old.label, '');
+    INSERT INTO notice_rollups_daily VALUES (
+        new.context_hash, date(new.processed_at, 'unixepoch', 'localtime'),
+        COALESCE(new.estado, ''), COALESCE(new.label, ''), 1
+    ) ON CONFLICT DO UPDATE SET notices = notices + 1;
+    INSERT INTO notice_rollups_orgao VALUES (
+        new.context_hash, strftime('%Y-%m', new.processed_at, 'unixepoch', 'localtime'),
+        COALESCE(new.orgao, ''), COALESCE(new.label, ''), 1
+    ) ON CONFLICT DO UPDATE SET notices = notices + 1;
+END;
+"""
+
+NOTICE_FIELDS = (
+    "num_seq_boletim",
+    "orgao",
+    "estado",
+    "numero_licitacao",
+    "objeto",
+    "data_hora_licitacao",
+    "id_universo",
+    "data_hora_alteracao",
+    "label",
+    "label_source",
+    "label_rule",
+)
+
+# Same priority as TenderNoticeProcessor._to_dataframe: yes, unsure, no, insufficient_info
+_LABEL_ORDER = """
+    CASE label WHEN 'yes' THEN 0 WHEN 'no' THEN 2 WHEN 'insufficient_info' THEN 3 ELSE 1 END
+"""
+
+_BUMP_VERSION = "UPDATE store_version SET version = version + 1"
+
+# Opening date formats found in bulletins
+DATETIME_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %Hh%M", "%d/%m/%Y")
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_datetime(value: Any) -> Optional[str]:
+    """Return an opening date as sortable ISO text ("2025-01-31T10:00:00"), or None if unreadable."""
+    text = str(value or "").strip()
+    if not text:
+        return None
+    for datetime_format in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, datetime_format).isoformat()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None).isoformat()
+    except ValueError:
+        return None
+
+
+def _fts_query(search: str) -> str:
+    """Turn free text into an FTS5 query matching notices holding all words as prefixes."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search))
+
+
+@dataclass
+class NoticeFilters:
+    """Filters of a notice query. Empty filters match everything."""
+
+    file_hashes: Optional[List[str]] = None
+    estados: Optional[List[str]] = None
+    labels: Optional[List[str]] = None
+    search: str = ""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    def to_sql(self, context_hash: str) -> Tuple[str, List[Any]]:
+        """Return the WHERE clause and its parameters."""
+        clauses, params = ["context_hash = ?"], [context_hash]
+        for column, values in (("file_hash", self.file_hashes), ("estado", self.estados), ("label", self.labels)):
+            if values is not None:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        fts_query = _fts_query(self.search)
+        if fts_query:
+            clauses.append("id IN (SELECT rowid FROM notices_fts WHERE notices_fts MATCH ?)")
+            params.append(fts_query)
+        if self.date_from:
+            clauses.append("data_hora_licitacao >= ?")
+            params.append(self.date_from.isoformat())
+        if self.date_to:
+            clauses.append("data_hora_licitacao < ?")
+            params.append((self.date_to + timedelta(days=1)).isoformat())
+        return " AND ".join(clauses), params
+
+
+class NoticeStore:
+    """Persistent processed notices, grouped by bulletin."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the notice store.
+
+        Args:
+            db_path: Path to the SQLite database. Defaults to TENDER_NOTICE_STORE_PATH
+                or data/tender_notices.sqlite3.
+        """
+        self.db_path = db_path or os.getenv("TENDER_NOTICE_STORE_PATH", "data/tender_notices.sqlite3")
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            has_rollups = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notice_rollups_daily'"
+            ).fetchone()
+            conn.executescript(_ROLLUP_SCHEMA)
+            if not has_rollups:
+                self._rebuild_rollups(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rebuild_rollups(conn: sqlite3.Connection) -> None:
+        """Compute the rollups from scratch, for notices stored before the rollups existed."""
+        conn.execute("DELETE FROM notice_rollups_daily")
+        conn.execute("DELETE FROM notice_rollups_orgao")
+        conn.execute(
+            """
+            INSERT INTO notice_rollups_daily
+            SELECT context_hash, date(processed_at, 'unixepoch', 'localtime'), COALESCE(estado, ''),
+                COALESCE(label, ''), COUNT(*)
+            FROM notices GROUP BY 1, 2, 3, 4
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO notice_rollups_orgao
+            SELECT context_hash, strftime('%Y-%m', processed_at, 'unixepoch', 'localtime'), COALESCE(orgao, ''),
+                COALESCE(label, ''), COUNT(*)
+            FROM notices GROUP BY 1, 2, 3, 4
+            """
+        )
+
+    def add_bulletin(
+        self,
+        file_hash: str,
+        context_hash: str,
+        source_file: str,
+        notices: List[Dict[str, Any]],
+        processed_at: Optional[float] = None,
+    ) -> None:
+        """Store the labeled notices of a bulletin, replacing a previous run of the same bulletin.
+
+        Args:
+            file_hash: Hash of the bulletin PDF
+            context_hash: labeling_context_hash of the template and company description
+            source_file: File name of the bulletin
+            notices: Labeled notices, with raw labels ("yes", "no", ...)
+            processed_at: Timestamp of the run. Defaults to now.
+        """
+        processed_at = processed_at or time.time()
+        rows = []
+        for notice in notices:
+            values = {field: notice.get(field) for field in NOTICE_FIELDS}
+            values["data_hora_licitacao"] = normalize_datetime(values["data_hora_licitacao"])
+            if values["id_universo"] is not None:
+                values["id_universo"] = str(values["id_universo"])
+            rows.append((file_hash, context_hash, source_file, processed_at, *values.values()))
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM notices WHERE file_hash = ? AND context_hash = ?", (file_hash, context_hash))
+                conn.executemany(
+                    f"""
+                    INSERT INTO notices (file_hash, context_hash, source_file, processed_at, {", ".join(NOTICE_FIELDS)})
+                    VALUES ({", ".join("?" * (4 + len(NOTICE_FIELDS)))})
+                    """,
+                    rows,
+                )
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO bulletins (file_hash, context_hash, source_file, notice_count, processed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (file_hash, context_hash, source_file, len(rows), processed_at),
+                )
+                conn.execute(_BUMP_VERSION)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Stored {len(rows)} notices of {source_file}")
+
+    def get_bulletins(self, file_hashes: List[str], context_hash: str) -> Dict[str, Dict[str, Any]]:
+        """Return the stored bulletins among file_hashes, by file hash."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT * FROM bulletins
+                WHERE context_hash = ? AND file_hash IN ({", ".join("?" * len(file_hashes))})
+                """,
+                (context_hash, *file_hashes),
+            ).fetchall()
+        return {row["file_hash"]: dict(row) for row in rows}
+
+    def list_bulletins(self, context_hash: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """Return the most recently processed bulletins, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM bulletins WHERE context_hash = ? ORDER BY processed_at DESC LIMIT ?",
+                (context_hash, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_notices(
+        self,
+        context_hash: str,
+        filters: Optional[NoticeFilters] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> pd.DataFrame:
+        """Return matching notices sorted by label priority and opening date.
+
+        Args:
+            context_hash: labeling_context_hash of the template and company description
+            filters: Query filters
+            limit: Page size (None = all matching notices)
+            offset: Notices to skip
+
+        Returns:
+            pd.DataFrame: One row per notice, indexed by its store id, with data_hora_licitacao
+                as datetimes and raw labels
+        """
+        sql, params = self._select_sql(context_hash, filters)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = [*params, limit, offset]
+        with self._connect() as conn:
+            return self._convert(pd.read_sql_query(sql, conn, params=params, index_col="id"))
+
+    def iter_notices(
+        self, context_hash: str, filters: Optional[NoticeFilters] = None, chunk_size: int = 5000
+    ) -> Iterator[pd.DataFrame]:
+        """Yield all matching notices in query_notices order, chunk_size notices at a time.
+
+        Large result sets (e.g. exports) are read without holding every notice in memory.
+        """
+        sql, params = self._select_sql(context_hash, filters)
+        with self._connect() as conn:
+            for chunk in pd.read_sql_query(sql, conn, params=params, index_col="id", chunksize=chunk_size):
+                yield self._convert(chunk)
+
+    @staticmethod
+    def _select_sql(context_hash: str, filters: Optional[NoticeFilters]) -> Tuple[str, List[Any]]:
+        where, params = (filters or NoticeFilters()).to_sql(context_hash)
+        sql = f"""
+            SELECT id, source_file, processed_at, {", ".join(NOTICE_FIELDS)} FROM notices
+            WHERE {where}
+            ORDER BY {_LABEL_ORDER}, data_hora_licitacao IS NULL, data_hora_licitacao, id
+        """
+        return sql, params
+
+    @staticmethod
+    def _convert(df: pd.DataFrame) -> pd.DataFrame:
+        df["data_hora_licitacao"] = pd.to_datetime(df["data_hora_licitacao"])
+        df["processed_at"] = pd.to_datetime(df["processed_at"], unit="s")
+        return df
+
+    def version(self) -> int:
+        """Return the store version, which changes whenever notices are added or relabeled."""
+        with self._connect() as conn:
+            return conn.execute("SELECT version FROM store_version").fetchone()["version"]
+
+    def label_counts(self, context_hash: str, filters: Optional[NoticeFilters] = None) -> Dict[str, int]:
+        """Return the number of matching notices per raw label."""
+        where, params = (filters or NoticeFilters()).to_sql(context_hash)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT label, COUNT(*) AS count FROM notices WHERE {where} GROUP BY label", params
+            ).fetchall()
+        return {row["label"]: row["count"] for row in rows}
+
+    def estados(self, context_hash: str, file_hashes: Optional[List[str]] = None) -> List[str]:
+        """Return the distinct states of the stored notices, optionally of some bulletins."""
+        where, params = NoticeFilters(file_hashes=file_hashes).to_sql(context_hash)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT estado FROM notices WHERE {where} AND estado IS NOT NULL ORDER BY estado", params
+            ).fetchall()
+        return [row["estado"] for row in rows]
+
+    def set_labels(self, labels: Dict[int, str], label_source: str = "user") -> None:
+        """Overwrite the labels of stored notices by store id, e.g. with user corrections."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE notices SET label = ?, label_source = ?, label_rule = NULL WHERE id = ?",
+                    [(label, label_source, int(notice_id)) for notice_id, label in labels.items()],
+                )
+                conn.execute(_BUMP_VERSION)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def daily_rollups(
+        self, context_hash: str, date_from: Optional[date] = None, date_to: Optional[date] = None
+    ) -> pd.DataFrame:
+        """Return notice counts per processing day, state and label.
+
+        Args:
+            context_hash: labeling_context_hash of the template and company description
+            date_from: First processing day (inclusive)
+            date_to: Last processing day (inclusive)
+
+        Returns:
+            pd.DataFrame: day (datetime), estado, label and notices columns
+        """
+        clauses, params = ["context_hash = ?", "notices > 0"], [context_hash]
+        if date_from:
+            clauses.append("day >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            clauses.append("day <= ?")
+            params.append(date_to.isoformat())
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT day, estado, label, notices FROM notice_rollups_daily WHERE {' AND '.join(clauses)}",
+                conn,
+                params=params,
+            )
+        df["day"] = pd.to_datetime(df["day"])
+        return df
+
+    def orgao_rollups(
+        self, context_hash: str, date_from: Optional[date] = None, date_to: Optional[date] = None
+    ) -> pd.DataFrame:
+        """Return notice counts per organization and label, over the months of a period.
+
+        Returns:
+            pd.DataFrame: orgao, label and notices columns
+        """
+        clauses, params = ["context_hash = ?", "notices > 0"], [context_hash]
+        if date_from:
+            clauses.append("month >= ?")
+            params.append(f"{date_from:%Y-%m}")
+        if date_to:
+            clauses.append("month <= ?")
+            params.append(f"{date_to:%Y-%m}")
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"""
+                SELECT orgao, label, SUM(notices) AS notices FROM notice_rollups_orgao
+                WHERE {' AND '.join(clauses)} GROUP BY orgao, label
+                """,
+                conn,
+                params=params,
+            )
+
+
+@lru_cache(maxsize=None)
+def get_notice_store(db_path: Optional[str] = None) -> NoticeStore:
+    """Return the process-wide notice store."""
+    return NoticeStore(db_path)
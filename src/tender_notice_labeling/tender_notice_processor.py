@@ -1,23 +1,33 @@
 import os
 from dotenv import load_dotenv
 import tempfile
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Callable, Any, AsyncIterator, Tuple
 import re
-from dataclasses import dataclass
 from datetime import datetime
 import pandas as pd
-from pdfminer.high_level import extract_text
 from langchain_openai import AzureChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 import logging
 import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from tqdm.asyncio import tqdm_asyncio
 import streamlit as st
 import json
 
+from src.llm_rate_limiter import count_tokens, get_rate_limiter
+from src.pdf_text import extract_text
+from .label_store import LabelStore, get_label_store, labeling_context_hash, notice_key
+from .notice_frame import TenderNotice, to_notice_frame
+from .notice_classifier import NoticeRelevanceClassifier, get_notice_classifier
+from .notice_rules import NoticeRuleEngine, get_rule_engine
+from .bulletin_segmenter import group_segments, parse_sequence_number, segment_bulletin, segments_to_reextract
 from .tender_notice_templates import (
     COMPANY_BUSINESS_DESCRIPTION,
+    TENDER_NOTICE_BATCH_LABELING_INSTRUCTIONS,
+    TENDER_NOTICE_BATCH_LABELING_SCHEMA,
     TENDER_NOTICE_EXTRACTION_SCHEMA,
     TENDER_NOTICE_EXTRACTION_PROMPT,
     TENDER_NOTICE_LABELING_TEMPLATE,
@@ -28,53 +38,188 @@ load_dotenv()
 # Configure logging to only show INFO and above
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-@dataclass
-class TenderNotice:
-    """Represents a single tender notice extracted from an email digest."""
-    num_seq_boletim: str
-    orgao: str
-    estado: str
-    numero_licitacao: str
-    objeto: str
-    data_hora_licitacao: str
-    id_universo: int
-    data_hora_alteracao: str
-    label: Optional[str] = None
+# Completion tokens reserved in the rate limiter for each label (the model reasons before answering)
+LABELING_COMPLETION_TOKENS = int(os.getenv("TENDER_NOTICE_LABELING_COMPLETION_TOKENS", 500))
+# Notices labeled per request (1 = one request per notice)
+LABELING_BATCH_SIZE = int(os.getenv("TENDER_NOTICE_LABELING_BATCH_SIZE", 10))
+# Completion tokens reserved in the rate limiter for each notice of a batched labeling request
+BATCH_LABELING_COMPLETION_TOKENS = int(os.getenv("TENDER_NOTICE_BATCH_LABELING_COMPLETION_TOKENS", 150))
+
+# LLM requests in flight across all bulletins of a process_pdfs run
+MAX_CONCURRENT_REQUESTS = int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_REQUESTS", 10))
+
+# Reuse the labels of notices already labeled in previous bulletins
+LABEL_STORE_ENABLED = os.getenv("TENDER_NOTICE_LABEL_STORE_ENABLED", "true").lower() == "true"
+
+# Label notices matching the bid team's rules (TENDER_NOTICE_RULES_PATH) without the LLM
+RULES_ENABLED = os.getenv("TENDER_NOTICE_RULES_ENABLED", "true").lower() == "true"
+
+# Decline notices locally when the trained classifier gives a "no" at least this likely
+CLASSIFIER_ENABLED = os.getenv("TENDER_NOTICE_CLASSIFIER_ENABLED", "true").lower() == "true"
+CLASSIFIER_THRESHOLD = float(os.getenv("TENDER_NOTICE_CLASSIFIER_THRESHOLD", 0.95))
+
+VALID_LABELS = ("yes", "no", "unsure", "insufficient_info")
+
+# Text extraction backend of bulletins (see src.pdf_text); the segmenter is tuned on pdfminer's layout
+PDF_BACKEND = os.getenv("TENDER_NOTICE_PDF_BACKEND", "pdfminer")
+
+# Notices per extraction request once the bulletin is split at its (n/N) counters
+EXTRACTION_GROUP_SIZE = int(os.getenv("TENDER_NOTICE_EXTRACTION_GROUP_SIZE", 5))
+# Extraction requests of a bulletin running at the same time
+MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_EXTRACTIONS", 10))
+# Rounds of re-extraction of notices missing from the sequence 1..N
+EXTRACTION_MAX_RETRIES = int(os.getenv("TENDER_NOTICE_EXTRACTION_MAX_RETRIES", 2))
+
+# Shared limit of the LLM requests of a process_pdfs run, inherited by the tasks it starts
+_request_slots: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("tender_notice_request_slots", default=None)
+
+
+@asynccontextmanager
+async def _request_slot():
+    """Wait for a slot of the shared LLM request limit, when one is set."""
+    semaphore = _request_slots.get()
+    if semaphore is None:
+        yield
+        return
+    async with semaphore:
+        yield
+
 
 class TenderNoticeProcessor:
     """Processes tender notices from email PDFs."""
     
-    def __init__(self, batch_size: int = int(os.getenv("TENDER_NOTICE_PROCESSOR_BATCH_SIZE", 10))):
+    def __init__(
+        self,
+        batch_size: int = int(os.getenv("TENDER_NOTICE_PROCESSOR_BATCH_SIZE", 10)),
+        labeling_batch_size: int = LABELING_BATCH_SIZE,
+        label_store: Optional[LabelStore] = None,
+        classifier: Optional[NoticeRelevanceClassifier] = None,
+        classifier_threshold: float = CLASSIFIER_THRESHOLD,
+        rule_engine: Optional[NoticeRuleEngine] = None,
+    ):
+        """Initialize the processor.
+
+        Args:
+            batch_size: Notices per labeling batch
+            labeling_batch_size: Notices per labeling request (1 = one request per notice)
+            label_store: Store of previously labeled notices. Defaults to the process-wide
+                store, opened on first use, unless TENDER_NOTICE_LABEL_STORE_ENABLED is false.
+            classifier: Local relevance classifier. Defaults to the trained model, if any,
+                unless TENDER_NOTICE_CLASSIFIER_ENABLED is false.
+            classifier_threshold: Notices whose "no" probability reaches it skip the LLM
+            rule_engine: Triage rules applied before everything else. Defaults to the configured
+                rules unless TENDER_NOTICE_RULES_ENABLED is false.
+        """
         self.llm = AzureChatOpenAI(
             model="gpt-4o",
             azure_deployment="gpt-4o",
             temperature=0,
             seed=42,
         )
-        self.extraction_llm = self.llm.with_structured_output(TENDER_NOTICE_EXTRACTION_SCHEMA)
+        # Keep the raw message of structured outputs for its token usage
+        self.extraction_llm = self.llm.with_structured_output(TENDER_NOTICE_EXTRACTION_SCHEMA, include_raw=True)
+        self.batch_labeling_llm = self.llm.with_structured_output(
+            TENDER_NOTICE_BATCH_LABELING_SCHEMA, include_raw=True
+        )
         self.batch_size = batch_size
+        self.labeling_batch_size = labeling_batch_size
+        self.label_store = label_store
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self.rule_engine = rule_engine
+        self.rate_limiter = get_rate_limiter()
 
     async def _extract_tender_notices(self, text: str) -> List[Dict[str, Any]]:
-        """Extracts tender notices from text using structured LLM output."""
+        """Extracts tender notices from a bulletin, in parallel groups of notices.
+
+        The bulletin is split locally at the (n/N) counters of its notices, groups of
+        EXTRACTION_GROUP_SIZE notices are extracted concurrently, and notices missing from
+        the sequence 1..N are re-extracted from their segments. Bulletins without counters
+        are extracted in a single request.
+        """
         logging.info("Starting tender notice extraction")
-        
+        segments = segment_bulletin(text)
+        if not segments:
+            logging.info("No (n/N) counters found, extracting the bulletin in a single request")
+            return await self._extract_notices_from_text(text)
+
+        total = segments[0].total
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+        notices_by_number: Dict[int, Dict[str, Any]] = {}
+        unnumbered: List[Dict[str, Any]] = []
+        errors: List[Exception] = []
+
+        async def extract_group(group) -> None:
+            async with semaphore:
+                try:
+                    notices = await self._extract_notices_from_text("\n\n".join(segment.text for segment in group))
+                except Exception as e:
+                    # The notices of the group are re-extracted one by one
+                    errors.append(e)
+                    return
+            for notice in notices:
+                number = parse_sequence_number(notice.get("num_seq_boletim"))
+                if number is None or not 1 <= number <= total:
+                    unnumbered.append(notice)
+                else:
+                    notices_by_number.setdefault(number, notice)
+
+        groups = group_segments(segments, EXTRACTION_GROUP_SIZE)
+        logging.info(f"Extracting {len(segments)} of {total} notices in {len(groups)} requests")
+        await asyncio.gather(*(extract_group(group) for group in groups))
+
+        for attempt in range(EXTRACTION_MAX_RETRIES):
+            missing_segments = segments_to_reextract(segments, notices_by_number)
+            if not missing_segments:
+                break
+            logging.info(
+                f"Re-extracting notices {[segment.number for segment in missing_segments]} "
+                f"(attempt {attempt + 1} of {EXTRACTION_MAX_RETRIES})"
+            )
+            await asyncio.gather(*(extract_group([segment]) for segment in missing_segments))
+
+        if not notices_by_number and not unnumbered:
+            raise RuntimeError("No tender notices could be extracted from the bulletin") from (
+                errors[-1] if errors else None
+            )
+        missing_numbers = [number for number in range(1, total + 1) if number not in notices_by_number]
+        if missing_numbers:
+            logging.warning(f"Notices {missing_numbers} of {total} are missing after re-extraction")
+        return [notices_by_number[number] for number in sorted(notices_by_number)] + unnumbered
+
+    async def _extract_notices_from_text(self, text: str) -> List[Dict[str, Any]]:
+        """Extracts tender notices from text using structured LLM output."""
         # Create prompt and get structured response
         prompt = ChatPromptTemplate.from_template(TENDER_NOTICE_EXTRACTION_PROMPT)
         messages = prompt.format_messages(tender_notices_text=text)
         
         try:
-            response = await self.extraction_llm.ainvoke(messages)
-            return response["boletins_de_licitacoes"]
+            # The extracted notices restate most of the bulletin text
+            async with _request_slot(), self.rate_limiter.limit_async(
+                messages, completion_tokens=count_tokens(text)
+            ) as reservation:
+                response = await self.extraction_llm.ainvoke(messages)
+                reservation.reconcile_response(response["raw"])
+            if response["parsing_error"]:
+                raise response["parsing_error"]
+            return response["parsed"]["boletins_de_licitacoes"]
         except Exception as e:
             logging.error(f"Error extracting tender notices: {str(e)}")
             raise
     
-    async def _label_tender_batch(self, tenders: List[Dict[str, Any]], template: str, company_description: str) -> None:
-        """Labels a batch of tenders using the LLM in parallel."""
-        tasks = []
-        for tender in tenders:
-            # Create tender notice text for LLM
-            notice_text = f"""
+    async def _invoke_with_rate_limit(self, messages: List[Any]) -> Any:
+        """Invokes the LLM once the shared rate limiter admits the request."""
+        async with _request_slot(), self.rate_limiter.limit_async(
+            messages, completion_tokens=LABELING_COMPLETION_TOKENS
+        ) as reservation:
+            response = await self.llm.ainvoke(messages)
+            reservation.reconcile_response(response)
+        return response
+
+    @staticmethod
+    def _format_notice(tender: Dict[str, Any]) -> str:
+        """Formats a tender notice for the labeling prompt."""
+        return f"""
             Organization: {tender['orgao']}
             Location: {tender['estado']}
             Number: {tender['numero_licitacao']}
@@ -84,14 +229,90 @@ class TenderNoticeProcessor:
             
             Opening Date: {tender['data_hora_licitacao']}
             """
-            
+
+    async def _label_tender_batch(self, tenders: List[Dict[str, Any]], template: str, company_description: str) -> None:
+        """Labels a batch of tenders, labeling_batch_size notices per LLM request.
+
+        Notices missing from a batched response, or whose request failed, are labeled
+        again with one request each.
+        """
+        if self.labeling_batch_size <= 1:
+            await self._label_tenders_individually(tenders, template, company_description)
+            return
+
+        groups = [
+            tenders[i:i + self.labeling_batch_size] for i in range(0, len(tenders), self.labeling_batch_size)
+        ]
+        results = await asyncio.gather(
+            *(self._label_tenders_together(group, template, company_description) for group in groups),
+            return_exceptions=True,
+        )
+
+        gaps = []
+        for group, labels in zip(groups, results):
+            if isinstance(labels, Exception):
+                logging.warning(f"Batched labeling of {len(group)} notices failed: {str(labels)}")
+                gaps.extend(group)
+                continue
+            for index, tender in enumerate(group):
+                label = labels.get(index)
+                if label in VALID_LABELS:
+                    tender['label'] = label
+                else:
+                    gaps.append(tender)
+
+        if gaps:
+            logging.info(f"Labeling {len(gaps)} notices missing from batched responses one by one")
+            await self._label_tenders_individually(gaps, template, company_description)
+
+    async def _label_tenders_together(
+        self, tenders: List[Dict[str, Any]], template: str, company_description: str
+    ) -> Dict[int, str]:
+        """Labels several tenders in one request.
+
+        Notices are tagged with their position in the batch rather than their id_universo,
+        which some notices lack.
+
+        Returns:
+            Dict[int, str]: Labels by position of the tender in tenders
+        """
+        notices_text = "\n".join(
+            f'<NOTICE index="{index}">{self._format_notice(tender)}</NOTICE>'
+            for index, tender in enumerate(tenders)
+        )
+        prompt = ChatPromptTemplate.from_template(template + TENDER_NOTICE_BATCH_LABELING_INSTRUCTIONS)
+        messages = prompt.format_messages(
+            company_business_description=company_description,
+            tender_notice=notices_text
+        )
+        async with _request_slot(), self.rate_limiter.limit_async(
+            messages, completion_tokens=BATCH_LABELING_COMPLETION_TOKENS * len(tenders)
+        ) as reservation:
+            response = await self.batch_labeling_llm.ainvoke(messages)
+            reservation.reconcile_response(response["raw"])
+        if response["parsing_error"]:
+            raise response["parsing_error"]
+        labels = {}
+        for item in response["parsed"].get("labels", []):
+            try:
+                labels[int(item.get("index"))] = str(item.get("label", "")).lower()
+            except (TypeError, ValueError):
+                continue
+        return labels
+
+    async def _label_tenders_individually(
+        self, tenders: List[Dict[str, Any]], template: str, company_description: str
+    ) -> None:
+        """Labels tenders with one LLM request each, in parallel."""
+        tasks = []
+        for tender in tenders:
             # Create prompt and get response directly from LLM
             prompt = ChatPromptTemplate.from_template(template)
             messages = prompt.format_messages(
                 company_business_description=company_description,
-                tender_notice=notice_text
+                tender_notice=self._format_notice(tender)
             )
-            tasks.append(self.llm.ainvoke(messages))
+            tasks.append(self._invoke_with_rate_limit(messages))
         
         # Process all tasks in parallel
         responses = await asyncio.gather(*tasks)
@@ -100,7 +321,120 @@ class TenderNoticeProcessor:
         for tender, response in zip(tenders, responses):
             label_match = re.search(r'(yes|no|unsure)', response.content.lower())
             tender['label'] = label_match.group(1) if label_match else 'unsure'
+
+    async def _label_tenders(
+        self,
+        tender_notices: List[Dict[str, Any]],
+        template: str,
+        company_description: str,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        max_concurrent_chunks: int = 5,
+        labeled_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> None:
+        """Labels tenders in batches of batch_size, with up to max_concurrent_chunks batches at once.
+
+        Notices matching a triage rule get the rule's label, notices found in the label store
+        with the same objeto, template and company description reuse their stored label, and
+        notices the local classifier declines with a probability of at least classifier_threshold
+        are labeled "no"; only the remaining notices are sent to the LLM. The origin of each
+        label is kept in label_source, and the name of the rule that fired in label_rule.
+        labeled_callback receives the notices labeled by each step and LLM batch as they finish.
+        """
+        to_label = tender_notices
+        rule_engine = self.rule_engine
+        if rule_engine is None and RULES_ENABLED:
+            rule_engine = get_rule_engine()
+        if rule_engine is not None:
+            # Rule labels are not stored, so changing a rule takes effect on the next run
+            matched, to_label = rule_engine.apply(tender_notices)
+            if labeled_callback and matched:
+                labeled_callback(matched)
+            if progress_callback and matched:
+                progress_callback(f"Labeled {len(matched)} of {len(tender_notices)} notices with triage rules")
+
+        label_store = self.label_store
+        if label_store is None and LABEL_STORE_ENABLED:
+            label_store = get_label_store()
+        context_hash = labeling_context_hash(template, company_description)
+
+        if label_store is not None:
+            stored_labels = label_store.get_labels(to_label, context_hash)
+            unlabeled = []
+            for tender in to_label:
+                label = stored_labels.get(notice_key(tender))
+                if label:
+                    tender['label'] = label
+                    tender['label_source'] = 'store'
+                else:
+                    unlabeled.append(tender)
+            if labeled_callback and len(unlabeled) < len(to_label):
+                labeled_callback([tender for tender in to_label if tender.get('label_source') == 'store'])
+            if progress_callback:
+                progress_callback(
+                    f"Reused {len(to_label) - len(unlabeled)} of {len(to_label)} labels from previous "
+                    f"bulletins, labeling {len(unlabeled)} new or modified notices"
+                )
+            to_label = unlabeled
+
+        classifier = self.classifier
+        if classifier is None and CLASSIFIER_ENABLED:
+            classifier = get_notice_classifier()
+        if classifier is not None and to_label:
+            if classifier.context_hash != context_hash:
+                logging.info("Notice classifier skipped: it was trained for another template or company description")
+            else:
+                uncertain = []
+                for tender, probability in zip(to_label, classifier.predict_no_probability(to_label)):
+                    if probability >= self.classifier_threshold:
+                        # Not stored, so the classifier is never trained on its own labels
+                        tender['label'] = 'no'
+                        tender['label_source'] = 'classifier'
+                    else:
+                        uncertain.append(tender)
+                if labeled_callback and len(uncertain) < len(to_label):
+                    labeled_callback([tender for tender in to_label if tender.get('label_source') == 'classifier'])
+                if progress_callback:
+                    progress_callback(
+                        f"Declined {len(to_label) - len(uncertain)} of {len(to_label)} notices with the local "
+                        f"classifier, labeling {len(uncertain)} uncertain notices"
+                    )
+                to_label = uncertain
+
+        semaphore = asyncio.Semaphore(max_concurrent_chunks)
+        total_batches = (len(to_label) + self.batch_size - 1) // self.batch_size
+        
+        async def process_batch(batch_index: int, batch: List[Dict[str, Any]]):
+            async with semaphore:
+                if progress_callback:
+                    progress_callback(f"Processing batch {batch_index + 1} of {total_batches}...")
+                await self._label_tender_batch(batch, template, company_description)
+                for tender in batch:
+                    tender['label_source'] = 'llm'
+                if label_store is not None:
+                    # Stored per batch, so an interrupted run keeps the labels it paid for
+                    label_store.put_labels(batch, context_hash)
+                if labeled_callback:
+                    labeled_callback(batch)
+                if progress_callback:
+                    progress_callback(f"Processed batch {batch_index + 1} of {total_batches}")
+        
+        # Create tasks for all batches
+        tasks = []
+        for i in range(0, len(to_label), self.batch_size):
+            batch = to_label[i:i + self.batch_size]
+            tasks.append(process_batch(i // self.batch_size, batch))
+        
+        # Process all batches
+        await asyncio.gather(*tasks)
     
+    @staticmethod
+    def _to_dataframe(tender_notices: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Converts labeled notices to a typed frame with display labels, sorted by priority and date.
+
+        See notice_frame.to_notice_frame for the column types.
+        """
+        return to_notice_frame(TenderNotice.from_dict(notice) for notice in tender_notices)
+
     async def process_pdf(
         self, 
         pdf_path: str, 
@@ -114,185 +448,258 @@ class TenderNoticeProcessor:
         
         try:
             # Extract text from PDF
-            text = extract_text(pdf_path)
+            text = extract_text(pdf_path, PDF_BACKEND)
             
             # Extract tender notices using structured output
             tender_notices = await self._extract_tender_notices(text)
             
-            # Process tenders in batches with semaphore to limit concurrency
-            semaphore = asyncio.Semaphore(max_concurrent_chunks)
-            total_batches = (len(tender_notices) + self.batch_size - 1) // self.batch_size
-            
-            async def process_batch(batch_index: int, batch: List[Dict[str, Any]]):
-                async with semaphore:
-                    if progress_callback:
-                        progress_callback(f"Processing batch {batch_index + 1} of {total_batches}...")
-                    await self._label_tender_batch(batch, template, company_description)
-                    if progress_callback:
-                        progress_callback(f"Processed batch {batch_index + 1} of {total_batches}")
-            
-            # Create tasks for all batches
-            tasks = []
-            for i in range(0, len(tender_notices), self.batch_size):
-                batch = tender_notices[i:i + self.batch_size]
-                tasks.append(process_batch(i // self.batch_size, batch))
-            
-            # Process all batches
-            await asyncio.gather(*tasks)
+            # Label tenders in batches with semaphore to limit concurrency
+            await self._label_tenders(
+                tender_notices, template, company_description, progress_callback, max_concurrent_chunks
+            )
             
             if progress_callback:
                 progress_callback("Processing completed!")
             
-            # Convert to DataFrame
-            df = pd.DataFrame(tender_notices)
-            
-            # Clean up and standardize labels
-            label_map = {
-                'yes': '✅ Participar',
-                'no': '❌ Declinar',
-                'unsure': '🤔 Avaliar',
-                'insufficient_info': '🤷‍♂️ Info insuficiente',
-                None: '🤔 Avaliar'  # Default to 'Avaliar'
-            }
-            df['label'] = df['label'].map(lambda x: label_map.get(x, '🤔 Avaliar'))
-            
-            # Sort by label priority and opening date
-            label_priority = {
-                '✅ Participar': 0,
-                '🤔 Avaliar': 1,
-                '❌ Declinar': 2,
-                '🤷‍♂️ Info insuficiente': 3
-            }
-            df['label_priority'] = df['label'].map(label_priority)
-            df = df.sort_values(['label_priority', 'data_hora_licitacao'], ascending=[True, True], na_position='last')
-            df = df.drop('label_priority', axis=1)
-            
-            return df
+            return self._to_dataframe(tender_notices)
             
         except Exception as e:
             logging.error(f"Error processing PDF: {str(e)}")
             raise
 
+    async def process_pdfs(
+        self,
+        pdf_files: List[Tuple[str, str]],
+        template: str,
+        company_description: str,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        max_concurrent_chunks: int = 5,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+        notice_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> pd.DataFrame:
+        """Processes several bulletin PDFs concurrently, labeling notices shared by them once.
+
+        Files are extracted concurrently, all LLM requests of the run share
+        max_concurrent_requests slots, and each file's notices start labeling as soon as
+        the file is extracted. Notices already claimed by another file (same id_universo
+        and objeto) wait for that label instead of being labeled again.
+
+        Args:
+            pdf_files: (source_file, pdf_path) pairs
+            template: Labeling template
+            company_description: Company business description
+            progress_callback: Receives progress messages
+            max_concurrent_chunks: Labeling batches per file running at once
+            max_concurrent_requests: LLM requests in flight across all files
+            notice_callback: Receives rows (notices with raw labels and source_file) as soon as
+                they are labeled, each row exactly once
+
+        Returns:
+            pd.DataFrame: One row per notice and source_file, sorted by label priority and date.
+                Files that failed to be extracted or labeled have no rows and are listed in
+                df.attrs["failed_files"] with their errors.
+        """
+        request_slots_token = _request_slots.set(asyncio.Semaphore(max_concurrent_requests))
+        # notice_key -> (notice labeled for every file holding it, labeling task)
+        claimed: Dict[Any, Tuple[Dict[str, Any], asyncio.Task]] = {}
+        file_notices: Dict[str, List[Dict[str, Any]]] = {}
+        failed_files: Dict[str, str] = {}
+        # notice_key -> (source_file, notice) of every file holding it, and the keys labeled so far
+        holders: Dict[Any, List[Tuple[str, Dict[str, Any]]]] = defaultdict(list)
+        labeled_keys = set()
+
+        def publish(keys: List[Any], source_file: Optional[str] = None) -> None:
+            rows = [
+                self._labeled_row(notice, claimed[key][0], holder_file)
+                for key in keys
+                for holder_file, notice in holders[key]
+                if source_file is None or holder_file == source_file
+            ]
+            if rows:
+                notice_callback(rows)
+
+        async def process_file(source_file: str, pdf_path: str) -> None:
+            try:
+                # Extraction is CPU bound; keep the event loop serving the other files
+                text = await asyncio.to_thread(extract_text, pdf_path, PDF_BACKEND)
+                tender_notices = await self._extract_tender_notices(text)
+            except Exception as e:
+                logging.error(f"Error processing PDF {source_file}: {str(e)}")
+                failed_files[source_file] = str(e)
+                if progress_callback:
+                    progress_callback(f"Failed to process {source_file}: {str(e)}")
+                return
+
+            new_notices: Dict[Any, Dict[str, Any]] = {}
+            file_keys = []
+            for index, notice in enumerate(tender_notices):
+                key = notice_key(notice) or (source_file, index)
+                if key not in claimed and key not in new_notices:
+                    new_notices[key] = notice
+                holders[key].append((source_file, notice))
+                file_keys.append(key)
+            keys_by_notice = {id(notice): key for key, notice in new_notices.items()}
+
+            def on_labeled(notices: List[Dict[str, Any]]) -> None:
+                keys = [keys_by_notice[id(notice)] for notice in notices]
+                labeled_keys.update(keys)
+                if notice_callback:
+                    publish(keys)
+
+            task = asyncio.create_task(
+                self._label_tenders(
+                    list(new_notices.values()),
+                    template,
+                    company_description,
+                    progress_callback,
+                    max_concurrent_chunks,
+                    labeled_callback=on_labeled,
+                )
+            )
+            for key, notice in new_notices.items():
+                claimed[key] = (notice, task)
+            file_notices[source_file] = tender_notices
+            if notice_callback:
+                # Notices another file already got labels for are ready right away
+                publish(list(dict.fromkeys(key for key in file_keys if key in labeled_keys)), source_file)
+            if progress_callback:
+                progress_callback(
+                    f"Extracted {len(tender_notices)} notices from {source_file}, "
+                    f"{len(tender_notices) - len(new_notices)} already labeled with another file"
+                )
+
+        try:
+            await asyncio.gather(*(process_file(source_file, pdf_path) for source_file, pdf_path in pdf_files))
+            tasks = list(dict.fromkeys(task for _, task in claimed.values()))
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            _request_slots.reset(request_slots_token)
+
+        # A failed labeling task fails every file holding one of the notices it claimed,
+        # the other files keep their labels
+        for task, result in zip(tasks, results):
+            if not isinstance(result, Exception):
+                continue
+            for key, (_, key_task) in claimed.items():
+                if key_task is not task:
+                    continue
+                for holder_file, _ in holders[key]:
+                    if file_notices.pop(holder_file, None) is None:
+                        continue
+                    logging.error(f"Error labeling notices of {holder_file}: {str(result)}")
+                    failed_files[holder_file] = str(result)
+                    if progress_callback:
+                        progress_callback(f"Failed to label {holder_file}: {str(result)}")
+        if not file_notices:
+            raise RuntimeError(f"No bulletin could be processed: {failed_files}")
+
+        rows = []
+        for source_file, tender_notices in file_notices.items():
+            for index, notice in enumerate(tender_notices):
+                labeled_notice, _ = claimed[notice_key(notice) or (source_file, index)]
+                rows.append(self._labeled_row(notice, labeled_notice, source_file))
+        if progress_callback:
+            progress_callback(f"Processing completed! {len(claimed)} unique notices in {len(rows)} rows")
+
+        df = self._to_dataframe(rows)
+        df.attrs["failed_files"] = failed_files
+        return df
+
+    @staticmethod
+    def _labeled_row(notice: Dict[str, Any], labeled_notice: Dict[str, Any], source_file: str) -> Dict[str, Any]:
+        """A notice of a file, with the label of the notice labeled for every file holding it."""
+        return {
+            **notice,
+            **{field: labeled_notice.get(field) for field in ('label', 'label_source', 'label_rule')},
+            'source_file': source_file,
+        }
+
+    async def stream_pdfs(
+        self,
+        pdf_files: List[Tuple[str, str]],
+        template: str,
+        company_description: str,
+        max_concurrent_chunks: int = 5,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process bulletin PDFs like process_pdfs, yielding labeled notices as they finish.
+
+        Events are dicts with a "type" key:
+            - "progress": {"message": str}
+            - "notices": {"notices": list} rows with raw labels and source_file, each row once
+            - "result": {"df": pd.DataFrame} once, at the end, as returned by process_pdfs
+
+        Args:
+            pdf_files: (source_file, pdf_path) pairs
+            template: Labeling template
+            company_description: Company business description
+            max_concurrent_chunks: Labeling batches per file running at once
+            max_concurrent_requests: LLM requests in flight across all files
+
+        Yields:
+            Dict[str, Any]: The next processing event
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        run = asyncio.create_task(
+            self.process_pdfs(
+                pdf_files,
+                template=template,
+                company_description=company_description,
+                progress_callback=lambda message: events.put_nowait({"type": "progress", "message": message}),
+                max_concurrent_chunks=max_concurrent_chunks,
+                max_concurrent_requests=max_concurrent_requests,
+                notice_callback=lambda rows: events.put_nowait({"type": "notices", "notices": rows}),
+            )
+        )
+        run.add_done_callback(lambda _: events.put_nowait(None))
+
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            if not run.done():
+                run.cancel()
+
+        yield {"type": "result", "df": run.result()}
+
     async def process_all_pdfs(self, files):
-        """Process multiple PDFs asynchronously."""
+        """Process multiple PDFs concurrently with process_pdfs."""
+        tmp_paths = []
         try:
-            # Initialize processor with correct model settings
-            processor = TenderNoticeProcessor()
-            
-            # Process each PDF
-            all_tenders = []
-            progress_bar = st.progress(0)
             status_text = st.empty()
+            status_text.text(f"Processando {len(files)} boletins...")
             
-            for i, file in enumerate(files):
-                try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                        tmp_file.write(file.getvalue())
-                        tmp_path = tmp_file.name
-                    
-                    try:
-                        # Update status
-                        status_text.text(f"Processando {file.name}...")
-                        
-                        # Process PDF
-                        df = await processor.process_pdf(
-                            pdf_path=tmp_path,
-                            template=TENDER_NOTICE_LABELING_TEMPLATE,
-                            company_description=COMPANY_BUSINESS_DESCRIPTION,
-                            max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
-                        )
-                        
-                        if not df.empty:
-                            # Add source information
-                            df['source_file'] = file.name
-                            df['processed_at'] = datetime.now()
-                            all_tenders.append(df)
-                        
-                    finally:
-                        # Clean up temp file
-                        os.unlink(tmp_path)
-                    
-                except Exception as e:
-                    st.error(f"Erro ao processar {file.name}: {str(e)}")
-                    if os.getenv("ENVIRONMENT") == "dev":
-                        st.exception(e)
-                    continue
-                
-                # Update progress
-                progress = (i + 1) / len(files)
-                progress_bar.progress(progress)
+            # Save uploaded files temporarily
+            pdf_files = []
+            for file in files:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                    tmp_file.write(file.getvalue())
+                    tmp_paths.append(tmp_file.name)
+                pdf_files.append((file.name, tmp_file.name))
+            
+            df = await self.process_pdfs(
+                pdf_files,
+                template=TENDER_NOTICE_LABELING_TEMPLATE,
+                company_description=COMPANY_BUSINESS_DESCRIPTION,
+                progress_callback=status_text.text,
+                max_concurrent_chunks=int(os.getenv("TENDER_NOTICE_MAX_CONCURRENT_CHUNKS", 5)),
+            )
+            for source_file, error in df.attrs.get("failed_files", {}).items():
+                st.error(f"Erro ao processar {source_file}: {error}")
             
             # Clear progress indicators
-            progress_bar.empty()
             status_text.empty()
             
-            # Combine all results
-            if all_tenders:
-                df = pd.concat(all_tenders, ignore_index=True)
-                return df
-                
-            return pd.DataFrame()
+            if not df.empty:
+                df['processed_at'] = datetime.now()
+            return df
             
         except Exception as e:
             st.error(f"Erro ao processar os boletins: {str(e)}")
             if os.getenv("ENVIRONMENT") == "dev":
                 st.exception(e)
             return pd.DataFrame()
-
-
-
-if __name__ == "__main__":
-    import sys
-    import asyncio
-    import os
-    from langchain_openai import AzureChatOpenAI
-    
-    # Configure logging
-    logging.basicConfig(level=logging.INFO,
-                       format='%(asctime)s - %(levelname)s - %(message)s')
-    
-    if len(sys.argv) != 2:
-        print("Usage: python tender_notice_processor.py <pdf_path>")
-        sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    
-    # Test data
-    template = """
-    Você é um especialista em análise de licitações. Sua tarefa é analisar o edital de licitação fornecido e determinar se a empresa deve participar com base nos seguintes critérios:
-    
-    1. A empresa atua no setor de engenharia e construção civil, com foco em:
-       - Obras de infraestrutura
-       - Construção de edifícios
-       - Reformas e adaptações
-       - Instalações elétricas e hidráulicas
-    
-    2. A empresa tem capacidade para executar obras de até R$ 10 milhões
-    
-    3. A empresa atua principalmente nos estados: SP, RJ, MG, PR, SC
-    
-    Analise o edital e responda apenas "yes" se a empresa deve participar, "no" se não deve participar, ou "maybe" se precisar de mais informações.
-    """
-    
-    company_description = """
-    Empresa de engenharia e construção civil com 15 anos de experiência.
-    Principais áreas de atuação:
-    - Obras de infraestrutura
-    - Construção de edifícios
-    - Reformas e adaptações
-    - Instalações elétricas e hidráulicas
-    
-    Capacidade de execução: Até R$ 10 milhões por obra
-    Região de atuação: SP, RJ, MG, PR, SC
-    """
-    
-    processor = TenderNoticeProcessor()
-    
-    async def main():
-        df = await processor.process_pdf(pdf_path, template, company_description)
-        print(f"\nProcessed {len(df)} tenders")
-        print(df)
-    
-    asyncio.run(main())
-
+        finally:
+            # Clean up temp files
+            for tmp_path in tmp_paths:
+                os.unlink(tmp_path)
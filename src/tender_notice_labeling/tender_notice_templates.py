@@ -65,7 +65,7 @@ TENDER_NOTICE_EXTRACTION_SCHEMA = {
 # Prompt template for tender notice extraction
 TENDER_NOTICE_EXTRACTION_PROMPT = """The following string is a collection of tender notices extracted from an email that has been printed as a pdf. Please extract the relevant information for every single tender noteice and output a JSON object according to the provided schema.
 
-Pay attention to the segments of the text that contain 2 sets of integers inside parentheses. These represent the current tender notice number and the total number of tender notices in the collection. Use this information in the 'num_seq_boletim" field and make sure that the last extracted tender notice is the final one. Examples: "(12/12)", "(31/31)", "(50/50)".
+Pay attention to the segments of the text that contain 2 sets of integers inside parentheses. These represent the current tender notice number and the total number of tender notices in the collection. Use this information in the 'num_seq_boletim" field and make sure that every tender notice from the first to the last counter in the text is extracted. The text may hold the whole collection or only some of its tender notices. Examples: "(12/12)", "(31/31)", "(50/50)".
 
 <tender_notices_text>
 {tender_notices_text}
@@ -97,6 +97,47 @@ If the provided tender notice, for some reason (likely parsing errors upstream),
 </TENDER_NOTICE>
 """
 
+# Schema for labeling several tender notices in one request
+TENDER_NOTICE_BATCH_LABELING_SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "title": "LabelTenderNotices",
+    "description": "Labels of a batch of tender notices.",
+    "type": "object",
+    "properties": {
+        "labels": {
+            "type": "array",
+            "description": "One entry per tender notice, in the order the notices were given.",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {
+                        "type": "integer",
+                        "description": "The index attribute of the labeled tender notice's NOTICE tag."
+                    },
+                    "reasoning": {
+                        "type": "string",
+                        "description": "Brief reasoning behind the label."
+                    },
+                    "label": {
+                        "type": "string",
+                        "enum": ["yes", "no", "unsure", "insufficient_info"],
+                        "description": "Label of the tender notice."
+                    }
+                },
+                "required": ["index", "reasoning", "label"]
+            }
+        }
+    },
+    "required": ["labels"]
+}
+
+# Appended to the labeling template when several tender notices are labeled in one request
+TENDER_NOTICE_BATCH_LABELING_INSTRUCTIONS = """
+<BATCH_INSTRUCTIONS>
+The TENDER_NOTICE section above holds several tender notices, each one inside a <NOTICE index="..."> tag. Label every tender notice independently, following the INSTRUCTIONS, and return exactly one entry per tender notice with its index, a brief reasoning and its label.
+</BATCH_INSTRUCTIONS>
+"""
+
 # Company business description for tender notice labeling
 COMPANY_BUSINESS_DESCRIPTION = """'Fast Indústria e Comércio Ltda', our USER, is a Brazilian company from the State of Santa Catarina which has become in the last decade a prominent player in the water and wastewater treatment industry.
 
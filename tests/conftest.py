@@ -4,6 +4,13 @@ import pytest
 import streamlit as st
 
 
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    """Keep the exported run metrics out of the working tree."""
+    monkeypatch.setenv("TENDER_ANALYSIS_METRICS_DIR", str(tmp_path / "metrics"))
+    return tmp_path / "metrics"
+
+
 @pytest.fixture(autouse=True)
 def mock_streamlit_session():
     """Mock Streamlit's session state for testing."""
@@ -0,0 +1,161 @@
+"""Tests for the background job subsystem."""
+
+import time
+import socket
+
+import pytest
+
+from src.background_jobs.job_runner import JobRunner
+from src.background_jobs.job_store import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    CANCELLED,
+    JobStore,
+    store_upload,
+)
+
+
+@pytest.fixture
+def job_store(tmp_path):
+    """Create a JobStore backed by a temporary database."""
+    return JobStore(db_path=str(tmp_path / "jobs.sqlite3"))
+
+
+def test_enqueue_and_claim_in_order(job_store):
+    """Test that jobs are claimed oldest first and marked as running."""
+    first_id = job_store.enqueue("tender_summary", {"tender_documents_text": "a"})
+    second_id = job_store.enqueue("tender_summary", {"tender_documents_text": "b"})
+
+    job = job_store.claim_next("host:1")
+
+    assert job.id == first_id
+    assert job.status == RUNNING
+    assert job.attempts == 1
+    assert job.payload == {"tender_documents_text": "a"}
+    assert job_store.get(second_id).status == QUEUED
+
+
+def test_claim_next_empty_queue(job_store):
+    """Test that claiming from an empty queue returns None."""
+    assert job_store.claim_next("host:1") is None
+
+
+def test_progress_partial_results_and_completion(job_store):
+    """Test progress reporting and result retrieval."""
+    job_id = job_store.enqueue("tender_summary", {})
+    job_store.claim_next("host:1")
+
+    job_store.update_progress(job_id, 0.5, "Processando parte 1/2")
+    job_store.update_progress(job_id, partial_result={"task_outputs": {"a": "1"}})
+    job_store.update_progress(job_id, partial_result={"report": "# Rel"})
+    job = job_store.get(job_id)
+    assert job.progress == 0.5
+    assert job.progress_message == "Processando parte 1/2"
+    assert job.partial_result == {"task_outputs": {"a": "1"}, "report": "# Rel"}
+
+    job_store.complete(job_id, "# Relatório")
+    job = job_store.get(job_id)
+    assert job.status == SUCCEEDED
+    assert job.is_finished
+    assert job.result == "# Relatório"
+    assert job.progress == 1
+
+
+def test_daily_job_stats(job_store):
+    """Test that succeeded jobs of a kind are counted per day with their published cost."""
+    for cost in (0.25, 0.5, None):
+        job_id = job_store.enqueue("tender_summary", {})
+        job_store.claim_next("host:1")
+        if cost is not None:
+            job_store.update_progress(job_id, partial_result={"metrics": {"cost_usd": cost}})
+        job_store.complete(job_id, "# Relatório")
+    job_store.enqueue("tender_notice_pdfs", {})
+    failed_id = job_store.enqueue("tender_summary", {})
+    job_store.fail(failed_id, "erro")
+
+    stats = job_store.daily_job_stats("tender_summary")
+    assert len(stats) == 1
+    assert stats[0]["jobs"] == 3
+    assert stats[0]["cost_usd"] == 0.75
+    assert job_store.daily_job_stats("tender_summary", since=time.time() + 60) == []
+
+
+def test_fail_and_cancel(job_store):
+    """Test that failed jobs keep their error and only queued jobs can be cancelled."""
+    failed_id = job_store.enqueue("tender_summary", {})
+    job_store.claim_next("host:1")
+    job_store.fail(failed_id, "429 Too Many Requests")
+    assert job_store.get(failed_id).status == FAILED
+    assert job_store.get(failed_id).error == "429 Too Many Requests"
+    assert not job_store.cancel(failed_id)
+
+    queued_id = job_store.enqueue("tender_summary", {})
+    assert job_store.cancel(queued_id)
+    assert job_store.get(queued_id).status == CANCELLED
+
+
+def test_requeue_orphaned_jobs(job_store, monkeypatch):
+    """Test that jobs of dead workers on this host are requeued."""
+    monkeypatch.setattr("src.background_jobs.job_store.socket.gethostname", lambda: "host")
+    job_id = job_store.enqueue("tender_summary", {})
+    job_store.claim_next("host:999999999")
+
+    assert job_store.requeue_orphaned_jobs() == 1
+    assert job_store.get(job_id).status == QUEUED
+
+
+def test_store_upload(tmp_path):
+    """Test that uploads are persisted for the workers."""
+    path = store_upload("boletim.pdf", b"%PDF", upload_dir=str(tmp_path))
+
+    assert path.endswith("_boletim.pdf")
+    with open(path, "rb") as upload_file:
+        assert upload_file.read() == b"%PDF"
+
+
+def test_job_runner_processes_queue(tmp_path):
+    """Test that worker processes pick up jobs from the queue."""
+    runner = JobRunner(db_path=str(tmp_path / "jobs.sqlite3"), num_workers=1, poll_interval=0.1)
+    job_id = runner.store.enqueue("unknown_kind", {})
+
+    runner.start()
+    try:
+        deadline = time.time() + 30
+        while not runner.store.get(job_id).is_finished and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        runner.stop()
+
+    job = runner.store.get(job_id)
+    assert job.status == FAILED
+    assert job.error == "Unknown job kind: unknown_kind"
+    assert not runner.is_running
+
+
+def test_dead_workers_are_replaced_and_their_jobs_requeued(tmp_path):
+    """Test that a crashed worker is respawned and its claimed job doesn't stay running."""
+    runner = JobRunner(db_path=str(tmp_path / "jobs.sqlite3"), num_workers=2, poll_interval=0.1)
+    runner.start()
+    try:
+        crashed = runner._workers[0]
+        crashed.kill()
+        crashed.join(10)
+        job_id = runner.store.enqueue("unknown_kind", {})
+        with runner.store._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, attempts = 1 WHERE id = ?",
+                (RUNNING, f"{socket.gethostname()}:{crashed.pid}", job_id),
+            )
+
+        assert runner.is_running
+        assert runner.replace_dead_workers() == 1
+        assert runner._workers[0] is not crashed and runner._workers[0].is_alive()
+        deadline = time.time() + 30
+        while not runner.store.get(job_id).is_finished and time.time() < deadline:
+            time.sleep(0.1)
+        assert runner.store.get(job_id).error == "Unknown job kind: unknown_kind"
+        assert runner.replace_dead_workers() == 0
+    finally:
+        runner.stop()
@@ -0,0 +1,63 @@
+"""Tests for the headless bulletin processing CLI."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from src.tender_notice_labeling import batch_cli
+from src.tender_notice_labeling.label_store import DISPLAY_LABELS
+from src.tender_notice_labeling.notice_frame import TenderNotice, to_notice_frame
+from tests.test_notice_store import make_notices
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.processed = []
+
+    async def process_pdfs(self, pdf_files, template, company_description, **kwargs):
+        (source_file, pdf_path), = pdf_files
+        self.processed.append(source_file)
+        if source_file == "quebrado.pdf":
+            raise RuntimeError("No bulletin could be processed")
+        notices = make_notices()[:2] if source_file == "boletim_a.pdf" else make_notices()[2:]
+        return to_notice_frame(TenderNotice.from_dict({**notice, "source_file": source_file}) for notice in notices)
+
+
+def test_batch_processing_skips_stored_bulletins_and_reports_failures(tmp_path, monkeypatch, capsys):
+    """Test directory and glob inputs, copies processed once, resume, --force and the per-file report."""
+    processor = FakeProcessor()
+    monkeypatch.setattr(batch_cli, "_processor", processor)
+    bulletins = tmp_path / "boletins"
+    (bulletins / "2025").mkdir(parents=True)
+    (bulletins / "boletim_a.pdf").write_bytes(b"%PDF a")
+    (bulletins / "2025" / "boletim_b.pdf").write_bytes(b"%PDF b")
+    (tmp_path / "copia_a.pdf").write_bytes(b"%PDF a")
+    store = str(tmp_path / "tender_notices.sqlite3")
+    output = tmp_path / "licitacoes.jsonl"
+    args = [str(bulletins), str(tmp_path / "*.pdf"), "-o", str(output), "--workers", "1", "--store", store]
+
+    assert batch_cli.main(args + ["--report", str(tmp_path / "report.json")]) == 0
+    assert sorted(processor.processed) == ["boletim_a.pdf", "boletim_b.pdf"]
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(record["id_universo"] for record in records) == ["1", "2", "3", "4"]
+    assert {record["label"] for record in records} == {DISPLAY_LABELS[label] for label in ("yes", "no", "unsure")}
+    report = {result["source_file"]: result for result in json.load(open(tmp_path / "report.json"))["results"]}
+    assert report["boletim_a.pdf"]["status"] == "processed" and report["boletim_a.pdf"]["seconds"] >= 0
+    assert report["copia_a.pdf"]["status"] == "skipped" and report["copia_a.pdf"]["notices"] == 2
+    assert "boletim_b.pdf" in capsys.readouterr().out
+
+    # A second run only processes the new and the forced bulletins
+    (tmp_path / "quebrado.pdf").write_bytes(b"%PDF broken")
+    assert batch_cli.main(args[:-4] + ["-o", str(tmp_path / "licitacoes.csv"), "--store", store]) == 1
+    assert processor.processed[2:] == ["quebrado.pdf"]
+    csv_df = pd.read_csv(tmp_path / "licitacoes.csv", sep=";", encoding="utf-8-sig")
+    assert len(csv_df) == 4 and set(csv_df["source_file"]) == {"boletim_a.pdf", "boletim_b.pdf"}
+
+    assert batch_cli.main([str(bulletins / "boletim_a.pdf"), "-o", str(output), "--store", store, "--force"]) == 0
+    assert processor.processed[3:] == ["boletim_a.pdf"]
+
+
+def test_expand_inputs_rejects_unmatched_patterns(tmp_path):
+    with pytest.raises(FileNotFoundError, match="No PDF matches"):
+        batch_cli.expand_inputs([str(tmp_path / "*.pdf")])
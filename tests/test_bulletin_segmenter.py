@@ -0,0 +1,92 @@
+"""Tests for the bulletin segmenter and the parallel notice extraction."""
+
+import re
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.tender_notice_labeling.bulletin_segmenter import (
+    group_segments,
+    parse_sequence_number,
+    segment_bulletin,
+    segments_to_reextract,
+)
+from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+
+
+def make_bulletin(total: int) -> str:
+    notices = [
+        f"""SANEPAR - Cia de Saneamento do Paraná ({number}/{total})
+Tipo de Órgão: Estadual Cidade: Curitiba PR
+Modalidade: LEI DAS ESTATAIS Nº: {number}/2024
+Objeto: AMPLIACAO DA ETE {number}, COM TUBOS DE 1/2 POLEGADA (1/2)
+Abertura: 03/12/2024 10:00
+ID Universo: {10223300 + number}
+"""
+        for number in range(1, total + 1)
+    ]
+    return "Boletim de Licitações - Enviado em 02/12/2024\n\n" + "\n".join(notices)
+
+
+def test_segment_bulletin_splits_at_counters():
+    """Test that segments start at each (n/N) counter and ignore other fractions."""
+    segments = segment_bulletin(make_bulletin(12))
+
+    assert [segment.number for segment in segments] == list(range(1, 13))
+    assert {segment.total for segment in segments} == {12}
+    assert segments[0].text.startswith("SANEPAR - Cia de Saneamento do Paraná (1/12)")
+    assert "Boletim de Licitações" not in segments[0].text
+    assert "ID Universo: 10223303" in segments[2].text
+    assert "(4/12)" not in segments[2].text
+    assert [len(group) for group in group_segments(segments, 5)] == [5, 5, 2]
+    assert segment_bulletin("Texto sem contadores") == []
+    assert parse_sequence_number("(7/12)") == 7
+    assert parse_sequence_number(None) is None
+
+
+def test_segments_to_reextract_covers_lost_counters():
+    """Test that a notice whose counter was lost is re-extracted from the segment before it."""
+    text = make_bulletin(5).replace("(3/5)", "")
+    segments = segment_bulletin(text)
+
+    assert [segment.number for segment in segments] == [1, 2, 4, 5]
+    assert [segment.number for segment in segments_to_reextract(segments, [1, 4])] == [2, 5]
+    assert segments_to_reextract(segments, [1, 2, 3, 4, 5]) == []
+
+
+def test_extract_tender_notices_in_parallel_groups(monkeypatch):
+    """Test that groups are extracted concurrently and missing notices are re-extracted."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    processor = TenderNoticeProcessor()
+    requests = []
+
+    async def extract(text):
+        numbers = [int(number) for number in re.findall(r"\((\d+)/12\)", text)]
+        requests.append(numbers)
+        if len(requests) == 1:
+            # First group misses its last notice
+            numbers = numbers[:-1]
+        await asyncio.sleep(0)
+        return [{"num_seq_boletim": f"({number}/12)", "id_universo": 10223300 + number} for number in numbers]
+
+    with patch.object(processor, "_extract_notices_from_text", AsyncMock(side_effect=extract)):
+        notices = asyncio.run(processor._extract_tender_notices(make_bulletin(12)))
+
+    assert [notice["id_universo"] for notice in notices] == [10223300 + number for number in range(1, 13)]
+    assert sorted(map(tuple, requests)) == [(1, 2, 3, 4, 5), (5,), (6, 7, 8, 9, 10), (11, 12)]
+
+
+def test_extract_tender_notices_raises_when_nothing_is_extracted(monkeypatch):
+    """Test that failures of every request surface as an error."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    processor = TenderNoticeProcessor()
+
+    with patch.object(
+        processor, "_extract_notices_from_text", AsyncMock(side_effect=TimeoutError("timeout"))
+    ), pytest.raises(RuntimeError, match="No tender notices"):
+        asyncio.run(processor._extract_tender_notices(make_bulletin(3)))
@@ -0,0 +1,78 @@
+"""Tests for the chunk prefilter and its evaluation harness."""
+
+import pytest
+
+from src.tender_analysis_crew.chunk_prefilter import (
+    ChunkPreFilter,
+    ROUTE_CHEAP,
+    ROUTE_FULL,
+    ROUTE_SKIP,
+)
+from src.tender_analysis_crew.prefilter_evaluation import evaluate_prefilter
+
+TECHNICAL_CHUNK = """Edital - Pág.12
+A estação de tratamento de esgoto (ETE) deverá utilizar reatores MBBR com vazão média de 120 L/s.
+O prazo de execução das obras é de 360 (trezentos e sessenta) dias corridos a partir da ordem de serviço.
+Valor estimado da contratação: R$ 25.400.000,00. Multa de 0,5% por dia de atraso.
+Os equipamentos deverão ser fabricados em aço inox AISI 316."""
+
+BOILERPLATE_CHUNK = """Minuta do Contrato - Pág.85
+ANEXO VII - MODELO DE DECLARAÇÃO
+Declaramos, sob as penas da lei, que não empregamos menores de dezoito anos.
+Fica eleito o foro da comarca para dirimir quaisquer dúvidas.
+E por estarem justas e contratadas, as partes assinam o presente instrumento.
+Local e data
+______________________________
+Assinatura do representante legal"""
+
+
+def test_boilerplate_scores_below_technical_content():
+    """Test that signature pages and declaration templates score lower."""
+    technical_score, boilerplate_score = ChunkPreFilter(mode="skip").score_chunks(
+        [TECHNICAL_CHUNK, BOILERPLATE_CHUNK]
+    )
+
+    assert 0 <= boilerplate_score < technical_score <= 1
+    assert boilerplate_score < 0.15
+
+
+def test_route_chunks_by_mode():
+    """Test routing in each prefilter mode."""
+    chunks = [BOILERPLATE_CHUNK, TECHNICAL_CHUNK, BOILERPLATE_CHUNK]
+
+    assert ChunkPreFilter(mode="off").route_chunks(chunks) == [ROUTE_FULL] * 3
+    assert ChunkPreFilter(mode="skip", threshold=0.15).route_chunks(chunks) == [
+        ROUTE_FULL,  # the first chunk carries the overview and is always kept
+        ROUTE_FULL,
+        ROUTE_SKIP,
+    ]
+    assert ChunkPreFilter(mode="cheap_model", threshold=0.15).route_chunks(chunks)[2] == ROUTE_CHEAP
+
+
+def test_invalid_mode():
+    """Test that an unknown prefilter mode is rejected."""
+    with pytest.raises(ValueError, match="Invalid prefilter mode"):
+        ChunkPreFilter(mode="aggressive")
+
+
+def test_evaluate_prefilter():
+    """Test the recall versus calls saved sweep."""
+    records = [
+        {
+            "source": "edital.pdf",
+            "text": TECHNICAL_CHUNK,
+            "sections": [{"checklist": 1}, {"checklist": 0}],
+        },
+        {"source": "edital.pdf", "text": BOILERPLATE_CHUNK, "sections": []},
+    ]
+
+    no_filter, filtered, everything_filtered = evaluate_prefilter(
+        records, thresholds=[0.0, 0.15, 1.01]
+    )
+
+    assert no_filter["calls_saved"] == 0
+    assert no_filter["section_recall"] == 1
+    assert filtered["calls_saved"] == 0.5
+    assert filtered["chunk_recall"] == 1
+    assert filtered["checklist_recall"] == 1
+    assert everything_filtered["section_recall"] == 0
@@ -0,0 +1,47 @@
+"""Tests for the fake Azure OpenAI backend used by the benchmarks."""
+
+import random
+
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_openai import AzureChatOpenAI
+
+from benchmarks.fake_azure_openai import FakeAzureOpenAI, FakeAzureOpenAIServer, azure_environment, fake_from_schema
+from src.tender_analysis_crew.templates.extract_and_label_sections_template import (
+    extract_and_label_sections_json_schema,
+)
+
+
+def test_fake_from_schema_follows_enums_and_types():
+    """Test that generated values match the extraction schema."""
+    result = fake_from_schema(extract_and_label_sections_json_schema, random.Random(0), max_items=5)
+    categories = extract_and_label_sections_json_schema["properties"]["sections"]["items"]["properties"]["categoria"]["enum"]
+
+    assert set(result) == {"sections", "overview"}
+    for section in result["sections"]:
+        assert section["categoria"] in categories
+        assert isinstance(section["transcricao"], str)
+
+
+def test_structured_output_against_fake_backend(monkeypatch):
+    """Test that tool calls and json_schema answers of the fake backend parse like Azure's."""
+    with FakeAzureOpenAIServer(FakeAzureOpenAI()) as server:
+        for key, value in azure_environment(server.endpoint).items():
+            monkeypatch.setenv(key, value)
+        model = AzureChatOpenAI(model="gpt-4o-mini", azure_deployment="gpt-4o-mini", temperature=0)
+        tool_response = model.with_structured_output(
+            extract_and_label_sections_json_schema, include_raw=True
+        ).invoke("Edital - Pág.1\nPrazo de execução de 360 dias")
+        json_schema_response = (
+            model.bind(
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {"name": "sections", "schema": extract_and_label_sections_json_schema},
+                }
+            )
+            | JsonOutputParser()
+        ).invoke("Edital - Pág.1\nPrazo de execução de 360 dias")
+
+    assert tool_response["parsing_error"] is None
+    assert "sections" in tool_response["parsed"]
+    assert tool_response["raw"].usage_metadata["total_tokens"] > 0
+    assert "sections" in json_schema_response
@@ -0,0 +1,95 @@
+"""Tests for the inbox daemon."""
+
+import os
+import threading
+from email.message import EmailMessage
+
+from src.tender_notice_labeling.inbox_watcher import InboxWatcher, eml_attachments
+from src.tender_notice_labeling.notice_frame import TenderNotice, to_notice_frame
+from src.tender_notice_labeling.notice_store import NoticeFilters, NoticeStore
+from tests.test_notice_store import CONTEXT, make_notices
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.batches = []
+
+    async def process_pdfs(self, pdf_files, template, company_description, **kwargs):
+        self.batches.append([source_file for source_file, _ in pdf_files])
+        failed = {source_file: "unreadable" for source_file, _ in pdf_files if source_file == "quebrado.pdf"}
+        rows = [
+            {**notice, "source_file": source_file}
+            for source_file, _ in pdf_files
+            if source_file not in failed
+            for notice in make_notices()
+        ]
+        df = to_notice_frame(map(TenderNotice.from_dict, rows))
+        df.attrs["failed_files"] = failed
+        return df
+
+
+def write_eml(path, attachments):
+    message = EmailMessage()
+    message["Subject"] = "Boletim diário"
+    message.set_content("Segue o boletim.")
+    for filename, content in attachments:
+        message.add_attachment(content, maintype="application", subtype="pdf", filename=filename)
+    path.write_bytes(message.as_bytes())
+
+
+def test_inbox_bulletins_are_labeled_once_and_archived(tmp_path):
+    """Test PDFs and email attachments, deduplication by content, failures and archiving."""
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "boletim_a.pdf").write_bytes(b"%PDF a")
+    (inbox / "quebrado.pdf").write_bytes(b"%PDF broken")
+    (inbox / "notas.txt").write_text("ignored")
+    # The email repeats boletim_a.pdf under another name and brings a new bulletin
+    write_eml(inbox / "boletim.eml", [("copia.pdf", b"%PDF a"), ("boletim_b.pdf", b"%PDF b")])
+    store = NoticeStore(str(tmp_path / "tender_notices.sqlite3"))
+    processor = FakeProcessor()
+    watcher = InboxWatcher(str(inbox), store, processor, settle_seconds=0)
+
+    assert watcher.process_ready() == {"processed": 2, "duplicate": 1, "failed": 1}
+    assert sorted(processor.batches[0]) == ["boletim_a.pdf", "boletim_b.pdf", "quebrado.pdf"]
+    assert {bulletin["source_file"] for bulletin in store.list_bulletins(CONTEXT)} == {"boletim_a.pdf", "boletim_b.pdf"}
+    assert len(store.query_notices(CONTEXT, NoticeFilters())) == 8
+    assert sorted(os.listdir(inbox / "processados")) == ["boletim.eml", "boletim_a.pdf"]
+    assert os.listdir(inbox / "falhas") == ["quebrado.pdf"]
+    assert sorted(entry.name for entry in inbox.iterdir() if entry.is_file()) == ["notas.txt"]
+
+    # A bulletin received again is recognized by its content
+    (inbox / "boletim_a_reenviado.pdf").write_bytes(b"%PDF a")
+    assert watcher.process_ready() == {"processed": 0, "duplicate": 1, "failed": 0}
+    assert len(processor.batches) == 1
+
+
+def test_files_are_read_once_settled_and_remembered_without_archiving(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "boletim_a.pdf").write_bytes(b"%PDF a")
+    processor = FakeProcessor()
+    store = NoticeStore(str(tmp_path / "tender_notices.sqlite3"))
+
+    assert InboxWatcher(str(inbox), store, processor, settle_seconds=60).ready_files() == []
+
+    watcher = InboxWatcher(str(inbox), store, processor, settle_seconds=0, archive=False)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop_event, 0.05))
+    thread.start()
+    try:
+        for _ in range(100):
+            if processor.batches:
+                break
+            stop_event.wait(0.05)
+    finally:
+        stop_event.set()
+        thread.join(5)
+    assert processor.batches == [["boletim_a.pdf"]]
+    assert os.listdir(inbox) == ["boletim_a.pdf"]
+    assert watcher.ready_files() == []
+
+
+def test_eml_attachments(tmp_path):
+    write_eml(tmp_path / "boletim.eml", [("Boletim 01.PDF", b"%PDF 1")])
+    assert eml_attachments(str(tmp_path / "boletim.eml")) == [("Boletim 01.PDF", b"%PDF 1")]
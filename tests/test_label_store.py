@@ -0,0 +1,85 @@
+"""Tests for the persistent notice label store."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.tender_notice_labeling.label_store import SOURCE_USER, LabelStore, labeling_context_hash, notice_key
+from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+
+
+def make_notices():
+    return [
+        {"id_universo": 10223301, "objeto": "AMPLIACAO DA ETE", "orgao": "SANEPAR"},
+        {"id_universo": 10223302, "objeto": "FORNECIMENTO DE CENTRIFUGA", "orgao": "CASAN"},
+        {"id_universo": 10223303, "objeto": "PAVIMENTACAO ASFALTICA", "orgao": "SABESP"},
+    ]
+
+
+@pytest.fixture
+def label_store(tmp_path):
+    return LabelStore(str(tmp_path / "notice_labels.sqlite3"))
+
+
+def test_labels_are_keyed_by_objeto_and_context(label_store):
+    """Test that a stored label is reused only for the same objeto and labeling context."""
+    context_hash = labeling_context_hash("template", "empresa")
+    notices = make_notices()
+    notices[0]["label"] = "yes"
+    label_store.put_labels(notices, context_hash)
+
+    republished = {"id_universo": 10223301, "objeto": "AMPLIACAO  DA ETE\n", "orgao": "SANEPAR"}
+    modified = {"id_universo": 10223301, "objeto": "AMPLIACAO DA ETA", "orgao": "SANEPAR"}
+    labels = label_store.get_labels([republished, modified], context_hash)
+
+    assert labels == {notice_key(republished): "yes"}
+    assert label_store.get_labels([republished], labeling_context_hash("template", "outra empresa")) == {}
+    assert notice_key({"objeto": "sem id"}) is None
+    assert notice_key({"id_universo": 10223301.0, "objeto": "AMPLIACAO DA ETE"}) == notice_key(notices[0])
+
+
+def test_user_corrections_are_not_overwritten_by_llm_labels(label_store):
+    """Test that user corrections survive later LLM labels and are returned as training examples."""
+    context_hash = labeling_context_hash("template", "empresa")
+    notices = make_notices()
+    for notice in notices:
+        notice["label"] = "no"
+    label_store.put_labels(notices, context_hash)
+    label_store.put_labels([{**notices[1], "label": "yes"}], context_hash, source=SOURCE_USER)
+    label_store.put_labels(notices, context_hash)
+
+    assert label_store.get_labels(notices, context_hash)[notice_key(notices[1])] == "yes"
+    examples = sorted(label_store.training_examples(context_hash), key=lambda example: example["id_universo"])
+    assert [(example["id_universo"], example["label"], example["source"]) for example in examples] == [
+        ("10223301", "no", "llm"),
+        ("10223302", "yes", "user"),
+        ("10223303", "no", "llm"),
+    ]
+    assert examples[0]["orgao"] == "SANEPAR"
+
+
+def test_label_tenders_only_labels_new_or_modified_notices(monkeypatch, label_store):
+    """Test that recurring notices reuse their labels and the cache hits are reported."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.RULES_ENABLED", False)
+    processor = TenderNoticeProcessor(label_store=label_store)
+    labeled = []
+
+    async def label_batch(tenders, template, company_description):
+        for tender in tenders:
+            labeled.append(tender["id_universo"])
+            tender["label"] = "no"
+
+    with patch.object(processor, "_label_tender_batch", side_effect=label_batch):
+        asyncio.run(processor._label_tenders(make_notices(), "template", "empresa"))
+        notices = make_notices()
+        notices[2]["objeto"] = "PAVIMENTACAO ASFALTICA E DRENAGEM"
+        messages = []
+        asyncio.run(processor._label_tenders(notices, "template", "empresa", progress_callback=messages.append))
+
+    assert labeled == [10223301, 10223302, 10223303, 10223303]
+    assert [notice["label"] for notice in notices] == ["no", "no", "no"]
+    assert messages[0] == "Reused 2 of 3 labels from previous bulletins, labeling 1 new or modified notices"
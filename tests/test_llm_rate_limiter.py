@@ -0,0 +1,115 @@
+"""Tests for the shared LLM rate limiter."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.llm_rate_limiter import LLMRateLimiter, count_tokens, usage_tokens
+
+
+def test_requests_per_minute_quota():
+    """Test that the next request waits for the oldest one to leave the window."""
+    limiter = LLMRateLimiter(requests_per_minute=2, tokens_per_minute=0, backend="memory")
+
+    with patch("src.llm_rate_limiter.time.time", return_value=100.0):
+        limiter.acquire(10)
+    with patch("src.llm_rate_limiter.time.time", return_value=110.0):
+        limiter.acquire(10)
+        reservation, wait = limiter._try_acquire(10)
+
+    assert reservation is None
+    assert wait == 50.0
+
+
+def test_reconcile_releases_overestimated_tokens():
+    """Test that reconciling with the actual usage frees the unused part of the TPM budget."""
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=1000, backend="memory")
+
+    with patch("src.llm_rate_limiter.time.time", return_value=100.0):
+        reservation = limiter.acquire(900)
+        assert limiter._try_acquire(200)[0] is None
+
+        reservation.reconcile_response(
+            AIMessage(content="yes", usage_metadata={"input_tokens": 280, "output_tokens": 20, "total_tokens": 300})
+        )
+        assert limiter._try_acquire(200)[0] is not None
+
+
+def test_failed_requests_release_their_tokens():
+    """Test that a request that raises keeps its RPM slot but frees its estimated tokens."""
+    limiter = LLMRateLimiter(requests_per_minute=2, tokens_per_minute=1000, backend="memory")
+
+    with patch("src.llm_rate_limiter.time.time", return_value=100.0), patch(
+        "src.llm_rate_limiter.count_tokens", return_value=100
+    ):
+        with pytest.raises(TimeoutError):
+            with limiter.limit("prompt", completion_tokens=900):
+                raise TimeoutError("timeout")
+
+        async def fail_async():
+            async with limiter.limit_async("prompt", completion_tokens=900):
+                raise TimeoutError("timeout")
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(fail_async())
+        reservation, wait = limiter._try_acquire(900)
+
+    assert reservation is None
+    assert wait == 60.0
+    assert [tokens for _, tokens in limiter._window._entries.values()] == [0, 0]
+
+
+def test_rate_limited_llm_releases_tokens_of_failed_calls():
+    from src.tender_analysis_crew.streaming_llm import RateLimitedLLM
+
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=1000, backend="memory")
+    llm = RateLimitedLLM(model="azure/gpt-4o", max_tokens=900)
+
+    with patch("src.tender_analysis_crew.streaming_llm.get_rate_limiter", return_value=limiter), patch.object(
+        RateLimitedLLM, "_complete", side_effect=TimeoutError("timeout")
+    ):
+        with pytest.raises(TimeoutError):
+            llm.call([{"role": "user", "content": "Resuma"}])
+
+    assert limiter._try_acquire(900)[0] is not None
+
+
+def test_sqlite_backend_is_shared_between_limiters(tmp_path):
+    """Test that limiters in different processes share the same window through SQLite."""
+    db_path = str(tmp_path / "llm_rate_limit.sqlite3")
+    first = LLMRateLimiter(requests_per_minute=1, tokens_per_minute=0, backend="sqlite", db_path=db_path)
+    second = LLMRateLimiter(requests_per_minute=1, tokens_per_minute=0, backend="sqlite", db_path=db_path)
+
+    first.acquire(10)
+    reservation, wait = second._try_acquire(10)
+
+    assert reservation is None
+    assert 0 < wait <= 60
+
+
+def test_acquire_async_waits_without_blocking():
+    """Test that async callers sleep on the event loop until the window has room."""
+    limiter = LLMRateLimiter(requests_per_minute=1, tokens_per_minute=0, backend="memory")
+
+    with patch("src.llm_rate_limiter.time.time", return_value=100.0):
+        limiter.acquire(10)
+
+    async def advance_clock(seconds):
+        mock_time.return_value += seconds
+
+    with patch("src.llm_rate_limiter.time.time", return_value=130.0) as mock_time, patch(
+        "src.llm_rate_limiter.asyncio.sleep", AsyncMock(side_effect=advance_clock)
+    ) as mock_sleep:
+        reservation = asyncio.run(limiter.acquire_async(10))
+
+    assert reservation.reservation_id is not None
+    mock_sleep.assert_awaited_once_with(30.0)
+
+
+def test_count_tokens_and_usage():
+    """Test prompt token estimates and usage extraction from responses."""
+    assert count_tokens([HumanMessage(content="Prazo de execução")]) == count_tokens("Prazo de execução") + 4
+    assert usage_tokens(AIMessage(content="", response_metadata={"token_usage": {"total_tokens": 42}})) == 42
+    assert usage_tokens(AIMessage(content="")) is None
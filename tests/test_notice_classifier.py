@@ -0,0 +1,98 @@
+"""Tests for the local relevance classifier of bulletin notices."""
+
+import asyncio
+from unittest.mock import patch
+
+from src.tender_notice_labeling.label_store import labeling_context_hash
+from src.tender_notice_labeling.notice_classifier import (
+    NoticeRelevanceClassifier,
+    evaluate_classifier,
+    get_notice_classifier,
+    split_examples,
+)
+from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+
+OUT_OF_SCOPE = [
+    "AQUISICAO DE GENEROS ALIMENTICIOS PARA MERENDA ESCOLAR",
+    "FORNECIMENTO DE COMBUSTIVEL PARA A FROTA MUNICIPAL",
+    "AQUISICAO DE MATERIAL DE EXPEDIENTE",
+    "PAVIMENTACAO ASFALTICA DE VIAS URBANAS",
+]
+IN_SCOPE = [
+    "AMPLIACAO DA ESTACAO DE TRATAMENTO DE ESGOTO",
+    "FORNECIMENTO DE CENTRIFUGA PARA DESAGUAMENTO DE LODO",
+    "IMPLANTACAO DE REATOR MBBR NA ESTACAO DE TRATAMENTO",
+]
+
+
+def make_examples(repeat=10):
+    examples = []
+    for index in range(repeat):
+        for objeto in OUT_OF_SCOPE:
+            examples.append({"objeto": objeto, "orgao": f"PREFEITURA {index}", "estado": "SP", "label": "no"})
+        for objeto in IN_SCOPE:
+            examples.append({"objeto": objeto, "orgao": "COMPANHIA DE SANEAMENTO", "estado": "SC", "label": "yes"})
+    return [{**example, "id_universo": index, "source": "llm"} for index, example in enumerate(examples)]
+
+
+def test_classifier_separates_notices_and_reports_held_out_metrics(tmp_path):
+    """Test training, evaluation on held-out LLM labels and a save/load round trip."""
+    training, held_out = split_examples(make_examples(), holdout=0.25)
+    assert len(held_out) == 17 and len(training) == 53
+    classifier = NoticeRelevanceClassifier(context_hash="context").fit(training)
+
+    no, yes = classifier.predict_no_probability(
+        [
+            {"objeto": "MERENDA ESCOLAR PARA A REDE MUNICIPAL", "orgao": "PREFEITURA 99", "estado": "SP"},
+            {"objeto": "TRATAMENTO DE ESGOTO COM REATOR MBBR", "orgao": "COMPANHIA DE SANEAMENTO", "estado": "SC"},
+        ]
+    )
+    assert no > 0.9 and yes < 0.1
+
+    results = evaluate_classifier(classifier, held_out, thresholds=[0.5, 0.999999])
+    assert results[0]["precision"] == 1.0 and results[0]["recall"] == 1.0 and results[0]["missed_yes"] == 0
+    assert results[1]["auto_labeled"] < results[0]["auto_labeled"]
+
+    path = str(tmp_path / "notice_classifier.json")
+    classifier.save(path)
+    loaded = get_notice_classifier(path)
+    assert loaded.context_hash == "context"
+    assert loaded.predict_no_probability([{"objeto": OUT_OF_SCOPE[0]}]) == classifier.predict_no_probability(
+        [{"objeto": OUT_OF_SCOPE[0]}]
+    )
+    assert get_notice_classifier(str(tmp_path / "missing.json")) is None
+
+
+def test_label_tenders_sends_only_uncertain_notices_to_the_llm(monkeypatch):
+    """Test that confidently declined notices skip the LLM and are marked as classifier labels."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.LABEL_STORE_ENABLED", False)
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.RULES_ENABLED", False)
+    classifier = NoticeRelevanceClassifier(context_hash=labeling_context_hash("template", "empresa"))
+    classifier.fit(make_examples())
+    processor = TenderNoticeProcessor(classifier=classifier, classifier_threshold=0.9)
+    notices = [
+        {"id_universo": 1, "objeto": "MERENDA ESCOLAR", "orgao": "PREFEITURA 1", "estado": "SP"},
+        {"id_universo": 2, "objeto": "CENTRIFUGA DE LODO", "orgao": "COMPANHIA DE SANEAMENTO", "estado": "SC"},
+        {"id_universo": 3, "objeto": "LOCACAO DE IMOVEL", "orgao": "CAMARA", "estado": "PR"},
+    ]
+    labeled = []
+
+    async def label_batch(tenders, template, company_description):
+        for tender in tenders:
+            labeled.append(tender["id_universo"])
+            tender["label"] = "unsure"
+
+    messages = []
+    with patch.object(processor, "_label_tender_batch", side_effect=label_batch):
+        asyncio.run(processor._label_tenders(notices, "template", "empresa", progress_callback=messages.append))
+
+    assert labeled == [2, 3]
+    assert [(notice["label"], notice["label_source"]) for notice in notices] == [
+        ("no", "classifier"),
+        ("unsure", "llm"),
+        ("unsure", "llm"),
+    ]
+    assert messages[0] == "Declined 1 of 3 notices with the local classifier, labeling 2 uncertain notices"
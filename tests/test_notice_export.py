@@ -0,0 +1,57 @@
+"""Tests for the cached notice exports."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src.tender_notice_labeling.label_store import DISPLAY_LABELS
+from src.tender_notice_labeling.notice_export import EXPORT_COLUMNS, NoticeExporter
+from src.tender_notice_labeling.notice_store import NoticeFilters, NoticeStore
+from tests.test_notice_store import CONTEXT, make_notices
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    store = NoticeStore(str(tmp_path / "tender_notices.sqlite3"))
+    store.add_bulletin("hash-a", CONTEXT, "boletim_a.pdf", make_notices())
+    return NoticeExporter(store, cache_dir=str(tmp_path / "exports"), cache_items=3, chunk_size=2)
+
+
+def test_exports_are_chunked_and_cached_by_dataset_version(exporter):
+    """Test CSV and Excel exports across chunks, their reuse and their invalidation by new labels."""
+    filters = NoticeFilters(estados=["SP", "SC"])
+    csv_path = exporter.export(CONTEXT, filters, "csv")
+    csv_df = pd.read_csv(csv_path, sep=";", encoding="utf-8-sig")
+    assert list(csv_df.columns) == list(EXPORT_COLUMNS)
+    assert list(csv_df["id_universo"]) == [1, 4, 2]
+    assert list(csv_df["label"]) == [DISPLAY_LABELS["yes"], DISPLAY_LABELS["yes"], DISPLAY_LABELS["no"]]
+    with open(csv_path, "rb") as csv_file:
+        assert csv_file.read(3) == b"\xef\xbb\xbf"
+
+    xlsx_df = pd.read_excel(exporter.export(CONTEXT, filters, "xlsx"))
+    assert list(xlsx_df["orgao"]) == ["CASAN", "SABESP", "PREFEITURA"]
+    assert xlsx_df["data_hora_licitacao"].isna().tolist() == [False, True, False]
+
+    assert exporter.export(CONTEXT, filters, "csv") == csv_path
+    assert exporter.export(CONTEXT, NoticeFilters(search="lodo"), "csv") != csv_path
+
+    notice_id = exporter.store.query_notices(CONTEXT, NoticeFilters(estados=["SP"]), limit=1).index[0]
+    exporter.store.set_labels({notice_id: "no"})
+    relabeled_path = exporter.export(CONTEXT, filters, "csv")
+    assert relabeled_path != csv_path
+    assert list(pd.read_csv(relabeled_path, sep=";", encoding="utf-8-sig")["label"]).count(DISPLAY_LABELS["no"]) == 2
+    # Only the 3 most recently used exports are kept
+    assert len(os.listdir(exporter.cache_dir)) == 3
+
+    empty_df = pd.read_csv(exporter.export(CONTEXT, NoticeFilters(estados=[]), "csv"), sep=";", encoding="utf-8-sig")
+    assert empty_df.empty and list(empty_df.columns) == list(EXPORT_COLUMNS)
+
+
+def test_parquet_export(exporter):
+    """Test that Parquet exports keep datetimes and read ids as text."""
+    pytest.importorskip("pyarrow.parquet", exc_type=ImportError)
+    parquet_df = pd.read_parquet(exporter.export(CONTEXT, None, "parquet"))
+    assert len(parquet_df) == 4
+    assert list(parquet_df["id_universo"]) == ["1", "4", "3", "2"]
+    assert pd.api.types.is_datetime64_any_dtype(parquet_df["data_hora_licitacao"])
@@ -0,0 +1,33 @@
+"""Tests for the typed notice records and frames."""
+
+import pandas as pd
+
+from src.tender_notice_labeling.notice_frame import TenderNotice, parse_opening_dates, to_notice_frame
+
+
+def test_notice_frame_is_typed_and_sorted_by_priority_and_date():
+    """Test column types and that dates sort chronologically, not as DD/MM/YYYY text."""
+    notices = [
+        {"id_universo": "10223301", "estado": "SP", "data_hora_licitacao": "10/01/2025 09:00", "label": "no", "extra": 1},
+        {"id_universo": 10223302.0, "estado": "SP", "data_hora_licitacao": "05/02/2025", "label": "no"},
+        {"id_universo": None, "estado": "PR", "data_hora_licitacao": "a definir", "label": "yes"},
+        {"id_universo": 3, "estado": "PR", "data_hora_licitacao": "20/12/2024 10h30", "label": "yes"},
+        {"id_universo": "sem id", "estado": "SC", "data_hora_licitacao": None},
+    ]
+    df = to_notice_frame(TenderNotice.from_dict(notice) for notice in notices)
+
+    assert df["id_universo"].dtype == "Int64"
+    assert df["data_hora_licitacao"].dtype == "datetime64[ns]"
+    assert isinstance(df["estado"].dtype, pd.CategoricalDtype)
+    assert df["label"].cat.ordered
+    assert "extra" not in df.columns
+    assert df["id_universo"].tolist() == [3, pd.NA, pd.NA, 10223301, 10223302]
+    assert df["label"].tolist() == ["✅ Participar", "✅ Participar", "🤔 Avaliar", "❌ Declinar", "❌ Declinar"]
+    assert df.loc[0, "data_hora_licitacao"] == pd.Timestamp("2024-12-20 10:30")
+    assert to_notice_frame([]).empty
+
+
+def test_parse_opening_dates_falls_back_to_iso():
+    parsed = parse_opening_dates(["01/02/2025 14:30:15", "2025-03-01T10:00:00", "", None])
+    assert parsed.tolist()[:2] == [pd.Timestamp("2025-02-01 14:30:15"), pd.Timestamp("2025-03-01 10:00")]
+    assert parsed.isna().tolist()[2:] == [True, True]
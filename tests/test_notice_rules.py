@@ -0,0 +1,90 @@
+"""Tests for the triage rule engine of bulletin notices."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.tender_notice_labeling.notice_rules import (
+    AhoCorasickAutomaton,
+    NoticeRuleEngine,
+    extract_value,
+    get_rule_engine,
+)
+from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor
+
+
+def test_automaton_finds_overlapping_keywords():
+    """Test that all keywords are found, including ones sharing prefixes and suffixes."""
+    automaton = AhoCorasickAutomaton()
+    for keyword in ["he", "she", "his", "hers"]:
+        automaton.add(keyword, keyword)
+    automaton.build()
+    assert automaton.find("ushers") == {"she", "he", "hers"}
+    assert automaton.find("this") == {"his"}
+    assert automaton.find("xyz") == set()
+
+
+def test_default_rules_match_whole_words_and_first_rule_wins():
+    """Test the bid team's default rules on accents, word boundaries, prefixes and priority."""
+    engine = get_rule_engine()
+    assert engine.match({"objeto": "Ampliação da ETE Norte"}).label == "yes"
+    assert engine.match({"objeto": "FORNECIMENTO DE CENTRÍFUGAS"}).label == "yes"
+    assert engine.match({"objeto": "Aquisição de gêneros para MERENDA escolar"}).label == "no"
+    assert engine.match({"objeto": "Aquisição de Combustíveis"}).label == "no"
+    # "ete" inside a word is not the ETE term
+    assert engine.match({"objeto": "Contratação de serviço competente de limpeza"}) is None
+    # Yes rules come first, so a treatment plant with paving is still a yes
+    assert engine.match({"objeto": "ETA e pavimentação do acesso"}).name == "tratamento_de_agua_e_esgoto"
+
+
+def test_estado_value_and_pattern_conditions():
+    """Test that all conditions of a rule must hold."""
+    engine = NoticeRuleEngine(
+        [
+            {"name": "obras_grandes_sc", "label": "yes", "patterns": [r"\bobras?\b"], "estados": ["sc"], "min_value": 1e6},
+            {"name": "orgao_bloqueado", "label": "no", "terms": ["prefeitura de exemplo"], "fields": ["orgao"]},
+        ]
+    )
+    big = {"objeto": "Obra de saneamento, valor estimado R$ 2.500.000,00", "estado": "SC"}
+    assert engine.match(big).name == "obras_grandes_sc"
+    assert engine.match({**big, "estado": "PR"}) is None
+    assert engine.match({**big, "objeto": "Obra de saneamento, R$ 900.000,00"}) is None
+    assert engine.match({"objeto": "Obra", "orgao": "PREFEITURA DE EXEMPLO"}).name == "orgao_bloqueado"
+    assert extract_value("R$ 1.234,5 e R$ 99") == 1234.5
+
+    with pytest.raises(ValueError):
+        NoticeRuleEngine([{"name": "sem_condicoes", "label": "no"}])
+    with pytest.raises(ValueError):
+        NoticeRuleEngine([{"name": "rotulo", "label": "talvez", "terms": ["x"]}])
+
+
+def test_label_tenders_sends_only_unmatched_notices_to_the_llm(monkeypatch, tmp_path):
+    """Test that rule-labeled notices skip the LLM and record the rule that fired."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.LABEL_STORE_ENABLED", False)
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.CLASSIFIER_ENABLED", False)
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps([{"name": "merenda", "label": "no", "terms": ["merenda"]}]))
+    monkeypatch.setenv("TENDER_NOTICE_RULES_PATH", str(rules_path))
+    processor = TenderNoticeProcessor()
+    notices = [
+        {"id_universo": 1, "objeto": "MERENDA ESCOLAR"},
+        {"id_universo": 2, "objeto": "ETE NORTE"},
+    ]
+    labeled = []
+
+    async def label_batch(tenders, template, company_description):
+        for tender in tenders:
+            labeled.append(tender["id_universo"])
+            tender["label"] = "yes"
+
+    with patch.object(processor, "_label_tender_batch", side_effect=label_batch):
+        asyncio.run(processor._label_tenders(notices, "template", "empresa"))
+
+    assert labeled == [2]
+    assert (notices[0]["label"], notices[0]["label_source"], notices[0]["label_rule"]) == ("no", "rule", "merenda")
+    assert notices[1]["label_source"] == "llm"
@@ -0,0 +1,194 @@
+"""Tests for the persistent store of processed bulletin notices."""
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.background_jobs.job_handlers import run_tender_notice_pdfs
+from src.tender_notice_labeling.label_store import labeling_context_hash
+from src.tender_notice_labeling.notice_store import NoticeFilters, NoticeStore, file_hash, normalize_datetime
+from src.tender_notice_labeling.tender_notice_templates import (
+    COMPANY_BUSINESS_DESCRIPTION,
+    TENDER_NOTICE_LABELING_TEMPLATE,
+)
+
+CONTEXT = labeling_context_hash(TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+
+
+def make_notices():
+    return [
+        {"id_universo": 1, "orgao": "CASAN", "estado": "SC", "objeto": "Ampliação da Estação de Tratamento",
+         "data_hora_licitacao": "10/02/2025 09:00", "label": "yes", "label_source": "rule", "label_rule": "ete"},
+        {"id_universo": 2, "orgao": "PREFEITURA", "estado": "SP", "objeto": "Merenda escolar",
+         "data_hora_licitacao": "05/02/2025 10:00", "label": "no", "label_source": "llm"},
+        {"id_universo": 3, "orgao": "SANEPAR", "estado": "PR", "objeto": "Tratamento de lodo",
+         "data_hora_licitacao": "01/02/2025 14:30", "label": "unsure", "label_source": "llm"},
+        {"id_universo": 4, "orgao": "SABESP", "estado": "SP", "objeto": "Centrífuga de tratamento",
+         "data_hora_licitacao": "a definir", "label": "yes", "label_source": "llm"},
+    ]
+
+
+@pytest.fixture
+def notice_store(tmp_path):
+    return NoticeStore(str(tmp_path / "tender_notices.sqlite3"))
+
+
+def test_query_filters_sorts_and_paginates(notice_store):
+    """Test server-side filters, full-text search, label priority order and pagination."""
+    notice_store.add_bulletin("hash-a", CONTEXT, "boletim_a.pdf", make_notices())
+    notice_store.add_bulletin("hash-b", CONTEXT, "boletim_b.pdf", make_notices()[:1])
+
+    df = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=["hash-a"]))
+    assert df["id_universo"].tolist() == ["1", "4", "3", "2"]
+    assert df["data_hora_licitacao"].isna().tolist() == [False, True, False, False]
+
+    page = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=["hash-a"]), limit=2, offset=2)
+    assert page["id_universo"].tolist() == ["3", "2"]
+
+    # Accent-insensitive prefix search on objeto
+    search = NoticeFilters(file_hashes=["hash-a"], search="estacao trat")
+    assert notice_store.query_notices(CONTEXT, search)["id_universo"].tolist() == ["1"]
+    assert notice_store.label_counts(CONTEXT, NoticeFilters(search="tratamento")) == {"yes": 3, "unsure": 1}
+
+    filters = NoticeFilters(estados=["SP"], labels=["no", "yes"], date_from=date(2025, 2, 5), date_to=date(2025, 2, 5))
+    assert notice_store.query_notices(CONTEXT, filters)["id_universo"].tolist() == ["2"]
+    assert notice_store.estados(CONTEXT, ["hash-a"]) == ["PR", "SC", "SP"]
+    assert notice_store.query_notices("other context").empty
+
+    # Reprocessing a bulletin replaces its notices, corrections overwrite labels
+    notice_store.add_bulletin("hash-a", CONTEXT, "boletim_a.pdf", make_notices()[1:2])
+    assert notice_store.label_counts(CONTEXT, NoticeFilters(file_hashes=["hash-a"])) == {"no": 1}
+    notice_id = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=["hash-a"])).index[0]
+    notice_store.set_labels({notice_id: "yes"})
+    assert notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=["hash-a"]))["label_source"].tolist() == ["user"]
+    assert normalize_datetime("2025-02-10T09:00:00") == "2025-02-10T09:00:00"
+
+
+def test_stored_bulletins_are_reopened_without_processing(notice_store, tmp_path):
+    """Test that the bulletin job only processes bulletins missing from the store."""
+    stored_path, new_path = tmp_path / "stored.pdf", tmp_path / "new.pdf"
+    stored_path.write_bytes(b"stored bulletin")
+    new_path.write_bytes(b"new bulletin")
+    notice_store.add_bulletin(file_hash(str(stored_path)), CONTEXT, "stored.pdf", make_notices())
+
+    processed = []
+
+    async def process_pdfs(self, pdf_files, **kwargs):
+        import pandas as pd
+
+        processed.extend(source_file for source_file, _ in pdf_files)
+        df = pd.DataFrame([{**make_notices()[1], "label": "❌ Declinar", "source_file": "new.pdf"}])
+        df.attrs["failed_files"] = {}
+        return df
+
+    payload = {
+        "files": [
+            {"source_file": "stored.pdf", "pdf_path": str(stored_path)},
+            {"source_file": "new.pdf", "pdf_path": str(new_path)},
+        ]
+    }
+    with patch("src.tender_notice_labeling.notice_store.get_notice_store", return_value=notice_store), patch(
+        "src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.__init__", return_value=None
+    ), patch("src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.process_pdfs", process_pdfs):
+        result = run_tender_notice_pdfs(payload, lambda *args: None)
+
+    assert processed == ["new.pdf"]
+    assert sorted((bulletin["source_file"], bulletin["notice_count"]) for bulletin in result) == [
+        ("new.pdf", 1),
+        ("stored.pdf", 4),
+    ]
+    new_notices = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=[file_hash_of(result, "new.pdf")]))
+    assert new_notices["label"].tolist() == ["no"]
+    assert not stored_path.exists() and not new_path.exists()
+
+
+def test_bulletins_with_the_same_name_or_no_notices_are_stored(notice_store, tmp_path):
+    """Test that same-named uploads are stored apart and bulletins without notices aren't processed again."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    contents = {
+        tmp_path / "a" / "boletim.pdf": b"first bulletin",
+        tmp_path / "b" / "boletim.pdf": b"second bulletin",
+        tmp_path / "vazio.pdf": b"bulletin without notices",
+    }
+    processed = []
+
+    async def process_pdfs(self, pdf_files, **kwargs):
+        import pandas as pd
+
+        processed.extend(source_file for source_file, _ in pdf_files)
+        df = pd.DataFrame(
+            [
+                {**notice, "label": "❌ Declinar", "source_file": source_file}
+                for source_file, notice in (("boletim.pdf", make_notices()[1]), ("boletim (2).pdf", make_notices()[2]))
+            ]
+        )
+        df.attrs["failed_files"] = {}
+        return df
+
+    def upload():
+        # The job deletes the uploaded files once it is done
+        for path, content in contents.items():
+            path.write_bytes(content)
+        return {"files": [{"source_file": path.name, "pdf_path": str(path)} for path in contents]}
+
+    with patch("src.tender_notice_labeling.notice_store.get_notice_store", return_value=notice_store), patch(
+        "src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.__init__", return_value=None
+    ), patch("src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.process_pdfs", process_pdfs):
+        result = run_tender_notice_pdfs(upload(), lambda *args: None)
+        run_tender_notice_pdfs(upload(), lambda *args: None)
+
+    assert processed == ["boletim.pdf", "boletim (2).pdf", "vazio.pdf"]
+    assert sorted((bulletin["source_file"], bulletin["notice_count"]) for bulletin in result) == [
+        ("boletim (2).pdf", 1),
+        ("boletim.pdf", 1),
+        ("vazio.pdf", 0),
+    ]
+    second_notices = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=[file_hash_of(result, "boletim (2).pdf")]))
+    assert second_notices["id_universo"].tolist() == ["3"]
+
+
+def test_uploads_are_deleted_when_the_bulletin_job_fails(notice_store, tmp_path):
+    upload_path = tmp_path / "boletim.pdf"
+    upload_path.write_bytes(b"bulletin")
+
+    async def process_pdfs(self, pdf_files, **kwargs):
+        raise RuntimeError("No bulletin could be processed")
+
+    with patch("src.tender_notice_labeling.notice_store.get_notice_store", return_value=notice_store), patch(
+        "src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.__init__", return_value=None
+    ), patch("src.tender_notice_labeling.tender_notice_processor.TenderNoticeProcessor.process_pdfs", process_pdfs):
+        with pytest.raises(RuntimeError):
+            run_tender_notice_pdfs({"files": [{"source_file": "boletim.pdf", "pdf_path": str(upload_path)}]}, lambda *args: None)
+
+    assert not upload_path.exists()
+    assert notice_store.list_bulletins(CONTEXT) == []
+
+
+def file_hash_of(bulletins, source_file):
+    return next(bulletin["file_hash"] for bulletin in bulletins if bulletin["source_file"] == source_file)
+
+
+def test_rollups_follow_added_replaced_and_corrected_notices(notice_store):
+    """Test that the dashboard rollups are kept in sync with the stored notices."""
+    january, february = datetime(2025, 1, 15, 12).timestamp(), datetime(2025, 2, 3, 12).timestamp()
+    notice_store.add_bulletin("hash-a", CONTEXT, "boletim_a.pdf", make_notices(), processed_at=january)
+    notice_store.add_bulletin("hash-b", CONTEXT, "boletim_b.pdf", make_notices()[:2], processed_at=february)
+    # Replacing a bulletin removes the counts of its previous run
+    notice_store.add_bulletin("hash-b", CONTEXT, "boletim_b.pdf", make_notices()[:1], processed_at=february)
+    notice_id = notice_store.query_notices(CONTEXT, NoticeFilters(file_hashes=["hash-a"], estados=["PR"])).index[0]
+    notice_store.set_labels({notice_id: "yes"})
+
+    daily = notice_store.daily_rollups(CONTEXT, date_from=date(2025, 1, 1))
+    assert daily.groupby("label")["notices"].sum().to_dict() == {"no": 1, "yes": 4}
+    assert daily[daily["day"] == "2025-02-03"][["estado", "label", "notices"]].values.tolist() == [["SC", "yes", 1]]
+    assert notice_store.daily_rollups(CONTEXT, date_to=date(2025, 1, 31))["notices"].sum() == 4
+
+    orgaos = notice_store.orgao_rollups(CONTEXT, date(2025, 2, 1), date(2025, 2, 28))
+    assert orgaos.values.tolist() == [["CASAN", "yes", 1]]
+
+    # Stores created before the rollups are backfilled on open
+    with notice_store._connect() as conn:
+        conn.execute("DROP TABLE notice_rollups_daily")
+    assert NoticeStore(notice_store.db_path).daily_rollups(CONTEXT)["notices"].sum() == 5
@@ -0,0 +1,29 @@
+"""Tests for the PDF text extraction backends."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from pdfminer.high_level import extract_text as pdfminer_extract_text
+from pypdf import PdfReader
+
+from src import pdf_text
+
+TEST_PDF = os.path.join(os.path.dirname(__file__), "test_assets", "test_pdf.pdf")
+
+
+def test_backends_match_their_libraries():
+    """Test that per-page extraction gives the text the pipelines read before."""
+    assert pdf_text.extract_text(TEST_PDF, "pdfminer", max_workers=1) == pdfminer_extract_text(TEST_PDF)
+    assert pdf_text.extract_pages(TEST_PDF, "pypdf", max_workers=1) == [
+        page.extract_text() for page in PdfReader(TEST_PDF).pages
+    ]
+    with pytest.raises(ValueError):
+        pdf_text.extract_pages(TEST_PDF, "ocr")
+
+
+def test_pool_extraction_keeps_page_order():
+    """Test that pages extracted across the process pool come back in order."""
+    expected = pdf_text.extract_pages(TEST_PDF, "pypdf", max_workers=1)
+    with patch.object(pdf_text, "PAGES_PER_TASK", 2):
+        assert pdf_text.extract_pages(TEST_PDF, "pypdf", max_workers=2) == expected
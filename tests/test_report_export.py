@@ -0,0 +1,109 @@
+"""Tests for the report export module."""
+
+import threading
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from docx import Document
+
+from src.tender_analysis_crew import report_export
+from src.tender_analysis_crew.report_export import ReportExporter, markdown_to_pdf, parse_markdown
+
+REPORT = """# Resumo da Licitação
+
+Obra de **ampliação** da ETE, com *prazo* de `360` dias.
+
+## Documentos
+- Edital
+  - Anexo I
+1. Proposta
+2. Habilitação
+
+| Item | Prazo |
+|------|-------|
+| Obra | 360 dias |
+| Garantia | 5% |
+"""
+
+
+def test_parse_markdown_keeps_structure():
+    """Test that headings, inline styles, nested lists and tables are parsed into blocks."""
+    blocks = parse_markdown(REPORT)
+
+    assert [block.kind for block in blocks] == [
+        "heading", "paragraph", "heading", "list_item", "list_item", "list_item", "list_item", "table"
+    ]
+    assert (blocks[0].level, blocks[2].level) == (1, 2)
+    assert ("ampliação", True, False, False) in blocks[1].spans
+    assert ("360", False, False, True) in blocks[1].spans
+    assert [(block.level, block.marker) for block in blocks[3:7]] == [(0, "•"), (1, "•"), (0, "1."), (0, "2.")]
+    assert [[cell[0][0] for cell in row] for row in blocks[7].rows] == [
+        ["Item", "Prazo"], ["Obra", "360 dias"], ["Garantia", "5%"]
+    ]
+
+
+def test_renders_pdf_and_docx_with_tables(tmp_path):
+    """Test that both formats render, and markdown tables become DOCX tables."""
+    exporter = ReportExporter(cache_dir=str(tmp_path))
+
+    assert markdown_to_pdf(REPORT + "\n⚠️ Cobertura parcial").startswith(b"%PDF")
+    document = Document(BytesIO(exporter.render(REPORT, "docx")))
+    assert document.paragraphs[0].style.name == "Heading 1"
+    assert len(document.tables) == 1
+    assert document.tables[0].cell(1, 1).text == "360 dias"
+    with pytest.raises(ValueError):
+        exporter.submit(REPORT, "odt")
+
+
+def test_exporter_caches_by_report_hash_and_format(tmp_path):
+    """Test that renders are cached in memory and on disk and not repeated."""
+    calls = []
+
+    def render(report):
+        calls.append(report)
+        return b"pdf"
+
+    with patch.dict(report_export.RENDERERS, {"pdf": render}):
+        exporter = ReportExporter(cache_dir=str(tmp_path))
+        assert exporter.submit(REPORT, "pdf").result() == b"pdf"
+        assert exporter.submit(REPORT, "pdf").done()
+        assert exporter.render(REPORT, "pdf") == b"pdf"
+
+        # A new process reads the disk cache
+        assert ReportExporter(cache_dir=str(tmp_path)).render(REPORT, "pdf") == b"pdf"
+        exporter.render(REPORT + "\nNova seção", "pdf")
+
+    assert len(calls) == 2
+    assert len(list(tmp_path.glob("*.pdf"))) == 2
+
+
+class ImmediateExecutor:
+    """Runs submitted calls inline, so their futures are done before submit returns."""
+
+    def submit(self, function, *args):
+        future = report_export.Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def test_failed_render_is_reported_and_retried(tmp_path):
+    """Test that a render failing before its done-callback is registered doesn't deadlock."""
+    def render(report):
+        raise ValueError("invalid markdown")
+
+    with patch.dict(report_export.RENDERERS, {"pdf": render}):
+        exporter = ReportExporter(cache_dir=str(tmp_path))
+        exporter._executor = ImmediateExecutor()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(exporter.submit(REPORT, "pdf")), daemon=True)
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive()
+        with pytest.raises(ValueError):
+            results[0].result()
+        # Failures are not cached; the next request renders again
+        assert exporter.submit(REPORT, "pdf") is not results[0]
@@ -0,0 +1,145 @@
+"""Tests for the summary run metrics."""
+
+import json
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.tender_analysis_crew.agents import AGENT_CONFIGS
+from src.tender_analysis_crew.crew import TenderAnalysisCrew
+from src.tender_analysis_crew.run_metrics import (
+    MetricsRegistry,
+    RunMetrics,
+    current_run_metrics,
+    estimate_cost,
+)
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    """Keep chunk checkpoints out of the working tree."""
+    monkeypatch.setenv("TENDER_ANALYSIS_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
+
+def test_record_llm_response_and_cost():
+    """Test that prompt, completion and cached tokens are read from response metadata and priced."""
+    metrics = RunMetrics()
+    metrics.record_llm_response(
+        "gpt-4o-mini",
+        AIMessage(
+            content="",
+            response_metadata={
+                "token_usage": {
+                    "prompt_tokens": 3000,
+                    "completion_tokens": 500,
+                    "prompt_tokens_details": {"cached_tokens": 1000},
+                }
+            },
+        ),
+    )
+
+    usage = metrics.tokens["gpt-4o-mini"]
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens) == (3000, 500, 1000)
+    assert metrics.cost_usd == pytest.approx((2000 * 0.15 + 1000 * 0.075 + 500 * 0.60) / 1_000_000)
+    assert estimate_cost("azure/gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("modelo-desconhecido", 1_000_000, 1_000_000) == 0.0
+
+
+def test_stage_times_are_added_up_even_when_the_stage_fails():
+    metrics = RunMetrics()
+    with patch("src.tender_analysis_crew.run_metrics.time.time", side_effect=[10.0, 12.5, 20.0, 21.0]):
+        with metrics.stage("crew_time"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.stage("crew_time"):
+                raise RuntimeError("crew failed")
+
+    assert metrics.stages == {"crew_time": 3.5}
+
+
+def test_registry_renders_prometheus_text():
+    """Test that finished runs are aggregated into Prometheus counters."""
+    metrics = RunMetrics(status="succeeded", total_time=12.5)
+    metrics.stages["crew_time"] = 10.0
+    metrics.record_usage("gpt-4o", 100, 20)
+    registry = MetricsRegistry()
+    registry.record(metrics)
+    registry.record(metrics)
+
+    text = registry.to_prometheus({"worker": "w1"})
+
+    assert 'tender_analysis_runs_total{worker="w1",status="succeeded"} 2' in text
+    assert 'tender_analysis_stage_seconds_total{worker="w1",stage="crew_time"} 20.0' in text
+    assert 'tender_analysis_tokens_total{worker="w1",model="gpt-4o",kind="completion"} 40' in text
+
+
+def test_generate_summary_returns_metrics(tmp_path, monkeypatch):
+    """Test that chunk, retry and token metrics are returned and exported for every run."""
+    monkeypatch.setenv("TENDER_ANALYSIS_METRICS_DIR", str(tmp_path / "metrics"))
+    crew = TenderAnalysisCrew()
+    chunk_result = {"sections": [], "overview": {"client_name": "SANEPAR"}}
+    attempts = []
+
+    async def extract(chunk):
+        attempts.append(chunk)
+        if len(attempts) == 1:
+            raise TimeoutError("timeout")
+        current_run_metrics.get().record_usage("gpt-4o-mini", 2000, 300)
+        return chunk_result
+
+    crew_output = SimpleNamespace(raw="# Relatório")
+    with patch.object(crew.utils, "split_text", return_value=["Edital - Pág.1", "Edital - Pág.2"]), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(side_effect=extract)
+    ), patch("src.tender_analysis_crew.crew.asyncio.sleep", AsyncMock()), patch.object(
+        crew, "_kickoff_crew", AsyncMock(return_value=crew_output)
+    ):
+        summary, metrics = asyncio.run(crew.generate_summary("texto", return_metrics=True))
+
+    assert summary is crew_output
+    assert metrics.status == "succeeded"
+    assert metrics.retries == 1
+    assert [chunk.route for chunk in metrics.chunks] == ["full", "full"]
+    assert metrics.tokens["gpt-4o-mini"].requests == 2
+    assert set(metrics.stages) == {
+        "split_time", "prefilter_time", "batch_processing_time", "combine_time", "filter_time", "format_time", "crew_time"
+    }
+    assert all(seconds >= 0 for seconds in metrics.stages.values())
+
+    with open(tmp_path / "metrics" / "runs.jsonl", encoding="utf-8") as runs_file:
+        exported = json.loads(runs_file.readline())
+    assert exported["run_id"] == metrics.run_id
+    assert exported["retries"] == 1
+    assert list((tmp_path / "metrics").glob("tender_analysis_*.prom"))
+
+
+def test_crew_usage_is_recorded_under_each_agent_model(monkeypatch):
+    """Test that the crew's token usage is priced by the model of the agent that spent it."""
+    monkeypatch.setitem(AGENT_CONFIGS["compilador_de_relatorio"], "model", "azure/gpt-4o-mini")
+    crew = TenderAnalysisCrew()
+
+    async def kickoff_async(self, inputs):
+        for agent in self.agents:
+            agent._token_process.sum_prompt_tokens(1000)
+            agent._token_process.sum_completion_tokens(100)
+            agent._token_process.sum_successful_requests(1)
+        return SimpleNamespace(raw="# Relatório")
+
+    metrics = RunMetrics()
+    metrics_token = current_run_metrics.set(metrics)
+    try:
+        with patch("src.tender_analysis_crew.crew.Crew.kickoff_async", kickoff_async):
+            asyncio.run(crew._kickoff_crew({}))
+            asyncio.run(crew._kickoff_crew({}))
+    finally:
+        current_run_metrics.reset(metrics_token)
+
+    assert metrics.tokens["crew/gpt-4o"].requests == 4
+    assert metrics.tokens["crew/gpt-4o-mini"].completion_tokens == 200
+    assert metrics.cost_usd == pytest.approx(
+        estimate_cost("gpt-4o", 4000, 400) + estimate_cost("gpt-4o-mini", 2000, 200)
+    )
+    # Runs count their usage on copies of the crew, so nothing piles up on the shared agents
+    assert all(not agent._token_process.get_summary().successful_requests for agent in crew.crew.agents)
@@ -0,0 +1,91 @@
+"""Tests for the per-process service container."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services import ResourcePool, ServiceContainer
+
+
+def test_resource_pool_reuses_objects_and_bounds_concurrent_use():
+    """Test that objects are reused, built up to max_size and lent to one caller at a time."""
+    built = []
+    pool = ResourcePool(lambda: built.append(object()) or built[-1], max_size=2)
+
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as again:
+        assert again is first
+
+    in_use = set()
+    overlaps = []
+
+    def use():
+        with pool.acquire() as item:
+            overlaps.append(id(item) in in_use)
+            in_use.add(id(item))
+            time.sleep(0.01)
+            in_use.discard(id(item))
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.size == len(built) == 2
+    assert overlaps == [False] * 8
+
+    with pool.acquire(), pool.acquire():
+        with pytest.raises(TimeoutError):
+            with pool.acquire(timeout=0.01):
+                pass
+
+
+def test_resource_pool_warm_up_and_failed_builds():
+    pool = ResourcePool(object, max_size=2)
+    pool.warm_up(5)
+    assert pool.size == 2
+
+    failing = ResourcePool(MagicMock(side_effect=RuntimeError("no credentials")), max_size=1)
+    with pytest.raises(RuntimeError):
+        with failing.acquire():
+            pass
+    # The slot of the failed build is released
+    with pytest.raises(RuntimeError):
+        failing.warm_up()
+
+
+def test_services_are_built_once_and_shut_down_in_reverse_order():
+    services = ServiceContainer()
+    factory = MagicMock(side_effect=lambda: time.sleep(0.01) or object())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(services.get("client", factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert factory.call_count == 1
+    assert len({id(result) for result in results}) == 1
+
+    calls = []
+    services.on_shutdown(lambda: calls.append("first"))
+    services.on_shutdown(lambda: calls.append("second"))
+    services.shutdown()
+    services.shutdown()
+    assert calls == ["second", "first"]
+
+
+def test_warm_up_builds_page_services_and_starts_job_runner_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("LICITA_AI_JOBS_DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    services = ServiceContainer()
+    runner = MagicMock()
+    with patch("src.background_jobs.job_runner.ensure_job_runner", return_value=runner) as ensure_job_runner, patch.object(
+        ServiceContainer, "get", side_effect=lambda name, factory: name
+    ):
+        services.warm_up()
+        services.warm_up()
+    ensure_job_runner.assert_called_once()
+    services.shutdown()
+    runner.stop.assert_called_once()
@@ -0,0 +1,311 @@
+"""Tests for the TenderAnalysisCrew class."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from src.tender_analysis_crew.chunk_checkpoint import ChunkCheckpointStore
+from src.tender_analysis_crew.crew import CREW_EXECUTION_MODES, ChunkValidationError, TenderAnalysisCrew
+from src.tender_analysis_crew.streaming_llm import FinalAnswerTokenFilter, StreamingLLM
+
+SAMPLE_CHUNK_RESULT = {
+    "sections": [
+        {
+            "categoria": "prazos_e_cronograma",
+            "checklist": 1,
+            "transcricao": "Prazo de execução de 360 dias",
+            "fonte": "Edital",
+            "pagina": 3,
+        }
+    ],
+    "overview": {
+        "client_name": "SANEPAR",
+        "tender_id": "411/2024",
+        "tender_object": "Ampliação da ETA Tibagi",
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    """Keep chunk checkpoints out of the working tree."""
+    monkeypatch.setenv("TENDER_ANALYSIS_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    return tmp_path / "checkpoints"
+
+
+def test_sequential_mode_is_default(monkeypatch):
+    """Test that the crew runs its tasks strictly in sequence by default."""
+    monkeypatch.delenv("TENDER_ANALYSIS_CREW_EXECUTION_MODE", raising=False)
+    crew = TenderAnalysisCrew()
+
+    assert crew.execution_mode == "sequential"
+    assert not any(task.async_execution for task in crew.crew.tasks)
+
+
+def test_graph_mode_runs_draft_concurrently_with_schedule():
+    """Test that graph mode drafts the report while the schedule is being built."""
+    crew = TenderAnalysisCrew(execution_mode="graph")
+    schedule_task, draft_task, review_task = crew.crew.tasks
+
+    assert schedule_task.async_execution
+    assert draft_task.async_execution
+    assert not review_task.async_execution
+    assert review_task.context == [schedule_task, draft_task]
+    assert [task.name for task in crew.crew.tasks] == CREW_EXECUTION_MODES["graph"]
+
+
+def test_crews_do_not_share_agents_tasks_or_llms():
+    """Test that each crew is built with its own crewai objects."""
+    first, second = TenderAnalysisCrew().crew, TenderAnalysisCrew().crew
+
+    assert not {id(agent) for agent in first.agents} & {id(agent) for agent in second.agents}
+    assert not {id(agent.llm) for agent in first.agents} & {id(agent.llm) for agent in second.agents}
+    assert not {id(task) for task in first.tasks} & {id(task) for task in second.tasks}
+    assert all(task.agent in first.agents for task in first.tasks)
+
+
+def test_invalid_execution_mode():
+    """Test that an unknown execution mode is rejected."""
+    with pytest.raises(ValueError, match="Invalid crew execution mode"):
+        TenderAnalysisCrew(execution_mode="parallel")
+
+
+def test_generate_summary_does_not_block_event_loop():
+    """Test that the crew is kicked off asynchronously."""
+    crew = TenderAnalysisCrew()
+
+    with patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(return_value=SAMPLE_CHUNK_RESULT)
+    ), patch.object(
+        type(crew.crew), "kickoff_async", AsyncMock(return_value="Relatório")
+    ) as mock_kickoff_async, patch.object(
+        type(crew.crew), "kickoff"
+    ) as mock_kickoff:
+        summary = asyncio.run(crew.generate_summary("Edital - Pág.1\nPrazo de 360 dias"))
+
+    assert summary == "Relatório"
+    mock_kickoff_async.assert_awaited_once()
+    mock_kickoff.assert_not_called()
+
+
+def test_final_answer_token_filter():
+    """Test that the reasoning preamble is dropped from the streamed tokens."""
+    token_filter = FinalAnswerTokenFilter()
+    tokens = ["Thought: I now can give", " a great answer\nFinal ", "Answer: # Relatório", "\n## Visão Geral"]
+
+    streamed = "".join(token_filter.feed(token) for token in tokens)
+
+    assert streamed == "# Relatório\n## Visão Geral"
+
+
+def test_streaming_llm_reports_usage_to_callbacks(monkeypatch):
+    """Test that streamed completions request and report their token usage."""
+    monkeypatch.setattr("litellm.callbacks", [])
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=3, total_tokens=123)
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))], usage=None)
+        for token in ["Final ", "Answer: ", "ok"]
+    ] + [SimpleNamespace(choices=[], usage=usage)]
+    completion = Mock(return_value=iter(chunks))
+    callback = Mock(spec=["log_success_event"])
+    tokens = []
+    llm = StreamingLLM(model="azure/gpt-4o", token_callback=tokens.append)
+
+    with patch("src.tender_analysis_crew.streaming_llm.litellm.completion", completion):
+        response = llm._complete([{"role": "user", "content": "Resuma"}], callbacks=[callback])
+
+    assert response == "Final Answer: ok"
+    assert tokens == ["Final ", "Answer: ", "ok"]
+    assert completion.call_args.kwargs["stream_options"] == {"include_usage": True}
+    assert callback.log_success_event.call_args.kwargs["response_obj"] == {"usage": usage}
+
+
+def test_stream_summary_yields_events_in_order():
+    """Test that intermediate outputs and tokens are streamed before the summary."""
+    crew = TenderAnalysisCrew()
+
+    async def fake_kickoff(crew_input, task_output_callback=None, token_callback=None):
+        task_output_callback("montagem_de_cronograma", "| Data | Evento |")
+        task_output_callback("esboco_do_relatorio", "# Esboço")
+        for token in ["Thought: ok\nFinal Answer: ", "# Relatório", " final"]:
+            token_callback(token)
+        return "# Relatório final"
+
+    async def collect_events():
+        return [event async for event in crew.stream_summary("Edital - Pág.1\nPrazo de 360 dias")]
+
+    with patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(return_value=SAMPLE_CHUNK_RESULT)
+    ), patch.object(crew, "_kickoff_crew", side_effect=fake_kickoff):
+        events = asyncio.run(collect_events())
+
+    assert [event["type"] for event in events] == [
+        "progress",
+        "task_output",
+        "task_output",
+        "token",
+        "token",
+        "summary",
+    ]
+    assert events[1]["task"] == "montagem_de_cronograma"
+    assert "".join(event["token"] for event in events if event["type"] == "token") == "# Relatório final"
+    assert events[-1]["summary"] == "# Relatório final"
+
+
+def test_generate_summary_skips_prefiltered_chunks():
+    """Test that chunks routed to "skip" never reach the LLM map stage."""
+    crew = TenderAnalysisCrew()
+    chunks = ["Edital - Pág.1", "Minuta do Contrato - Pág.2", "Termo de Referência - Pág.3"]
+
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew.prefilter, "route_chunks", return_value=["full", "skip", "full"]
+    ), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(return_value=SAMPLE_CHUNK_RESULT)
+    ) as mock_extract, patch.object(
+        crew, "_kickoff_crew", AsyncMock(return_value="Relatório")
+    ):
+        asyncio.run(crew.generate_summary("texto"))
+
+    assert [call.args[0] for call in mock_extract.await_args_list] == [chunks[0], chunks[2]]
+
+
+def test_checkpoint_store_ignores_changed_chunks(checkpoint_dir):
+    """Test that a checkpoint is only reused for the exact chunk text it was saved for."""
+    store = ChunkCheckpointStore("run", str(checkpoint_dir))
+    store.save(0, "Edital - Pág.1", SAMPLE_CHUNK_RESULT)
+
+    assert store.load(0, "Edital - Pág.1") == SAMPLE_CHUNK_RESULT
+    assert store.load(0, "Edital revisado - Pág.1") is None
+    assert store.load(1, "Edital - Pág.1") is None
+
+    store.save(0, "Edital - Pág.1", SAMPLE_CHUNK_RESULT)
+    assert [path.name for path in (checkpoint_dir / "run").iterdir()] == ["chunk_00000.json"]
+
+    store.clear()
+    assert store.load(0, "Edital - Pág.1") is None
+
+
+def test_validate_chunk_result_repairs_fields():
+    """Test that invalid categories, checklists and pages are repaired instead of discarded."""
+    crew = TenderAnalysisCrew()
+    result = crew._validate_chunk_result(
+        {
+            "sections": [
+                {"categoria": "inexistente", "checklist": "sim", "transcricao": "Visita técnica", "pagina": "?"},
+                {"categoria": "riscos", "checklist": 1, "transcricao": ""},
+            ],
+            "overview": {"client_name": "SANEPAR"},
+        },
+        "Edital - Pág.7\nVisita técnica obrigatória",
+    )
+
+    assert result["sections"] == [
+        {
+            "categoria": "outras_informacoes_relevantes",
+            "checklist": 0,
+            "transcricao": "Visita técnica",
+            "pagina": 7,
+            "fonte": "",
+        }
+    ]
+    assert result["overview"] == {"client_name": "SANEPAR"}
+
+    with pytest.raises(ChunkValidationError):
+        crew._validate_chunk_result({"sections": "Visita técnica"})
+
+
+def test_chunk_extraction_is_retried():
+    """Test that transient failures and invalid results are retried with backoff."""
+    crew = TenderAnalysisCrew()
+    mock_extract = AsyncMock(side_effect=[TimeoutError("timeout"), ["not", "an", "object"], SAMPLE_CHUNK_RESULT])
+
+    with patch.object(crew, "_extract_and_label_sections", mock_extract), patch(
+        "src.tender_analysis_crew.crew.asyncio.sleep", AsyncMock()
+    ) as mock_sleep:
+        result = asyncio.run(crew._extract_chunk_with_retries("Edital - Pág.3", base_delay=1.0))
+
+    assert result["sections"] == SAMPLE_CHUNK_RESULT["sections"]
+    assert mock_extract.await_count == 3
+    delays = [call.args[0] for call in mock_sleep.await_args_list]
+    assert 1.0 <= delays[0] < 2.0 and 2.0 <= delays[1] < 3.0
+
+
+def test_generate_summary_resumes_from_checkpoints():
+    """Test that a rerun after a failed chunk only extracts the chunks that are still missing."""
+    crew = TenderAnalysisCrew()
+    chunks = ["Edital - Pág.1", "Edital - Pág.2", "Edital - Pág.3"]
+
+    async def flaky_extract(chunk):
+        if chunk == chunks[1]:
+            raise TimeoutError("timeout")
+        return SAMPLE_CHUNK_RESULT
+
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(side_effect=flaky_extract)
+    ), patch("src.tender_analysis_crew.crew.asyncio.sleep", AsyncMock()), patch.object(
+        crew, "_kickoff_crew", AsyncMock(return_value="Relatório")
+    ) as mock_kickoff:
+        with pytest.raises(RuntimeError, match="1 of 3 chunks failed"):
+            asyncio.run(crew.generate_summary("texto", allow_partial=False))
+    mock_kickoff.assert_not_awaited()
+
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(return_value=SAMPLE_CHUNK_RESULT)
+    ) as mock_extract, patch.object(crew, "_kickoff_crew", AsyncMock(return_value="Relatório")):
+        summary = asyncio.run(crew.generate_summary("texto", allow_partial=False))
+
+    assert summary == "Relatório"
+    assert [call.args[0] for call in mock_extract.await_args_list] == [chunks[1]]
+
+
+def test_prefilter_settings_are_part_of_the_checkpointed_run(checkpoint_dir):
+    """Test that skipped chunks aren't checkpointed and other prefilter settings start a new run."""
+    crew = TenderAnalysisCrew()
+    crew.prefilter.mode = "skip"
+    chunks = ["Edital - Pág.1", "Edital - Pág.2", "Edital - Pág.3"]
+
+    async def flaky_extract(chunk):
+        if chunk == chunks[2]:
+            raise TimeoutError("timeout")
+        return SAMPLE_CHUNK_RESULT
+
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew.prefilter, "route_chunks", return_value=["full", "skip", "full"]
+    ), patch.object(crew, "_extract_and_label_sections", AsyncMock(side_effect=flaky_extract)), patch(
+        "src.tender_analysis_crew.crew.asyncio.sleep", AsyncMock()
+    ), patch.object(crew, "_kickoff_crew", AsyncMock(return_value="Relatório")):
+        with pytest.raises(RuntimeError, match="1 of 3 chunks failed"):
+            asyncio.run(crew.generate_summary("texto", allow_partial=False))
+    assert [path.name for path in checkpoint_dir.glob("*/*")] == ["chunk_00000.json"]
+
+    crew.prefilter.mode = "off"
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(return_value=SAMPLE_CHUNK_RESULT)
+    ) as mock_extract, patch.object(crew, "_kickoff_crew", AsyncMock(return_value="Relatório")):
+        asyncio.run(crew.generate_summary("texto", allow_partial=False))
+
+    assert [call.args[0] for call in mock_extract.await_args_list] == chunks
+
+
+def test_generate_summary_flags_partial_coverage():
+    """Test that failed pages are listed in the report when partial coverage is allowed."""
+    crew = TenderAnalysisCrew()
+    chunks = ["Edital - Pág.1", "Termo de Referência - Pág.4\nTermo de Referência - Pág.5"]
+
+    async def flaky_extract(chunk):
+        if chunk == chunks[1]:
+            raise TimeoutError("timeout")
+        return SAMPLE_CHUNK_RESULT
+
+    with patch.object(crew.utils, "split_text", return_value=chunks), patch.object(
+        crew, "_extract_and_label_sections", AsyncMock(side_effect=flaky_extract)
+    ), patch("src.tender_analysis_crew.crew.asyncio.sleep", AsyncMock()), patch.object(
+        crew, "_kickoff_crew", AsyncMock(return_value=SimpleNamespace(raw="# Relatório"))
+    ) as mock_kickoff:
+        summary = asyncio.run(crew.generate_summary("texto", allow_partial=True))
+
+    assert "Cobertura parcial" in summary.raw
+    assert "Termo de Referência - Pág.4, Termo de Referência - Pág.5" in summary.raw
+    assert "Termo de Referência - Pág.4" in mock_kickoff.await_args.args[0]["overview"]
@@ -1,8 +1,14 @@
 """Tests for the TenderNoticeProcessor class."""
+import asyncio
 import pytest
 from datetime import datetime
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+from langchain_core.messages import AIMessage
 from src.tender_notice_labeling.tender_notice_processor import TenderNoticeProcessor, TenderNotice
+from src.tender_notice_labeling.tender_notice_templates import (
+    COMPANY_BUSINESS_DESCRIPTION,
+    TENDER_NOTICE_LABELING_TEMPLATE,
+)
 
 # Sample test data
 SAMPLE_TENDER_BLOCK = """
@@ -87,3 +93,232 @@ def test_extract_tender_blocks_multiple_patterns(processor):
     blocks = processor._extract_tender_blocks(text)
     assert len(blocks) > 0
 
+
+@pytest.fixture
+def azure_processor(monkeypatch):
+    """Create a TenderNoticeProcessor with dummy Azure OpenAI settings."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-08-01-preview")
+    # Keep labels of previous test runs out of the way
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.LABEL_STORE_ENABLED", False)
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.CLASSIFIER_ENABLED", False)
+    monkeypatch.setattr("src.tender_notice_labeling.tender_notice_processor.RULES_ENABLED", False)
+    return TenderNoticeProcessor(labeling_batch_size=3)
+
+
+def make_notices(count):
+    return [
+        {
+            "orgao": "SANEPAR",
+            "estado": "PR",
+            "numero_licitacao": f"{number}/2024",
+            "objeto": "AMPLIACAO DA ETE",
+            "data_hora_licitacao": "03/12/2024 10:00",
+            "id_universo": 10223300 + number,
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def test_label_tender_batch_sends_several_notices_per_request(azure_processor):
+    """Test that K notices go in one request and notices missing from the answer fall back to single calls."""
+    notices = make_notices(5)
+
+    async def label_together(messages):
+        # The second notice of the first request is missing from the answer
+        first_request = "Number: 1/2024" in messages[0].content
+        labels = [
+            {"index": index, "reasoning": "", "label": "no"}
+            for index in range(messages[0].content.count("<NOTICE index="))
+            if not (first_request and index == 1)
+        ]
+        return {"raw": AIMessage(content=""), "parsed": {"labels": labels}, "parsing_error": None}
+
+    batch_labeling_llm = Mock(ainvoke=AsyncMock(side_effect=label_together))
+    llm = Mock(ainvoke=AsyncMock(return_value=AIMessage(content="yes")))
+    with patch.object(azure_processor, "batch_labeling_llm", batch_labeling_llm), patch.object(
+        azure_processor, "llm", llm
+    ):
+        asyncio.run(
+            azure_processor._label_tender_batch(notices, TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+        )
+
+    assert batch_labeling_llm.ainvoke.await_count == 2
+    assert '<NOTICE index="2">' in batch_labeling_llm.ainvoke.await_args_list[0].args[0][0].content
+    assert llm.ainvoke.await_count == 1
+    assert [notice["label"] for notice in notices] == ["no", "yes", "no", "no", "no"]
+
+
+def test_label_tender_batch_labels_notices_without_id_universo(azure_processor):
+    """Test that batched labels are matched to notices by position, not by id_universo."""
+    notices = [{**notice, "id_universo": None} for notice in make_notices(3)]
+    parsed = {"labels": [{"index": index, "reasoning": "", "label": label} for index, label in enumerate(["yes", "no", "unsure"])]}
+    batch_labeling_llm = Mock(
+        ainvoke=AsyncMock(return_value={"raw": AIMessage(content=""), "parsed": parsed, "parsing_error": None})
+    )
+    llm = Mock(ainvoke=AsyncMock())
+    with patch.object(azure_processor, "batch_labeling_llm", batch_labeling_llm), patch.object(
+        azure_processor, "llm", llm
+    ):
+        asyncio.run(
+            azure_processor._label_tender_batch(notices, TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+        )
+
+    assert llm.ainvoke.await_count == 0
+    assert [notice["label"] for notice in notices] == ["yes", "no", "unsure"]
+
+
+def test_label_tender_batch_falls_back_when_request_fails(azure_processor):
+    """Test that every notice of a failed batched request is labeled with single calls."""
+    notices = make_notices(2)
+    batch_labeling_llm = Mock(ainvoke=AsyncMock(side_effect=TimeoutError("timeout")))
+    llm = Mock(ainvoke=AsyncMock(return_value=AIMessage(content="unsure")))
+    with patch.object(azure_processor, "batch_labeling_llm", batch_labeling_llm), patch.object(
+        azure_processor, "llm", llm
+    ):
+        asyncio.run(
+            azure_processor._label_tender_batch(notices, TENDER_NOTICE_LABELING_TEMPLATE, COMPANY_BUSINESS_DESCRIPTION)
+        )
+
+    assert llm.ainvoke.await_count == 2
+    assert [notice["label"] for notice in notices] == ["unsure", "unsure"]
+
+
+def test_process_pdfs_labels_shared_notices_once(azure_processor):
+    """Test that files are extracted concurrently, shared notices labeled once and fanned out per file."""
+    notices = make_notices(4)
+    bulletins = {
+        "texto-a": [notices[0], notices[1], notices[2]],
+        "texto-b": [dict(notices[1]), dict(notices[2]), notices[3]],
+    }
+    both_started = asyncio.Event()
+    started = []
+    labeled = []
+
+    async def extract(text):
+        if text == "texto-c":
+            raise TimeoutError("timeout")
+        started.append(text)
+        if len(started) == 2:
+            both_started.set()
+        # Every file waits for the others, so this only finishes if they run concurrently
+        await asyncio.wait_for(both_started.wait(), timeout=5)
+        return bulletins[text]
+
+    async def label_batch(tenders, template, company_description):
+        for tender in tenders:
+            labeled.append(tender["id_universo"])
+            tender["label"] = "yes" if tender["id_universo"] == 10223302 else "no"
+
+    with patch(
+        "src.tender_notice_labeling.tender_notice_processor.extract_text",
+        side_effect=lambda path, backend: path.replace(".pdf", ""),
+    ), patch.object(azure_processor, "_extract_tender_notices", AsyncMock(side_effect=extract)), patch.object(
+        azure_processor, "_label_tender_batch", AsyncMock(side_effect=label_batch)
+    ):
+        df = asyncio.run(
+            azure_processor.process_pdfs(
+                [("a.pdf", "texto-a.pdf"), ("b.pdf", "texto-b.pdf"), ("c.pdf", "texto-c.pdf")],
+                TENDER_NOTICE_LABELING_TEMPLATE,
+                COMPANY_BUSINESS_DESCRIPTION,
+            )
+        )
+
+    assert sorted(labeled) == [10223301, 10223302, 10223303, 10223304]
+    assert len(df) == 6
+    shared = df[df["id_universo"] == 10223302]
+    assert sorted(shared["source_file"]) == ["a.pdf", "b.pdf"]
+    assert set(shared["label"]) == {"✅ Participar"}
+    assert df.iloc[0]["id_universo"] == 10223302
+    assert df.attrs["failed_files"] == {"c.pdf": "timeout"}
+
+
+def test_process_pdfs_keeps_the_labels_of_files_whose_labeling_succeeded(azure_processor):
+    """Test that a failed labeling task only fails the files holding its notices."""
+    notices = make_notices(4)
+    bulletins = {
+        "texto-a": [notices[0]],
+        "texto-b": [notices[1], notices[2]],
+        "texto-c": [dict(notices[2]), notices[3]],
+    }
+
+    async def label_batch(tenders, template, company_description):
+        if tenders[0]["id_universo"] == 10223302:
+            raise RuntimeError("labeling failed")
+        for tender in tenders:
+            tender["label"] = "no"
+
+    async def extract(text):
+        if text == "texto-c":
+            # c is extracted after b claimed the notice they share
+            await asyncio.sleep(0.01)
+        return bulletins[text]
+
+    with patch(
+        "src.tender_notice_labeling.tender_notice_processor.extract_text",
+        side_effect=lambda path, backend: path.replace(".pdf", ""),
+    ), patch.object(azure_processor, "_extract_tender_notices", AsyncMock(side_effect=extract)), patch.object(
+        azure_processor, "_label_tender_batch", AsyncMock(side_effect=label_batch)
+    ):
+        df = asyncio.run(
+            azure_processor.process_pdfs(
+                [("a.pdf", "texto-a.pdf"), ("b.pdf", "texto-b.pdf"), ("c.pdf", "texto-c.pdf")],
+                TENDER_NOTICE_LABELING_TEMPLATE,
+                COMPANY_BUSINESS_DESCRIPTION,
+            )
+        )
+
+    # c shares a notice claimed by b, so it can't be completed either
+    assert df["source_file"].tolist() == ["a.pdf"]
+    assert df.attrs["failed_files"] == {"b.pdf": "labeling failed", "c.pdf": "labeling failed"}
+
+
+def test_stream_pdfs_yields_each_labeled_row_once(azure_processor):
+    """Test that rows are streamed as soon as labeled, including shared notices labeled with an earlier file."""
+    notices = make_notices(4)
+    bulletins = {"texto-a": [notices[0], notices[1]], "texto-b": [dict(notices[1]), notices[2], notices[3]]}
+    a_labeled = asyncio.Event()
+
+    async def extract(text):
+        if text == "texto-b":
+            # b is extracted once the notices of a are labeled
+            await asyncio.wait_for(a_labeled.wait(), timeout=5)
+        return bulletins[text]
+
+    async def label_batch(tenders, template, company_description):
+        for tender in tenders:
+            tender["label"] = "yes" if tender["id_universo"] == 10223302 else "no"
+        if tenders[0]["id_universo"] == 10223301:
+            a_labeled.set()
+
+    async def collect():
+        events = []
+        async for event in azure_processor.stream_pdfs(
+            [("a.pdf", "texto-a.pdf"), ("b.pdf", "texto-b.pdf")],
+            TENDER_NOTICE_LABELING_TEMPLATE,
+            COMPANY_BUSINESS_DESCRIPTION,
+        ):
+            events.append(event)
+        return events
+
+    with patch(
+        "src.tender_notice_labeling.tender_notice_processor.extract_text",
+        side_effect=lambda path, backend: path.replace(".pdf", ""),
+    ), patch.object(azure_processor, "_extract_tender_notices", AsyncMock(side_effect=extract)), patch.object(
+        azure_processor, "_label_tender_batch", AsyncMock(side_effect=label_batch)
+    ):
+        events = asyncio.run(collect())
+
+    streamed = [row for event in events if event["type"] == "notices" for row in event["notices"]]
+    assert sorted((row["source_file"], row["id_universo"], row["label"]) for row in streamed) == [
+        ("a.pdf", 10223301, "no"),
+        ("a.pdf", 10223302, "yes"),
+        ("b.pdf", 10223302, "yes"),
+        ("b.pdf", 10223303, "no"),
+        ("b.pdf", 10223304, "no"),
+    ]
+    # The rows of a are streamed before b is even extracted
+    assert {row["source_file"] for row in next(e for e in events if e["type"] == "notices")["notices"]} == {"a.pdf"}
+    assert any(event["type"] == "progress" for event in events)
+    assert events[-1]["type"] == "result" and len(events[-1]["df"]) == 5
@@ -8,10 +8,15 @@ import streamlit as st
 from dotenv import load_dotenv
 import streamlit.components.v1 as components
 
+from src.services import get_services
+
 # Load environment variables
 env_path = Path(__file__).parent / ".env"
 load_dotenv(env_path)
 
+# Build the shared services and start the job workers when the server starts serving
+get_services().warm_up()
+
 # Configure page
 st.set_page_config(
     page_title="Página Inicial",